@@ -3,15 +3,19 @@ Rift Rewind API Server - FastAPI Implementation
 Provides RESTful API endpoints for Risk Forecaster and Annual Summary agents
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta, timezone
+import asyncio
+import functools
 import sys
 from pathlib import Path
 import threading
 import json
+import hashlib
 import subprocess
 from dotenv import load_dotenv
 
@@ -26,6 +30,7 @@ from src.agents.player_analysis.annual_summary.agent import AnnualSummaryAgent
 
 # Import combatpower services
 from services.riot_client import riot_client
+from services.account_cache import account_cache
 from src.combatpower.services.analytics import player_analytics
 from src.combatpower.services.combat_power import combat_power_calculator
 from src.combatpower.services.data_dragon import data_dragon
@@ -35,8 +40,15 @@ from src.combatpower.services.multi_patch_data import multi_patch_data
 from src.combatpower.services.build_tracker import build_tracker
 from src.combatpower.custom_build_manager import custom_build_manager
 from services.player_data_manager import player_data_manager, DataStatus
+from services.player_summary import summary_etag
+from services.static_response_cache import static_responses
+from services.match_store import match_store
+from src.agents.shared.pack_cache import pack_cache
 from services.opgg_mcp_service import opgg_mcp_service
 from services.report_cache import report_cache, cached_agent_stream
+from services.agent_stream_bridge import stream_in_worker, run_in_worker
+from services.dashboard_stream import AgentStage, sse_event, stream_agent_stage
+from src.agents.meta_strategy.context import AgentContext
 import requests
 import os
 import time as time_module
@@ -91,6 +103,12 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+
+@app.on_event("startup")
+async def resume_background_work():
+    """Resume timeline tasks left in the persistent queue by the previous run"""
+    await player_data_manager.resume_timeline_queue()
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -547,6 +565,7 @@ class PlayerDataFetchRequest(BaseModel):
     region: str = Field("na1", description="Region code", example="na1")
     days: int = Field(365, description="Number of days to fetch", example=365)
     include_timeline: bool = Field(True, description="Include timeline data")
+    refresh: bool = Field(False, description="Delta-sync new matches even if cached data exists")
 
 
 class PlayerDataFetchResponse(BaseModel):
@@ -665,12 +684,13 @@ async def fetch_player_data(request: PlayerDataFetchRequest, background_tasks: B
                     region=request.region,
                     game_name=request.game_name,
                     tag_line=request.tag_line,
-                    max_matches=request.days
+                    max_matches=request.days,
+                    refresh=request.refresh
                 )
 
-                # Step 3: Monitor job progress
+                # Step 3: Monitor job progress (woken on every phase/progress change)
                 while job.status not in [DataStatus.COMPLETED, DataStatus.FAILED]:
-                    await asyncio.sleep(2)  # Poll every 2 seconds
+                    await job.wait_for_change()
 
                     # Update task progress
                     with task_lock:
@@ -715,7 +735,7 @@ async def fetch_player_data(request: PlayerDataFetchRequest, background_tasks: B
         return {
             "task_id": task_id,
             "status": "pending",
-            "message": f"Data fetch task created. Check status at /v1/player/fetch-status/{task_id}",
+            "message": f"Data fetch task created. Check status at /v1/player/fetch-status/{task_id} or stream it from /v1/player/{puuid}/data-progress",
             "estimated_time": f"~{int(estimated_minutes)} minutes"
         }
 
@@ -750,6 +770,48 @@ async def get_fetch_status(task_id: str):
         }
 
 
+@app.get("/v1/player/{puuid}/data-progress")
+async def stream_player_data_progress(puuid: str, timeout: int = 600):
+    """
+    Stream data preparation progress (SSE) instead of polling fetch-status / data-status
+
+    **Events** (`data: {...}`):
+    - `{"type": "progress", "status": ..., "progress": 0.0-1.0, ...}` on every phase/progress change
+    - `{"type": "complete", ...}` once packs are written, or `{"type": "failed", "error": ...}`
+    - `{"type": "timeout", ...}` if the job is still running after `timeout` seconds
+
+    If no job exists for the PUUID, a single event with status `not_started` is sent.
+    """
+    from fastapi.responses import StreamingResponse
+
+    async def generate_stream():
+        state = {}
+        try:
+            async for state in player_data_manager.watch_job(puuid, timeout=timeout):
+                yield sse_event({"type": "progress", **state})
+        except Exception as e:
+            yield sse_event({"type": "failed", "puuid": puuid, "error": str(e)})
+            return
+
+        status = state.get("status")
+        if status == DataStatus.COMPLETED:
+            yield sse_event({"type": "complete", **state})
+        elif status == DataStatus.FAILED:
+            yield sse_event({"type": "failed", **state})
+        elif status != DataStatus.NOT_STARTED:
+            yield sse_event({"type": "timeout", **state})
+
+    return StreamingResponse(
+        generate_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 # ============================================================================
 # Player Analysis Agents - Batch Endpoints
 # ============================================================================
@@ -782,15 +844,51 @@ class AgentResponse(BaseModel):
     error: Optional[str] = None
 
 
-@app.post("/v1/agents/weakness-analysis")
-async def weakness_analysis(request: AgentRequest):
-    """Weakness Diagnosis - ADK-compliant agent endpoint with SSE streaming"""
+# Required request parameters of the player-level agents (agent id → (field, error message))
+AGENT_REQUIRED_PARAMS = {
+    "champion-mastery": ("champion_id", "Champion Mastery analysis requires a champion_id parameter"),
+    "peer-comparison": ("rank", "Peer Comparison requires a rank parameter (IRON/BRONZE/SILVER/GOLD/PLATINUM/EMERALD/DIAMOND/MASTER/GRANDMASTER/CHALLENGER)."),
+    "role-specialization": ("role", "Role Specialization requires a role parameter (TOP/JUNGLE/MID/ADC/SUPPORT)."),
+}
+
+
+def agent_param_error(agent_id: str, request: AgentRequest) -> Optional[str]:
+    """Error message if the request is missing a parameter the agent requires, else None"""
+    field, message = AGENT_REQUIRED_PARAMS.get(agent_id, (None, None))
+    if field and not getattr(request, field, None):
+        return message
+    return None
+
+
+def no_data_error(time_range: Optional[str], queue_id: Optional[int], default: str = "No data found") -> str:
+    """Error message for a queue/time-range filter that matched no player data"""
+    if queue_id == 400:
+        return "No Normal game data found. Please play some Normal games first."
+    if queue_id == 440:
+        return "No Ranked Flex data found. Please play some Ranked Flex games first."
+    if queue_id == 420:
+        return "No Ranked Solo/Duo data found. Please play some Ranked Solo/Duo games first."
+    if time_range == "past-365":
+        return "No data found for Past 365 Days"
+    return default
+
+
+def agent_stage_response(agent_id: str, request: AgentRequest, stage_func) -> Response:
+    """
+    SSE response of a player-level agent
+
+    Waits for the player's data, runs the agent's deterministic stage (pack loading, analysis,
+    prompts) in a worker over a per-request AgentContext, then streams the stage's messages and
+    its LLM stream. /v1/agents/dashboard runs the same stage functions over one shared context.
+    """
     from fastapi.responses import StreamingResponse
-    from src.agents.player_analysis.weakness_analysis.agent import WeaknessAnalysisAgent
 
     async def generate_stream():
         try:
-            print(f"\n{'='*60}\n🎯 Weakness Analysis (ADK) - Model: {request.model or 'haiku'}\n{'='*60}")
+            param_error = agent_param_error(agent_id, request)
+            if param_error:
+                yield sse_event({"error": param_error})
+                return
 
             # Step 1: Wait for data preparation
             await player_data_manager.wait_for_data(puuid=request.puuid, timeout=120)
@@ -803,30 +901,12 @@ async def weakness_analysis(request: AgentRequest):
 
             print(f"✅ Player data ready: {packs_dir}")
 
-            # Step 3: Get parameters
-            time_range = getattr(request, 'time_range', None)
-            queue_id = getattr(request, 'queue_id', None)
-            recent_count = request.recent_count or 5
-
-            print(f"🔍 Params: time_range={time_range}, queue_id={queue_id}, recent_count={recent_count}")
-
-            # Step 4: Execute with caching
-            agent = WeaknessAnalysisAgent(model=request.model or "haiku")
-
-            for message in cached_agent_stream(
-                agent_id='weakness-analysis',
-                agent_run_stream_func=lambda: agent.run_stream(
-                    packs_dir=packs_dir,
-                    recent_count=recent_count,
-                    time_range=time_range,
-                    queue_id=queue_id
-                ),
-                puuid=request.puuid,
-                packs_dir=Path(packs_dir),
-                time_range=time_range,
-                queue_id=queue_id,
-                recent_count=recent_count
-            ):
+            # Step 3: Deterministic stage (pack loading, analysis, prompts) off the event loop
+            context = AgentContext(user_request=agent_id, packs_dir=packs_dir)
+            stage = await run_in_worker(stage_func, request, context)
+
+            # Step 4: Analysis messages, then the LLM stream
+            async for message in stream_agent_stage(stage):
                 yield message
 
         except Exception as e:
@@ -843,20 +923,50 @@ async def weakness_analysis(request: AgentRequest):
             "X-Accel-Buffering": "no"
         }
     )
-async def _extract_postgame_features(timeline_data: dict, target_puuid: str, match_id: str, packs_dir: str) -> tuple:
-    """Extract match_features and timeline_features from timeline data and match data"""
-    import json
-    from pathlib import Path
 
-    # Read match data from global matches pool (shared across all players)
-    global_matches_dir = Path("data/matches")
-    match_file = global_matches_dir / f"{match_id}.json"
 
-    if not match_file.exists():
-        raise ValueError(f"Match data file not found in global pool: {match_file}")
+def _weakness_analysis_stage(request: AgentRequest, context: AgentContext) -> AgentStage:
+    """Weakness Diagnosis - deterministic stage"""
+    from src.agents.player_analysis.weakness_analysis.agent import WeaknessAnalysisAgent
+
+    packs_dir = context.packs_dir
+    time_range = getattr(request, 'time_range', None)
+    queue_id = getattr(request, 'queue_id', None)
+    recent_count = request.recent_count or 5
+
+    print(f"🔍 Params: time_range={time_range}, queue_id={queue_id}, recent_count={recent_count}")
+
+    agent = WeaknessAnalysisAgent(model=request.model or "haiku")
+    analysis = agent.analyze(
+        packs_dir,
+        recent_count,
+        time_range=time_range,
+        queue_id=queue_id,
+        packs=context.shared_packs(queue_id, time_range)
+    )
+
+    return AgentStage(stream=lambda: cached_agent_stream(
+        agent_id='weakness-analysis',
+        agent_run_stream_func=lambda: agent.stream_analysis(analysis, time_range=time_range, queue_id=queue_id),
+        puuid=request.puuid,
+        packs_dir=Path(packs_dir),
+        time_range=time_range,
+        queue_id=queue_id,
+        recent_count=recent_count
+    ))
+
+
+@app.post("/v1/agents/weakness-analysis")
+async def weakness_analysis(request: AgentRequest):
+    """Weakness Diagnosis - ADK-compliant agent endpoint with SSE streaming"""
+    print(f"\n{'='*60}\n🎯 Weakness Analysis (ADK) - Model: {request.model or 'haiku'}\n{'='*60}")
+    return agent_stage_response('weakness-analysis', request, _weakness_analysis_stage)
+
 
-    with open(match_file, 'r', encoding='utf-8') as f:
-        match_data = json.load(f)
+async def _extract_postgame_features(timeline_data: dict, target_puuid: str, match_id: str, packs_dir: str) -> tuple:
+    """Extract match_features and timeline_features from timeline data and match data"""
+    # Read match data from the shared match store
+    match_data = await run_in_worker(match_store.get_match, match_id)
 
     if not match_data:
         raise ValueError(f"Failed to load match data for {match_id}")
@@ -934,234 +1044,148 @@ async def _extract_postgame_features(timeline_data: dict, target_puuid: str, mat
     return match_features, timeline_features
 
 
+def _annual_summary_stage(request: AgentRequest, context: AgentContext) -> AgentStage:
+    """Annual Summary - deterministic stage (analysis event for the frontend widgets + report stream)"""
+    from src.agents.player_analysis.annual_summary.agent import AnnualSummaryAgent, get_annual_analysis
+
+    packs_dir = context.packs_dir
+    time_range = getattr(request, 'time_range', None)
+    queue_id = getattr(request, 'queue_id', None)
+    print(f"🔍 Params: time_range={time_range}, queue_id={queue_id}")
+
+    # Memoised, reused by the agent's report stream below
+    annual = get_annual_analysis(
+        packs_dir, time_range=time_range, queue_id=queue_id, packs=context.shared_packs(queue_id, time_range)
+    )
+    messages = []
+    if annual is not None:
+        # Send analysis data for frontend widgets
+        messages.append(f"data: {{\"type\": \"analysis\", \"data\": {json.dumps(annual['analysis'], ensure_ascii=False)}}}\n\n")
+
+    agent = AnnualSummaryAgent(model=request.model or "haiku")
+    return AgentStage(messages, lambda: cached_agent_stream(
+        agent_id='annual-summary',
+        agent_run_stream_func=lambda: agent.stream_analysis(annual),
+        puuid=request.puuid,
+        packs_dir=Path(packs_dir),
+        time_range=time_range,
+        queue_id=queue_id
+    ))
+
+
 @app.post("/v1/agents/annual-summary")
 async def annual_summary(request: AgentRequest):
     """Annual Summary - ADK-compliant agent endpoint with SSE streaming"""
-    from fastapi.responses import StreamingResponse
-    from src.agents.player_analysis.annual_summary.agent import AnnualSummaryAgent
-    from src.agents.player_analysis.annual_summary.tools import (
-        load_all_annual_packs, generate_comprehensive_annual_analysis
-    )
-
-    async def generate_stream():
-        try:
-            print(f"\n{'='*60}\n📅 Annual Summary (ADK) - Model: {request.model or 'haiku'}\n{'='*60}")
+    print(f"\n{'='*60}\n📅 Annual Summary (ADK) - Model: {request.model or 'haiku'}\n{'='*60}")
+    return agent_stage_response('annual-summary', request, _annual_summary_stage)
 
-            # Step 1: Wait for data preparation
-            await player_data_manager.wait_for_data(puuid=request.puuid, timeout=120)
 
-            # Step 2: Get packs directory
-            packs_dir = player_data_manager.get_packs_dir(request.puuid)
-            if not packs_dir:
-                yield f"data: {{\"error\": \"Player data not ready\"}}\n\n"
-                return
+def _champion_mastery_stage(request: AgentRequest, context: AgentContext) -> AgentStage:
+    """Champion Mastery - deterministic stage"""
+    from src.agents.shared.analysis_cache import analysis_cache
+    from src.agents.shared.stream_helper import stream_agent_with_thinking
+    from src.agents.player_analysis.champion_mastery.tools import (
+        generate_comprehensive_mastery_analysis,
+        format_analysis_for_prompt,
+        load_champion_data
+    )
+    from src.agents.player_analysis.champion_mastery.prompts import build_narrative_prompt
 
-            print(f"✅ Player data ready: {packs_dir}")
+    packs_dir = context.packs_dir
+    time_range = getattr(request, 'time_range', None)
 
-            # Step 3: Get params
-            time_range = getattr(request, 'time_range', None)
-            queue_id = getattr(request, 'queue_id', None)
-            print(f"🔍 Params: time_range={time_range}, queue_id={queue_id}")
-
-            # Step 4: Load data and generate analysis for frontend widgets
-            all_packs_dict = load_all_annual_packs(packs_dir, time_range=time_range, queue_id=queue_id)
-            if len(all_packs_dict) > 0:
-                analysis = generate_comprehensive_annual_analysis(all_packs_dict)
-                # Send analysis data for frontend widgets
-                yield f"data: {{\"type\": \"analysis\", \"data\": {json.dumps(analysis, ensure_ascii=False)}}}\n\n"
-                print(f"✅ Sent analysis data for frontend widgets")
-
-            # Step 5: Create ADK agent and stream report with caching
-            agent = AnnualSummaryAgent(model=request.model or "haiku")
-            for message in cached_agent_stream(
-                agent_id='annual-summary',
-                agent_run_stream_func=lambda: agent.run_stream(
-                    packs_dir=packs_dir,
-                    time_range=time_range,
-                    queue_id=queue_id
-                ),
-                puuid=request.puuid,
-                packs_dir=Path(packs_dir),
-                time_range=time_range,
-                queue_id=queue_id
-            ):
-                yield message
+    # Champion mastery covers every queue
+    shared = context.shared_packs(None, time_range)
+    all_packs_data = [pack.data for pack in shared] if shared is not None else None
 
-        except Exception as e:
-            import traceback
-            print(f"❌ Error: {traceback.format_exc()}")
-            yield f"data: {{\"error\": \"{str(e)}\"}}\n\n"
+    def compute():
+        if not load_champion_data(packs_dir, request.champion_id, all_packs_data, time_range=time_range):
+            return None
+        analysis = generate_comprehensive_mastery_analysis(
+            champion_id=request.champion_id,
+            packs_dir=packs_dir,
+            all_packs_data=all_packs_data,
+            time_range=time_range
+        )
+        return build_narrative_prompt(analysis, format_analysis_for_prompt(analysis))
 
-    return StreamingResponse(
-        generate_stream(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
-        }
+    prompts = analysis_cache.get_or_compute(
+        "champion-mastery", packs_dir, compute, champion_id=request.champion_id, time_range=time_range
     )
+    if prompts is None:
+        error_msg = "No data found for Past 365 Days" if time_range == "past-365" else f"No data found for champion_id {request.champion_id}"
+        return AgentStage.error(error_msg)
+
+    return AgentStage(stream=lambda: cached_agent_stream(
+        agent_id='champion-mastery',
+        agent_run_stream_func=lambda: stream_agent_with_thinking(
+            prompt=prompts['user'],
+            system_prompt=prompts['system'],
+            model="haiku",
+            max_tokens=8000,
+            enable_thinking=False
+        ),
+        puuid=request.puuid,
+        packs_dir=Path(packs_dir),
+        time_range=time_range,
+        champion_id=request.champion_id
+    ))
 
 
 @app.post("/v1/agents/champion-mastery")
 async def champion_mastery(request: AgentRequest):
     """Champion Mastery - Champion mastery analysis (SSE Stream output, supports extended thinking + model switching)"""
-    from fastapi.responses import StreamingResponse
-    from src.agents.shared.stream_helper import stream_agent_with_thinking
-
-    async def generate_stream():
-        try:
-            # Validate required parameters
-            if not request.champion_id:
-                yield f"data: {{\"error\": \"Champion Mastery analysis requires a champion_id parameter\"}}\n\n"
-                return
-
-            print(f"\n{'='*60}\n🎮 Champion Mastery Stream (Champion ID: {request.champion_id}, Model: {request.model or 'haiku'})\n{'='*60}")
-
-            # Wait for data preparation to complete
-            await player_data_manager.wait_for_data(puuid=request.puuid, timeout=120)
-            packs_dir = player_data_manager.get_packs_dir(request.puuid)
-            if not packs_dir:
-                yield f"data: {{\"error\": \"Player data not ready\"}}\n\n"
-                return
-
-            print(f"✅ Player data ready: {packs_dir}")
-
-            time_range = getattr(request, 'time_range', None)
-
-            # Define analysis generation function
-            def generate_analysis():
-                from src.agents.player_analysis.champion_mastery.tools import (
-                    generate_comprehensive_mastery_analysis,
-                    format_analysis_for_prompt,
-                    load_champion_data
-                )
-                from src.agents.player_analysis.champion_mastery.prompts import build_narrative_prompt
-
-                # Check if data exists
-                champion_data = load_champion_data(packs_dir, request.champion_id, time_range=time_range)
-                if not champion_data:
-                    error_msg = "No data found for Past 365 Days" if time_range == "past-365" else f"No data found for champion_id {request.champion_id}"
-                    yield f"data: {{\"error\": \"{error_msg}\"}}\n\n"
-                    return
-
-                analysis = generate_comprehensive_mastery_analysis(
-                    champion_id=request.champion_id,
-                    packs_dir=packs_dir,
-                    time_range=time_range
-                )
-                formatted_data = format_analysis_for_prompt(analysis)
-                prompts = build_narrative_prompt(analysis, formatted_data)
+    print(f"\n{'='*60}\n🎮 Champion Mastery Stream (Champion ID: {request.champion_id}, Model: {request.model or 'haiku'})\n{'='*60}")
+    return agent_stage_response('champion-mastery', request, _champion_mastery_stage)
 
-                for message in stream_agent_with_thinking(
-                    prompt=prompts['user'],
-                    system_prompt=prompts['system'],
-                    model="haiku",
-                    max_tokens=8000,
-                    enable_thinking=False
-                ):
-                    yield message
-
-            # Execute with caching
-            for message in cached_agent_stream(
-                agent_id='champion-mastery',
-                agent_run_stream_func=generate_analysis,
-                puuid=request.puuid,
-                packs_dir=Path(packs_dir),
-                time_range=time_range,
-                champion_id=request.champion_id
-            ):
-                yield message
 
-        except Exception as e:
-            import traceback
-            print(f"❌ Error: {traceback.format_exc()}")
-            yield f"data: {{\"error\": \"{str(e)}\"}}\n\n"
+def _progress_tracker_stage(request: AgentRequest, context: AgentContext) -> AgentStage:
+    """Progress Tracker - deterministic stage (analysis event for the frontend widgets + report stream)"""
+    from src.agents.shared.stream_helper import stream_agent_with_thinking
+    from src.agents.player_analysis.progress_tracker.tools import (
+        load_recent_packs,
+        analyze_progress,
+        format_analysis_for_prompt
+    )
+    from src.agents.player_analysis.progress_tracker.prompts import build_narrative_prompt
+
+    window_size = request.recent_count or 10
+    time_range = getattr(request, 'time_range', None)
+    queue_id = getattr(request, 'queue_id', None)
+    print(f"🔍 [Progress Tracker] Received time_range: {time_range}, queue_id: {queue_id}")
+    recent_packs = load_recent_packs(
+        context.packs_dir,
+        window_size=window_size,
+        time_range=time_range,
+        queue_id=queue_id,
+        packs=context.shared_packs(queue_id, time_range)
+    )
 
-    return StreamingResponse(
-        generate_stream(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
-        }
+    queue_name = {420: "Solo/Duo", 440: "Flex", 400: "Normal"}.get(queue_id, "All") if queue_id else "All"
+    print(f"📊 Loaded {len(recent_packs)} patches" + (f" (time_range: {time_range}, queue: {queue_name})" if time_range or queue_id else ""))
+
+    analysis = analyze_progress(recent_packs)
+    formatted_data = format_analysis_for_prompt(analysis)
+    prompts = build_narrative_prompt(analysis, formatted_data)
+
+    # Analysis data first (for frontend widgets), then the report (Haiku 4.5 for best speed)
+    return AgentStage(
+        [f"data: {{\"type\": \"analysis\", \"data\": {json.dumps(analysis, ensure_ascii=False)}}}\n\n"],
+        lambda: stream_agent_with_thinking(
+            prompt=prompts['user'],
+            system_prompt=prompts['system'],
+            model="haiku",
+            max_tokens=8000,  # Reduced for faster response
+            enable_thinking=False  # Disabled for speed
+        )
     )
 
 
 @app.post("/v1/agents/progress-tracker")
 async def progress_tracker(request: AgentRequest):
     """Progress Tracker - Progress tracking analysis (SSE Stream output, supports extended thinking + model switching)"""
-    from fastapi.responses import StreamingResponse
-    from src.agents.shared.stream_helper import stream_agent_with_thinking
-
-    async def generate_stream():
-        try:
-            print(f"\n{'='*60}\n📈 Progress Tracker Stream (Model: {request.model or 'haiku'})\n{'='*60}")
-
-            # Step 0: Wait for data preparation to complete
-            await player_data_manager.wait_for_data(puuid=request.puuid, timeout=120)
-
-            # Get packs directory
-            packs_dir = player_data_manager.get_packs_dir(request.puuid)
-            if not packs_dir:
-                yield f"data: {{\"error\": \"Player data not ready\"}}\n\n"
-                return
-
-            print(f"✅ Player data ready: {packs_dir}")
-
-            # Step 1: Load player pack data and build prompt
-            from src.agents.player_analysis.progress_tracker.tools import (
-                load_recent_packs,
-                analyze_progress,
-                format_analysis_for_prompt
-            )
-            from src.agents.player_analysis.progress_tracker.prompts import build_narrative_prompt
-
-            window_size = request.recent_count or 10
-            time_range = getattr(request, 'time_range', None)
-            queue_id = getattr(request, 'queue_id', None)
-            print(f"🔍 [Progress Tracker] Received time_range: {time_range}, queue_id: {queue_id}")
-            recent_packs = load_recent_packs(packs_dir, window_size=window_size, time_range=time_range, queue_id=queue_id)
-
-            queue_name = {420: "Solo/Duo", 440: "Flex", 400: "Normal"}.get(queue_id, "All") if queue_id else "All"
-            print(f"📊 Loaded {len(recent_packs)} patches" + (f" (time_range: {time_range}, queue: {queue_name})" if time_range or queue_id else ""))
-
-            analysis = analyze_progress(recent_packs)
-            formatted_data = format_analysis_for_prompt(analysis)
-            prompts = build_narrative_prompt(analysis, formatted_data)
-
-            # Step 1.5: Send analysis data first (for frontend widgets)
-            yield f"data: {{\"type\": \"analysis\", \"data\": {json.dumps(analysis, ensure_ascii=False)}}}\n\n"
-            print(f"✅ Sent analysis data for frontend widgets")
-
-            # Step 2: Use generic stream helper (supports model switching)
-            model = "haiku"  # Force use of Haiku 4.5 for best speed
-            print(f"🚀 Using model: Haiku 4.5")
-
-            for message in stream_agent_with_thinking(
-                prompt=prompts['user'],
-                system_prompt=prompts['system'],
-                model=model,
-                max_tokens=8000,  # Reduced for faster response
-                enable_thinking=False  # Disabled for speed
-            ):
-                yield message
-
-        except Exception as e:
-            import traceback
-            print(f"❌ Error: {traceback.format_exc()}")
-            yield f"data: {{\"error\": \"{str(e)}\"}}\n\n"
-
-    return StreamingResponse(
-        generate_stream(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
-        }
-    )
+    print(f"\n{'='*60}\n📈 Progress Tracker Stream (Model: {request.model or 'haiku'})\n{'='*60}")
+    return agent_stage_response('progress-tracker', request, _progress_tracker_stage)
 
 
 @app.post("/v1/agents/detailed-analysis")
@@ -1189,80 +1213,46 @@ async def detailed_analysis(request: AgentRequest):
     )
 
 
-@app.post("/v1/agents/peer-comparison")
-async def peer_comparison(request: AgentRequest):
-    """Peer Comparison - Same rank comparison analysis (SSE Stream output, supports extended thinking + model switching)"""
-    from fastapi.responses import StreamingResponse
+def _peer_comparison_stage(request: AgentRequest, context: AgentContext) -> AgentStage:
+    """Peer Comparison - deterministic stage"""
     from src.agents.shared.stream_helper import stream_agent_with_thinking
+    from src.agents.player_analysis.peer_comparison.tools import (
+        load_player_data,
+        load_rank_baseline,
+        compare_to_baseline,
+        format_analysis_for_prompt
+    )
+    from src.agents.player_analysis.peer_comparison.prompts import build_narrative_prompt
 
-    async def generate_stream():
-        try:
-            # Validate required parameters
-            if not request.rank:
-                yield f"data: {{\"error\": \"Peer Comparison requires a rank parameter (IRON/BRONZE/SILVER/GOLD/PLATINUM/EMERALD/DIAMOND/MASTER/GRANDMASTER/CHALLENGER).\"}}\n\n"
-                return
-
-            print(f"\n{'='*60}\n🏅 Peer Comparison Stream (Rank: {request.rank.upper()}, Model: {request.model or 'haiku'})\n{'='*60}")
-
-            # Step 0: Wait for data preparation to complete
-            await player_data_manager.wait_for_data(puuid=request.puuid, timeout=120)
-
-            # Get packs directory
-            packs_dir = player_data_manager.get_packs_dir(request.puuid)
-            if not packs_dir:
-                yield f"data: {{\"error\": \"Player data not ready\"}}\n\n"
-                return
-
-            print(f"✅ Player data ready: {packs_dir}")
-
-            # Step 1: Load player pack data and build prompt
-            from src.agents.player_analysis.peer_comparison.tools import (
-                load_player_data,
-                load_rank_baseline,
-                compare_to_baseline,
-                format_analysis_for_prompt
-            )
-            from src.agents.player_analysis.peer_comparison.prompts import build_narrative_prompt
-
-            rank = request.rank.upper()
-            player_data = load_player_data(packs_dir)
-            baseline = load_rank_baseline(rank)
+    rank = request.rank.upper()
 
-            if baseline is None:
-                yield f"data: {{\"error\": \"Rank baseline data not available for {rank}\"}}\n\n"
-                return
+    # Peer comparison uses every pack of the player (no queue/time filter)
+    shared = context.shared_packs(None, None)
+    player_data = load_player_data(context.packs_dir, [pack.data for pack in shared] if shared is not None else None)
+    baseline = load_rank_baseline(rank)
 
-            comparison = compare_to_baseline(player_data, baseline)
-            formatted_data = format_analysis_for_prompt(comparison, rank)
-            prompts = build_narrative_prompt(comparison, formatted_data, rank)
+    if baseline is None:
+        return AgentStage.error(f"Rank baseline data not available for {rank}")
 
-            # Step 2: Use generic stream helper (supports model switching)
-            model = "haiku"  # Force use of Haiku 4.5 for best speed
-            print(f"🚀 Using model: Haiku 4.5")
+    comparison = compare_to_baseline(player_data, baseline)
+    formatted_data = format_analysis_for_prompt(comparison, rank)
+    prompts = build_narrative_prompt(comparison, formatted_data, rank)
 
-            for message in stream_agent_with_thinking(
-                prompt=prompts['user'],
-                system_prompt=prompts['system'],
-                model=model,
-                max_tokens=8000,  # Reduced for faster response
-                enable_thinking=False  # Disabled for speed
-            ):
-                yield message
+    # Haiku 4.5 for best speed
+    return AgentStage(stream=lambda: stream_agent_with_thinking(
+        prompt=prompts['user'],
+        system_prompt=prompts['system'],
+        model="haiku",
+        max_tokens=8000,  # Reduced for faster response
+        enable_thinking=False  # Disabled for speed
+    ))
 
-        except Exception as e:
-            import traceback
-            print(f"❌ Error: {traceback.format_exc()}")
-            yield f"data: {{\"error\": \"{str(e)}\"}}\n\n"
 
-    return StreamingResponse(
-        generate_stream(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
-        }
-    )
+@app.post("/v1/agents/peer-comparison")
+async def peer_comparison(request: AgentRequest):
+    """Peer Comparison - Same rank comparison analysis (SSE Stream output, supports extended thinking + model switching)"""
+    print(f"\n{'='*60}\n🏅 Peer Comparison Stream (Rank: {(request.rank or '').upper()}, Model: {request.model or 'haiku'})\n{'='*60}")
+    return agent_stage_response('peer-comparison', request, _peer_comparison_stage)
 
 
 @app.post("/v1/agents/friend-comparison")
@@ -1337,8 +1327,8 @@ async def friend_comparison(request: AgentRequest):
             time_range = getattr(request, 'time_range', None)
             queue_id = getattr(request, 'queue_id', None)
             print(f"🔍 [Friend Comparison] Received time_range: {time_range}, queue_id: {queue_id}")
-            player1_data = load_player_data(current_player_packs_dir, time_range=time_range, queue_id=queue_id)
-            player2_data = load_player_data(friend_packs_dir, time_range=time_range, queue_id=queue_id)
+            player1_data = await run_in_worker(load_player_data, current_player_packs_dir, time_range=time_range, queue_id=queue_id)
+            player2_data = await run_in_worker(load_player_data, friend_packs_dir, time_range=time_range, queue_id=queue_id)
             
             queue_name = {420: "Solo/Duo", 440: "Flex", 400: "Normal"}.get(queue_id, "All") if queue_id else "All"
             print(f"📊 Loaded player data" + (f" (time_range: {time_range}, queue: {queue_name})" if time_range or queue_id else ""))
@@ -1366,13 +1356,13 @@ async def friend_comparison(request: AgentRequest):
             model = "haiku"  # Force use of Haiku 4.5 for best speed
             print(f"🚀 Using model: Haiku 4.5")
 
-            for message in stream_agent_with_thinking(
+            async for message in stream_in_worker(stream_agent_with_thinking(
                 prompt=prompts['user'],
                 system_prompt=prompts['system'],
                 model=model,
                 max_tokens=8000,  # Reduced for faster response
                 enable_thinking=False  # Disabled for speed
-            ):
+            )):
                 yield message
 
         except Exception as e:
@@ -1391,217 +1381,109 @@ async def friend_comparison(request: AgentRequest):
     )
 
 
-@app.post("/v1/agents/role-specialization")
-async def role_specialization(request: AgentRequest):
-    """Role Specialization - Role specialization analysis (SSE Stream output, supports extended thinking + model switching)"""
-    from fastapi.responses import StreamingResponse
+def _role_specialization_stage(request: AgentRequest, context: AgentContext) -> AgentStage:
+    """Role Specialization - deterministic stage"""
     from src.agents.shared.stream_helper import stream_agent_with_thinking
+    from src.agents.player_analysis.role_specialization.agent import get_role_analysis
+
+    role = request.role.upper()
+    # Map ADC → BOTTOM for backend compatibility
+    if role == 'ADC':
+        role = 'BOTTOM'
+    time_range = getattr(request, 'time_range', None)
+    queue_id = getattr(request, 'queue_id', None)
+    print(f"🔍 [Role Specialization] Received time_range: {time_range}, queue_id: {queue_id}")
+
+    # Memoised per data version and filters; None when there is no data for the selected filters
+    shared = context.shared_packs(queue_id, time_range)
+    role_analysis = get_role_analysis(
+        context.packs_dir,
+        role,
+        time_range=time_range,
+        queue_id=queue_id,
+        all_packs_data=[pack.data for pack in shared] if shared is not None else None
+    )
+    if role_analysis is None:
+        return AgentStage.error(no_data_error(time_range, queue_id, default=f"No data found for role {role}"))
 
-    async def generate_stream():
-        try:
-            # Validate required parameters
-            if not request.role:
-                yield f"data: {{\"error\": \"Role Specialization requires a role parameter (TOP/JUNGLE/MID/ADC/SUPPORT).\"}}\n\n"
-                return
+    prompts = role_analysis['prompts']
 
-            print(f"\n{'='*60}\n🎮 Role Specialization Stream (Role: {request.role.upper()}, Model: {request.model or 'haiku'})\n{'='*60}")
+    # Haiku 4.5 for best speed
+    return AgentStage(stream=lambda: stream_agent_with_thinking(
+        prompt=prompts['user'],
+        system_prompt=prompts['system'],
+        model="haiku",
+        max_tokens=12000,  # Role Specialization needs detailed analysis
+        enable_thinking=False  # Disabled for speed
+    ))
 
-            # Step 0: Wait for data preparation to complete
-            await player_data_manager.wait_for_data(puuid=request.puuid, timeout=120)
-
-            # Get packs directory
-            packs_dir = player_data_manager.get_packs_dir(request.puuid)
-            if not packs_dir:
-                yield f"data: {{\"error\": \"Player data not ready\"}}\n\n"
-                return
-
-            print(f"✅ Player data ready: {packs_dir}")
 
-            # Step 1: Load player pack data and build prompt
-            from src.agents.player_analysis.role_specialization.tools import (
-                generate_comprehensive_role_analysis,
-                format_analysis_for_prompt,
-                load_role_data
-            )
-            from src.agents.player_analysis.role_specialization.prompts import build_narrative_prompt
-
-            role = request.role.upper()
-            # Map ADC → BOTTOM for backend compatibility
-            if role == 'ADC':
-                role = 'BOTTOM'
-            time_range = getattr(request, 'time_range', None)
-            queue_id = getattr(request, 'queue_id', None)
-            print(f"🔍 [Role Specialization] Received time_range: {time_range}, queue_id: {queue_id}")
-            
-            # Check if data exists for the selected filters before generating analysis
-            role_data = load_role_data(packs_dir, role, time_range=time_range, queue_id=queue_id)
-            if not role_data:
-                if queue_id == 400:
-                    error_msg = "No Normal game data found. Please play some Normal games first."
-                elif queue_id == 440:
-                    error_msg = "No Ranked Flex data found. Please play some Ranked Flex games first."
-                elif queue_id == 420:
-                    error_msg = "No Ranked Solo/Duo data found. Please play some Ranked Solo/Duo games first."
-                elif time_range == "past-365":
-                    error_msg = "No data found for Past 365 Days"
-                else:
-                    error_msg = f"No data found for role {role}"
-                yield f"data: {{\"error\": \"{error_msg}\"}}\n\n"
-                return
-            
-            analysis = generate_comprehensive_role_analysis(
-                role=role,
-                packs_dir=packs_dir,
-                time_range=time_range,
-                queue_id=queue_id
-            )
-            formatted_data = format_analysis_for_prompt(analysis)
-            prompts = build_narrative_prompt(analysis, formatted_data)
+@app.post("/v1/agents/role-specialization")
+async def role_specialization(request: AgentRequest):
+    """Role Specialization - Role specialization analysis (SSE Stream output, supports extended thinking + model switching)"""
+    print(f"\n{'='*60}\n🎮 Role Specialization Stream (Role: {(request.role or '').upper()}, Model: {request.model or 'haiku'})\n{'='*60}")
+    return agent_stage_response('role-specialization', request, _role_specialization_stage)
 
-            # Step 2: Use generic stream helper (supports model switching)
-            model = "haiku"  # Force use of Haiku 4.5 for best speed
-            print(f"🚀 Using model: Haiku 4.5")
 
-            for message in stream_agent_with_thinking(
-                prompt=prompts['user'],
-                system_prompt=prompts['system'],
-                model=model,
-                max_tokens=12000,  # Role Specialization needs detailed analysis
-                enable_thinking=False  # Disabled for speed
-            ):
-                yield message
+def _champion_recommendation_stage(request: AgentRequest, context: AgentContext) -> AgentStage:
+    """Champion Recommendation - deterministic stage"""
+    from src.agents.player_analysis.champion_recommendation.agent import ChampionRecommendationAgent
 
-        except Exception as e:
-            import traceback
-            print(f"❌ Error: {traceback.format_exc()}")
-            yield f"data: {{\"error\": \"{str(e)}\"}}\n\n"
+    packs_dir = context.packs_dir
+    time_range = getattr(request, 'time_range', None)
+    queue_id = getattr(request, 'queue_id', None)
+    print(f"🔍 [Champion Recommendation] Params: time_range={time_range}, queue_id={queue_id}")
 
-    return StreamingResponse(
-        generate_stream(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
-        }
+    agent = ChampionRecommendationAgent(model=request.model or "haiku")
+    analysis = agent.analyze(
+        packs_dir, time_range=time_range, queue_id=queue_id, packs=context.shared_packs(queue_id, time_range)
     )
 
+    return AgentStage(stream=lambda: cached_agent_stream(
+        agent_id='champion-recommendation',
+        agent_run_stream_func=lambda: agent.stream_analysis(analysis),
+        puuid=request.puuid,
+        packs_dir=Path(packs_dir),
+        time_range=time_range,
+        queue_id=queue_id
+    ))
+
 
 @app.post("/v1/agents/champion-recommendation")
 async def champion_recommendation(request: AgentRequest):
     """Champion Recommendation - ADK-compliant agent endpoint with SSE streaming"""
-    from fastapi.responses import StreamingResponse
-    from src.agents.player_analysis.champion_recommendation.agent import ChampionRecommendationAgent
+    print(f"\n{'='*60}\n🎯 Champion Recommendation (ADK) - Model: {request.model or 'haiku'}\n{'='*60}")
+    return agent_stage_response('champion-recommendation', request, _champion_recommendation_stage)
 
-    async def generate_stream():
-        try:
-            print(f"\n{'='*60}\n🎯 Champion Recommendation (ADK) - Model: {request.model or 'haiku'}\n{'='*60}")
-
-            # Step 1: Wait for data preparation
-            await player_data_manager.wait_for_data(puuid=request.puuid, timeout=120)
 
-            # Step 2: Get packs directory
-            packs_dir = player_data_manager.get_packs_dir(request.puuid)
-            if not packs_dir:
-                yield f"data: {{\"error\": \"Player data not ready\"}}\n\n"
-                return
-
-            print(f"✅ Player data ready: {packs_dir}")
-
-            # Step 3: Get params
-            time_range = getattr(request, 'time_range', None)
-            queue_id = getattr(request, 'queue_id', None)
-            print(f"🔍 [Champion Recommendation] Params: time_range={time_range}, queue_id={queue_id}")
-
-            # Step 4: Create ADK agent and stream with caching
-            agent = ChampionRecommendationAgent(model=request.model or "haiku")
-            for message in cached_agent_stream(
-                agent_id='champion-recommendation',
-                agent_run_stream_func=lambda: agent.run_stream(
-                    packs_dir=packs_dir,
-                    time_range=time_range,
-                    queue_id=queue_id
-                ),
-                puuid=request.puuid,
-                packs_dir=Path(packs_dir),
-                time_range=time_range,
-                queue_id=queue_id
-            ):
-                yield message
+def _multi_version_stage(request: AgentRequest, context: AgentContext, agent_id: str = 'multi-version') -> AgentStage:
+    """Multi-Version Analysis - deterministic stage (shared with Version Trends)"""
+    from src.agents.player_analysis.multi_version.agent import MultiVersionAgent
 
-        except Exception as e:
-            import traceback
-            print(f"❌ Error: {traceback.format_exc()}")
-            yield f"data: {{\"error\": \"{str(e)}\"}}\n\n"
+    packs_dir = context.packs_dir
+    time_range = getattr(request, 'time_range', None)
+    queue_id = getattr(request, 'queue_id', None)
 
-    return StreamingResponse(
-        generate_stream(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
-        }
+    agent = MultiVersionAgent(model=request.model or "haiku")
+    analysis = agent.analyze(
+        packs_dir, time_range=time_range, queue_id=queue_id, packs=context.shared_packs(queue_id, time_range)
     )
 
+    return AgentStage(stream=lambda: cached_agent_stream(
+        agent_id=agent_id,
+        agent_run_stream_func=lambda: agent.stream_analysis(analysis),
+        puuid=request.puuid,
+        packs_dir=Path(packs_dir),
+        time_range=time_range,
+        queue_id=queue_id
+    ))
+
 
 @app.post("/v1/agents/multi-version")
 async def multi_version_comparison(request: AgentRequest):
     """Multi-Version Analysis - ADK-compliant agent endpoint with SSE streaming"""
-    from fastapi.responses import StreamingResponse
-    from src.agents.player_analysis.multi_version.agent import MultiVersionAgent
-
-    async def generate_stream():
-        try:
-            print(f"\n{'='*60}\n🎮 Multi-Version Analysis (ADK) - Model: {request.model or 'haiku'}\n{'='*60}")
-
-            # Step 1: Wait for data preparation
-            await player_data_manager.wait_for_data(puuid=request.puuid, timeout=120)
-
-            # Step 2: Get packs directory
-            packs_dir = player_data_manager.get_packs_dir(request.puuid)
-            if not packs_dir:
-                yield f"data: {{\"error\": \"Player data not ready\"}}\n\n"
-                return
-
-            print(f"✅ Player data ready: {packs_dir}")
-
-            # Step 3: Create ADK agent instance
-            agent = MultiVersionAgent(model=request.model or "haiku")
-
-            # Step 4: Execute agent with streaming and caching
-            time_range = getattr(request, 'time_range', None)
-            queue_id = getattr(request, 'queue_id', None)
-
-            for message in cached_agent_stream(
-                agent_id='multi-version',
-                agent_run_stream_func=lambda: agent.run_stream(
-                    packs_dir=packs_dir,
-                    time_range=time_range,
-                    queue_id=queue_id
-                ),
-                puuid=request.puuid,
-                packs_dir=Path(packs_dir),
-                time_range=time_range,
-                queue_id=queue_id
-            ):
-                yield message
-
-        except Exception as e:
-            import traceback
-            print(f"❌ Error: {traceback.format_exc()}")
-            yield f"data: {{\"error\": \"{str(e)}\"}}\n\n"
-            return
-
-    return StreamingResponse(
-        generate_stream(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
-        }
-    )
+    print(f"\n{'='*60}\n🎮 Multi-Version Analysis (ADK) - Model: {request.model or 'haiku'}\n{'='*60}")
+    return agent_stage_response('multi-version', request, _multi_version_stage)
 
 
 @app.post("/v1/agents/build-simulator")
@@ -1635,7 +1517,7 @@ async def build_simulator(request: AgentRequest):
             queue_id = getattr(request, 'queue_id', None)
             print(f"🔍 [Build Simulator] Received time_range: {time_range}, queue_id: {queue_id}")
             
-            analysis = generate_player_build_analysis(packs_dir, time_range=time_range, queue_id=queue_id)
+            analysis = await run_in_worker(generate_player_build_analysis, packs_dir, time_range=time_range, queue_id=queue_id)
 
             if not analysis.get("analysis_ready"):
                 yield f"data: {{\"error\": \"{analysis.get('error', 'Analysis failed')}\"}}\n\n"
@@ -1656,12 +1538,12 @@ Your tasks:
 
 Output format: Complete analysis report in Markdown format"""
 
-            for message in stream_agent_with_thinking(
+            async for message in stream_in_worker(stream_agent_with_thinking(
                 prompt=prompt,
                 system_prompt=system_prompt,
                 model="haiku",  # Force use of Haiku 4.5
                 enable_thinking=False  # Build Simulator does not show thinking
-            ):
+            )):
                 yield message
 
         except Exception as e:
@@ -1740,7 +1622,6 @@ async def postgame_review(request: AgentRequest):
     """Postgame Review - Post-game review (SSE Stream output, supports extended thinking + model switching)"""
     from fastapi.responses import StreamingResponse
     from src.agents.shared.stream_helper import stream_agent_with_thinking
-    import json
 
     async def generate_stream():
         try:
@@ -1760,18 +1641,13 @@ async def postgame_review(request: AgentRequest):
                 yield f"data: {{\"error\": \"Player data not ready\"}}\n\n"
                 return
 
-            # Check timeline data
-            timelines_dir = Path(packs_dir) / "timelines"
-            timeline_file = timelines_dir / f"{request.match_id}_timeline.json"
-            if not timeline_file.exists():
+            # Step 1: Load timeline data
+            timeline_data = await run_in_worker(match_store.get_timeline, request.match_id, puuid=request.puuid)
+            if not timeline_data:
                 yield f"data: {{\"error\": \"Timeline data for match {request.match_id} not found.\"}}\n\n"
                 return
 
-            print(f"✅ Timeline file found: {timeline_file}")
-
-            # Step 1: Load timeline data
-            with open(timeline_file, 'r', encoding='utf-8') as f:
-                timeline_data = json.load(f)
+            print(f"✅ Timeline found: {request.match_id}")
 
             # Step 2: Extract match_features and timeline_features
             print("📊 Extracting features from timeline and match data...")
@@ -1784,7 +1660,8 @@ async def postgame_review(request: AgentRequest):
             from src.agents.player_analysis.postgame_review.prompts import build_narrative_prompt
 
             engine = PostgameReviewEngine()
-            review = engine.generate_postgame_review(
+            review = await run_in_worker(
+                engine.generate_postgame_review,
                 match_features=match_features,
                 timeline_features=timeline_features
             )
@@ -1796,13 +1673,13 @@ async def postgame_review(request: AgentRequest):
             model = "haiku"  # Force use of Haiku 4.5
             print(f"🚀 Using model: {model} with extended thinking")
 
-            for message in stream_agent_with_thinking(
+            async for message in stream_in_worker(stream_agent_with_thinking(
                 prompt=prompt,
                 system_prompt="",  # system prompt already included in build_narrative_prompt
                 model=model,
                 max_tokens=8000,  # Reduced for faster response
                 enable_thinking=False  # Disabled for speed
-            ):
+            )):
                 yield message
 
         except Exception as e:
@@ -1821,119 +1698,81 @@ async def postgame_review(request: AgentRequest):
     )
 
 
-@app.post("/v1/agents/risk-forecaster")
-async def risk_forecaster_agent(request: AgentRequest):
-    """Risk Forecaster - Risk prediction (SSE Stream output, supports extended thinking + model switching)"""
-    from fastapi.responses import StreamingResponse
+def _risk_forecaster_stage(request: AgentRequest, context: AgentContext) -> AgentStage:
+    """Risk Forecaster - deterministic stage (team compositions of the most recent match)"""
     from src.agents.shared.stream_helper import stream_agent_with_thinking
-    import json
-
-    async def generate_stream():
-        try:
-            print(f"\n{'='*60}\n🔮 Risk Forecaster Stream (Model: {request.model or 'haiku'})\n{'='*60}")
-
-            # Step 0: Wait for data preparation to complete
-            await player_data_manager.wait_for_data(puuid=request.puuid, timeout=120)
-            packs_dir = player_data_manager.get_packs_dir(request.puuid)
-            if not packs_dir:
-                yield f"data: {{\"error\": \"Player data not ready\"}}\n\n"
-                return
-
-            # Extract team composition from recent matches
-            # First, read player's match ID list
-            match_ids_file = Path(packs_dir) / "match_ids.json"
-            if not match_ids_file.exists():
-                yield f"data: {{\"error\": \"No match IDs found for player\"}}\n\n"
-                return
-
-            with open(match_ids_file, 'r', encoding='utf-8') as f:
-                match_ids = json.load(f)
-
-            if not match_ids:
-                yield f"data: {{\"error\": \"No match data available for analysis\"}}\n\n"
-                return
+    from src.agents.player_analysis.risk_forecaster.tools import (
+        analyze_composition_matchup,
+        format_analysis_for_prompt
+    )
+    from src.agents.player_analysis.risk_forecaster.prompts import SYSTEM_PROMPT, USER_PROMPT_TEMPLATE
 
-            # Read most recent match from global pool
-            global_matches_dir = Path("data/matches")
-            most_recent_match_id = match_ids[0]  # match_ids is already sorted by recency
-            match_file = global_matches_dir / f"{most_recent_match_id}.json"
+    # Extract team composition from recent matches
+    # First, read player's match ID list
+    match_ids_file = Path(context.packs_dir) / "match_ids.json"
+    if not match_ids_file.exists():
+        return AgentStage.error("No match IDs found for player")
 
-            if not match_file.exists():
-                yield f"data: {{\"error\": \"Match data not found in global pool\"}}\n\n"
-                return
+    with open(match_ids_file, 'r', encoding='utf-8') as f:
+        match_ids = json.load(f)
 
-            with open(match_file, 'r', encoding='utf-8') as f:
-                match_data = json.load(f)
+    if not match_ids:
+        return AgentStage.error("No match data available for analysis")
 
-            # Extract team compositions
-            our_team_id = None
-            for participant in match_data['info']['participants']:
-                if participant['puuid'] == request.puuid:
-                    our_team_id = participant['teamId']
-                    break
+    # Read most recent match from the shared match store
+    most_recent_match_id = match_ids[0]  # match_ids.json is sorted newest first by gameCreation
+    match_data = match_store.get_match(most_recent_match_id)
 
-            if our_team_id is None:
-                yield f"data: {{\"error\": \"Target player not found in match data\"}}\n\n"
-                return
+    if not match_data:
+        return AgentStage.error("Match data not found in match store")
 
-            # Extract team compositions
-            our_team = []
-            enemy_team = []
+    # Extract team compositions
+    our_team_id = None
+    for participant in match_data['info']['participants']:
+        if participant['puuid'] == request.puuid:
+            our_team_id = participant['teamId']
+            break
 
-            for participant in match_data['info']['participants']:
-                comp_item = {
-                    "champion_id": participant['championId'],
-                    "role": participant.get('teamPosition', 'UNKNOWN')
-                }
+    if our_team_id is None:
+        return AgentStage.error("Target player not found in match data")
 
-                if participant['teamId'] == our_team_id:
-                    our_team.append(comp_item)
-                else:
-                    enemy_team.append(comp_item)
+    # Extract team compositions
+    our_team = []
+    enemy_team = []
 
-            print(f"✅ Team compositions extracted")
+    for participant in match_data['info']['participants']:
+        comp_item = {
+            "champion_id": participant['championId'],
+            "role": participant.get('teamPosition', 'UNKNOWN')
+        }
 
-            # Step 1: Analyze team composition matchup and build prompt
-            from src.agents.player_analysis.risk_forecaster.tools import (
-                analyze_composition_matchup,
-                format_analysis_for_prompt
-            )
-            from src.agents.player_analysis.risk_forecaster.prompts import SYSTEM_PROMPT, USER_PROMPT_TEMPLATE
+        if participant['teamId'] == our_team_id:
+            our_team.append(comp_item)
+        else:
+            enemy_team.append(comp_item)
 
-            analysis = analyze_composition_matchup(
-                our_composition=our_team,
-                enemy_composition=enemy_team
-            )
-            formatted_data = format_analysis_for_prompt(analysis)
-            user_prompt = USER_PROMPT_TEMPLATE.format(analysis_data=formatted_data)
+    print(f"✅ Team compositions extracted")
 
-            # Step 2: Use generic stream helper (supports model switching)
-            model = "haiku"  # Force use of Haiku 4.5 for best speed
-            print(f"🚀 Using model: Haiku 4.5")
+    # Analyze team composition matchup and build prompt
+    analysis = analyze_composition_matchup(our_composition=our_team, enemy_composition=enemy_team)
+    formatted_data = format_analysis_for_prompt(analysis)
+    user_prompt = USER_PROMPT_TEMPLATE.format(analysis_data=formatted_data)
 
-            for message in stream_agent_with_thinking(
-                prompt=user_prompt,
-                system_prompt=SYSTEM_PROMPT,
-                model=model,
-                max_tokens=8000,  # Reduced for faster response
-                enable_thinking=False  # Disabled for speed
-            ):
-                yield message
+    # Haiku 4.5 for best speed
+    return AgentStage(stream=lambda: stream_agent_with_thinking(
+        prompt=user_prompt,
+        system_prompt=SYSTEM_PROMPT,
+        model="haiku",
+        max_tokens=8000,  # Reduced for faster response
+        enable_thinking=False  # Disabled for speed
+    ))
 
-        except Exception as e:
-            import traceback
-            print(f"❌ Error: {traceback.format_exc()}")
-            yield f"data: {{\"error\": \"{str(e)}\"}}\n\n"
 
-    return StreamingResponse(
-        generate_stream(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
-        }
-    )
+@app.post("/v1/agents/risk-forecaster")
+async def risk_forecaster_agent(request: AgentRequest):
+    """Risk Forecaster - Risk prediction (SSE Stream output, supports extended thinking + model switching)"""
+    print(f"\n{'='*60}\n🔮 Risk Forecaster Stream (Model: {request.model or 'haiku'})\n{'='*60}")
+    return agent_stage_response('risk-forecaster', request, _risk_forecaster_stage)
 
 
 @app.post("/v1/agents/timeline-deep-dive")
@@ -1995,7 +1834,7 @@ async def version_comparison(request: AgentRequest):
             time_range = getattr(request, 'time_range', None)
             queue_id = getattr(request, 'queue_id', None)
             print(f"🔍 [Version Comparison] Received time_range: {time_range}, queue_id: {queue_id}")
-            all_packs = load_all_packs(packs_dir, time_range=time_range, queue_id=queue_id)
+            all_packs = await run_in_worker(load_all_packs, packs_dir, time_range=time_range, queue_id=queue_id)
             
             queue_name = {420: "Solo/Duo", 440: "Flex", 400: "Normal"}.get(queue_id, "All") if queue_id else "All"
             print(f"📊 Loaded {len(all_packs)} patches" + (f" (time_range: {time_range}, queue: {queue_name})" if time_range or queue_id else ""))
@@ -2016,7 +1855,7 @@ async def version_comparison(request: AgentRequest):
                 return
 
             # Analyze trends
-            trends = analyze_trends(all_packs)
+            trends = await run_in_worker(analyze_trends, all_packs)
 
             # Identify key turning points
             transitions = identify_key_transitions(trends)
@@ -2029,11 +1868,11 @@ async def version_comparison(request: AgentRequest):
             print(f"✅ Prompt constructed ({len(prompt)} chars)")
 
             # Step 2: Stream generate AI analysis
-            for message in stream_agent_with_thinking(
+            async for message in stream_in_worker(stream_agent_with_thinking(
                 prompt=prompt,
                 model="haiku",  # Force use of Haiku 4.5
                 enable_thinking=False
-            ):
+            )):
                 yield message
 
         except Exception as e:
@@ -2103,7 +1942,7 @@ async def comparison_hub(request: AgentRequest):
                 time_range = getattr(request, 'time_range', None)
                 queue_id = getattr(request, 'queue_id', None)
                 print(f"🔍 [Comparison Hub - Peer] Received time_range: {time_range}, queue_id: {queue_id}")
-                player_data = load_player_data(packs_dir, time_range=time_range, queue_id=queue_id)
+                player_data = await run_in_worker(load_player_data, packs_dir, time_range=time_range, queue_id=queue_id)
                 
                 queue_name = {420: "Solo/Duo", 440: "Flex", 400: "Normal"}.get(queue_id, "All") if queue_id else "All"
                 print(f"📊 Loaded player data" + (f" (time_range: {time_range}, queue: {queue_name})" if time_range or queue_id else ""))
@@ -2123,7 +1962,7 @@ async def comparison_hub(request: AgentRequest):
                     yield f"data: {{\"error\": \"{error_msg}\"}}\n\n"
                     return
                 
-                baseline = load_rank_baseline(rank)
+                baseline = await run_in_worker(load_rank_baseline, rank)
 
                 if baseline is None:
                     yield f"data: {{\"error\": \"Rank baseline data not available for {rank}\"}}\n\n"
@@ -2133,13 +1972,13 @@ async def comparison_hub(request: AgentRequest):
                 formatted_data = format_analysis_for_prompt(comparison, rank)
                 prompts = build_narrative_prompt(comparison, formatted_data, rank)
 
-                for message in stream_agent_with_thinking(
+                async for message in stream_in_worker(stream_agent_with_thinking(
                     prompt=prompts['user'],
                     system_prompt=prompts['system'],
                     model="haiku",  # Force use of Haiku 4.5
                     max_tokens=8000,  # Reduced for faster response
                     enable_thinking=False  # Disabled for speed
-                ):
+                )):
                     yield message
 
             else:
@@ -2189,8 +2028,8 @@ async def comparison_hub(request: AgentRequest):
                 time_range = getattr(request, 'time_range', None)
                 queue_id = getattr(request, 'queue_id', None)
                 print(f"🔍 [Comparison Hub - Friend] Received time_range: {time_range}, queue_id: {queue_id}")
-                player_data = load_player_data(player_packs_dir, time_range=time_range, queue_id=queue_id)
-                friend_data = load_player_data(friend_packs_dir, time_range=time_range, queue_id=queue_id)
+                player_data = await run_in_worker(load_player_data, player_packs_dir, time_range=time_range, queue_id=queue_id)
+                friend_data = await run_in_worker(load_player_data, friend_packs_dir, time_range=time_range, queue_id=queue_id)
                 
                 queue_name = {420: "Solo/Duo", 440: "Flex", 400: "Normal"}.get(queue_id, "All") if queue_id else "All"
                 print(f"📊 Loaded player data" + (f" (time_range: {time_range}, queue: {queue_name})" if time_range or queue_id else ""))
@@ -2217,13 +2056,13 @@ async def comparison_hub(request: AgentRequest):
                 formatted_data = format_comparison_for_prompt(comparison, player_name, friend_name)
                 prompts = build_friend_prompt(comparison, formatted_data, player_name, friend_name)
 
-                for message in stream_agent_with_thinking(
+                async for message in stream_in_worker(stream_agent_with_thinking(
                     prompt=prompts['user'],
                     system_prompt=prompts['system'],
                     model="haiku",  # Force use of Haiku 4.5
                     max_tokens=12000,
                     enable_thinking=False
-                ):
+                )):
                     yield message
 
         except Exception as e:
@@ -2248,8 +2087,6 @@ async def match_analysis(request: AgentRequest):
     """Match Analysis - Match deep analysis (Timeline Deep Dive + Postgame Review merged) (SSE Stream output)"""
     from fastapi.responses import StreamingResponse
     from src.agents.shared.stream_helper import stream_agent_with_thinking
-    import json
-    from pathlib import Path
 
     async def generate_stream():
         try:
@@ -2266,98 +2103,36 @@ async def match_analysis(request: AgentRequest):
                 return
 
             # Use Timeline Deep Dive logic (already includes postgame functionality)
-            timelines_dir = Path(packs_dir) / "timelines"
-            timeline_file = timelines_dir / f"{request.match_id}_timeline.json"
-            if not timeline_file.exists():
+            timeline_data = await run_in_worker(match_store.get_timeline, request.match_id, puuid=request.puuid)
+            if not timeline_data:
                 yield f"data: {{\"error\": \"Timeline data for match {request.match_id} not found\"}}\n\n"
                 return
 
-            with open(timeline_file, 'r', encoding='utf-8') as f:
-                timeline_data = json.load(f)
-
-            # Extract features (includes match and timeline features)
-            match_features, timeline_features = await _extract_postgame_features(
-                timeline_data, request.puuid, request.match_id, packs_dir
-            )
-
-            # Use Postgame Review Engine to generate diagnosis
-            from src.agents.player_analysis.postgame_review.engine import PostgameReviewEngine
-            from src.agents.player_analysis.postgame_review.prompts import build_narrative_prompt as build_postgame_prompt
-
-            engine = PostgameReviewEngine()
-            review = engine.generate_postgame_review(
-                match_features=match_features,
-                timeline_features=timeline_features
-            )
-
-            # Build comprehensive analysis prompt (combine timeline and postgame)
-            prompt = build_postgame_prompt(review)
-
-            for message in stream_agent_with_thinking(
-                prompt=prompt,
-                model="haiku",  # Force use of Haiku 4.5
-                max_tokens=8000,  # Reduced for faster response
-                enable_thinking=False
-            ):
-                yield message
-
-        except Exception as e:
-            import traceback
-            print(f"❌ Error: {traceback.format_exc()}")
-            yield f"data: {{\"error\": \"{str(e)}\"}}\n\n"
-            return
-
-    return StreamingResponse(
-        generate_stream(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
-        }
-    )
-
-
-@app.post("/v1/agents/version-trends")
-async def version_trends(request: AgentRequest):
-    """Version Trends - ADK-compliant agent endpoint with SSE streaming"""
-    from fastapi.responses import StreamingResponse
-    from src.agents.player_analysis.multi_version.agent import MultiVersionAgent
-
-    async def generate_stream():
-        try:
-            print(f"\n{'='*60}\n📊 Version Trends (ADK) - Model: {request.model or 'haiku'}\n{'='*60}")
-
-            # Step 1: Wait for data preparation
-            await player_data_manager.wait_for_data(puuid=request.puuid, timeout=120)
-
-            # Step 2: Get packs directory
-            packs_dir = player_data_manager.get_packs_dir(request.puuid)
-            if not packs_dir:
-                yield f"data: {{\"error\": \"Player data not ready\"}}\n\n"
-                return
-
-            print(f"✅ Player data ready: {packs_dir}")
+            # Extract features (includes match and timeline features)
+            match_features, timeline_features = await _extract_postgame_features(
+                timeline_data, request.puuid, request.match_id, packs_dir
+            )
 
-            # Step 3: Create ADK agent instance
-            agent = MultiVersionAgent(model=request.model or "haiku")
+            # Use Postgame Review Engine to generate diagnosis
+            from src.agents.player_analysis.postgame_review.engine import PostgameReviewEngine
+            from src.agents.player_analysis.postgame_review.prompts import build_narrative_prompt as build_postgame_prompt
 
-            # Step 4: Execute agent with streaming
-            time_range = getattr(request, 'time_range', None)
-            queue_id = getattr(request, 'queue_id', None)
+            engine = PostgameReviewEngine()
+            review = await run_in_worker(
+                engine.generate_postgame_review,
+                match_features=match_features,
+                timeline_features=timeline_features
+            )
 
-            for message in cached_agent_stream(
-                agent_id='version-trends',
-                agent_run_stream_func=lambda: agent.run_stream(
-                    packs_dir=packs_dir,
-                    time_range=time_range,
-                    queue_id=queue_id
-                ),
-                puuid=request.puuid,
-                packs_dir=Path(packs_dir),
-                time_range=time_range,
-                queue_id=queue_id
-            ):
+            # Build comprehensive analysis prompt (combine timeline and postgame)
+            prompt = build_postgame_prompt(review)
+
+            async for message in stream_in_worker(stream_agent_with_thinking(
+                prompt=prompt,
+                model="haiku",  # Force use of Haiku 4.5
+                max_tokens=8000,  # Reduced for faster response
+                enable_thinking=False
+            )):
                 yield message
 
         except Exception as e:
@@ -2377,61 +2152,59 @@ async def version_trends(request: AgentRequest):
     )
 
 
-@app.post("/v1/agents/performance-insights")
-async def performance_insights(request: AgentRequest):
-    """Performance Insights - Comprehensive performance insights (Weakness + Detailed + Progress merged) (SSE Stream output)"""
-    from fastapi.responses import StreamingResponse
-    from src.agents.shared.stream_helper import stream_agent_with_thinking
+def _version_trends_stage(request: AgentRequest, context: AgentContext) -> AgentStage:
+    """Version Trends - the multi-version stage under its own report cache id"""
+    return _multi_version_stage(request, context, agent_id='version-trends')
 
-    async def generate_stream():
-        try:
-            print(f"\n{'='*60}\n💡 Performance Insights Stream\n{'='*60}")
 
-            await player_data_manager.wait_for_data(puuid=request.puuid, timeout=120)
-            packs_dir = player_data_manager.get_packs_dir(request.puuid)
-            if not packs_dir:
-                yield f"data: {{\"error\": \"Player data not ready\"}}\n\n"
-                return
+@app.post("/v1/agents/version-trends")
+async def version_trends(request: AgentRequest):
+    """Version Trends - ADK-compliant agent endpoint with SSE streaming"""
+    print(f"\n{'='*60}\n📊 Version Trends (ADK) - Model: {request.model or 'haiku'}\n{'='*60}")
+    return agent_stage_response('version-trends', request, _version_trends_stage)
 
-            time_range = getattr(request, 'time_range', None)
-            queue_id = getattr(request, 'queue_id', None)
-            recent_count = request.recent_count or 20
 
-            print(f"🔍 [Performance Insights] time_range: {time_range}, queue_id: {queue_id}, recent_count: {recent_count}")
+def _performance_insights_stage(request: AgentRequest, context: AgentContext) -> AgentStage:
+    """Performance Insights - deterministic stage (weakness analysis with an extended prompt)"""
+    from src.agents.shared.analysis_cache import analysis_cache
+    from src.agents.shared.stream_helper import stream_agent_with_thinking
+    from src.agents.player_analysis.weakness_analysis.tools import (
+        load_recent_data, identify_weaknesses, format_analysis_for_prompt
+    )
+    from src.agents.player_analysis.weakness_analysis.prompts import build_narrative_prompt as build_weakness_prompt
 
-            # Define the analysis generation function
-            def generate_analysis():
-                from src.agents.player_analysis.weakness_analysis.tools import (
-                    load_recent_data, identify_weaknesses, format_analysis_for_prompt
-                )
-                from src.agents.player_analysis.weakness_analysis.prompts import build_narrative_prompt as build_weakness_prompt
+    packs_dir = context.packs_dir
+    time_range = getattr(request, 'time_range', None)
+    queue_id = getattr(request, 'queue_id', None)
+    recent_count = request.recent_count or 20
 
-                recent_data = load_recent_data(packs_dir, recent_count, time_range=time_range, queue_id=queue_id)
+    print(f"🔍 [Performance Insights] time_range: {time_range}, queue_id: {queue_id}, recent_count: {recent_count}")
 
-                queue_name = {420: "Solo/Duo", 440: "Flex", 400: "Normal"}.get(queue_id, "All") if queue_id else "All"
-                print(f"📊 Loaded {len(recent_data)} patches (time_range: {time_range}, queue: {queue_name})")
+    def compute():
+        recent_data = load_recent_data(
+            packs_dir, recent_count, time_range=time_range, queue_id=queue_id,
+            packs=context.shared_packs(queue_id, time_range)
+        )
 
-                # Check if no data found
-                if len(recent_data) == 0:
-                    if queue_id == 400:
-                        error_msg = "No Normal game data found. Please play some Normal games first."
-                    elif queue_id == 440:
-                        error_msg = "No Ranked Flex data found. Please play some Ranked Flex games first."
-                    elif queue_id == 420:
-                        error_msg = "No Ranked Solo/Duo data found. Please play some Ranked Solo/Duo games first."
-                    elif time_range == "past-365":
-                        error_msg = "No data found for Past 365 Days"
-                    else:
-                        error_msg = "No data found"
-                    yield f"data: {{\"error\": \"{error_msg}\"}}\n\n"
-                    return
+        queue_name = {420: "Solo/Duo", 440: "Flex", 400: "Normal"}.get(queue_id, "All") if queue_id else "All"
+        print(f"📊 Loaded {len(recent_data)} patches (time_range: {time_range}, queue: {queue_name})")
+
+        # Check if no data found
+        if len(recent_data) == 0:
+            return None
+
+        weaknesses = identify_weaknesses(recent_data)
+        formatted = format_analysis_for_prompt(weaknesses)
+        return build_weakness_prompt(weaknesses, formatted)
 
-                weaknesses = identify_weaknesses(recent_data)
-                formatted = format_analysis_for_prompt(weaknesses)
-                prompts = build_weakness_prompt(weaknesses, formatted)
+    prompts = analysis_cache.get_or_compute(
+        "performance-insights", packs_dir, compute, time_range=time_range, queue_id=queue_id, recent_count=recent_count
+    )
+    if prompts is None:
+        return AgentStage.error(no_data_error(time_range, queue_id))
 
-                # Enhance prompt
-                enhanced_prompt = prompts['user'] + """
+    # Enhance prompt
+    enhanced_prompt = prompts['user'] + """
 
 Please include the following sections in your analysis:
 1. 💪 **Strength Analysis** - Areas where the player performs best
@@ -2440,42 +2213,28 @@ Please include the following sections in your analysis:
 
 Ensure the analysis is comprehensive and actionable."""
 
-                for message in stream_agent_with_thinking(
-                    prompt=enhanced_prompt,
-                    system_prompt=prompts['system'],
-                    model="haiku",
-                    max_tokens=8000,
-                    enable_thinking=False
-                ):
-                    yield message
-
-            # Execute with caching
-            for message in cached_agent_stream(
-                agent_id='performance-insights',
-                agent_run_stream_func=generate_analysis,
-                puuid=request.puuid,
-                packs_dir=Path(packs_dir),
-                time_range=time_range,
-                queue_id=queue_id,
-                recent_count=recent_count
-            ):
-                yield message
+    return AgentStage(stream=lambda: cached_agent_stream(
+        agent_id='performance-insights',
+        agent_run_stream_func=lambda: stream_agent_with_thinking(
+            prompt=enhanced_prompt,
+            system_prompt=prompts['system'],
+            model="haiku",
+            max_tokens=8000,
+            enable_thinking=False
+        ),
+        puuid=request.puuid,
+        packs_dir=Path(packs_dir),
+        time_range=time_range,
+        queue_id=queue_id,
+        recent_count=recent_count
+    ))
 
-        except Exception as e:
-            import traceback
-            print(f"❌ Error: {traceback.format_exc()}")
-            yield f"data: {{\"error\": \"{str(e)}\"}}\n\n"
-            return
 
-    return StreamingResponse(
-        generate_stream(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
-        }
-    )
+@app.post("/v1/agents/performance-insights")
+async def performance_insights(request: AgentRequest):
+    """Performance Insights - Comprehensive performance insights (Weakness + Detailed + Progress merged) (SSE Stream output)"""
+    print(f"\n{'='*60}\n💡 Performance Insights Stream\n{'='*60}")
+    return agent_stage_response('performance-insights', request, _performance_insights_stage)
 
 
 # ============================================================================
@@ -2538,7 +2297,8 @@ async def get_player_summary(
     tag_line: str,
     days: int = None,
     count: int = None,
-    time_range: str = None
+    time_range: str = None,
+    refresh: bool = False
 ):
     """
     Trigger background data preparation and return basic player info
@@ -2555,6 +2315,7 @@ async def get_player_summary(
     - days: Number of days to fetch data from (legacy, optional)
     - count: Number of matches to fetch (optional, takes priority over days/time_range)
     - time_range: Time range preset ("past-365")
+    - refresh: Delta-sync matches played since the last fetch (only new match IDs hit Riot API)
 
     Priority: count > time_range > days (default 365)
 
@@ -2586,8 +2347,11 @@ async def get_player_summary(
         print(f"⏱️  Start time: {time.strftime('%H:%M:%S')}")
         print(f"{'='*60}\n")
 
-        # Step 1: Infer platform and region from tag_line
+        # Step 1: Infer platform and region from tag_line (prefer where this Riot ID was last found)
         platform, routing_region = infer_platform_and_region(tag_line)
+        cached_platform, cached_region = account_cache.get_location(game_name, tag_line)
+        platform = cached_platform or platform
+        routing_region = cached_region or routing_region
         print(f"📍 Inferred platform: {platform}, routing region: {routing_region}")
 
         # Step 2: Get account info - try inferred region first, then try other regions if needed
@@ -2657,6 +2421,7 @@ async def get_player_summary(
         if not summoner:
             raise HTTPException(status_code=404, detail=f"Summoner not found for PUUID on platform {platform}")
         print(f"✅ [2/2] Got summoner info ({time.time()-step_start:.2f}s)")
+        account_cache.set_platform(game_name, tag_line, platform)
 
         # Step 4: Start background data preparation (non-blocking)
         print(f"\n🔄 Starting background data preparation from patch 14.1 (2024-01-09) to today...")
@@ -2665,7 +2430,8 @@ async def get_player_summary(
             region=platform,
             game_name=game_name,
             tag_line=tag_line,
-            max_matches=days  # max_matches per queue (100 by default)
+            max_matches=days,  # max_matches per queue (100 by default)
+            refresh=refresh
         )
 
         # Step 4: Try to get role stats and champion stats
@@ -2851,10 +2617,21 @@ async def get_player_summary(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Static data changes once per patch; custom builds can be edited at any time
+STATIC_CACHE_CONTROL = "public, max-age=3600, stale-while-revalidate=86400"
+BUILD_CACHE_CONTROL = "public, max-age=60"
+
+
+async def static_response(http_request: Request, key: str, version: Any, build, cache_control: str = STATIC_CACHE_CONTROL) -> Response:
+    """Serve a precomputed (pre-serialised, pre-compressed) static-data response, built once per version"""
+    entry = static_responses.lookup(key, version) or await run_in_worker(static_responses.get, key, version, build)
+    return entry.respond(http_request, cache_control)
+
+
 @app.get("/api/champions")
-async def get_all_champions():
+async def get_all_champions(http_request: Request):
     """Get all champions with their base combat power"""
-    try:
+    def build():
         all_champions_power = combat_power_calculator.calculate_all_champions_base_power()
 
         champions_list = [
@@ -2871,6 +2648,9 @@ async def get_all_champions():
             'avg_combat_power': round(avg_power, 2),
             'champions': champions_list
         }
+
+    try:
+        return await static_response(http_request, "champions:base-power", data_dragon.version, build)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -2915,9 +2695,9 @@ async def suggest_items(q: str = "", patch: str = "14.19", count: int = 10):
 # ============================================================================
 
 @app.get("/api/patches")
-async def get_all_patches():
+async def get_all_patches(http_request: Request):
     """Get all available patch versions with dates"""
-    try:
+    def build():
         patches = []
         for patch in patch_manager.get_all_patches():
             patch_date = patch_manager.get_patch_date(patch)
@@ -2931,52 +2711,69 @@ async def get_all_patches():
             'success': True,
             'patches': patches
         }
+
+    try:
+        all_patches = patch_manager.get_all_patches()
+        return await static_response(http_request, "patches", f"{len(all_patches)}:{all_patches[-1] if all_patches else ''}", build)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/patch/champion/{champion_name}/patch/{patch}")
-async def get_champion_by_patch(champion_name: str, patch: str):
+async def get_champion_by_patch(champion_name: str, patch: str, http_request: Request):
     """Get champion combat power for a specific patch with popular build"""
     try:
         # Get popular build (if available from tracked data)
         popular_build = build_tracker.get_popular_build(patch, champion_name, min_games=5)
 
-        # Get champion data for this patch
-        champions = multi_patch_data.get_champions_for_patch(patch)
-
-        if champion_name not in champions:
-            raise HTTPException(
-                status_code=404,
-                detail=f'Champion {champion_name} not found in patch {patch}'
-            )
-
-        champion_data = champions[champion_name]
-
-        # Calculate combat power with popular build if available
-        if popular_build:
-            combat_power = combat_power_calculator.calculate_champion_power(
-                champion_data,
-                popular_build.get('items', []),
-                popular_build.get('runes', [])
-            )
-        else:
-            combat_power = combat_power_calculator.calculate_base_power(champion_data)
-
-        return {
-            'success': True,
-            'champion': champion_name,
-            'patch': patch,
-            'combat_power': round(combat_power, 2),
-            'popular_build': popular_build,
-            'has_build_data': popular_build is not None
-        }
+        # The build is the only input that changes within a patch: it versions the cached response
+        build_version = hashlib.sha1(json.dumps(popular_build, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return await static_response(
+            http_request,
+            f"patch-champion:{patch}:{champion_name}",
+            build_version,
+            lambda: _champion_by_patch_payload(champion_name, patch, popular_build),
+            cache_control=BUILD_CACHE_CONTROL
+        )
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _champion_by_patch_payload(champion_name: str, patch: str, popular_build: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Champion combat power for a patch (blocking: may fetch the patch's DDragon data)"""
+    # Get champion data for this patch
+    champions = multi_patch_data.get_champions_for_patch(patch)
+
+    if champion_name not in champions:
+        raise HTTPException(
+            status_code=404,
+            detail=f'Champion {champion_name} not found in patch {patch}'
+        )
+
+    champion_data = champions[champion_name]
+
+    # Calculate combat power with popular build if available
+    if popular_build:
+        combat_power = combat_power_calculator.calculate_champion_power(
+            champion_data,
+            popular_build.get('items', []),
+            popular_build.get('runes', [])
+        )
+    else:
+        combat_power = combat_power_calculator.calculate_base_power(champion_data)
+
+    return {
+        'success': True,
+        'champion': champion_name,
+        'patch': patch,
+        'combat_power': round(combat_power, 2),
+        'popular_build': popular_build,
+        'has_build_data': popular_build is not None
+    }
+
+
 # ============================================================================
 # Custom Build Routes (from combatpower/routes/custom_build_routes.py)
 # ============================================================================
@@ -3023,6 +2820,112 @@ async def set_champion_custom_build(champion_name: str, build_data: dict):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+class DashboardRequest(AgentRequest):
+    """Dashboard Request Model - several agents for one player/time_range/queue"""
+    agents: List[str] = Field(..., description="Agent IDs to run, e.g. ['weakness-analysis', 'progress-tracker']")
+
+
+# Player-level agents the dashboard can multiplex (agent id → deterministic stage function)
+DASHBOARD_AGENTS = {
+    "weakness-analysis": _weakness_analysis_stage,
+    "annual-summary": _annual_summary_stage,
+    "champion-mastery": _champion_mastery_stage,
+    "progress-tracker": _progress_tracker_stage,
+    "peer-comparison": _peer_comparison_stage,
+    "role-specialization": _role_specialization_stage,
+    "champion-recommendation": _champion_recommendation_stage,
+    "multi-version": _multi_version_stage,
+    "risk-forecaster": _risk_forecaster_stage,
+    "version-trends": _version_trends_stage,
+    "performance-insights": _performance_insights_stage,
+}
+
+
+@app.post("/v1/agents/dashboard")
+async def agents_dashboard(request: DashboardRequest):
+    """
+    Dashboard - run several agents for one player over a single SSE connection
+
+    Player data is awaited and the filtered packs are loaded once into a shared
+    AgentContext. Every agent's deterministic stage (pack filtering, analysis,
+    prompts) then runs once, in parallel, over that context; only after that are
+    the agents' LLM streams multiplexed. Every message carries an "agent" field,
+    with agent_start / agent_done events per agent and a final dashboard_complete event.
+    """
+    from fastapi.responses import StreamingResponse
+    from services.dashboard_stream import multiplex_agent_streams
+
+    agent_ids = list(dict.fromkeys(request.agents))
+    unknown = [agent_id for agent_id in agent_ids if agent_id not in DASHBOARD_AGENTS]
+    agent_ids = [agent_id for agent_id in agent_ids if agent_id in DASHBOARD_AGENTS]
+
+    async def run_stage(agent_id: str, context: AgentContext) -> AgentStage:
+        param_error = agent_param_error(agent_id, request)
+        if param_error:
+            return AgentStage.error(param_error)
+        try:
+            return await run_in_worker(DASHBOARD_AGENTS[agent_id], request, context)
+        except Exception as e:
+            print(f"❌ Dashboard agent {agent_id} stage failed: {e}")
+            return AgentStage.error(str(e))
+
+    async def generate_stream():
+        try:
+            print(f"\n{'='*60}\n📊 Dashboard - Agents: {', '.join(agent_ids)}\n{'='*60}")
+
+            for agent_id in unknown:
+                yield sse_event({"type": "error", "agent": agent_id, "error": f"Unknown dashboard agent: {agent_id}"})
+            if not agent_ids:
+                yield sse_event({"type": "dashboard_complete", "agents": [], "elapsed": 0})
+                return
+
+            # Step 1: Wait for data preparation (once for every agent)
+            await player_data_manager.wait_for_data(puuid=request.puuid, timeout=120)
+
+            # Step 2: Get packs directory
+            packs_dir = player_data_manager.get_packs_dir(request.puuid)
+            if not packs_dir:
+                yield f"data: {{\"error\": \"Player data not ready\"}}\n\n"
+                return
+
+            # Step 3: Load the filtered packs once into the shared context
+            context = AgentContext(user_request=f"dashboard: {', '.join(agent_ids)}", packs_dir=packs_dir)
+            context.prewarm_cache("dashboard", queue_id=request.queue_id, time_range=request.time_range)
+            packs = await run_in_worker(context.shared_packs, request.queue_id, request.time_range)
+
+            yield sse_event({
+                "type": "dashboard_start",
+                "agents": agent_ids,
+                "packs": len(packs or []),
+                "time_range": request.time_range,
+                "queue_id": request.queue_id
+            })
+
+            # Step 4: Every agent's deterministic stage once, in parallel, over the shared context
+            stages = dict(zip(agent_ids, await asyncio.gather(*(run_stage(agent_id, context) for agent_id in agent_ids))))
+
+            # Step 5: Multiplex the agents' analysis messages and LLM streams over this connection
+            async for message in multiplex_agent_streams({
+                agent_id: functools.partial(stream_agent_stage, stage) for agent_id, stage in stages.items()
+            }):
+                yield message
+
+        except Exception as e:
+            import traceback
+            print(f"❌ Error: {traceback.format_exc()}")
+            yield f"data: {{\"error\": \"{str(e)}\"}}\n\n"
+
+    return StreamingResponse(
+        generate_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 @app.get("/v1/agents/list")
 async def list_agents():
     """List all available Agents"""
@@ -3044,6 +2947,7 @@ async def list_agents():
             {"id": "postgame-review", "name": "Postgame Review", "endpoint": "/v1/agents/postgame-review"},
             {"id": "timeline-deep-dive", "name": "Timeline Deep Dive", "endpoint": "/v1/agents/timeline-deep-dive"},
             {"id": "version-comparison", "name": "Version Comparison", "endpoint": "/v1/agents/version-comparison"},
+            {"id": "dashboard", "name": "Dashboard (multiple agents, one stream)", "endpoint": "/v1/agents/dashboard"},
             {"id": "player-summary", "name": "Player Summary", "endpoint": "/api/player/{game_name}/{tag_line}/summary"},
         ]
     }
@@ -3053,10 +2957,20 @@ async def list_agents():
 # Player Data Status API
 # ============================================================================
 
+def summary_response(http_request: Request, summary: Dict[str, Any], content: Dict[str, Any], *etag_parts) -> Response:
+    """JSON response for data served from a player summary, with ETag / If-None-Match (304) support"""
+    etag = summary_etag(summary, http_request.url.path, *etag_parts)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in [tag.strip() for tag in http_request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=content, headers=headers)
+
+
 @app.get("/api/player/{game_name}/{tag_line}/champions")
 async def get_player_champions(
     game_name: str,
     tag_line: str,
+    http_request: Request,
     time_range: str = None,
     queue_id: int = None,
     limit: int = 50
@@ -3082,14 +2996,19 @@ async def get_player_champions(
         
         puuid = account['puuid']
         
-        # Get champion stats with filters
+        # Get champion stats with filters (pre-aggregated summary)
         # Note: Champion Mastery uses all game modes, so queue_id should be None
-        champions = player_data_manager.get_best_champions(puuid, limit=limit, time_range=time_range, queue_id=queue_id)
-        
-        return {
+        summary = await run_in_worker(player_data_manager.get_player_summary, puuid, time_range=time_range, queue_id=queue_id)
+        if not summary:
+            return {
+                'success': True,
+                'champions': []
+            }
+
+        return summary_response(http_request, summary, {
             'success': True,
-            'champions': champions
-        }
+            'champions': summary['champions'][:limit]
+        }, limit)
     except HTTPException:
         raise
     except Exception as e:
@@ -3103,6 +3022,7 @@ async def get_player_champions(
 async def get_player_role_stats(
     game_name: str,
     tag_line: str,
+    http_request: Request,
     time_range: str = None,
     queue_id: int = None
 ):
@@ -3126,13 +3046,18 @@ async def get_player_role_stats(
         
         puuid = account['puuid']
         
-        # Get role stats with filters
-        role_stats = player_data_manager.get_role_stats(puuid, time_range=time_range, queue_id=queue_id)
-        
-        return {
+        # Get role stats with filters (pre-aggregated summary)
+        summary = await run_in_worker(player_data_manager.get_player_summary, puuid, time_range=time_range, queue_id=queue_id)
+        if not summary:
+            return {
+                'success': True,
+                'role_stats': []
+            }
+
+        return summary_response(http_request, summary, {
             'success': True,
-            'role_stats': role_stats
-        }
+            'role_stats': summary['role_stats']
+        })
     except HTTPException:
         raise
     except Exception as e:
@@ -3196,10 +3121,10 @@ async def get_player_data_status(game_name: str, tag_line: str):
                 }
             }
 
-        # Read all pack files (including queue_id-specific packs)
-        pack_files = sorted(player_dir.glob("pack_*.json"))
+        # Read the pack manifest (one row per pack file, including queue_id-specific packs)
+        pack_rows = pack_cache.load_manifest(player_dir).rows()
 
-        if not pack_files:
+        if not pack_rows:
             return {
                 "success": True,
                 "puuid": puuid,
@@ -3252,10 +3177,8 @@ async def get_player_data_status(game_name: str, tag_line: str):
         today = datetime.now(timezone.utc)
         past_365_days_start = today - timedelta(days=365)
 
-        for pack_file in pack_files:
-            with open(pack_file, 'r') as f:
-                pack = json.load(f)
-
+        # Manifest rows carry the same fields as the packs, so no pack file is opened here
+        for pack in pack_rows:
             patch = pack.get("patch", "unknown")
             games = pack.get("total_games", 0)
             queue_id = pack.get("queue_id", 420)  # Default to Solo/Duo for legacy packs
@@ -3484,7 +3407,7 @@ async def get_player_data_status(game_name: str, tag_line: str):
 
 
 @app.get("/api/player/{game_name}/{tag_line}/progress")
-async def get_player_progress(game_name: str, tag_line: str):
+async def get_player_progress(game_name: str, tag_line: str, http_request: Request):
     """
     Get player's progress data across patches (time series)
 
@@ -3507,84 +3430,18 @@ async def get_player_progress(game_name: str, tag_line: str):
 
         puuid = account['puuid']
 
-        # Get player packs directory
-        player_dir = Path("data/player_packs") / puuid
-
-        if not player_dir.exists():
-            return {
-                "success": True,
-                "data": []
-            }
-
-        # Read all pack files
-        pack_files = sorted(player_dir.glob("pack_*.json"))
-
-        if not pack_files:
+        # Per-patch trends from the pre-aggregated summary (all queues, all time)
+        summary = await run_in_worker(player_data_manager.get_player_summary, puuid)
+        if not summary:
             return {
                 "success": True,
                 "data": []
             }
 
-        # Collect progress data across patches
-        progress_data = []
-
-        for pack_file in pack_files:
-            with open(pack_file, 'r') as f:
-                pack = json.load(f)
-
-            patch = pack.get("patch", "unknown")
-
-            # Calculate aggregated metrics from by_cr (champion-role combinations)
-            by_cr = pack.get("by_cr", [])
-
-            if not by_cr:
-                continue
-
-            total_games = 0
-            total_wins = 0
-            total_combat_power = 0
-            total_kda = 0
-            total_obj_rate = 0
-            total_gold = 0
-
-            for cr in by_cr:
-                games = cr.get("games", 0)
-                total_games += games
-                total_wins += cr.get("wins", 0)
-
-                # Weight by games
-                total_combat_power += cr.get("combat_power", 0) * games
-                total_kda += cr.get("kda_adj", 0) * games
-                total_obj_rate += cr.get("obj_rate", 0) * games
-                total_gold += cr.get("gold_per_min", 0) * games
-
-            if total_games == 0:
-                continue
-
-            # Calculate averages
-            avg_combat_power = total_combat_power / total_games
-            avg_kda = total_kda / total_games
-            avg_obj_rate = total_obj_rate / total_games
-            avg_gold = total_gold / total_games
-            win_rate = total_wins / total_games
-
-            progress_data.append({
-                "patch": patch,
-                "combat_power": round(avg_combat_power, 2),
-                "kda": round(avg_kda, 2),
-                "win_rate": round(win_rate, 3),
-                "objective_rate": round(avg_obj_rate, 3),
-                "gold_per_min": round(avg_gold, 1),
-                "games": total_games
-            })
-
-        # Sort by patch version
-        progress_data.sort(key=lambda x: x["patch"])
-
-        return {
+        return summary_response(http_request, summary, {
             "success": True,
-            "data": progress_data
-        }
+            "data": summary["progress"]
+        })
 
     except HTTPException:
         raise
@@ -3596,7 +3453,7 @@ async def get_player_progress(game_name: str, tag_line: str):
 
 
 @app.get("/api/player/{game_name}/{tag_line}/skills")
-async def get_player_skills(game_name: str, tag_line: str, top_n: int = 3):
+async def get_player_skills(game_name: str, tag_line: str, http_request: Request, top_n: int = 3):
     """
     Get player's skill analysis (5-dimensional radar chart data)
 
@@ -3614,13 +3471,6 @@ async def get_player_skills(game_name: str, tag_line: str, top_n: int = 3):
     tag_line = tag_line.strip()
 
     try:
-        # Load champion ID to name mapping
-        champion_mapping = {}
-        mapping_file = Path("data/static/mappings/champions.json")
-        if mapping_file.exists():
-            with open(mapping_file, 'r') as f:
-                champion_mapping = json.load(f)
-
         # Get account info
         account = await riot_client.get_account_by_riot_id(game_name, tag_line, region='americas')
         if not account:
@@ -3628,156 +3478,19 @@ async def get_player_skills(game_name: str, tag_line: str, top_n: int = 3):
 
         puuid = account['puuid']
 
-        # Get player packs directory
-        player_dir = Path("data/player_packs") / puuid
-
-        if not player_dir.exists():
-            return {
-                "success": True,
-                "data": []
-            }
-
-        # Read all pack files to aggregate champion data
-        pack_files = sorted(player_dir.glob("pack_*.json"))
-
-        if not pack_files:
+        # Skill radar per champion-role from the pre-aggregated summary (all queues, all time)
+        summary = await run_in_worker(player_data_manager.get_player_summary, puuid)
+        if not summary:
             return {
                 "success": True,
                 "data": []
             }
 
-        # Aggregate data by champion across all patches
-        champion_data = {}
-
-        for pack_file in pack_files:
-            with open(pack_file, 'r') as f:
-                pack = json.load(f)
-
-            by_cr = pack.get("by_cr", [])
-
-            for cr in by_cr:
-                # Get champion ID and map to name
-                champ_id = cr.get("champ_id")
-                if champ_id is None:
-                    continue
-
-                champion = champion_mapping.get(str(champ_id), "Unknown")
-                champion_id_value = champ_id  # Store for response
-                role = cr.get("role", "")
-                games = cr.get("games", 0)
-
-                if games == 0:
-                    continue
-
-                # Create unique key for champion-role
-                key = f"{champion}_{role}" if role else champion
-
-                if key not in champion_data:
-                    champion_data[key] = {
-                        "champion": champion,
-                        "champion_id": champion_id_value,
-                        "role": role,
-                        "games": 0,
-                        "wins": 0,
-                        "kills": 0,
-                        "deaths": 0,
-                        "assists": 0,
-                        "damage_dealt": 0,
-                        "damage_taken": 0,
-                        "gold": 0,
-                        "combat_power": 0,
-                        "obj_rate": 0,
-                        "vision_score": 0
-                    }
-
-                # Aggregate metrics (weighted by games)
-                champion_data[key]["games"] += games
-                champion_data[key]["wins"] += cr.get("wins", 0)
-                champion_data[key]["kills"] += cr.get("kills", 0) * games
-                champion_data[key]["deaths"] += cr.get("deaths", 0) * games
-                champion_data[key]["assists"] += cr.get("assists", 0) * games
-                champion_data[key]["damage_dealt"] += cr.get("damage_dealt", 0) * games
-                champion_data[key]["damage_taken"] += cr.get("damage_taken", 0) * games
-                champion_data[key]["gold"] += cr.get("gold_per_min", 0) * games
-                champion_data[key]["combat_power"] += cr.get("combat_power", 0) * games
-                champion_data[key]["obj_rate"] += cr.get("obj_rate", 0) * games
-                champion_data[key]["vision_score"] += cr.get("vision_score", 0) * games
-
-        # Calculate averages and skill scores
-        skills_data = []
-
-        for key, data in champion_data.items():
-            games = data["games"]
-            if games == 0:
-                continue
-
-            # Calculate averages
-            avg_kills = data["kills"] / games
-            avg_deaths = data["deaths"] / games
-            avg_assists = data["assists"] / games
-            avg_damage_dealt = data["damage_dealt"] / games
-            avg_damage_taken = data["damage_taken"] / games
-            avg_gold = data["gold"] / games
-            avg_combat_power = data["combat_power"] / games
-            avg_obj_rate = data["obj_rate"] / games
-            avg_vision = data["vision_score"] / games
-            kda = (avg_kills + avg_assists) / max(avg_deaths, 1)
-            win_rate = data["wins"] / games
-
-            # Calculate 5 skill dimensions (0-100 scale)
-
-            # 1. Offense: damage dealt, kills, combat power
-            offense_score = min(100, (
-                (avg_damage_dealt / 600) * 40 +  # Normalize damage (assume 600 avg)
-                (avg_kills / 8) * 30 +             # Normalize kills (assume 8 avg)
-                (avg_combat_power / 1200) * 30    # Normalize combat power
-            ))
-
-            # 2. Defense: survival (inverse deaths), damage taken mitigation
-            # Lower deaths = higher defense score
-            death_score = max(0, 100 - (avg_deaths / 8) * 100)  # Assume 8 deaths = 0 score
-            defense_score = min(100, (
-                death_score * 0.6 +                              # 60% weight on survival
-                min(100, (avg_damage_taken / 25000) * 100) * 0.4  # 40% weight on tankiness
-            ))
-
-            # 3. Teamwork: assists, objective rate
-            teamwork_score = min(100, (
-                (avg_assists / 10) * 60 +          # Normalize assists (assume 10 avg)
-                (avg_obj_rate) * 100 * 0.4         # obj_rate already 0-1
-            ))
-
-            # 4. Economy: gold per minute
-            # Assume 400 gold/min = 100 score
-            economy_score = min(100, (avg_gold / 400) * 100)
-
-            # 5. Vision: vision score
-            # Assume 60 vision score = 100 score
-            vision_score = min(100, (avg_vision / 60) * 100)
-
-            skills_data.append({
-                "champion": data["champion"],
-                "champion_id": data["champion_id"],
-                "role": data["role"],
-                "games": games,
-                "win_rate": round(win_rate, 3),
-                "skills": [
-                    {"subject": "Offense", "value": round(offense_score, 1), "fullMark": 100},
-                    {"subject": "Defense", "value": round(defense_score, 1), "fullMark": 100},
-                    {"subject": "Teamwork", "value": round(teamwork_score, 1), "fullMark": 100},
-                    {"subject": "Economy", "value": round(economy_score, 1), "fullMark": 100},
-                    {"subject": "Vision", "value": round(vision_score, 1), "fullMark": 100}
-                ]
-            })
-
-        # Sort by games played (descending)
-        skills_data.sort(key=lambda x: x["games"], reverse=True)
-
         # Return top N champions
-        return {
+        return summary_response(http_request, summary, {
             "success": True,
-            "data": skills_data[:top_n]
-        }
+            "data": summary["skills"][:top_n]
+        }, top_n)
 
     except HTTPException:
         raise
@@ -3843,7 +3556,7 @@ async def get_player_matches(game_name: str, tag_line: str, limit: int = 20):
 # ============================================================================
 
 @app.get("/api/v1/static/champions")
-async def get_static_champions():
+async def get_static_champions(http_request: Request):
     """
     Get DDragon champion data
 
@@ -3854,21 +3567,22 @@ async def get_static_champions():
         For detailed DDragon data, consider using the CDN directly:
         https://ddragon.leagueoflegends.com/cdn/15.1.1/data/en_US/champion.json
     """
-    try:
-        champion_data = data_dragon.get_champions()
-
+    def build():
         return {
             "success": True,
-            "data": champion_data,
+            "data": data_dragon.get_champions(),
             "note": "For complete DDragon data with version control, use https://ddragon.leagueoflegends.com"
         }
 
+    try:
+        return await static_response(http_request, "static:champions", data_dragon.version, build)
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching champion data: {str(e)}")
 
 
 @app.get("/api/v1/static/items")
-async def get_static_items():
+async def get_static_items(http_request: Request):
     """
     Get DDragon item data
 
@@ -3879,21 +3593,22 @@ async def get_static_items():
         For detailed DDragon data, consider using the CDN directly:
         https://ddragon.leagueoflegends.com/cdn/15.1.1/data/en_US/item.json
     """
-    try:
-        item_data = data_dragon.get_items()
-
+    def build():
         return {
             "success": True,
-            "data": item_data,
+            "data": data_dragon.get_items(),
             "note": "For complete DDragon data with version control, use https://ddragon.leagueoflegends.com"
         }
 
+    try:
+        return await static_response(http_request, "static:items", data_dragon.version, build)
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching item data: {str(e)}")
 
 
 @app.get("/api/v1/static/runes")
-async def get_static_runes():
+async def get_static_runes(http_request: Request):
     """
     Get DDragon rune data
 
@@ -3904,15 +3619,16 @@ async def get_static_runes():
         For detailed DDragon data, consider using the CDN directly:
         https://ddragon.leagueoflegends.com/cdn/15.1.1/data/en_US/runesReforged.json
     """
-    try:
-        rune_data = data_dragon.get_runes()
-
+    def build():
         return {
             "success": True,
-            "data": rune_data,
+            "data": data_dragon.get_runes(),
             "note": "For complete DDragon data with version control, use https://ddragon.leagueoflegends.com"
         }
 
+    try:
+        return await static_response(http_request, "static:runes", data_dragon.version, build)
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching rune data: {str(e)}")
 
@@ -4057,7 +3773,7 @@ async def execute_agent(agent_id: str, packs_dir: str, puuid: str, region: str,
         from src.agents.player_analysis.weakness_analysis.agent import WeaknessAnalysisAgent
 
         agent = WeaknessAnalysisAgent(model="haiku")
-        for message in cached_agent_stream(
+        async for message in stream_in_worker(cached_agent_stream(
             agent_id='weakness-analysis',
             agent_run_stream_func=lambda: agent.run_stream(packs_dir, recent_count, time_range, queue_id),
             puuid=puuid,
@@ -4065,34 +3781,34 @@ async def execute_agent(agent_id: str, packs_dir: str, puuid: str, region: str,
             recent_count=recent_count,
             time_range=time_range,
             queue_id=queue_id
-        ):
+        )):
             yield message
 
     elif agent_id == "annual-summary":
         from src.agents.player_analysis.annual_summary.agent import AnnualSummaryAgent
 
         agent = AnnualSummaryAgent(model="haiku")
-        for message in cached_agent_stream(
+        async for message in stream_in_worker(cached_agent_stream(
             agent_id='annual-summary',
             agent_run_stream_func=lambda: agent.run_stream(packs_dir, time_range, queue_id),
             puuid=puuid,
             packs_dir=Path(packs_dir),
             time_range=time_range,
             queue_id=queue_id
-        ):
+        )):
             yield message
 
     elif agent_id == "champion-recommendation":
         from src.agents.player_analysis.champion_recommendation.agent import ChampionRecommendationAgent
         agent = ChampionRecommendationAgent(model="haiku")
-        for message in cached_agent_stream(
+        async for message in stream_in_worker(cached_agent_stream(
             agent_id='champion-recommendation',
             agent_run_stream_func=lambda: agent.run_stream(packs_dir, time_range, queue_id),
             puuid=puuid,
             packs_dir=Path(packs_dir),
             time_range=time_range,
             queue_id=queue_id
-        ):
+        )):
             yield message
 
     elif agent_id == "role-specialization":
@@ -4103,7 +3819,7 @@ async def execute_agent(agent_id: str, packs_dir: str, puuid: str, region: str,
 
         from src.agents.player_analysis.role_specialization.agent import RoleSpecializationAgent
         agent = RoleSpecializationAgent(model="haiku")
-        for message in cached_agent_stream(
+        async for message in stream_in_worker(cached_agent_stream(
             agent_id='role-specialization',
             agent_run_stream_func=lambda: agent.run_stream(packs_dir, role.upper(), recent_count, time_range, queue_id),
             puuid=puuid,
@@ -4112,7 +3828,7 @@ async def execute_agent(agent_id: str, packs_dir: str, puuid: str, region: str,
             recent_count=recent_count,
             time_range=time_range,
             queue_id=queue_id
-        ):
+        )):
             yield message
 
     elif agent_id == "champion-mastery":
@@ -4123,7 +3839,7 @@ async def execute_agent(agent_id: str, packs_dir: str, puuid: str, region: str,
 
         from src.agents.player_analysis.champion_mastery.agent import ChampionMasteryAgent
         agent = ChampionMasteryAgent(model="haiku")
-        for message in cached_agent_stream(
+        async for message in stream_in_worker(cached_agent_stream(
             agent_id='champion-mastery',
             agent_run_stream_func=lambda: agent.run_stream(packs_dir, int(champion_id), recent_count, time_range, queue_id),
             puuid=puuid,
@@ -4132,7 +3848,7 @@ async def execute_agent(agent_id: str, packs_dir: str, puuid: str, region: str,
             recent_count=recent_count,
             time_range=time_range,
             queue_id=queue_id
-        ):
+        )):
             yield message
 
     elif agent_id == "timeline-deep-dive":
@@ -4143,7 +3859,7 @@ async def execute_agent(agent_id: str, packs_dir: str, puuid: str, region: str,
 
         from src.agents.player_analysis.timeline_deep_dive.agent import TimelineDeepDiveAgent
         agent = TimelineDeepDiveAgent(model="haiku")
-        for message in cached_agent_stream(
+        async for message in stream_in_worker(cached_agent_stream(
             agent_id='timeline-deep-dive',
             agent_run_stream_func=lambda: agent.run_stream(packs_dir, match_id, recent_count, time_range, queue_id),
             puuid=puuid,
@@ -4152,20 +3868,20 @@ async def execute_agent(agent_id: str, packs_dir: str, puuid: str, region: str,
             recent_count=recent_count,
             time_range=time_range,
             queue_id=queue_id
-        ):
+        )):
             yield message
 
     elif agent_id == "version-trends":
         from src.agents.player_analysis.multi_version.agent import MultiVersionAgent
         agent = MultiVersionAgent(model="haiku")
-        for message in cached_agent_stream(
+        async for message in stream_in_worker(cached_agent_stream(
             agent_id='version-trends',
             agent_run_stream_func=lambda: agent.run_stream(packs_dir, time_range, queue_id),
             puuid=puuid,
             packs_dir=Path(packs_dir),
             time_range=time_range,
             queue_id=queue_id
-        ):
+        )):
             yield message
 
     elif agent_id == "friend-comparison":
@@ -4200,7 +3916,7 @@ async def execute_agent(agent_id: str, packs_dir: str, puuid: str, region: str,
         from services.riot_client import get_summoner_name_by_puuid
         player_name = f"Player#{region}"  # Fallback
 
-        for message in cached_agent_stream(
+        async for message in stream_in_worker(cached_agent_stream(
             agent_id='friend-comparison',
             agent_run_stream_func=lambda: agent.run_stream(
                 packs_dir=packs_dir,
@@ -4220,7 +3936,7 @@ async def execute_agent(agent_id: str, packs_dir: str, puuid: str, region: str,
             recent_count=recent_count,
             time_range=time_range,
             queue_id=queue_id
-        ):
+        )):
             yield message
 
     elif agent_id == "build-simulator":
@@ -4235,7 +3951,7 @@ async def execute_agent(agent_id: str, packs_dir: str, puuid: str, region: str,
 
         from src.agents.player_analysis.build_simulator.agent import BuildSimulatorAgent
         agent = BuildSimulatorAgent(model_id="haiku")
-        for message in cached_agent_stream(
+        async for message in stream_in_worker(cached_agent_stream(
             agent_id='build-simulator',
             agent_run_stream_func=lambda: agent.run_stream(
                 packs_dir=packs_dir,
@@ -4256,14 +3972,14 @@ async def execute_agent(agent_id: str, packs_dir: str, puuid: str, region: str,
             recent_count=recent_count,
             time_range=time_range,
             queue_id=queue_id
-        ):
+        )):
             yield message
 
     else:
         yield f"data: {{\"error\": \"Unknown agent: {agent_id}\"}}\n\n"
 
 
-async def get_player_summary_data(puuid: str, packs_dir: str) -> Dict[str, Any]:
+def get_player_summary_data(puuid: str, packs_dir: str) -> Dict[str, Any]:
     """
     Load player summary data for ChatMasterAgent context
 
@@ -4295,43 +4011,21 @@ async def get_player_summary_data(puuid: str, packs_dir: str) -> Dict[str, Any]:
                 "recent_matches": []
             }
 
-        pack_files = sorted(packs_path.glob("pack_*.json"))
-
-        total_games = 0
-        patches = []
+        # Patches and game count from the pre-aggregated summary (all queues, all time)
+        summary = player_data_manager.get_player_summary(puuid) or {}
+        total_games = summary.get("total_games", 0)
+        patches = summary.get("packs", [])
         all_matches = []
 
-        for pack_file in pack_files:
-            with open(pack_file, 'r') as f:
-                pack_data = json.load(f)
-
-            # Extract patch
-            patch = pack_file.stem.replace("pack_", "")
-            patches.append(patch)
-
-            # Count games
-            by_champion = pack_data.get("by_champion_role", {})
-            for champ_data in by_champion.values():
-                for role_data in champ_data.values():
-                    total_games += role_data.get("total_games", 0)
-
-        # Get recent match list from matches_data.json if available
-        matches_data_file = packs_path / "matches_data.json"
-        if matches_data_file.exists():
-            with open(matches_data_file, 'r') as f:
-                matches_data = json.load(f)
-
-                # Handle both list and dict formats
-                if isinstance(matches_data, list):
-                    # Direct list format: [{match1}, {match2}, ...]
-                    all_matches = matches_data[:20]
-                    total_games = len(matches_data)  # Use actual match count
-                elif isinstance(matches_data, dict):
-                    # Dict format: {"matches": [...]}
-                    all_matches = matches_data.get("matches", [])[:20]
-                    total_games = len(matches_data.get("matches", []))  # Use actual match count
-                else:
-                    all_matches = []
+        # Get recent match list from match_ids.json (sorted newest first by gameCreation) + match store
+        match_ids_file = packs_path / "match_ids.json"
+        if match_ids_file.exists():
+            with open(match_ids_file, 'r') as f:
+                match_ids = json.load(f)
+
+            if isinstance(match_ids, list):
+                all_matches = match_store.get_matches(match_ids[:20])
+                total_games = len(match_ids)  # Use actual match count
 
         return {
             "total_games": total_games,
@@ -4540,7 +4234,7 @@ async def chat_endpoint(
                 return
 
             # Step 4: Load player data for context
-            player_data = await get_player_summary_data(puuid, packs_dir)
+            player_data = await run_in_worker(get_player_summary_data, puuid, packs_dir)
 
             # Add user message to session
             session.add_message("user", message)
@@ -4551,7 +4245,7 @@ async def chat_endpoint(
 
             # Stream routing decision and agent execution
             full_response = ""
-            for sse_message in stream_chat_with_routing(
+            async for sse_message in stream_in_worker(stream_chat_with_routing(
                 user_message=message,
                 puuid=puuid,
                 packs_dir=Path(packs_dir),
@@ -4559,7 +4253,7 @@ async def chat_endpoint(
                 player_data=player_data,
                 model="haiku",
                 rule_confidence_threshold=0.7
-            ):
+            )):
                 yield sse_message
 
                 # Accumulate response for session storage
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Mock Riot API server for exercising the bulk crawler offline
+
+Serves a deterministic synthetic world (players, apex ladders, ranked matches) on the
+endpoints services/bulk_crawler.py uses, and optionally enforces an app rate limit
+(429 + Retry-After, X-App-Rate-Limit headers) so throttling behaviour can be observed.
+
+Usage:
+    python scripts/mock_riot_server.py --port 8089 --players 2000 --matches 5000 --limit 100:1
+    python -m services.bulk_crawler --base-url http://127.0.0.1:8089 --api-key mock \\
+        --bronze-dir /tmp/bronze --max-matches 500
+
+GET /__stats returns request counters.
+"""
+
+import argparse
+import random
+import time
+from collections import Counter, deque
+
+from aiohttp import web
+
+
+CHAMPION_IDS = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20,
+                21, 22, 23, 24, 25, 26, 27, 28, 29, 30, 31, 32, 33, 34, 35, 36, 37, 38, 39, 40]
+POSITIONS = ["TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY"]
+
+
+class MockRiotWorld:
+    """Deterministic players and matches (same seed → same world)"""
+
+    def __init__(self, players: int, matches: int, seed: int = 7, platform: str = "NA1"):
+        rng = random.Random(seed)
+        self.platform = platform
+        self.puuids = [f"mock-puuid-{i:06d}" for i in range(players)]
+        self.match_ids = [f"{platform}_{5000000000 + i}" for i in range(matches)]
+        self.match_players = {}
+        self.player_matches = {puuid: [] for puuid in self.puuids}
+
+        start_ms = int(time.time() * 1000) - 30 * 86400 * 1000
+        self.match_created = {}
+        for i, match_id in enumerate(self.match_ids):
+            lobby = rng.sample(self.puuids, 10)
+            self.match_players[match_id] = lobby
+            self.match_created[match_id] = start_ms + i * 60_000
+            for puuid in lobby:
+                self.player_matches[puuid].append(match_id)
+        for puuid in self.puuids:
+            self.player_matches[puuid].reverse()  # newest first, like match-v5
+
+    def league(self, tier: str, size: int):
+        offset = {"challenger": 0, "grandmaster": size, "master": 2 * size}[tier]
+        entries = [
+            {"puuid": puuid, "leaguePoints": 2000 - i, "wins": 100, "losses": 80}
+            for i, puuid in enumerate(self.puuids[offset:offset + size])
+        ]
+        return {"tier": tier.upper(), "queue": "RANKED_SOLO_5x5", "entries": entries}
+
+    def match(self, match_id: str):
+        rng = random.Random(match_id)
+        participants = []
+        for index, puuid in enumerate(self.match_players[match_id]):
+            team_id = 100 if index < 5 else 200
+            participants.append({
+                "participantId": index + 1,
+                "puuid": puuid,
+                "riotIdGameName": f"Mock{puuid[-6:]}",
+                "riotIdTagline": "MOCK",
+                "championId": rng.choice(CHAMPION_IDS),
+                "championName": f"Champion{index}",
+                "teamId": team_id,
+                "teamPosition": POSITIONS[index % 5],
+                "individualPosition": POSITIONS[index % 5],
+                "win": (team_id == 100) == (rng.random() < 0.5),
+                "kills": rng.randint(0, 15),
+                "deaths": rng.randint(0, 12),
+                "assists": rng.randint(0, 20),
+                "champLevel": rng.randint(11, 18),
+                "goldEarned": rng.randint(7000, 18000),
+                "totalDamageDealtToChampions": rng.randint(5000, 45000),
+                "totalDamageTaken": rng.randint(8000, 40000),
+                "totalMinionsKilled": rng.randint(20, 260),
+                "neutralMinionsKilled": rng.randint(0, 180),
+                "visionScore": rng.randint(5, 90),
+                "wardsPlaced": rng.randint(2, 40),
+                "wardsKilled": rng.randint(0, 12),
+                "turretKills": rng.randint(0, 4),
+                "dragonKills": rng.randint(0, 3),
+                "baronKills": rng.randint(0, 1),
+            })
+        created = self.match_created[match_id]
+        duration = rng.randint(900, 2400) if rng.random() > 0.03 else rng.randint(120, 280)
+        return {
+            "metadata": {"matchId": match_id, "participants": self.match_players[match_id]},
+            "info": {
+                "gameId": int(match_id.split("_")[1]),
+                "gameCreation": created,
+                "gameDuration": duration,
+                "gameEndTimestamp": created + duration * 1000,
+                "gameMode": "CLASSIC",
+                "gameVersion": "14.20.620.1234",
+                "queueId": 420,
+                "platformId": self.platform,
+                "participants": participants,
+            }
+        }
+
+
+def create_app(world: MockRiotWorld, ladder_size: int, limit: tuple = None) -> web.Application:
+    stats = Counter()
+    recent = deque()
+
+    @web.middleware
+    async def rate_limit(request, handler):
+        stats["requests"] += 1
+        stats[request.path.split("/")[2] if request.path.count("/") >= 3 else request.path] += 1
+        headers = {}
+        if limit and not request.path.startswith("/__"):
+            count, window = limit
+            now = time.monotonic()
+            while recent and now - recent[0] > window:
+                recent.popleft()
+            if len(recent) >= count:
+                stats["throttled"] += 1
+                retry_after = max(1, int(window - (now - recent[0]) + 0.999))
+                return web.json_response(
+                    {"status": {"message": "Rate limit exceeded", "status_code": 429}},
+                    status=429,
+                    headers={"Retry-After": str(retry_after), "X-Rate-Limit-Type": "application"}
+                )
+            recent.append(now)
+            headers = {
+                "X-App-Rate-Limit": f"{count}:{window}",
+                "X-App-Rate-Limit-Count": f"{len(recent)}:{window}",
+            }
+        response = await handler(request)
+        response.headers.update(headers)
+        return response
+
+    async def status(request):
+        return web.json_response({"id": world.platform, "maintenances": [], "incidents": []})
+
+    async def league(request):
+        tier = request.match_info["tier"]
+        if tier not in ("challenger", "grandmaster", "master"):
+            raise web.HTTPNotFound()
+        return web.json_response(world.league(tier, ladder_size))
+
+    async def match_ids(request):
+        puuid = request.match_info["puuid"]
+        if puuid not in world.player_matches:
+            raise web.HTTPNotFound()
+        ids = world.player_matches[puuid]
+        start_time = request.query.get("startTime")
+        if start_time:
+            ids = [mid for mid in ids if world.match_created[mid] >= int(start_time) * 1000]
+        start = int(request.query.get("start", 0))
+        count = min(int(request.query.get("count", 20)), 100)
+        return web.json_response(ids[start:start + count])
+
+    async def match(request):
+        match_id = request.match_info["match_id"]
+        if match_id not in world.match_players:
+            raise web.HTTPNotFound()
+        served = request.app["served"]
+        if match_id in served:
+            stats["duplicate_match_fetches"] += 1
+        served.add(match_id)
+        return web.json_response(world.match(match_id))
+
+    async def get_stats(request):
+        return web.json_response({**stats, "unique_matches": len(request.app["served"])})
+
+    app = web.Application(middlewares=[rate_limit])
+    app["served"] = set()
+    app.router.add_get("/lol/status/v4/platform-data", status)
+    app.router.add_get("/lol/league/v4/{tier}leagues/by-queue/{queue}", league)
+    app.router.add_get("/lol/match/v5/matches/by-puuid/{puuid}/ids", match_ids)
+    app.router.add_get("/lol/match/v5/matches/{match_id}", match)
+    app.router.add_get("/__stats", get_stats)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Riot API server (bulk crawler testing)")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--matches", type=int, default=5000)
+    parser.add_argument("--ladder-size", type=int, default=50, help="Players per apex ladder")
+    parser.add_argument("--limit", default=None, help="App rate limit as COUNT:WINDOW_SECONDS, e.g. 100:1")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    limit = tuple(int(x) for x in args.limit.split(":")) if args.limit else None
+    world = MockRiotWorld(args.players, args.matches, seed=args.seed)
+    print(f"🧪 Mock Riot API on http://127.0.0.1:{args.port} "
+          f"({args.players} players, {args.matches} matches, limit={args.limit or 'none'})")
+    web.run_app(create_app(world, args.ladder_size, limit), host="127.0.0.1", port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
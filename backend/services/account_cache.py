@@ -0,0 +1,303 @@
+"""
+Account Cache - Persistent Riot ID → account resolution cache
+
+gameName#tagLine → {puuid, gameName, tagLine} (+ routing region / platform once known)
+
+- Positive results are kept for POSITIVE_TTL (Riot IDs can be renamed, so not forever)
+- Not-found results are cached per routing region for NEGATIVE_TTL, so the summary
+  endpoint's four-region sweep and repeated data-status polls for a typo don't hit Riot
+- Concurrent lookups for the same Riot ID/region share one in-flight request (single-flight)
+- Entries are tagged with a fingerprint of the API key that resolved them: PUUIDs are
+  encrypted per API key, so a key rotation invalidates every cached PUUID
+
+Riot IDs are case-insensitive, keys are normalised to lower case.
+Errors (5xx, network) are never cached.
+Changes only mark the cache dirty; a background timer writes the file at most once
+per SAVE_DELAY (and on interpreter exit), so lookups never rewrite it on the event loop.
+"""
+import asyncio
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+POSITIVE_TTL = 24 * 3600      # 24 hours
+NEGATIVE_TTL = 10 * 60        # 10 minutes
+MAX_ENTRIES = 50000
+SAVE_DELAY = 2.0              # seconds between a change and the background write
+
+CACHE_VERSION = 1
+
+
+def riot_id_key(game_name: str, tag_line: str) -> str:
+    """Normalised cache key for a Riot ID"""
+    return f"{game_name.strip().lower()}#{tag_line.strip().lower()}"
+
+
+def key_fingerprint(api_key: Optional[str]) -> str:
+    """Short, non-reversible fingerprint of an API key"""
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+
+
+class AccountCache:
+    """
+    Riot ID → account cache with TTL, negative caching and single-flight lookups
+
+    使用示例:
+        account = await account_cache.resolve(
+            game_name, tag_line, region, fingerprint,
+            fetch=lambda: client._fetch_account_by_riot_id(game_name, tag_line, region)
+        )
+    """
+
+    def __init__(
+        self,
+        cache_file: Path = None,
+        positive_ttl: int = POSITIVE_TTL,
+        negative_ttl: int = NEGATIVE_TTL,
+        max_entries: int = MAX_ENTRIES,
+        save_delay: float = SAVE_DELAY
+    ):
+        self.cache_file = cache_file or Path("data/account_cache.json")
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.save_delay = save_delay
+
+        # riot_id_key → {"account", "region", "platform", "fingerprint", "cached_at"}
+        self._accounts: Optional[Dict[str, Dict[str, Any]]] = None
+        # "riot_id_key|region" → {"fingerprint", "cached_at"}
+        self._not_found: Dict[str, Dict[str, Any]] = {}
+
+        self._inflight: Dict[Tuple[str, str, str], asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        atexit.register(self.flush)
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        if self._accounts is not None:
+            return
+        accounts: Dict[str, Dict[str, Any]] = {}
+        not_found: Dict[str, Dict[str, Any]] = {}
+        if self.cache_file.exists():
+            try:
+                with open(self.cache_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == CACHE_VERSION:
+                    now = time.time()
+                    accounts = {
+                        k: v for k, v in data.get("accounts", {}).items()
+                        if now - v.get("cached_at", 0) < self.positive_ttl
+                    }
+                    not_found = {
+                        k: v for k, v in data.get("not_found", {}).items()
+                        if now - v.get("cached_at", 0) < self.negative_ttl
+                    }
+            except Exception as e:
+                print(f"⚠️  Failed to load account cache {self.cache_file}, starting empty: {e}")
+        self._accounts = accounts
+        self._not_found = not_found
+
+    def _save(self):
+        """Mark the cache dirty and schedule a background write; called with self._lock held"""
+        self._dirty = True
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self.save_delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        """Write pending changes (atomic: temp file + rename)"""
+        # Snapshot under the write lock too, so writes can't land out of order
+        with self._write_lock:
+            with self._lock:
+                self._save_timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                if len(self._accounts) > self.max_entries:
+                    oldest = sorted(self._accounts, key=lambda k: self._accounts[k].get("cached_at", 0))
+                    for k in oldest[:len(self._accounts) - self.max_entries]:
+                        del self._accounts[k]
+                # Shallow snapshot; serialising happens outside self._lock
+                snapshot = {
+                    "version": CACHE_VERSION,
+                    "accounts": dict(self._accounts),
+                    "not_found": dict(self._not_found)
+                }
+
+            try:
+                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file = self.cache_file.with_name(f".{self.cache_file.name}.{os.getpid()}.tmp")
+                with open(tmp_file, "w", encoding="utf-8") as f:
+                    json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+                tmp_file.replace(self.cache_file)
+            except Exception as e:
+                print(f"⚠️  Failed to save account cache: {e}")
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def get(self, game_name: str, tag_line: str, region: str, fingerprint: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        Cached lookup
+
+        Returns:
+            (found_in_cache, account) - account is None for a cached not-found
+        """
+        key = riot_id_key(game_name, tag_line)
+        now = time.time()
+        with self._lock:
+            self._load()
+            entry = self._accounts.get(key)
+            if entry is not None:
+                if entry.get("fingerprint") == fingerprint and now - entry["cached_at"] < self.positive_ttl:
+                    self.hits += 1
+                    return True, entry["account"]
+                del self._accounts[key]
+
+            # account-v1 is global, but not-found is only trusted for the region that said so
+            neg_key = f"{key}|{region}"
+            neg = self._not_found.get(neg_key)
+            if neg is not None:
+                if neg.get("fingerprint") == fingerprint and now - neg["cached_at"] < self.negative_ttl:
+                    self.negative_hits += 1
+                    return True, None
+                del self._not_found[neg_key]
+
+            self.misses += 1
+            return False, None
+
+    def set(self, game_name: str, tag_line: str, region: str, fingerprint: str, account: Optional[Dict[str, Any]]):
+        """Store a resolved account, or a not-found result when account is None"""
+        key = riot_id_key(game_name, tag_line)
+        now = time.time()
+        with self._lock:
+            self._load()
+            if account:
+                previous = self._accounts.get(key) or {}
+                self._accounts[key] = {
+                    "account": account,
+                    "region": region,
+                    "platform": previous.get("platform") if previous.get("fingerprint") == fingerprint else None,
+                    "fingerprint": fingerprint,
+                    "cached_at": now
+                }
+                # A successful lookup clears not-found entries for every region
+                for neg_key in [k for k in self._not_found if k.startswith(f"{key}|")]:
+                    del self._not_found[neg_key]
+            else:
+                self._not_found[f"{key}|{region}"] = {"fingerprint": fingerprint, "cached_at": now}
+            self._save()
+
+    def set_platform(self, game_name: str, tag_line: str, platform: str):
+        """Remember the platform (na1, kr, ...) a resolved account was found on"""
+        key = riot_id_key(game_name, tag_line)
+        with self._lock:
+            self._load()
+            entry = self._accounts.get(key)
+            if entry is None or entry.get("platform") == platform:
+                return
+            entry["platform"] = platform
+            self._save()
+
+    def get_location(self, game_name: str, tag_line: str) -> Tuple[Optional[str], Optional[str]]:
+        """(platform, routing region) recorded for a cached account, (None, None) if unknown"""
+        key = riot_id_key(game_name, tag_line)
+        with self._lock:
+            self._load()
+            entry = self._accounts.get(key)
+            if entry is None or time.time() - entry["cached_at"] >= self.positive_ttl:
+                return None, None
+            return entry.get("platform"), entry.get("region")
+
+    async def resolve(
+        self,
+        game_name: str,
+        tag_line: str,
+        region: str,
+        fingerprint: str,
+        fetch: Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Cached lookup; on a miss runs fetch() once per Riot ID/region no matter how
+        many callers are waiting, and caches its result (exceptions are not cached)
+        """
+        found, account = self.get(game_name, tag_line, region, fingerprint)
+        if found:
+            return account
+
+        flight_key = (riot_id_key(game_name, tag_line), region, fingerprint)
+        future = self._inflight.get(flight_key)
+        if future is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The request we were waiting on was cancelled (client went away): retry ourselves
+                return await self.resolve(game_name, tag_line, region, fingerprint, fetch)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[flight_key] = future
+        try:
+            account = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters re-raise it; mark retrieved so a lone caller doesn't log "never retrieved"
+            future.exception()
+            raise
+        else:
+            self.set(game_name, tag_line, region, fingerprint, account)
+            future.set_result(account)
+            return account
+        finally:
+            self._inflight.pop(flight_key, None)
+
+    def invalidate(self, game_name: str = None, tag_line: str = None):
+        """Drop one Riot ID (positive and negative entries) or everything"""
+        with self._lock:
+            self._load()
+            if game_name is None or tag_line is None:
+                self._accounts.clear()
+                self._not_found.clear()
+            else:
+                key = riot_id_key(game_name, tag_line)
+                self._accounts.pop(key, None)
+                for neg_key in [k for k in self._not_found if k.startswith(f"{key}|")]:
+                    del self._not_found[neg_key]
+            self._save()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._load()
+            return {
+                "accounts": len(self._accounts),
+                "not_found": len(self._not_found),
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses
+            }
+
+
+# Global singleton (shared by every RiotAPIClient instance)
+account_cache = AccountCache()
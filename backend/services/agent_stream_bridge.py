@@ -0,0 +1,156 @@
+"""
+Agent Stream Bridge - 在有界线程池中运行同步agent生成器，通过asyncio队列推送SSE消息
+
+SSE端点里的 cached_agent_stream / stream_agent_with_thinking / agent.run_stream 都是同步生成器，
+pack加载、分析和Bedrock流式调用都是阻塞的。直接在 async def generate_stream() 里迭代会卡住
+uvicorn事件循环，导致并发dashboard加载时所有请求一起变慢。
+
+- stream_in_worker: 在工作线程里迭代同步生成器，消息经asyncio队列送回事件循环
+  - 每个流最多缓冲 max_buffered 条消息，客户端读得慢时工作线程阻塞等待（背压）
+  - 客户端断开时停止生产并关闭生成器，释放工作线程
+  - 生成器抛出的异常在事件循环侧原样重新抛出，端点已有的 except 逻辑不变
+- run_in_worker: 在另一个线程池里执行一次性阻塞调用（pack加载、分析计算、summary/静态响应构建）
+
+两个线程池分开：LLM流一跑就是几分钟，如果共用一个池，并发dashboard多时所有线程都卡在
+Bedrock流里，短的 run_in_worker 调用全部排在后面。
+
+- 流线程池大小由 AGENT_STREAM_WORKERS 环境变量控制（默认16），超出的流排队等待空闲线程
+- 一次性调用线程池大小由 AGENT_TASK_WORKERS 环境变量控制（默认8）
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterable, Optional
+
+
+DEFAULT_WORKERS = int(os.getenv("AGENT_STREAM_WORKERS", "16"))
+DEFAULT_TASK_WORKERS = int(os.getenv("AGENT_TASK_WORKERS", "8"))
+DEFAULT_MAX_BUFFERED = 64
+
+# 生产者等待队列空位时检查停止标志的间隔（秒）
+_STOP_POLL_INTERVAL = 0.5
+
+_END = object()
+
+
+class _StreamError:
+    """包装生成器在工作线程中抛出的异常"""
+
+    __slots__ = ("exc",)
+
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_task_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """流式线程池（懒加载），只给 stream_in_worker 用"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=DEFAULT_WORKERS,
+                    thread_name_prefix="agent-stream"
+                )
+    return _executor
+
+
+def get_task_executor() -> ThreadPoolExecutor:
+    """一次性阻塞调用的线程池（懒加载），不会被长时间运行的LLM流占满"""
+    global _task_executor
+    if _task_executor is None:
+        with _executor_lock:
+            if _task_executor is None:
+                _task_executor = ThreadPoolExecutor(
+                    max_workers=DEFAULT_TASK_WORKERS,
+                    thread_name_prefix="agent-task"
+                )
+    return _task_executor
+
+
+async def run_in_worker(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    在一次性调用线程池中执行阻塞调用
+
+    使用示例:
+        player_data = await run_in_worker(load_player_data, packs_dir, time_range=time_range)
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_task_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def stream_in_worker(
+    iterable: Iterable[Any],
+    max_buffered: int = DEFAULT_MAX_BUFFERED
+) -> AsyncIterator[Any]:
+    """
+    在流式线程池中迭代同步生成器，异步产出其消息
+
+    Args:
+        iterable: 同步生成器/可迭代对象（生成器函数体在工作线程中执行）
+        max_buffered: 每个流最多缓冲的消息数，满了之后工作线程等待消费（背压）
+
+    使用示例:
+        async for message in stream_in_worker(cached_agent_stream(...)):
+            yield message
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    slots = threading.Semaphore(max_buffered)
+    stopped = threading.Event()
+
+    def deliver(item: Any) -> bool:
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+            return True
+        except RuntimeError:
+            # 事件循环已关闭
+            stopped.set()
+            return False
+
+    def produce():
+        iterator = None
+        try:
+            iterator = iter(iterable)
+            for item in iterator:
+                # 等待队列空位（背压），期间检查消费方是否已断开
+                while not slots.acquire(timeout=_STOP_POLL_INTERVAL):
+                    if stopped.is_set():
+                        return
+                if stopped.is_set() or not deliver(item):
+                    return
+        except Exception as e:
+            if not stopped.is_set():
+                deliver(_StreamError(e))
+            return
+        finally:
+            close = getattr(iterator if iterator is not None else iterable, "close", None)
+            if stopped.is_set() and close is not None:
+                try:
+                    close()
+                except Exception as e:
+                    print(f"⚠️  Error closing agent stream: {e}")
+        deliver(_END)
+
+    loop.run_in_executor(get_executor(), produce)
+
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                return
+            if isinstance(item, _StreamError):
+                raise item.exc
+            slots.release()
+            yield item
+    finally:
+        stopped.set()
+        # 唤醒可能正在等待空位的生产者
+        slots.release()
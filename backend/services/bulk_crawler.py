@@ -0,0 +1,493 @@
+"""
+Bulk Crawler - Resumable Riot match crawler feeding the bronze layer
+
+The global artifacts (counter matrix, power curves, rank baselines, champion similarity,
+meta tiers) are built from gold tables that are fed by bronze match files. This crawler
+fills the bronze layer directly from the Riot API:
+
+1. Seed: apex ladders (challenger / grandmaster / master) of one platform
+2. BFS: each player's recent match IDs → match details → the match's participants become
+   the next frontier (up to max_depth hops from the ladder)
+3. Dedup by match ID (crawler state + files already in the bronze layer)
+4. Bounded by quota: max_requests API calls and/or max_matches written per run
+
+Output (same layout the transforms read):
+
+    data/bronze/matches/{tier}/{platform}/{YYYY}/{MM}/{DD}/{match_id}.json
+    {"bronze_metadata": {...}, "raw_data": <match-v5 payload>}
+
+Throughput is paced by RiotAPIClient's header-driven rate limiter (all configured keys for
+match details); concurrency only has to be high enough to keep it saturated. The crawl state
+is checkpointed every CHECKPOINT_INTERVAL seconds, so an interrupted run resumes where it
+stopped: the frontier is rewritten atomically, seen players/matches are appended to a log. For a per-patch refresh, run with --reseed --since <patch start>:
+the ladder is re-seeded while already stored matches are still skipped.
+
+Against a local mock server (see scripts/mock_riot_server.py):
+
+    python -m services.bulk_crawler --base-url http://127.0.0.1:8089 --api-key mock --max-matches 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from .riot_client import RiotAPIClient
+
+
+STATE_VERSION = 2
+CHECKPOINT_INTERVAL = 30.0  # seconds
+
+# Seen log records: one "<kind> <id>" line per player added to the BFS / match written
+SEEN_PLAYER = "p"
+SEEN_MATCH = "m"
+
+LADDER_TIERS = ("challenger", "grandmaster", "master")
+
+# Minimum game length (seconds) for a match to pass the quality check (remakes are shorter)
+MIN_GAME_DURATION = 300
+
+
+class QuotaExhausted(Exception):
+    """Raised when the run's request budget is spent"""
+
+
+class BulkCrawler:
+    """
+    Ladder-seeded BFS crawler writing match-v5 payloads into the bronze layer
+
+    使用示例:
+        crawler = BulkCrawler(RiotAPIClient(), platform="kr", max_requests=20000, since=patch_start)
+        stats = await crawler.run()
+    """
+
+    def __init__(
+        self,
+        client: RiotAPIClient,
+        platform: str = "na1",
+        bronze_dir: Path = None,
+        state_file: Path = None,
+        tiers: Tuple[str, ...] = LADDER_TIERS,
+        ladder_queue: str = "RANKED_SOLO_5x5",
+        queue_id: Optional[int] = 420,
+        matches_per_player: int = 20,
+        max_depth: int = 2,
+        seed_players_per_tier: Optional[int] = None,
+        max_requests: Optional[int] = None,
+        max_matches: Optional[int] = None,
+        since: Optional[int] = None,
+        concurrency: int = 20,
+        reseed: bool = False
+    ):
+        self.client = client
+        self.platform = platform.lower()
+        self.region = client.get_region_from_platform(self.platform)
+        self.bronze_dir = bronze_dir or Path("data/bronze/matches")
+        self.state_file = state_file or Path(f"data/bronze/crawler_state_{self.platform}.json")
+        self.seen_log = self.state_file.with_suffix(".seen.log")
+        self.tiers = tuple(t.lower() for t in tiers)
+        self.ladder_queue = ladder_queue
+        self.queue_id = queue_id
+        self.matches_per_player = matches_per_player
+        self.max_depth = max_depth
+        self.seed_players_per_tier = seed_players_per_tier
+        self.max_requests = max_requests
+        self.max_matches = max_matches
+        self.since = since  # epoch seconds (match history startTime)
+        self.concurrency = concurrency
+        self.reseed = reseed
+
+        # Crawl state
+        self.frontier: Deque[Tuple[str, str, int]] = deque()  # (puuid, tier, depth)
+        self.in_flight: Dict[str, Tuple[str, str, int]] = {}
+        self.seen_players: Set[str] = set()
+        self.seen_matches: Set[str] = set()
+        self.totals = {"requests": 0, "matches_written": 0, "players_crawled": 0}
+
+        # This run
+        self.requests = 0
+        self.matches_written = 0
+        self.players_crawled = 0
+        self.errors = 0
+        self._stop = False
+        self._checkpointed_at = time.monotonic()
+        self._seen_delta: List[Tuple[str, str]] = []  # (kind, id) not yet appended to the seen log
+        self._matches_in_flight = 0
+        self._match_semaphore = asyncio.Semaphore(concurrency)
+        self._checkpoint_lock = asyncio.Lock()
+
+    # ========================================================================
+    # State
+    # ========================================================================
+
+    def _load_state(self) -> bool:
+        if not self.state_file.exists():
+            return False
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception as e:
+            print(f"⚠️  Crawler state unreadable, starting fresh: {e}")
+            return False
+        if state.get("version") != STATE_VERSION:
+            return False
+
+        self.frontier = deque(tuple(entry) for entry in state.get("frontier", []))
+        self.seen_players, self.seen_matches = self._load_seen_log()
+        self.totals.update(state.get("totals", {}))
+        return True
+
+    def _load_seen_log(self) -> Tuple[Set[str], Set[str]]:
+        """Replay the seen log (a torn last line from an interrupted append is cut off)"""
+        players, matches = set(), set()
+        if not self.seen_log.exists():
+            return players, matches
+        with open(self.seen_log, 'rb+') as f:
+            data = f.read()
+            complete = data.rfind(b"\n") + 1
+            if complete < len(data):
+                f.truncate(complete)
+        for line in data[:complete].decode('utf-8').splitlines():
+            kind, _, value = line.partition(" ")
+            if kind == SEEN_PLAYER:
+                players.add(value)
+            elif kind == SEEN_MATCH:
+                matches.add(value)
+        return players, matches
+
+    def _scan_bronze_match_ids(self) -> Set[str]:
+        """Match IDs already stored in the bronze layer (dedup when there is no state)"""
+        if not self.bronze_dir.exists():
+            return set()
+        return {path.stem for path in self.bronze_dir.rglob("*.json")}
+
+    def _mark_player_seen(self, puuid: str):
+        self.seen_players.add(puuid)
+        self._seen_delta.append((SEEN_PLAYER, puuid))
+
+    def _snapshot(self) -> Dict[str, Any]:
+        # In-flight players were not finished: they are crawled again after a resume
+        return {
+            "version": STATE_VERSION,
+            "platform": self.platform,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+            "frontier": list(self.in_flight.values()) + list(self.frontier),
+            "totals": dict(self.totals)
+        }
+
+    def _write_state(self, snapshot: Dict[str, Any], seen_delta: List[Tuple[str, str]]):
+        """
+        Atomic frontier write (temp file + rename), then append the new seen IDs
+
+        The frontier goes first: if the append is lost, a player may be crawled twice
+        after a resume, but no queued player is ever dropped.
+        """
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.state_file.with_name(f".{self.state_file.name}.{os.getpid()}.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        tmp_file.replace(self.state_file)
+
+        if seen_delta:
+            with open(self.seen_log, 'a', encoding='utf-8') as f:
+                f.write("".join(f"{kind} {value}\n" for kind, value in seen_delta))
+
+    def _compact_seen_log(self, players: Set[str], matches: Set[str]):
+        """Rewrite the seen log from the full sets (new crawl or re-seed only)"""
+        self.seen_log.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.seen_log.with_name(f".{self.seen_log.name}.{os.getpid()}.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            for match_id in matches:
+                f.write(f"{SEEN_MATCH} {match_id}\n")
+            for puuid in players:
+                f.write(f"{SEEN_PLAYER} {puuid}\n")
+        tmp_file.replace(self.seen_log)
+
+    async def checkpoint(self):
+        async with self._checkpoint_lock:
+            self._checkpointed_at = time.monotonic()
+            snapshot, seen_delta = self._snapshot(), self._seen_delta
+            self._seen_delta = []
+            try:
+                await asyncio.to_thread(self._write_state, snapshot, seen_delta)
+            except Exception as e:
+                # Keep the IDs for the next checkpoint
+                self._seen_delta = seen_delta + self._seen_delta
+                print(f"⚠️  Failed to checkpoint crawler state: {e}")
+
+    # ========================================================================
+    # Riot API
+    # ========================================================================
+
+    async def _call(self, method, *args, **kwargs):
+        """One API call, counted against the request budget"""
+        if self.max_requests is not None and self.requests >= self.max_requests:
+            self._stop = True
+            raise QuotaExhausted()
+        self.requests += 1
+        self.totals["requests"] += 1
+        return await method(*args, **kwargs)
+
+    async def seed(self):
+        """Seed the frontier from the apex ladders"""
+        ladder_methods = {
+            "challenger": self.client.get_challenger_league,
+            "grandmaster": self.client.get_grandmaster_league,
+            "master": self.client.get_master_league,
+        }
+        for tier in self.tiers:
+            method = ladder_methods.get(tier)
+            if method is None:
+                print(f"⚠️  No ladder endpoint for tier {tier}, skipped")
+                continue
+
+            league = await self._call(method, queue=self.ladder_queue, platform=self.platform)
+            entries = sorted((league or {}).get("entries", []), key=lambda e: e.get("leaguePoints", 0), reverse=True)
+            if self.seed_players_per_tier is not None:
+                entries = entries[:self.seed_players_per_tier]
+
+            seeded = 0
+            for entry in entries:
+                puuid = entry.get("puuid")
+                if not puuid and entry.get("summonerId"):
+                    # Older league payloads only carry the summoner ID
+                    summoner = await self._call(self.client.get_summoner_by_summoner_id, entry["summonerId"], platform=self.platform)
+                    puuid = (summoner or {}).get("puuid")
+                if puuid and puuid not in self.seen_players:
+                    self._mark_player_seen(puuid)
+                    self.frontier.append((puuid, tier, 0))
+                    seeded += 1
+            print(f"🌱 Seeded {seeded} {tier} players ({self.platform})")
+
+    # ========================================================================
+    # Crawl
+    # ========================================================================
+
+    async def run(self) -> Dict[str, Any]:
+        """Crawl until the frontier is empty or the quota is spent; returns run statistics"""
+        start = time.time()
+        resumed = self._load_state()
+        if resumed:
+            print(f"🔁 Resuming crawl: {len(self.frontier)} players queued, {len(self.seen_matches)} matches seen")
+        else:
+            self.seen_matches = self._scan_bronze_match_ids()
+            if self.seen_matches:
+                print(f"📦 {len(self.seen_matches)} matches already in {self.bronze_dir}, skipping them")
+
+        if self.reseed or not resumed:
+            # New ladder snapshot (e.g. new patch): players are crawled again, stored matches are not
+            self.frontier.clear()
+            self.seen_players.clear()
+            self._seen_delta.clear()
+            await asyncio.to_thread(self._compact_seen_log, set(), set(self.seen_matches))
+            try:
+                await self.seed()
+            except QuotaExhausted:
+                pass
+            await self.checkpoint()
+
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await self.checkpoint()
+
+        elapsed = time.time() - start
+        stats = {
+            "platform": self.platform,
+            "requests": self.requests,
+            "matches_written": self.matches_written,
+            "players_crawled": self.players_crawled,
+            "errors": self.errors,
+            "frontier": len(self.frontier),
+            "seen_matches": len(self.seen_matches),
+            "elapsed_seconds": round(elapsed, 1),
+            "requests_per_second": round(self.requests / elapsed, 1) if elapsed > 0 else 0.0,
+            "totals": dict(self.totals)
+        }
+        print(f"✅ Crawl finished: {self.matches_written} matches, {self.requests} requests "
+              f"in {elapsed:.1f}s ({stats['requests_per_second']} req/s), {len(self.frontier)} players left")
+        return stats
+
+    def _budget_left(self) -> bool:
+        if self._stop:
+            return False
+        if self.max_matches is not None and self.matches_written >= self.max_matches:
+            self._stop = True
+        if self.max_requests is not None and self.requests >= self.max_requests:
+            self._stop = True
+        return not self._stop
+
+    async def _worker(self):
+        while self._budget_left():
+            if not self.frontier:
+                if not self.in_flight:
+                    return
+                # Other workers may still discover players
+                await asyncio.sleep(0.05)
+                continue
+
+            entry = self.frontier.popleft()
+            self.in_flight[entry[0]] = entry
+            try:
+                await self._crawl_player(*entry)
+                self.players_crawled += 1
+                self.totals["players_crawled"] += 1
+            except QuotaExhausted:
+                self.frontier.appendleft(entry)
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️  Failed to crawl player {entry[0][:16]}...: {e}")
+            finally:
+                self.in_flight.pop(entry[0], None)
+
+    async def _crawl_player(self, puuid: str, tier: str, depth: int):
+        match_ids = await self._call(
+            self.client.get_match_history,
+            puuid,
+            count=self.matches_per_player,
+            queue_id=self.queue_id,
+            start_time=self.since,
+            platform=self.platform
+        ) or []
+
+        # Claim before awaiting so concurrent workers never fetch the same match
+        new_ids = [mid for mid in match_ids if mid not in self.seen_matches]
+        self.seen_matches.update(new_ids)
+
+        results = await asyncio.gather(
+            *(self._crawl_match(mid, tier, depth) for mid in new_ids),
+            return_exceptions=True
+        )
+
+        quota_hit = False
+        for match_id, result in zip(new_ids, results):
+            if isinstance(result, BaseException):
+                # Not stored: release it so a later player (or run) picks it up again
+                self.seen_matches.discard(match_id)
+                if isinstance(result, QuotaExhausted):
+                    quota_hit = True
+                else:
+                    self.errors += 1
+                    print(f"⚠️  Failed to fetch {match_id}: {result}")
+        if quota_hit:
+            raise QuotaExhausted()
+
+    async def _crawl_match(self, match_id: str, tier: str, depth: int):
+        async with self._match_semaphore:
+            # Matches already being fetched count against max_matches, so the run does not overshoot
+            if not self._budget_left() or (
+                    self.max_matches is not None and self.matches_written + self._matches_in_flight >= self.max_matches):
+                raise QuotaExhausted()
+            self._matches_in_flight += 1
+            try:
+                match = await self._call(self.client.get_match_details, match_id, region=self.region)
+                if match:
+                    await asyncio.to_thread(self._write_bronze_match, match_id, match, tier, depth)
+                    self._seen_delta.append((SEEN_MATCH, match_id))
+                    self.matches_written += 1
+                    self.totals["matches_written"] += 1
+            finally:
+                self._matches_in_flight -= 1
+        if not match:
+            return
+
+        # BFS: participants become the next frontier
+        if depth < self.max_depth:
+            for participant_puuid in match.get("metadata", {}).get("participants", []):
+                if participant_puuid not in self.seen_players:
+                    self._mark_player_seen(participant_puuid)
+                    self.frontier.append((participant_puuid, tier, depth + 1))
+
+        if time.monotonic() - self._checkpointed_at >= CHECKPOINT_INTERVAL:
+            await self.checkpoint()
+
+    def _write_bronze_match(self, match_id: str, match: Dict[str, Any], tier: str, depth: int):
+        """Atomic write into data/bronze/matches/{tier}/{platform}/{YYYY}/{MM}/{DD}/{match_id}.json"""
+        info = match.get("info", {})
+        game_created = datetime.fromtimestamp(info.get("gameCreation", 0) / 1000, tz=timezone.utc)
+        passed = len(info.get("participants", [])) == 10 and info.get("gameDuration", 0) >= MIN_GAME_DURATION
+
+        record = {
+            "bronze_metadata": {
+                "match_id": match_id,
+                "region": self.platform,
+                "tier": tier,
+                "queue_id": info.get("queueId"),
+                "source": "riot_api_bulk_crawler",
+                "crawl_depth": depth,
+                "ingestion_timestamp": datetime.now(timezone.utc).isoformat(),
+                "quality_flag": "PASS" if passed else "WARN",
+                "governance_tag": f"TIER_{tier.upper()}"
+            },
+            "raw_data": match
+        }
+
+        match_dir = self.bronze_dir / tier / self.platform / game_created.strftime("%Y/%m/%d")
+        match_dir.mkdir(parents=True, exist_ok=True)
+        match_file = match_dir / f"{match_id}.json"
+        tmp_file = match_dir / f".{match_id}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False)
+        tmp_file.replace(match_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk Riot crawler → bronze layer (data/bronze/matches)")
+    parser.add_argument("--platform", default="na1", help="Platform to crawl (na1, kr, euw1, ...)")
+    parser.add_argument("--tiers", nargs="+", default=list(LADDER_TIERS), help="Ladders to seed from")
+    parser.add_argument("--queue", type=int, default=420, help="Match history queue filter (420 = Ranked Solo)")
+    parser.add_argument("--matches-per-player", type=int, default=20)
+    parser.add_argument("--max-depth", type=int, default=2, help="BFS hops from the ladder")
+    parser.add_argument("--seed-players", type=int, default=None, help="Max seed players per tier")
+    parser.add_argument("--max-requests", type=int, default=None, help="API call budget for this run")
+    parser.add_argument("--max-matches", type=int, default=None, help="Matches to write in this run")
+    parser.add_argument("--since", type=int, default=None, help="Only matches after this epoch second (patch start)")
+    parser.add_argument("--since-days", type=int, default=None, help="Only matches from the last N days")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--reseed", action="store_true", help="Re-seed from the ladders (new patch refresh)")
+    parser.add_argument("--bronze-dir", default="data/bronze/matches")
+    parser.add_argument("--state-file", default=None)
+    parser.add_argument("--api-key", default=None, help="Single API key (default: RIOT_API_KEY_* env keys)")
+    parser.add_argument("--base-url", default=None, help="Override Riot hosts, e.g. a local mock server")
+    args = parser.parse_args()
+
+    since = args.since
+    if since is None and args.since_days:
+        since = int(time.time()) - args.since_days * 86400
+
+    async def run():
+        client = RiotAPIClient(api_key=args.api_key, default_region=args.platform, base_url=args.base_url)
+        crawler = BulkCrawler(
+            client,
+            platform=args.platform,
+            bronze_dir=Path(args.bronze_dir),
+            state_file=Path(args.state_file) if args.state_file else None,
+            tiers=tuple(args.tiers),
+            queue_id=args.queue,
+            matches_per_player=args.matches_per_player,
+            max_depth=args.max_depth,
+            seed_players_per_tier=args.seed_players,
+            max_requests=args.max_requests,
+            max_matches=args.max_matches,
+            since=since,
+            concurrency=args.concurrency,
+            reseed=args.reseed
+        )
+        try:
+            stats = await crawler.run()
+        finally:
+            await client.close()
+        print(json.dumps(stats, indent=2))
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
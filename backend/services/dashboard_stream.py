@@ -0,0 +1,146 @@
+"""
+Dashboard Stream - 把多个agent的SSE流合并到一个SSE连接上
+
+前端dashboard每张卡片原来各发一个 /v1/agents/* 请求，每个请求各自 wait_for_data、
+解析packs目录、加载pack并跑自己的LLM流。/v1/agents/dashboard 只做一次数据准备：
+
+- 每个agent拆成确定性阶段（pack过滤、分析、prompt构建）和LLM阶段，确定性阶段返回 AgentStage
+- 所有agent的确定性阶段在同一个 AgentContext（共享过滤后的pack）上并行跑一次
+- 然后用这里的 multiplex_agent_streams 并行运行各agent的LLM流：
+
+- 每个agent一个asyncio任务，消息经同一个asyncio队列按到达顺序转发（谁先产出谁先发）
+- 每条消息的JSON负载加上 "agent" 字段；非JSON负载包装为 {"type": "raw", "data": ...}
+- 每个agent开始/结束时发 agent_start / agent_done 事件，全部结束后发 dashboard_complete
+- 单个agent出错只影响它自己（发 error 事件），其它agent继续
+- 客户端断开时取消所有agent任务（各自的 stream_in_worker 随之释放工作线程）
+"""
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from services.agent_stream_bridge import stream_in_worker
+
+_DONE = object()
+
+
+def sse_event(payload: Dict[str, Any]) -> str:
+    """格式化一条SSE消息"""
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+class AgentStage:
+    """
+    agent确定性阶段的结果
+
+    - messages: LLM流之前先发出的SSE消息（前端widget用的analysis、参数/数据错误）
+    - stream: 返回LLM阶段同步SSE生成器的工厂函数；None表示没有LLM阶段（例如出错）
+    """
+
+    __slots__ = ("messages", "stream")
+
+    def __init__(self, messages: Optional[List[str]] = None, stream: Optional[Callable[[], Iterator[str]]] = None):
+        self.messages = messages or []
+        self.stream = stream
+
+    @classmethod
+    def error(cls, message: str) -> "AgentStage":
+        """只包含一条错误消息的阶段"""
+        return cls([sse_event({"error": message})])
+
+
+async def stream_agent_stage(stage: AgentStage) -> AsyncIterator[str]:
+    """先发出阶段的消息，再在流式线程池中运行它的LLM流"""
+    for message in stage.messages:
+        yield message
+    if stage.stream is not None:
+        async for message in stream_in_worker(stage.stream()):
+            yield message
+
+
+def tag_sse_message(agent_id: str, message: str) -> str:
+    """
+    给一条SSE消息加上agent标签
+
+    一条消息可能包含多行 "data: ..."，逐行处理；其它行（注释、event:）原样保留
+    """
+    lines = []
+    for line in message.split("\n"):
+        if not line.startswith("data:"):
+            lines.append(line)
+            continue
+        raw = line[5:].strip()
+        try:
+            payload = json.loads(raw)
+        except ValueError:
+            payload = None
+        if isinstance(payload, dict):
+            payload["agent"] = agent_id
+        else:
+            payload = {"type": "raw", "agent": agent_id, "data": raw if payload is None else payload}
+        lines.append(f"data: {json.dumps(payload, ensure_ascii=False)}")
+    tagged = "\n".join(lines)
+    return tagged if tagged.endswith("\n\n") else tagged.rstrip("\n") + "\n\n"
+
+
+async def multiplex_agent_streams(
+    streams: Dict[str, Callable[[], AsyncIterator[str]]],
+    max_buffered: int = 256
+) -> AsyncIterator[str]:
+    """
+    并行运行多个agent流，合并成一个带agent标签的SSE流
+
+    Args:
+        streams: {agent_id: 返回异步SSE消息迭代器的工厂函数}
+        max_buffered: 合并队列最多缓冲的消息数，客户端读得慢时各agent任务等待（背压）
+
+    使用示例:
+        async for message in multiplex_agent_streams({
+            "weakness-analysis": lambda: weakness_stream(),
+            "progress-tracker": lambda: progress_stream(),
+        }):
+            yield message
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_buffered)
+
+    async def pump(agent_id: str, factory: Callable[[], AsyncIterator[str]]):
+        start = time.time()
+        status = "success"
+        try:
+            await queue.put(sse_event({"type": "agent_start", "agent": agent_id}))
+            async for message in factory():
+                await queue.put(tag_sse_message(agent_id, message))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            status = "error"
+            print(f"❌ Dashboard agent {agent_id} failed: {e}")
+            await queue.put(sse_event({"type": "error", "agent": agent_id, "error": str(e)}))
+        await queue.put(sse_event({
+            "type": "agent_done",
+            "agent": agent_id,
+            "status": status,
+            "elapsed": round(time.time() - start, 2)
+        }))
+        await queue.put(_DONE)
+
+    tasks = [asyncio.create_task(pump(agent_id, factory)) for agent_id, factory in streams.items()]
+    remaining = len(tasks)
+    start = time.time()
+    try:
+        while remaining:
+            message = await queue.get()
+            if message is _DONE:
+                remaining -= 1
+                continue
+            yield message
+        yield sse_event({
+            "type": "dashboard_complete",
+            "agents": list(streams),
+            "elapsed": round(time.time() - start, 2)
+        })
+    finally:
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
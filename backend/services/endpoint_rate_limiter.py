@@ -1,24 +1,152 @@
 """
 Per-Endpoint Rate Limiter for Riot API
-每个API endpoint有独立的速率限制，不共享限速窗口
+每个API key、每个路由host、每个endpoint有独立的速率限制
+
+自适应限速：
+- 从响应头 X-App-Rate-Limit / X-Method-Rate-Limit 学习真实配额（"limit:window,limit:window"）
+- 用 X-App-Rate-Limit-Count / X-Method-Rate-Limit-Count 校准已用额度
+- 学到真实配额之前使用 ENDPOINT_LIMITS 中的默认值
+- 每个限速窗口是一个monotonic时钟的token bucket
+- Match API可以用任意key：acquire() 返回余量最大的key
+- 429时按 Retry-After / X-Rate-Limit-Type 冻结对应的bucket（application/method）
+
+Riot的application限额按 (API key, 路由host) 计算，method限额按 (API key, 路由host, endpoint) 计算。
 """
 import asyncio
 import re
-from collections import deque
-from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional
+import time
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
 from urllib.parse import urlparse
 
 
+# 没有Retry-After的429（通常是service限流）的退避时间（秒）
+DEFAULT_RETRY_AFTER = 1.0
+
+
+def parse_rate_limit_header(value: Optional[str]) -> List[Tuple[int, int]]:
+    """
+    解析 "20:1,100:120" → [(20, 1), (100, 120)]（limit/count:window_seconds）
+
+    无法解析的片段会被忽略
+    """
+    pairs = []
+    if not value:
+        return pairs
+    for part in value.split(','):
+        try:
+            count, window = part.strip().split(':')
+            pairs.append((int(count), int(window)))
+        except ValueError:
+            continue
+    return pairs
+
+
+class TokenBucket:
+    """
+    单个限速窗口：最多limit个token，每window秒补满（monotonic时钟）
+    """
+
+    __slots__ = ("limit", "window", "tokens", "updated")
+
+    def __init__(self, limit: int, window: int, now: float, fill: float = 1.0):
+        self.limit = max(1, limit)
+        self.window = max(1, window)
+        self.tokens = self.limit * fill
+        self.updated = now
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.limit, self.tokens + (now - self.updated) * self.limit / self.window)
+            self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """距离下一个可用token的秒数（0表示现在可用）"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) * self.window / self.limit
+
+    def consume(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def headroom(self, now: float) -> float:
+        """剩余额度比例（0~1）"""
+        self._refill(now)
+        return max(0.0, self.tokens) / self.limit
+
+    def sync_count(self, count: int, now: float):
+        """用服务端报告的已用请求数校准（只会减少token）"""
+        self._refill(now)
+        self.tokens = min(self.tokens, self.limit - count)
+
+
+class RateLimitGroup:
+    """
+    一组限速窗口（例如 20/1s + 100/120s），全部有token时才可发请求
+
+    blocked_until: 收到429后在此时间点之前不发放token（配额尚未学到时也生效）
+    """
+
+    def __init__(self, limits: Sequence[Tuple[int, int]], now: float):
+        self.limits: List[Tuple[int, int]] = list(limits)
+        self.learned = False
+        self.blocked_until = 0.0
+        self.buckets: List[TokenBucket] = [TokenBucket(limit, window, now) for limit, window in self.limits]
+
+    def wait_time(self, now: float) -> float:
+        wait = max((b.wait_time(now) for b in self.buckets), default=0.0)
+        return max(wait, self.blocked_until - now)
+
+    def headroom(self, now: float) -> float:
+        if now < self.blocked_until:
+            return 0.0
+        return min((b.headroom(now) for b in self.buckets), default=1.0)
+
+    def consume(self, now: float):
+        for bucket in self.buckets:
+            bucket.consume(now)
+
+    def update_limits(self, limits: List[Tuple[int, int]], now: float):
+        """切换到服务端报告的配额（保留每个窗口当前的剩余比例）"""
+        self.learned = True
+        if limits == self.limits:
+            return
+        old = {b.window: b for b in self.buckets}
+        buckets = []
+        for limit, window in limits:
+            previous = old.get(window)
+            fill = previous.headroom(now) if previous is not None else 1.0
+            buckets.append(TokenBucket(limit, window, now, fill))
+        self.limits = list(limits)
+        self.buckets = buckets
+
+    def sync_counts(self, counts: List[Tuple[int, int]], now: float):
+        by_window = {window: count for count, window in counts}
+        for bucket in self.buckets:
+            count = by_window.get(bucket.window)
+            if count is not None:
+                bucket.sync_count(count, now)
+
+    def block(self, until: float):
+        self.blocked_until = max(self.blocked_until, until)
+
+
 class EndpointRateLimiter:
     """
-    Per-endpoint rate limiter with independent windows for each API endpoint.
+    Adaptive per-key, per-endpoint rate limiter.
+
+    每个 (API key, 路由host) 一组application bucket，每个 (API key, 路由host, endpoint) 一组method bucket。
+    配额从响应头学习，学到之前method限额使用下面的默认值、application限额不限。
 
-    每个API endpoint维护独立的限速窗口，避免不同API之间互相影响。
-    例如：match-v5的请求不会消耗summoner-v4的配额。
+    使用方式:
+        key_index = await limiter.acquire(url, key_indices)   # 等待配额并选出余量最大的key
+        ... 发请求 ...
+        limiter.update_from_headers(url, key_index, response.headers)
+        limiter.penalize(url, key_index, retry_after, limit_type)  # 429时
     """
 
-    # Riot API官方速率限制配置 (使用90%作为安全边界)
+    # 默认method限额（学到响应头中的真实配额之前使用，取官方限额的90%）
     ENDPOINT_LIMITS = {
         # Champion API
         '/lol/platform/v3/champion-rotations': [(27, 10), (450, 600)],
@@ -83,6 +211,9 @@ class EndpointRateLimiter:
         '/lol/spectator/v5/active-games/by-summoner/{encryptedPUUID}': [(18000, 10), (1080000, 600)],
     }
 
+    # 每个endpoint pattern的URL正则（由ENDPOINT_LIMITS生成）
+    _PLACEHOLDER = re.compile(r'\{[^/]+?\}')
+
     def __init__(self, num_api_keys: int = 1):
         """
         初始化per-endpoint限速器
@@ -91,24 +222,18 @@ class EndpointRateLimiter:
             num_api_keys: API key数量，每个key有独立的限速配额
         """
         self.num_api_keys = num_api_keys
+        self._patterns = [
+            (pattern, re.compile('^' + self._PLACEHOLDER.sub('[^/]+', pattern) + '$'))
+            for pattern in self.ENDPOINT_LIMITS
+        ]
 
-        # 每个endpoint pattern的限速窗口
-        # key: endpoint_pattern (e.g., "/lol/match/v5/matches/{matchId}")
-        # value: list of deques for each rate limit window
-        self._endpoint_windows: Dict[str, List[deque]] = {}
-        self._locks: Dict[str, asyncio.Lock] = {}
-
-        # ⚡ Match-v5 API: 每个API key一个独立的限速窗口
-        # 4个keys = 4 × 2000 req/10s = 8000 req/10s 总配额
-        self._match_v5_windows = [deque() for _ in range(num_api_keys)]  # 每个key一个窗口
-        self._match_v5_locks = [asyncio.Lock() for _ in range(num_api_keys)]  # 每个key一个锁
-        self._match_v5_key_index = 0  # 轮换使用的key index
-        self._match_v5_rotation_lock = asyncio.Lock()  # 保护key轮换
-        self._match_v5_endpoints = {
-            '/lol/match/v5/matches/{matchId}',
-            '/lol/match/v5/matches/by-puuid/{puuid}/ids',
-            '/lol/match/v5/matches/{matchId}/timeline'
-        }
+        # (key_index, host) → application限额
+        self._app_groups: Dict[Tuple[int, str], RateLimitGroup] = {}
+        # (key_index, host, endpoint_pattern) → method限额
+        self._method_groups: Dict[Tuple[int, str, str], RateLimitGroup] = {}
+
+        # 余量相同时轮换起点，避免总是选第一个key
+        self._rotation = 0
 
     def _normalize_endpoint(self, url: str) -> str:
         """
@@ -120,163 +245,131 @@ class EndpointRateLimiter:
         - "https://na1.api.riotgames.com/lol/summoner/v4/summoners/by-puuid/abc123"
           -> "/lol/summoner/v4/summoners/by-puuid/{encryptedPUUID}"
         """
-        # 提取path部分
-        parsed = urlparse(url)
-        path = parsed.path
-
-        # 匹配已知的endpoint patterns
-        for pattern in self.ENDPOINT_LIMITS.keys():
-            # 将pattern转换为正则表达式
-            # 例如: "/lol/match/v5/matches/{matchId}" -> r"/lol/match/v5/matches/[^/]+"
-            regex_pattern = pattern
-            regex_pattern = regex_pattern.replace('{matchId}', '[^/]+')
-            regex_pattern = regex_pattern.replace('{puuid}', '[^/]+')
-            regex_pattern = regex_pattern.replace('{encryptedPUUID}', '[^/]+')
-            regex_pattern = regex_pattern.replace('{gameName}', '[^/]+')
-            regex_pattern = regex_pattern.replace('{tagLine}', '[^/]+')
-            regex_pattern = regex_pattern.replace('{queue}', '[^/]+')
-            regex_pattern = regex_pattern.replace('{tier}', '[^/]+')
-            regex_pattern = regex_pattern.replace('{division}', '[^/]+')
-            regex_pattern = regex_pattern.replace('{leagueId}', '[^/]+')
-            regex_pattern = regex_pattern.replace('{teamId}', '[^/]+')
-            regex_pattern = regex_pattern.replace('{tournamentId}', '[^/]+')
-            regex_pattern = regex_pattern.replace('{tournamentCode}', '[^/]+')
-            regex_pattern = regex_pattern.replace('{challengeId}', '[^/]+')
-            regex_pattern = regex_pattern.replace('{level}', '[^/]+')
-            regex_pattern = regex_pattern.replace('{championId}', '[^/]+')
-            regex_pattern = regex_pattern.replace('{game}', '[^/]+')
-            regex_pattern = f'^{regex_pattern}$'
-
-            if re.match(regex_pattern, path):
+        path = urlparse(url).path
+        for pattern, regex in self._patterns:
+            if regex.match(path):
                 return pattern
-
-        # 如果没有匹配到，返回通用限速 (最保守的match-v5限速)
-        return '/lol/match/v5/matches/{matchId}'
+        # 未知endpoint按路径本身独立限速（默认限额为最保守的match-v5限额）
+        return path
 
     def _get_rate_limits(self, endpoint_pattern: str) -> List[Tuple[int, int]]:
-        """获取endpoint的速率限制配置"""
+        """获取endpoint的默认速率限制配置"""
         return self.ENDPOINT_LIMITS.get(endpoint_pattern, [(1800, 10)])  # 默认使用match-v5限速
 
-    def _init_endpoint(self, endpoint_pattern: str):
-        """初始化endpoint的限速窗口"""
-        if endpoint_pattern not in self._endpoint_windows:
-            rate_limits = self._get_rate_limits(endpoint_pattern)
-            self._endpoint_windows[endpoint_pattern] = [deque() for _ in rate_limits]
-            self._locks[endpoint_pattern] = asyncio.Lock()
-
-    async def acquire(self, url: str):
+    @staticmethod
+    def _is_rate_limited_host(host: str) -> bool:
+        """只有Riot API host有限速（Data Dragon等CDN不限）"""
+        return host.endswith("api.riotgames.com")
+
+    def _groups(self, key_index: int, host: str, endpoint_pattern: str, now: float) -> Tuple[RateLimitGroup, RateLimitGroup]:
+        app_key = (key_index, host)
+        app_group = self._app_groups.get(app_key)
+        if app_group is None:
+            app_group = RateLimitGroup([], now)
+            self._app_groups[app_key] = app_group
+
+        method_key = (key_index, host, endpoint_pattern)
+        method_group = self._method_groups.get(method_key)
+        if method_group is None:
+            method_group = RateLimitGroup(self._get_rate_limits(endpoint_pattern), now)
+            self._method_groups[method_key] = method_group
+        return app_group, method_group
+
+    async def acquire(self, url: str, key_indices: Optional[Sequence[int]] = None) -> int:
         """
-        为指定URL获取速率限制许可
+        等待配额并选择API key
 
         Args:
             url: 完整的API URL
-        """
-        endpoint_pattern = self._normalize_endpoint(url)
+            key_indices: 可用的key（PUUID相关API只能用primary key，Match API可用全部）
 
-        # ⚡ Match-v5 API使用共享窗口
-        if endpoint_pattern in self._match_v5_endpoints:
-            return await self._acquire_match_v5()
+        Returns:
+            选中的key index（已扣除一个token）
+        """
+        if not key_indices:
+            key_indices = range(self.num_api_keys)
+        key_indices = list(key_indices)
 
-        # 其他API使用独立窗口
-        self._init_endpoint(endpoint_pattern)
-        rate_limits = self._get_rate_limits(endpoint_pattern)
-        windows = self._endpoint_windows[endpoint_pattern]
-        lock = self._locks[endpoint_pattern]
+        parsed = urlparse(url)
+        host = parsed.netloc
+        if not self._is_rate_limited_host(host):
+            return key_indices[0]
+        endpoint_pattern = self._normalize_endpoint(url)
 
+        waited = 0.0
         while True:
-            async with lock:
-                now = datetime.utcnow()
-                sleep_durations: List[float] = []
-
-                for idx, (max_requests, window_seconds) in enumerate(rate_limits):
-                    window = windows[idx]
-                    cutoff = now - timedelta(seconds=window_seconds)
-
-                    # 清理过期的时间戳
-                    while window and window[0] <= cutoff:
-                        window.popleft()
-
-                    # 检查是否达到限制
-                    if len(window) >= max_requests:
-                        oldest = window[0]
-                        remaining = window_seconds - (now - oldest).total_seconds()
-                        if remaining > 0:
-                            sleep_durations.append(remaining)
-
-                # 如果没有达到任何限制，记录本次请求并返回
-                if not sleep_durations:
-                    for window in windows:
-                        window.append(now)
-                    return
-
-                # 需要等待最长的窗口
-                sleep_time = max(sleep_durations)
-
-            # 在锁外等待，避免阻塞其他请求
+            now = time.monotonic()
+            best_index = None
+            best_headroom = -1.0
+            min_wait = float('inf')
+
+            # 从轮换起点开始遍历，余量相同时分摊到不同key
+            start = self._rotation % len(key_indices)
+            for offset in range(len(key_indices)):
+                key_index = key_indices[(start + offset) % len(key_indices)]
+                app_group, method_group = self._groups(key_index, host, endpoint_pattern, now)
+                wait = max(app_group.wait_time(now), method_group.wait_time(now))
+                if wait > 0:
+                    min_wait = min(min_wait, wait)
+                    continue
+                headroom = min(app_group.headroom(now), method_group.headroom(now))
+                if headroom > best_headroom:
+                    best_index, best_headroom = key_index, headroom
+
+            if best_index is not None:
+                app_group, method_group = self._groups(best_index, host, endpoint_pattern, now)
+                app_group.consume(now)
+                method_group.consume(now)
+                self._rotation += 1
+                if waited > 5:
+                    print(f"⏱️  Rate limiter等待了 {waited:.1f}秒 ({endpoint_pattern})")
+                return best_index
+
+            # 所有候选key都没有配额：等待最快恢复的那个（循环重试，不递归）
+            sleep_time = min_wait if min_wait < float('inf') else 0.05
+            waited += sleep_time
             await asyncio.sleep(sleep_time)
 
-    async def _acquire_match_v5(self):
+    def update_from_headers(self, url: str, key_index: int, headers: Mapping[str, str]):
+        """根据响应头更新该key的application/method真实配额和已用额度"""
+        parsed = urlparse(url)
+        host = parsed.netloc
+        if not self._is_rate_limited_host(host):
+            return
+        now = time.monotonic()
+        app_group, method_group = self._groups(key_index, host, self._normalize_endpoint(url), now)
+
+        for group, limit_header, count_header in (
+            (app_group, "X-App-Rate-Limit", "X-App-Rate-Limit-Count"),
+            (method_group, "X-Method-Rate-Limit", "X-Method-Rate-Limit-Count"),
+        ):
+            limits = parse_rate_limit_header(headers.get(limit_header))
+            if limits:
+                group.update_limits(limits, now)
+            counts = parse_rate_limit_header(headers.get(count_header))
+            if counts:
+                group.sync_counts(counts, now)
+
+    def penalize(self, url: str, key_index: int, retry_after: Optional[float], limit_type: Optional[str] = None):
         """
-        Match-v5 API轮换per-key限速窗口
-        每个API key有独立的2000 req/10s配额
-        4个keys = 4 × 2000 = 8000 req/10s 总配额
+        429处理：冻结对应bucket直到Retry-After之后
+
+        Args:
+            limit_type: X-Rate-Limit-Type（application / method / service）
         """
-        max_requests = 1800  # 90% of 2000 per key
-        window_seconds = 10
-
-        # 尝试所有keys，找到第一个可用的
-        tried_keys = 0
-        while tried_keys < self.num_api_keys:
-            # 获取下一个key index (轮换)
-            async with self._match_v5_rotation_lock:
-                key_index = self._match_v5_key_index
-                self._match_v5_key_index = (self._match_v5_key_index + 1) % self.num_api_keys
-
-            # 尝试使用这个key的配额
-            window = self._match_v5_windows[key_index]
-            lock = self._match_v5_locks[key_index]
-
-            async with lock:
-                now = datetime.utcnow()
-                cutoff = now - timedelta(seconds=window_seconds)
-
-                # 清理过期的时间戳
-                while window and window[0] <= cutoff:
-                    window.popleft()
-
-                # 检查是否达到限制
-                if len(window) < max_requests:
-                    # 这个key还有配额，使用它
-                    window.append(now)
-                    return
-
-            # 这个key满了，尝试下一个
-            tried_keys += 1
-
-        # 所有keys都满了，等待最早的key恢复
-        # 找到恢复最快的key
-        min_wait_time = float('inf')
-        for key_index in range(self.num_api_keys):
-            window = self._match_v5_windows[key_index]
-            lock = self._match_v5_locks[key_index]
-
-            async with lock:
-                if window:
-                    oldest = window[0]
-                    remaining = window_seconds - (datetime.utcnow() - oldest).total_seconds()
-                    if remaining > 0 and remaining < min_wait_time:
-                        min_wait_time = remaining
-
-        # 等待最快恢复的key
-        if min_wait_time < float('inf') and min_wait_time > 0:
-            if min_wait_time > 5:  # 如果等待超过5秒，记录日志
-                print(f"⏳ Rate limiter: 等待 {min_wait_time:.1f}秒 (所有{self.num_api_keys}个API keys都已满)")
-            await asyncio.sleep(min_wait_time + 0.1)  # 加一点buffer
+        parsed = urlparse(url)
+        host = parsed.netloc
+        if not self._is_rate_limited_host(host):
+            return
+        now = time.monotonic()
+        app_group, method_group = self._groups(key_index, host, self._normalize_endpoint(url), now)
+        until = now + (retry_after if retry_after is not None else DEFAULT_RETRY_AFTER)
+
+        if limit_type == "application":
+            app_group.block(until)
         else:
-            await asyncio.sleep(0.1)  # 短暂等待后重试
-
-        # 递归重试
-        return await self._acquire_match_v5()
+            # method限流；service限流（没有Retry-After，不计入配额）也只退避这个endpoint
+            method_group.block(until)
 
     def get_endpoint_status(self, url: str) -> Dict[str, any]:
         """
@@ -285,31 +378,23 @@ class EndpointRateLimiter:
         Returns:
             {
                 'endpoint': str,
-                'limits': [(max_req, window_sec), ...],
-                'current_usage': [(used, max, window_sec), ...]
+                'keys': [{'key_index', 'app_limits', 'method_limits', 'learned', 'headroom'}, ...]
             }
         """
+        host = urlparse(url).netloc
         endpoint_pattern = self._normalize_endpoint(url)
-        self._init_endpoint(endpoint_pattern)
-
-        rate_limits = self._get_rate_limits(endpoint_pattern)
-        windows = self._endpoint_windows[endpoint_pattern]
-
-        now = datetime.utcnow()
-        usage = []
-
-        for idx, (max_requests, window_seconds) in enumerate(rate_limits):
-            window = windows[idx]
-            cutoff = now - timedelta(seconds=window_seconds)
-
-            # 清理过期的时间戳
-            temp_window = deque([ts for ts in window if ts > cutoff])
-            used = len(temp_window)
-
-            usage.append((used, max_requests, window_seconds))
-
+        now = time.monotonic()
+        keys = []
+        for key_index in range(self.num_api_keys):
+            app_group, method_group = self._groups(key_index, host, endpoint_pattern, now)
+            keys.append({
+                'key_index': key_index,
+                'app_limits': app_group.limits,
+                'method_limits': method_group.limits,
+                'learned': app_group.learned and method_group.learned,
+                'headroom': round(min(app_group.headroom(now), method_group.headroom(now)), 3)
+            })
         return {
             'endpoint': endpoint_pattern,
-            'limits': rate_limits,
-            'current_usage': usage
+            'keys': keys
         }
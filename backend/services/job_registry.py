@@ -0,0 +1,215 @@
+"""
+Job Registry - Durable, cross-process registry of player data preparation jobs
+
+PlayerDataManager.jobs only lives in one process: with several uvicorn workers each worker
+started its own _fetch_and_calculate for the same PUUID (multiplying Riot API traffic), and a
+restart forgot every job. The registry is a small SQLite database (data/jobs.db, WAL mode)
+shared by all workers on the host:
+
+- claim() is atomic (BEGIN IMMEDIATE): exactly one worker wins the right to fetch a PUUID,
+  the others get the winning row back and follow its progress
+- The owner publishes status/progress, which doubles as a heartbeat; a job whose owner stopped
+  heart-beating for LEASE_SECONDS (crash, restart) can be claimed again
+- Finished jobs stay in the table, so status survives restarts
+
+Only job metadata lives here - packs and matches stay on disk where they were.
+"""
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+
+# Owner must heartbeat within this window or the job can be re-claimed
+LEASE_SECONDS = 30
+# A completed job with the same match budget is reused instead of re-fetched
+REUSE_SECONDS = 300
+
+ACTIVE_STATUSES = ("not_started", "fetching_matches", "fetching_timelines", "calculating_metrics")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    puuid         TEXT PRIMARY KEY,
+    region        TEXT,
+    game_name     TEXT,
+    tag_line      TEXT,
+    days          INTEGER,
+    status        TEXT NOT NULL,
+    progress      REAL NOT NULL DEFAULT 0,
+    error         TEXT,
+    owner         TEXT,
+    started_at    REAL,
+    completed_at  REAL,
+    heartbeat_at  REAL
+)
+"""
+
+
+def new_worker_id() -> str:
+    """Identifier of this process (host:pid:random), used as job owner"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class JobRegistry:
+    """
+    SQLite-backed job registry with atomic claim semantics
+
+    使用示例:
+        claimed, row = job_registry.claim(puuid, region, game_name, tag_line, days, owner=worker_id)
+        if claimed:
+            ... fetch, calling job_registry.update(puuid, owner, status, progress) periodically
+        else:
+            ... follow row via job_registry.get(puuid)
+    """
+
+    def __init__(self, db_file: Path = None, lease_seconds: int = LEASE_SECONDS, reuse_seconds: int = REUSE_SECONDS):
+        self.db_file = db_file or Path("data/jobs.db")
+        self.lease_seconds = lease_seconds
+        self.reuse_seconds = reuse_seconds
+        self._local = threading.local()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Per-thread connection (autocommit; transactions are explicit)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        with self._init_lock:
+            if not self._initialized:
+                self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_file), timeout=10, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._init_lock:
+            if not self._initialized:
+                conn.execute(_SCHEMA)
+                self._initialized = True
+        self._local.conn = conn
+        return conn
+
+    def _is_stale(self, row: sqlite3.Row, now: float) -> bool:
+        return row["status"] in ACTIVE_STATUSES and now - (row["heartbeat_at"] or 0) > self.lease_seconds
+
+    def claim(
+        self,
+        puuid: str,
+        region: str,
+        game_name: str,
+        tag_line: str,
+        days: int,
+        owner: str,
+        refresh: bool = False
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Atomically claim the fetch for a PUUID
+
+        Returns:
+            (True, new_row) if this owner should run the job;
+            (False, existing_row) if another live owner is running it, or it completed recently
+            with the same match budget (and refresh is False)
+        """
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE puuid = ?", (puuid,)).fetchone()
+            if row is not None and row["owner"] != owner:
+                if row["status"] in ACTIVE_STATUSES and not self._is_stale(row, now):
+                    conn.execute("COMMIT")
+                    return False, dict(row)
+                if (row["status"] == "completed" and not refresh and row["days"] == days and
+                        row["completed_at"] and now - row["completed_at"] < self.reuse_seconds):
+                    conn.execute("COMMIT")
+                    return False, dict(row)
+
+            conn.execute(
+                """
+                INSERT INTO jobs (puuid, region, game_name, tag_line, days, status, progress, error,
+                                  owner, started_at, completed_at, heartbeat_at)
+                VALUES (?, ?, ?, ?, ?, 'not_started', 0, NULL, ?, ?, NULL, ?)
+                ON CONFLICT(puuid) DO UPDATE SET
+                    region = excluded.region, game_name = excluded.game_name, tag_line = excluded.tag_line,
+                    days = excluded.days, status = 'not_started', progress = 0, error = NULL,
+                    owner = excluded.owner, started_at = excluded.started_at, completed_at = NULL,
+                    heartbeat_at = excluded.heartbeat_at
+                """,
+                (puuid, region, game_name, tag_line, days, owner, now, now)
+            )
+            row = conn.execute("SELECT * FROM jobs WHERE puuid = ?", (puuid,)).fetchone()
+            conn.execute("COMMIT")
+            return True, dict(row)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def update(
+        self,
+        puuid: str,
+        owner: str,
+        status: str,
+        progress: float,
+        error: Optional[str] = None,
+        completed_at: Optional[float] = None
+    ) -> bool:
+        """
+        Publish the owner's status/progress (also refreshes the heartbeat)
+
+        Returns:
+            False if this owner no longer holds the job (it was re-claimed after a stall)
+        """
+        cursor = self._connect().execute(
+            """
+            UPDATE jobs SET status = ?, progress = ?, error = ?, completed_at = ?, heartbeat_at = ?
+            WHERE puuid = ? AND owner = ?
+            """,
+            (status, progress, error, completed_at, time.time(), puuid, owner)
+        )
+        return cursor.rowcount == 1
+
+    def record_completed(self, puuid: str, region: str, game_name: str, tag_line: str, days: int, completed_at: float):
+        """Record a job served from disk cache (no fetch), unless a live job is running"""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE puuid = ?", (puuid,)).fetchone()
+            if row is None or not (row["status"] in ACTIVE_STATUSES and not self._is_stale(row, now)):
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO jobs (puuid, region, game_name, tag_line, days, status, progress,
+                                                 error, owner, started_at, completed_at, heartbeat_at)
+                    VALUES (?, ?, ?, ?, ?, 'completed', 1.0, NULL, NULL, ?, ?, ?)
+                    """,
+                    (puuid, region, game_name, tag_line, days, completed_at, completed_at, now)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(self, puuid: str) -> Optional[Dict[str, Any]]:
+        """
+        Job row, or None
+
+        An active job whose owner stopped heart-beating is reported with stale=True
+        """
+        row = self._connect().execute("SELECT * FROM jobs WHERE puuid = ?", (puuid,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["stale"] = self._is_stale(row, time.time())
+        return job
+
+    def get_stats(self) -> Dict[str, Any]:
+        rows = self._connect().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+
+# Global singleton (one database per host, shared by every worker process)
+job_registry = JobRegistry()
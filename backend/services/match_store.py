@@ -0,0 +1,329 @@
+"""
+Match Store - Compressed, sharded storage for raw match and timeline payloads
+
+Layout (one store per payload kind):
+    data/match_store/matches/shard_0a.seg    append-only compressed records
+    data/match_store/matches/shard_0a.idx    append-only index lines: "<match_id>\t<offset>\t<length>"
+    data/match_store/timelines/...
+
+Each record is a 1-byte codec tag followed by the compressed compact JSON payload.
+Payloads are immutable once written (a match ID always maps to the same Riot payload),
+so writes are skipped for IDs that are already present and no eviction is needed.
+
+Reads are O(1): the shard index is loaded once into memory, then a single seek+read
+returns the record. Several worker processes may share a store: appends hold an
+exclusive flock on the segment, and index lines written by other processes are
+picked up incrementally on a lookup miss. Per-player directories only keep match_ids.json and reference this
+store, so the same match is stored exactly once no matter how many players share it.
+"""
+import json
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import zstandard
+    _ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    _ZSTD_AVAILABLE = False
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+
+NUM_SHARDS = 64
+
+CODEC_ZLIB = b"d"
+CODEC_ZSTD = b"z"
+
+MATCHES = "matches"
+TIMELINES = "timelines"
+
+
+def _shard_of(match_id: str) -> int:
+    """Stable shard number for a match ID (crc32, independent of PYTHONHASHSEED)"""
+    return zlib.crc32(match_id.encode("utf-8")) % NUM_SHARDS
+
+
+class _Shard:
+    """One segment file plus its in-memory offset index"""
+
+    def __init__(self, directory: Path, shard_no: int):
+        self.segment_path = directory / f"shard_{shard_no:02x}.seg"
+        self.index_path = directory / f"shard_{shard_no:02x}.idx"
+        self.lock = threading.Lock()
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._index_pos = 0  # bytes of the index file already loaded
+        self._loaded = False
+
+    def _load_new_entries(self):
+        """
+        Load index lines appended since the last call (caller holds self.lock)
+
+        Only complete lines are consumed, so a line another process is still writing is
+        picked up next time. Entries pointing past the segment end (torn writes) are ignored.
+        """
+        self._loaded = True
+        if not self.index_path.exists() or self.index_path.stat().st_size == self._index_pos:
+            return
+
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_pos)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        # The segment is written before the index, so stat it after reading the index
+        segment_size = self.segment_path.stat().st_size if self.segment_path.exists() else 0
+
+        for line in data[:end].decode("utf-8").splitlines():
+            parts = line.split("\t")
+            if len(parts) != 3:
+                continue
+            try:
+                offset, length = int(parts[1]), int(parts[2])
+            except ValueError:
+                continue
+            if offset + length <= segment_size:
+                self._index[parts[0]] = (offset, length)
+        self._index_pos += end
+
+    def index(self) -> Dict[str, Tuple[int, int]]:
+        """Lazily load the index"""
+        if not self._loaded:
+            with self.lock:
+                if not self._loaded:
+                    self._load_new_entries()
+        return self._index
+
+    def lookup(self, match_id: str) -> Optional[Tuple[int, int]]:
+        """(offset, length) of a record; on a miss, entries appended by other workers are loaded first"""
+        entry = self.index().get(match_id)
+        if entry is None:
+            with self.lock:
+                self._load_new_entries()
+            entry = self._index.get(match_id)
+        return entry
+
+    def read(self, match_id: str) -> Optional[bytes]:
+        entry = self.lookup(match_id)
+        if entry is None:
+            return None
+        offset, length = entry
+        with open(self.segment_path, "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def append(self, match_id: str, record: bytes) -> bool:
+        """Append a record; returns False if the match ID is already stored (by any worker)"""
+        with self.lock:
+            self.segment_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.segment_path, "ab") as segment:
+                # Other worker processes append to the same shard: the offset is only
+                # taken, and the index only checked, while holding the file lock
+                if fcntl is not None:
+                    fcntl.flock(segment.fileno(), fcntl.LOCK_EX)
+                try:
+                    self._load_new_entries()
+                    if match_id in self._index:
+                        return False
+
+                    # Segment first, index second: a crash between the two leaves an
+                    # unreferenced tail in the segment, never an index entry without data
+                    segment.seek(0, os.SEEK_END)
+                    offset = segment.tell()
+                    segment.write(record)
+                    segment.flush()
+                    with open(self.index_path, "a", encoding="utf-8") as f:
+                        f.write(f"{match_id}\t{offset}\t{len(record)}\n")
+                    self._index[match_id] = (offset, len(record))
+                    return True
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(segment.fileno(), fcntl.LOCK_UN)
+
+
+class MatchStore:
+    """
+    Compressed match/timeline store keyed by match ID
+
+    Uses zstandard when installed, otherwise stdlib zlib. Records written with either
+    codec stay readable as long as the codec is available.
+
+    Legacy per-file JSON (data/matches/{id}.json and per-player timelines/{id}_timeline.json)
+    is still read as a fallback and migrated into the store on first access.
+    """
+
+    def __init__(
+        self,
+        root_dir: Path = None,
+        legacy_matches_dir: Path = None,
+        legacy_packs_dir: Path = None,
+        compression_level: int = 3
+    ):
+        self.root_dir = root_dir or Path("data/match_store")
+        self.legacy_matches_dir = legacy_matches_dir or Path("data/matches")
+        self.legacy_packs_dir = legacy_packs_dir or Path("data/player_packs")
+        self.compression_level = compression_level
+
+        self._shards: Dict[Tuple[str, int], _Shard] = {}
+        self._shards_lock = threading.Lock()
+        # zstd (de)compressor objects are not thread-safe: one pair per thread
+        self._codec_local = threading.local()
+
+    # ------------------------------------------------------------------
+    # Encoding
+    # ------------------------------------------------------------------
+
+    def _zstd_compressor(self) -> "zstandard.ZstdCompressor":
+        compressor = getattr(self._codec_local, "compressor", None)
+        if compressor is None:
+            compressor = self._codec_local.compressor = zstandard.ZstdCompressor(level=self.compression_level)
+        return compressor
+
+    def _zstd_decompressor(self) -> "zstandard.ZstdDecompressor":
+        decompressor = getattr(self._codec_local, "decompressor", None)
+        if decompressor is None:
+            decompressor = self._codec_local.decompressor = zstandard.ZstdDecompressor()
+        return decompressor
+
+    def _encode(self, payload: Dict[str, Any]) -> bytes:
+        raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if _ZSTD_AVAILABLE:
+            return CODEC_ZSTD + self._zstd_compressor().compress(raw)
+        return CODEC_ZLIB + zlib.compress(raw, 6)
+
+    def _decode(self, record: bytes) -> Dict[str, Any]:
+        codec, body = record[:1], record[1:]
+        if codec == CODEC_ZSTD:
+            if not _ZSTD_AVAILABLE:
+                raise RuntimeError("Record is zstd-compressed but zstandard is not installed")
+            raw = self._zstd_decompressor().decompress(body)
+        elif codec == CODEC_ZLIB:
+            raw = zlib.decompress(body)
+        else:
+            raise ValueError(f"Unknown record codec: {codec!r}")
+        return json.loads(raw)
+
+    def _shard(self, kind: str, match_id: str) -> _Shard:
+        key = (kind, _shard_of(match_id))
+        shard = self._shards.get(key)
+        if shard is None:
+            with self._shards_lock:
+                shard = self._shards.get(key)
+                if shard is None:
+                    shard = _Shard(self.root_dir / kind, key[1])
+                    self._shards[key] = shard
+        return shard
+
+    # ------------------------------------------------------------------
+    # Generic get/put
+    # ------------------------------------------------------------------
+
+    def _get(self, kind: str, match_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            record = self._shard(kind, match_id).read(match_id)
+            if record is None:
+                return None
+            return self._decode(record)
+        except Exception as e:
+            print(f"⚠️  Failed to read {kind[:-1]} {match_id} from match store: {e}")
+            return None
+
+    def _put(self, kind: str, match_id: str, payload: Dict[str, Any]) -> bool:
+        shard = self._shard(kind, match_id)
+        if shard.lookup(match_id) is not None:
+            return False
+        return shard.append(match_id, self._encode(payload))
+
+    def _has(self, kind: str, match_id: str) -> bool:
+        return self._shard(kind, match_id).lookup(match_id) is not None
+
+    @staticmethod
+    def _read_legacy_json(path: Path) -> Optional[Dict[str, Any]]:
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            # Bronze-layer files wrap the Riot payload in raw_data
+            return data.get("raw_data", data) if isinstance(data, dict) else None
+        except Exception as e:
+            print(f"⚠️  Failed to read legacy file {path}: {e}")
+            return None
+
+    # ------------------------------------------------------------------
+    # Matches
+    # ------------------------------------------------------------------
+
+    def get_match(self, match_id: str) -> Optional[Dict[str, Any]]:
+        """Match details (match-v5 payload) or None if not stored"""
+        match = self._get(MATCHES, match_id)
+        if match is not None:
+            return match
+
+        match = self._read_legacy_json(self.legacy_matches_dir / f"{match_id}.json")
+        if match is not None:
+            self.put_match(match_id, match)
+        return match
+
+    def put_match(self, match_id: str, match: Dict[str, Any]) -> bool:
+        """Store match details; returns False if already stored"""
+        return self._put(MATCHES, match_id, match)
+
+    def has_match(self, match_id: str) -> bool:
+        return self._has(MATCHES, match_id) or (self.legacy_matches_dir / f"{match_id}.json").exists()
+
+    def get_matches(self, match_ids: List[str]) -> List[Dict[str, Any]]:
+        """Match details for the given IDs, in order, skipping IDs that are not stored"""
+        matches = []
+        for match_id in match_ids:
+            match = self.get_match(match_id)
+            if match is not None:
+                matches.append(match)
+        return matches
+
+    # ------------------------------------------------------------------
+    # Timelines
+    # ------------------------------------------------------------------
+
+    def _legacy_timeline_paths(self, match_id: str, puuid: str = None) -> List[Path]:
+        filename = f"{match_id}_timeline.json"
+        if puuid:
+            return [self.legacy_packs_dir / puuid / "timelines" / filename]
+        return []
+
+    def get_timeline(self, match_id: str, puuid: str = None) -> Optional[Dict[str, Any]]:
+        """
+        Timeline (match-v5 timeline payload) or None if not stored
+
+        Args:
+            match_id: Match ID
+            puuid: If given, the player's legacy timelines/ directory is checked as a fallback
+        """
+        timeline = self._get(TIMELINES, match_id)
+        if timeline is not None:
+            return timeline
+
+        for path in self._legacy_timeline_paths(match_id, puuid):
+            timeline = self._read_legacy_json(path)
+            if timeline is not None:
+                self.put_timeline(match_id, timeline)
+                return timeline
+        return None
+
+    def put_timeline(self, match_id: str, timeline: Dict[str, Any]) -> bool:
+        """Store a timeline; returns False if already stored"""
+        return self._put(TIMELINES, match_id, timeline)
+
+    def has_timeline(self, match_id: str, puuid: str = None) -> bool:
+        if self._has(TIMELINES, match_id):
+            return True
+        return any(path.exists() for path in self._legacy_timeline_paths(match_id, puuid))
+
+
+# Global singleton
+match_store = MatchStore()
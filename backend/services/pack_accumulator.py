@@ -0,0 +1,376 @@
+"""
+Pack Accumulator - Incremental Player-Pack aggregation
+
+Keeps running sufficient statistics per (patch, queue_id, champ_id, role) so that
+new matches are folded into only the packs they touch, instead of rebuilding every
+pack_{patch}_{queue}.json from the full matches_data list.
+
+State is persisted per player as cr_accumulators.json (the name deliberately does
+not match the pack_*.json glob used by agents).
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Tuple, Set
+from datetime import datetime, timedelta, timezone
+import numpy as np
+
+from src.core.statistical_utils import wilson_confidence_interval, winsorize
+
+
+STATE_FILENAME = "cr_accumulators.json"
+STATE_VERSION = 3
+
+# Past Season date range: patch 14.1 (2024-01-09) to patch 14.25 (2025-01-06)
+PAST_SEASON_START = datetime(2024, 1, 9, tzinfo=timezone.utc)
+PAST_SEASON_END = datetime(2025, 1, 6, 23, 59, 59, 999000, tzinfo=timezone.utc)
+
+DEFAULT_TIME_TO_CORE = 30.0
+
+PackKey = Tuple[str, int]  # (patch, queue_id)
+
+
+class CRAccumulator:
+    """
+    Running statistics for one (champ_id, role) entry of a pack
+
+    Counts, sums and item/rune tallies are enough for every by_cr field except the
+    winsorized KDA, which needs the value distribution, so per-game KDA values are kept.
+    time_to_core is kept per match so background timeline results can replace the
+    default value of a single game.
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.wins = 0
+        self.kda_values: List[float] = []
+        self.obj_rate_sum = 0.0
+        self.cp_25_sum = 0.0
+        self.item_counts: Dict[int, int] = {}
+        self.rune_counts: Dict[int, int] = {}
+        self.time_to_core: Dict[str, float] = {}  # {match_id: minutes}
+
+    def add(self, match_id: str, game_stats: Dict[str, Any]):
+        """Fold a single game (output of PlayerDataManager._extract_game_stats)"""
+        self.games += 1
+        if game_stats['win']:
+            self.wins += 1
+        self.kda_values.append(float(game_stats['kda_adj']))
+        self.obj_rate_sum += float(game_stats['obj_rate'])
+        self.cp_25_sum += float(game_stats['cp_25'])
+        for item_id in game_stats['items_at_25']:
+            self.item_counts[item_id] = self.item_counts.get(item_id, 0) + 1
+        rune = game_stats['rune_keystone']
+        self.rune_counts[rune] = self.rune_counts.get(rune, 0) + 1
+        self.time_to_core[match_id] = float(game_stats['time_to_core'])
+
+    def to_by_cr_entry(self, champ_id: int, role: str) -> Dict[str, Any]:
+        """Derive the published by_cr entry (same fields as a full regeneration)"""
+        games = self.games
+        wins = self.wins
+        losses = games - wins
+
+        # Win rate with Wilson CI
+        p_hat = wins / games if games > 0 else 0.0
+        _, ci_lower, ci_upper = wilson_confidence_interval(wins, games)
+
+        # KDA adjusted (winsorized)
+        kda_winsorized = winsorize(self.kda_values)
+        kda_adj = np.mean(kda_winsorized) if kda_winsorized else 0.0
+
+        obj_rate = self.obj_rate_sum / games if games > 0 else 0.0
+        cp_25 = self.cp_25_sum / games if games > 0 else 0.0
+
+        # Build core: most common items
+        build_core = sorted(self.item_counts.keys(), key=lambda x: self.item_counts[x], reverse=True)[:3]
+
+        times = list(self.time_to_core.values())
+        avg_time_to_core = sum(times) / len(times) if times else DEFAULT_TIME_TO_CORE
+
+        # Most common rune keystone
+        rune_keystone = max(self.rune_counts.keys(), key=lambda x: self.rune_counts[x]) if self.rune_counts else 0
+
+        # Governance tag
+        if games >= 100:
+            governance_tag = "CONFIDENT"
+        elif games >= 30:
+            governance_tag = "CAUTION"
+        else:
+            governance_tag = "CONTEXT"
+
+        return {
+            "champ_id": champ_id,
+            "role": role,
+            "games": games,
+            "wins": wins,
+            "losses": losses,
+            "p_hat": round(p_hat, 4),
+            "p_hat_ci": [round(ci_lower, 4), round(ci_upper, 4)],
+            "kda_adj": round(float(kda_adj), 2),
+            "obj_rate": round(obj_rate, 3),
+            "cp_25": round(cp_25, 1),
+            "build_core": build_core,
+            "avg_time_to_core": round(avg_time_to_core, 2),
+            "rune_keystone": rune_keystone,
+            "effective_n": games,
+            "governance_tag": governance_tag
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "games": self.games,
+            "wins": self.wins,
+            "kda_values": self.kda_values,
+            "obj_rate_sum": self.obj_rate_sum,
+            "cp_25_sum": self.cp_25_sum,
+            # JSON object keys are strings; keep insertion order for tie-breaking
+            "item_counts": [[k, v] for k, v in self.item_counts.items()],
+            "rune_counts": [[k, v] for k, v in self.rune_counts.items()],
+            "time_to_core": self.time_to_core
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CRAccumulator":
+        acc = cls()
+        acc.games = data["games"]
+        acc.wins = data["wins"]
+        acc.kda_values = data["kda_values"]
+        acc.obj_rate_sum = data["obj_rate_sum"]
+        acc.cp_25_sum = data["cp_25_sum"]
+        acc.item_counts = {k: v for k, v in data["item_counts"]}
+        acc.rune_counts = {k: v for k, v in data["rune_counts"]}
+        acc.time_to_core = data["time_to_core"]
+        return acc
+
+
+class PackAccumulator:
+    """Accumulators for one pack_{patch}_{queue_id}.json"""
+
+    def __init__(self):
+        self.cells: Dict[Tuple[int, str], CRAccumulator] = {}
+        # gameCreation (ms) of every processed game of this patch/queue, for window counts
+        self.game_creations: List[int] = []
+        # Window counts as of the last time this pack was written (to detect aging packs)
+        self.written_windows: Optional[List[int]] = None
+
+    def window_counts(self, now: datetime) -> List[int]:
+        """[past_season_games, past_365_days_games] relative to now"""
+        season_start_ms = PAST_SEASON_START.timestamp() * 1000
+        season_end_ms = PAST_SEASON_END.timestamp() * 1000
+        past_365_start_ms = (now - timedelta(days=365)).timestamp() * 1000
+        past_season = sum(1 for gc in self.game_creations if gc and season_start_ms <= gc <= season_end_ms)
+        past_365 = sum(1 for gc in self.game_creations if gc and gc >= past_365_start_ms)
+        return [past_season, past_365]
+
+    def build(
+        self,
+        puuid: str,
+        patch: str,
+        queue_id: int,
+        now: datetime,
+        date_bounds: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        """Materialise the pack dict from accumulators (date_bounds: [earliest, latest] gameCreation of the patch)"""
+        by_cr = [acc.to_by_cr_entry(champ_id, role) for (champ_id, role), acc in self.cells.items() if acc.games > 0]
+
+        pack = {
+            "puuid": puuid,
+            "patch": patch,
+            "queue_id": queue_id,
+            "generation_timestamp": datetime.utcnow().isoformat(),
+            "total_games": sum(entry['games'] for entry in by_cr),
+            "by_cr": by_cr
+        }
+
+        if date_bounds:
+            pack["earliest_match_date"] = datetime.fromtimestamp(date_bounds[0] / 1000, tz=timezone.utc).isoformat()
+            pack["latest_match_date"] = datetime.fromtimestamp(date_bounds[1] / 1000, tz=timezone.utc).isoformat()
+
+        past_season, past_365 = self.window_counts(now)
+        pack["past_season_games"] = past_season
+        pack["past_365_days_games"] = past_365
+        return pack
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "cells": [[champ_id, role, acc.to_dict()] for (champ_id, role), acc in self.cells.items()],
+            "game_creations": self.game_creations,
+            "written_windows": self.written_windows
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PackAccumulator":
+        pack_acc = cls()
+        pack_acc.cells = {(champ_id, role): CRAccumulator.from_dict(acc) for champ_id, role, acc in data["cells"]}
+        pack_acc.game_creations = data["game_creations"]
+        pack_acc.written_windows = data.get("written_windows")
+        return pack_acc
+
+
+class PlayerPackAccumulator:
+    """
+    All pack accumulators of one player plus the index of folded matches
+
+    match_index maps match_id -> [patch, queue_id, champ_id, role, participant_id, game_creation]
+    (champ_id/role/participant_id are None for matches that did not produce a by_cr game),
+    so re-folding the same match is a no-op, timeline updates can find their cell and
+    match lists can be ordered without reloading match payloads.
+
+    timeline_applied holds the matches whose real time_to_core has been applied (their
+    timeline task does not need to run again on the next sync).
+
+    patch_dates keeps the [earliest, latest] gameCreation of every match seen per patch;
+    like a full regeneration, pack date bounds are per patch while window counts only
+    include processed games.
+    """
+
+    def __init__(self, puuid: str):
+        self.puuid = puuid
+        self.packs: Dict[PackKey, PackAccumulator] = {}
+        self.match_index: Dict[str, list] = {}
+        self.patch_dates: Dict[str, List[int]] = {}
+        self.timeline_applied: Set[str] = set()
+
+    def has_match(self, match_id: str) -> bool:
+        return match_id in self.match_index
+
+    def add_match_seen(self, match_id: str, patch: str, queue_id: int, game_creation: int) -> Set[PackKey]:
+        """
+        Record a match for the date bounds of its patch
+
+        Returns:
+            Pack keys of this patch whose date bounds changed
+        """
+        self.match_index[match_id] = [patch, queue_id, None, None, None, game_creation]
+        if not game_creation:
+            return set()
+
+        bounds = self.patch_dates.get(patch)
+        if bounds is None:
+            self.patch_dates[patch] = [game_creation, game_creation]
+        elif bounds[0] <= game_creation <= bounds[1]:
+            return set()
+        else:
+            bounds[0] = min(bounds[0], game_creation)
+            bounds[1] = max(bounds[1], game_creation)
+        return {key for key in self.packs if key[0] == patch}
+
+    def add_game(
+        self,
+        match_id: str,
+        patch: str,
+        queue_id: int,
+        champ_id: int,
+        role: str,
+        participant_id: Optional[int],
+        game_stats: Dict[str, Any],
+        game_creation: int = 0
+    ) -> PackKey:
+        """Fold a processed game into its (champ_id, role) cell (after add_match_seen)"""
+        key = (patch, queue_id)
+        pack_acc = self.packs.setdefault(key, PackAccumulator())
+        pack_acc.game_creations.append(game_creation)
+        acc = pack_acc.cells.get((champ_id, role))
+        if acc is None:
+            acc = pack_acc.cells[(champ_id, role)] = CRAccumulator()
+        acc.add(match_id, game_stats)
+        self.match_index[match_id] = [patch, queue_id, champ_id, role, participant_id, game_creation]
+        return key
+
+    def set_time_to_core(self, match_id: str, time_to_core: float) -> Optional[PackKey]:
+        """Replace the time_to_core of one game, returns the affected pack key if changed"""
+        entry = self.match_index.get(match_id)
+        if not entry:
+            return None
+        self.timeline_applied.add(match_id)
+        if entry[2] is None:
+            return None
+        patch, queue_id, champ_id, role = entry[:4]
+        acc = self.packs[(patch, queue_id)].cells[(champ_id, role)]
+        old = acc.time_to_core.get(match_id)
+        if old is not None and abs(old - time_to_core) < 1e-9:
+            return None
+        acc.time_to_core[match_id] = float(time_to_core)
+        return (patch, queue_id)
+
+    def participant_id(self, match_id: str) -> Optional[int]:
+        entry = self.match_index.get(match_id)
+        return entry[4] if entry else None
+
+    def newest_first(self, match_ids: List[str]) -> List[str]:
+        """Order folded match IDs by gameCreation, newest first (unknown IDs last)"""
+        return sorted(
+            match_ids,
+            key=lambda mid: self.match_index[mid][5] if mid in self.match_index else 0,
+            reverse=True
+        )
+
+    def publishable_keys(self) -> List[PackKey]:
+        """Pack keys that have at least one by_cr game, in (patch, queue_id) order"""
+        return sorted(
+            (key for key, pack_acc in self.packs.items() if any(acc.games > 0 for acc in pack_acc.cells.values())),
+            key=lambda k: (k[0], k[1])
+        )
+
+    def keys_to_write(self, dirty: Set[PackKey], now: datetime) -> List[PackKey]:
+        """Dirty packs plus untouched packs whose time-window counts have aged since last write"""
+        keys = []
+        for key in self.publishable_keys():
+            if key in dirty or self.packs[key].window_counts(now) != self.packs[key].written_windows:
+                keys.append(key)
+        return keys
+
+    def build_pack(self, key: PackKey, now: datetime) -> Dict[str, Any]:
+        patch, queue_id = key
+        pack_acc = self.packs[key]
+        pack = pack_acc.build(self.puuid, patch, queue_id, now, self.patch_dates.get(patch))
+        pack_acc.written_windows = [pack["past_season_games"], pack["past_365_days_games"]]
+        return pack
+
+    def build_all_packs(self, now: datetime) -> List[Dict[str, Any]]:
+        return [self.build_pack(key, now) for key in self.publishable_keys()]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": STATE_VERSION,
+            "puuid": self.puuid,
+            "packs": [[patch, queue_id, pack_acc.to_dict()] for (patch, queue_id), pack_acc in self.packs.items()],
+            "match_index": self.match_index,
+            "patch_dates": self.patch_dates,
+            "timeline_applied": sorted(self.timeline_applied)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PlayerPackAccumulator":
+        state = cls(data["puuid"])
+        state.packs = {(patch, queue_id): PackAccumulator.from_dict(p) for patch, queue_id, p in data["packs"]}
+        state.match_index = data["match_index"]
+        state.patch_dates = data["patch_dates"]
+        state.timeline_applied = set(data.get("timeline_applied", []))
+        return state
+
+    @classmethod
+    def load(cls, player_dir: Path, puuid: str) -> Optional["PlayerPackAccumulator"]:
+        """Load persisted state, or None if missing/unreadable/outdated"""
+        state_file = player_dir / STATE_FILENAME
+        if not state_file.exists():
+            return None
+        try:
+            with open(state_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != STATE_VERSION or data.get("puuid") != puuid:
+                return None
+            return cls.from_dict(data)
+        except Exception as e:
+            print(f"⚠️  Failed to load {STATE_FILENAME}, will rebuild: {e}")
+            return None
+
+    def save(self, player_dir: Path):
+        """Persist state atomically (write temp file, then rename)"""
+        state_file = player_dir / STATE_FILENAME
+        # Per-writer temp name: concurrent saves must not interleave in one temp file
+        tmp_file = state_file.with_name(f".{state_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+        tmp_file.replace(state_file)
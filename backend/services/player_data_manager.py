@@ -7,17 +7,34 @@ Architecture:
 """
 import asyncio
 import json
+import os
+import threading
 import time
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import AsyncIterator, Dict, Any, Optional, List, Set, Tuple
 from datetime import datetime, timedelta, timezone
-from collections import defaultdict
-import numpy as np
 from enum import Enum
 
 from .riot_client import riot_client
-from src.core.statistical_utils import wilson_confidence_interval, winsorize
+from .pack_accumulator import PlayerPackAccumulator, PackKey
+from .match_store import match_store
+from .timeline_queue import TimelineQueue, task_key
+from .job_registry import ACTIVE_STATUSES, job_registry, new_worker_id
+from .player_summary import (
+    SUMMARY_QUEUE_IDS,
+    SUMMARY_VERSION,
+    SUMMARY_TIME_RANGES,
+    aggregate_champions,
+    aggregate_progress,
+    aggregate_role_stats,
+    aggregate_skills,
+    load_champion_mapping,
+    read_summary,
+    summary_is_fresh,
+    write_summary,
+)
 from src.utils.id_mappings import get_champion_name
+from src.agents.shared.pack_cache import pack_cache, pack_in_time_range
 
 
 class DataStatus(str, Enum):
@@ -39,6 +56,9 @@ class PlayerDataJob:
         self.game_name = game_name
         self.tag_line = tag_line
         self.days = days  # Changed to days instead of count
+        # Waiters are woken on every status/progress/error change (see wait_for_change)
+        self._changed = asyncio.Event()
+        self.done = asyncio.Event()  # set once COMPLETED or FAILED
         self.status = DataStatus.NOT_STARTED
         self.progress = 0.0  # 0.0 - 1.0
         self.error: Optional[str] = None
@@ -46,7 +66,54 @@ class PlayerDataJob:
         self.completed_at: Optional[datetime] = None
         self.player_pack: Optional[Dict[str, Any]] = None
         self.matches_data: List[Dict[str, Any]] = []  # Store raw match data
-        self.timelines_data: List[Dict[str, Any]] = []  # Store timeline data for timeline_deep_dive
+        # True while another worker process owns the fetch (state mirrored from the job registry)
+        self.follower = False
+
+    # status / progress / error notify waiters when assigned
+    @property
+    def status(self) -> DataStatus:
+        return self._status
+
+    @status.setter
+    def status(self, value: DataStatus):
+        self._status = value
+        if value in (DataStatus.COMPLETED, DataStatus.FAILED):
+            self.done.set()
+        else:
+            self.done.clear()
+        self._notify()
+
+    @property
+    def progress(self) -> float:
+        return self._progress
+
+    @progress.setter
+    def progress(self, value: float):
+        self._progress = value
+        self._notify()
+
+    @property
+    def error(self) -> Optional[str]:
+        return self._error
+
+    @error.setter
+    def error(self, value: Optional[str]):
+        self._error = value
+        self._notify()
+
+    def _notify(self):
+        # Wake everyone waiting on the current event, later waiters get a fresh one
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait_for_change(self, timeout: Optional[float] = None) -> bool:
+        """Wait until status/progress/error changes; False on timeout"""
+        changed = self._changed
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
@@ -74,12 +141,36 @@ class PlayerDataManager:
     4. Provide data status query interface
     """
 
+    # Matches before this are filtered out (2024-02-01 00:00:00 UTC in milliseconds)
+    YEAR_2024_START_MS = 1706745600000
+
+    # Streaming match pipeline: requests kept in flight, fetched matches buffered
+    # ahead of folding, folded matches between progressive pack flushes
+    MATCH_FETCH_WINDOW = 20
+    MATCH_RESULT_QUEUE_SIZE = 100
+    PACK_FLUSH_EVERY = 100
+
+    # Background timeline queue: concurrent workers, landed timelines per player
+    # between time_to_core pack flushes
+    TIMELINE_WORKERS = 20
+    TIME_TO_CORE_FLUSH_EVERY = 50
+
+    # Cross-worker job registry: owner publishes status (heartbeat) / followers poll it, seconds
+    JOB_HEARTBEAT_INTERVAL = 2.0
+    JOB_FOLLOW_INTERVAL = 1.0
+    # Phase/progress changes are published right away, but at most this often
+    JOB_PUBLISH_MIN_INTERVAL = 0.25
+
     def __init__(self, cache_dir: Path = None):
         self.jobs: Dict[str, PlayerDataJob] = {}  # {puuid: PlayerDataJob}
         # Use directory structure expected by agents
         self.cache_dir = cache_dir or Path("data/player_packs")
         self.cache_dir.mkdir(parents=True, exist_ok=True)
 
+        # Global compressed match/timeline store shared across players
+        # (per-player directories only keep match_ids.json)
+        self.match_store = match_store
+
         # Boots item IDs (for time_to_core calculation)
         self.boots_ids = {1001, 3006, 3009, 3020, 3047, 3111, 3117, 3158}
 
@@ -88,13 +179,29 @@ class PlayerDataManager:
         # But considering network latency, 200 concurrent is reasonable
         self.semaphore = asyncio.Semaphore(20)  # Reduced to 20 for timeline fetching (avoid slow request pile-up)
 
+        # Persistent timeline work queue (survives restarts, see resume_timeline_queue)
+        self.timeline_queue = TimelineQueue()
+        self._timeline_workers: Set[asyncio.Task] = set()
+        # puuid → {match_id: time_to_core} landed but not yet written to packs
+        self._pending_time_to_core: Dict[str, Dict[str, float]] = {}
+        # puuid → task retrying a flush deferred by a running sync
+        self._deferred_flushes: Dict[str, asyncio.Task] = {}
+        # puuid → lock serialising load → set_time_to_core → save → ack (timeline workers share players)
+        self._time_to_core_locks: Dict[str, asyncio.Lock] = {}
+
+        # Durable job registry shared by all worker processes: exactly one worker fetches a
+        # PUUID, the others follow its progress; job state survives restarts
+        self.job_registry = job_registry
+        self.worker_id = new_worker_id()
+
     async def prepare_player_data(
         self,
         puuid: str,
         region: str,
         game_name: str,
         tag_line: str,
-        max_matches: int = 500
+        max_matches: int = 500,
+        refresh: bool = False
     ) -> PlayerDataJob:
         """
         Asynchronously prepare player data
@@ -108,6 +215,8 @@ class PlayerDataManager:
                         - 100: Quick test
                         - 200: Deep analysis
                         - 500: Full 2024 data (recommended)
+            refresh: If True, run a delta sync against Riot even when disk cache exists
+                     (only match IDs newer than the persisted match_ids.json are fetched)
 
         Returns:
             PlayerDataJob object (continues processing in background)
@@ -127,12 +236,18 @@ class PlayerDataManager:
                 print(f"✅ Reusing recent cache for {game_name}#{tag_line} (completed {(datetime.utcnow() - job.completed_at).seconds}s ago)")
                 return job
 
+        # Another worker may be fetching this player right now (its packs on disk are partial)
+        row = await asyncio.to_thread(self.job_registry.get, puuid)
+        if row and row["status"] in ACTIVE_STATUSES and not row["stale"] and row["owner"] != self.worker_id:
+            print(f"🔗 Following {game_name}#{tag_line} fetched by worker {row['owner']}, status: {row['status']}")
+            return self._follow_job(row, game_name, tag_line, refresh)
+
         # Check disk cache before creating new task
         player_dir = self.cache_dir / puuid
-        if player_dir.exists():
+        if player_dir.exists() and not refresh:
             pack_files = list(player_dir.glob("pack_*.json"))
             if len(pack_files) > 0:
-                # Use cache permanently (no time limit, only size limit 20GB)
+                # Use cache permanently (raw matches live in the shared match store)
                 latest_mtime = max(f.stat().st_mtime for f in pack_files)
                 cache_age = time.time() - latest_mtime
                 print(f"📦 Using disk cache for {game_name}#{tag_line} (cache age: {int(cache_age/60)}min)")
@@ -143,21 +258,149 @@ class PlayerDataManager:
                 job.completed_at = datetime.utcfromtimestamp(latest_mtime)
                 self.jobs[puuid] = job
 
-                # Check total cache size and cleanup if needed
-                self._cleanup_cache_if_needed()
-
+                # Other workers report it as completed too
+                await asyncio.to_thread(
+                    self.job_registry.record_completed,
+                    puuid, region, game_name, tag_line, max_matches, latest_mtime
+                )
                 return job
 
+        # Atomic claim: if another worker won the race (or finished recently), follow it instead
+        claimed, row = await asyncio.to_thread(
+            self.job_registry.claim,
+            puuid, region, game_name, tag_line, max_matches, self.worker_id, refresh
+        )
+        if not claimed:
+            print(f"🔗 Following {game_name}#{tag_line} fetched by worker {row['owner']}, status: {row['status']}")
+            return self._follow_job(row, game_name, tag_line, refresh)
+
         # Create new task (always fetch latest match list from Riot API)
-        print(f"🆕 Creating new data fetch task for {game_name}#{tag_line} (max {max_matches} matches per queue)")
+        if refresh:
+            print(f"🔁 Creating delta-sync task for {game_name}#{tag_line} (max {max_matches} matches per queue)")
+        else:
+            print(f"🆕 Creating new data fetch task for {game_name}#{tag_line} (max {max_matches} matches per queue)")
         job = PlayerDataJob(puuid, region, game_name, tag_line, max_matches)
         self.jobs[puuid] = job
 
         # Start background task
-        asyncio.create_task(self._fetch_and_calculate(job, game_name, tag_line))
+        asyncio.create_task(self._run_owned_job(job, game_name, tag_line, refresh))
 
         return job
 
+    # ========================================================================
+    # Cross-worker job registry
+    # ========================================================================
+
+    @staticmethod
+    def _apply_registry_row(job: PlayerDataJob, row: Dict[str, Any]):
+        """Mirror a registry row onto a local job"""
+        job.error = row["error"]
+        job.progress = row["progress"]
+        job.status = DataStatus(row["status"])
+        if row["started_at"]:
+            job.started_at = datetime.utcfromtimestamp(row["started_at"])
+        job.completed_at = datetime.utcfromtimestamp(row["completed_at"]) if row["completed_at"] else None
+
+    def _follow_job(self, row: Dict[str, Any], game_name: str, tag_line: str, refresh: bool) -> PlayerDataJob:
+        """Local job mirroring another worker's job (polled until it completes or its owner dies)"""
+        job = PlayerDataJob(row["puuid"], row["region"], game_name, tag_line, row["days"])
+        job.follower = True
+        self._apply_registry_row(job, row)
+        self.jobs[job.puuid] = job
+
+        if job.status not in (DataStatus.COMPLETED, DataStatus.FAILED):
+            asyncio.create_task(self._follow_remote_job(job, game_name, tag_line, refresh))
+        return job
+
+    async def _follow_remote_job(self, job: PlayerDataJob, game_name: str, tag_line: str, refresh: bool):
+        """Poll the registry; take the job over if its owner stops heart-beating"""
+        try:
+            while job.follower:
+                await asyncio.sleep(self.JOB_FOLLOW_INTERVAL)
+                row = await asyncio.to_thread(self.job_registry.get, job.puuid)
+
+                if row is None or row["stale"]:
+                    claimed, row = await asyncio.to_thread(
+                        self.job_registry.claim,
+                        job.puuid, job.region, game_name, tag_line, job.days, self.worker_id, refresh
+                    )
+                    if claimed:
+                        print(f"♻️  Owner of {game_name}#{tag_line} stopped responding, taking over the fetch")
+                        job.follower = False
+                        job.status = DataStatus.NOT_STARTED
+                        job.progress = 0.0
+                        job.error = None
+                        job.completed_at = None
+                        await self._run_owned_job(job, game_name, tag_line, refresh)
+                        return
+
+                self._apply_registry_row(job, row)
+                if job.status in (DataStatus.COMPLETED, DataStatus.FAILED):
+                    job.follower = False
+        except Exception as e:
+            print(f"❌ Following job failed: {e}")
+            job.follower = False
+            job.error = str(e)
+            job.status = DataStatus.FAILED
+            job.completed_at = datetime.utcnow()
+
+    async def _publish_job(self, job: PlayerDataJob) -> bool:
+        completed_at = job.completed_at.replace(tzinfo=timezone.utc).timestamp() if job.completed_at else None
+        try:
+            return await asyncio.to_thread(
+                self.job_registry.update,
+                job.puuid, self.worker_id, job.status.value, job.progress, job.error, completed_at
+            )
+        except Exception as e:
+            print(f"⚠️  Failed to publish job status: {e}")
+            return True
+
+    async def _run_owned_job(self, job: PlayerDataJob, game_name: str, tag_line: str, refresh: bool = False):
+        """
+        Run the fetch while publishing status/progress changes to the registry (doubles as heartbeat)
+
+        If another worker re-claims the job (this one missed heartbeats), the fetch is cancelled
+        and the job follows the new owner through the registry instead.
+        """
+        fetch_task = asyncio.create_task(self._fetch_and_calculate(job, game_name, tag_line))
+        lost_ownership = False
+
+        async def heartbeat():
+            nonlocal lost_ownership
+            while True:
+                if not await self._publish_job(job) and not fetch_task.done():
+                    print(f"⚠️  Job for {game_name}#{tag_line} was re-claimed by another worker, following it instead")
+                    lost_ownership = True
+                    fetch_task.cancel()
+                    return
+                await job.wait_for_change(self.JOB_HEARTBEAT_INTERVAL)
+                await asyncio.sleep(self.JOB_PUBLISH_MIN_INTERVAL)
+
+        heartbeat_task = asyncio.create_task(heartbeat())
+        try:
+            await fetch_task
+        except asyncio.CancelledError:
+            if not lost_ownership:
+                raise
+        finally:
+            heartbeat_task.cancel()
+            if not lost_ownership:
+                await self._publish_job(job)
+                await self._flush_deferred_time_to_core(job.puuid)
+
+        if lost_ownership:
+            job.follower = True
+            await self._follow_remote_job(job, game_name, tag_line, refresh)
+
+    async def _flush_deferred_time_to_core(self, puuid: str):
+        """Write time_to_core results that arrived while the sync was running (their flush was deferred)"""
+        if puuid not in self._pending_time_to_core:
+            return
+        try:
+            await self._flush_time_to_core(puuid)
+        except Exception as e:
+            print(f"⚠️  Failed to update time_to_core for {puuid[:20]}...: {e}")
+
     async def _fetch_and_calculate(self, job: PlayerDataJob, game_name: str, tag_line: str):
         """
         Background task: Fetch data and calculate metrics
@@ -171,200 +414,115 @@ class PlayerDataManager:
             job.status = DataStatus.FETCHING_MATCHES
             job.progress = 0.1
 
-            match_ids = await self._fetch_all_match_ids(
+            # Delta sync: match IDs already persisted for this player stop the paging early
+            player_dir = self.cache_dir / job.puuid
+            known_match_ids = self._load_known_match_ids(player_dir)
+            if known_match_ids:
+                print(f"🔁 Delta sync: {len(known_match_ids)} match IDs already persisted")
+
+            new_match_ids = await self._fetch_all_match_ids(
                 puuid=job.puuid,
                 platform=job.region,
-                max_matches=job.days  # job.days now stores max_matches count
+                max_matches=job.days,  # job.days now stores max_matches count
+                known_match_ids=known_match_ids
             )
 
+            if known_match_ids and not new_match_ids:
+                # Nothing new since last sync - existing packs are already up to date
+                print(f"✅ Delta sync: no new matches for {game_name}#{tag_line}, packs are up to date")
+                pack_state = PlayerPackAccumulator.load(player_dir, job.puuid)
+                if pack_state:
+                    # Still rewrite packs whose past-365 window counts have aged
+                    await asyncio.to_thread(self._write_player_packs, player_dir, pack_state, set())
+                    await asyncio.to_thread(self._materialise_player_summaries, player_dir)
+                    # match_ids.json written before it was kept in gameCreation order
+                    ordered_ids = pack_state.newest_first(known_match_ids)
+                    if ordered_ids != known_match_ids:
+                        await asyncio.to_thread(self._save_match_ids, player_dir, ordered_ids)
+                job.progress = 1.0
+                job.status = DataStatus.COMPLETED
+                job.completed_at = datetime.utcnow()
+                return
+
+            # Fetch order: new remote IDs, then the previously persisted ones
+            new_id_set = set(new_match_ids)
+            match_ids = new_match_ids + [mid for mid in known_match_ids if mid not in new_id_set]
+
             if not match_ids:
                 raise Exception(f"No matches found for {game_name}#{tag_line}")
 
-            print(f"✅ Retrieved {len(match_ids)} matches")
+            print(f"✅ Retrieved {len(match_ids)} matches ({len(new_match_ids)} new)")
             job.progress = 0.3
 
-            # Phase 2-A: Fetch match details and filter by time
+            # Phase 2-A + 3: Streaming pipeline - fetch, filter, store and fold matches as they arrive
             job.status = DataStatus.FETCHING_MATCHES
-            print(f"⚡ Pipeline: Fetch matches + filter by date (2024-02-01 onwards)")
-
-            matches_data = []
-            matches_before_2024 = 0
-            YEAR_2024_START_MS = 1706745600000  # 2024-02-01 00:00:00 UTC in milliseconds
-
-            # Batch parallel processing of matches
-            batch_size = 50
-            total_batches = (len(match_ids) + batch_size - 1) // batch_size
-
-            for batch_idx in range(total_batches):
-                start_idx = batch_idx * batch_size
-                end_idx = min(start_idx + batch_size, len(match_ids))
-                batch_match_ids = match_ids[start_idx:end_idx]
-
-                import time
-                batch_start = time.time()
-                print(f"   📦 Batch {batch_idx + 1}/{total_batches}: Fetching {len(batch_match_ids)} matches...")
-
-                # Fetch matches in this batch in parallel
-                batch_tasks = [self._fetch_match(match_id, job.region) for match_id in batch_match_ids]
-                batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
-                batch_duration = time.time() - batch_start
-
-                # Collect results, filter by gameCreation timestamp
-                batch_success = 0
-                batch_filtered = 0
-                for result in batch_results:
-                    if isinstance(result, Exception):
-                        print(f"      ⚠️  Skipping failed match: {result}")
-                        continue
-                    if result:
-                        # Check gameCreation timestamp (milliseconds)
-                        game_creation = result.get('info', {}).get('gameCreation', 0)
-                        if game_creation >= YEAR_2024_START_MS:
-                            # 2024 and later data, keep
-                            matches_data.append(result)
-                            batch_success += 1
-                        else:
-                            # Pre-2024 data, filter out
-                            batch_filtered += 1
-                            matches_before_2024 += 1
-
-                if batch_filtered > 0:
-                    print(f"      ✅ Batch: {batch_success} kept, {batch_filtered} filtered (before 2024) | {batch_duration:.1f}s")
-                else:
-                    print(f"      ✅ Batch: {batch_success}/{len(batch_match_ids)} kept | {batch_duration:.1f}s")
-
-                # Update progress (0.3-0.7 range)
-                progress = 0.3 + (0.4 * (batch_idx + 1) / total_batches)
-                job.progress = progress
-
-            if matches_before_2024 > 0:
-                print(f"📅 Filtered out {matches_before_2024} matches before 2024-02-01")
-            print(f"✅ Match fetch complete: {len(matches_data)} matches (2024-02-01 onwards)")
-            job.progress = 0.7
+            print(f"⚡ Pipeline: Fetch + fold matches as they arrive (2024-02-01 onwards, window={self.MATCH_FETCH_WINDOW})")
 
-            # Phase 3: Calculate metrics and generate Player-Pack (using default time_to_core)
-            job.status = DataStatus.CALCULATING_METRICS
-
-            import time
             calc_start = time.time()
-            print(f"\n⏱️  Starting metrics calculation (time_to_core using default values)...")
-
-            player_packs = self._generate_player_pack(
-                puuid=job.puuid,
-                game_name=job.game_name,
-                tag_line=job.tag_line,
-                matches_data=matches_data,
-                timelines_data=[]  # Phase 1 doesn't use timeline
-            )
-
-            calc_duration = time.time() - calc_start
-            print(f"⏱️  Calculation complete, took: {calc_duration:.2f} seconds")
-
-            # Save latest pack to job.player_pack (for frontend display)
-            job.player_pack = player_packs[-1] if player_packs else {}
-            job.matches_data = matches_data  # Save matches data for timeline analysis
-            job.progress = 1.0
-            job.status = DataStatus.COMPLETED
-            job.completed_at = datetime.utcnow()
 
-            # Save to disk cache (agent expected format: packs_dir/{puuid}/pack_{patch}.json)
             puuid = job.puuid  # Define puuid variable for later use
-            player_dir = self.cache_dir / puuid
             player_dir.mkdir(parents=True, exist_ok=True)
 
-            total_patches = len(player_packs)
-            total_games = sum(pack['total_games'] for pack in player_packs)
-
-            # ✅ Save pack files for each patch and queue_id combination
-            # File naming: pack_{patch}_{queue_id}.json (e.g., pack_15.1_420.json for Solo/Duo)
-            queue_id_names = {420: 'solo', 440: 'flex', 400: 'normal'}
-
-            for pack in player_packs:
-                patch = pack['patch']
-                queue_id = pack.get('queue_id', 420)  # Default to Solo/Duo if not specified
-                queue_name = queue_id_names.get(queue_id, str(queue_id))
-
-                cache_file = player_dir / f"pack_{patch}_{queue_id}.json"
-
-                # ✅ Only overwrite if new data >= existing data (prevent smaller requests from overwriting larger datasets)
-                should_save = True
-                if cache_file.exists():
-                    try:
-                        with open(cache_file, 'r', encoding='utf-8') as f:
-                            existing_pack = json.load(f)
-                        existing_games = existing_pack.get('total_games', 0)
-                        new_games = pack['total_games']
-
-                        if new_games < existing_games:
-                            should_save = False
-                            print(f"⏭️  Skipping save pack_{patch}_{queue_id}.json: Existing data more complete ({existing_games} games vs {new_games} games)")
-                    except Exception as e:
-                        print(f"⚠️  Cannot read existing pack_{patch}_{queue_id}.json, will overwrite: {e}")
-
-                if should_save:
-                    with open(cache_file, 'w', encoding='utf-8') as f:
-                        json.dump(pack, f, indent=2, ensure_ascii=False)
-                    print(f"✅ Saved pack_{patch}_{queue_id}.json ({queue_name}): {pack['total_games']} games")
-
-            # Save individual match files to global pool (shared across players)
-            global_matches_dir = Path("data/matches")
-            global_matches_dir.mkdir(parents=True, exist_ok=True)
-
-            saved_count = 0
-            skipped_count = 0
-            match_ids_list = []
-            verified_matches_data = []  # Only matches where player is present
-
-            for match in matches_data:
-                match_id = match['metadata']['matchId']
+            # Incremental aggregation: only matches not yet folded touch the accumulators
+            pack_state = PlayerPackAccumulator.load(player_dir, puuid)
+            bootstrap = pack_state is None
+            if bootstrap:
+                pack_state = PlayerPackAccumulator(puuid)
+                stream_ids = match_ids
+            else:
+                # Delta sync: folded matches are already in the accumulators, don't reload their payloads
+                stream_ids = [mid for mid in match_ids if not pack_state.has_match(mid)]
+                print(f"🔁 Delta sync: folding {len(stream_ids)} new matches into existing accumulators")
+
+            matches_data, match_ids_list, dirty_packs = await self._stream_fetch_and_fold(
+                job=job,
+                match_ids=stream_ids,
+                player_dir=player_dir,
+                state=pack_state,
+                bootstrap=bootstrap
+            )
+            if not bootstrap:
+                # Merge the new verified IDs with the previously persisted ones (order from match_index)
+                streamed = set(stream_ids)
+                match_ids_list = pack_state.newest_first(
+                    match_ids_list + [mid for mid in known_match_ids if mid not in streamed]
+                )
 
-                # Verify player is in this match before adding to match_ids
-                player_in_match = False
-                for participant in match['info']['participants']:
-                    if participant.get('puuid') == puuid:
-                        player_in_match = True
-                        break
+            # Final flush (using default time_to_core)
+            job.status = DataStatus.CALCULATING_METRICS
+            job.progress = 0.9
 
-                if not player_in_match:
-                    print(f"⚠️  Skipping {match_id}: Player not found in match")
-                    continue
+            # Save to disk cache (agent expected format: packs_dir/{puuid}/pack_{patch}_{queue_id}.json)
+            await asyncio.to_thread(self._write_player_packs, player_dir, pack_state, dirty_packs, bootstrap)
 
-                # Add to verified lists
-                match_ids_list.append(match_id)
-                verified_matches_data.append(match)
+            # Dashboard first paint reads one small summary file instead of every pack
+            await asyncio.to_thread(self._materialise_player_summaries, player_dir)
 
-                match_file = global_matches_dir / f"{match_id}.json"
+            calc_duration = time.time() - calc_start
+            print(f"⏱️  Fetch + calculation complete, took: {calc_duration:.2f} seconds")
 
-                # Only save if not already exists (avoid duplicate writes)
-                if not match_file.exists():
-                    try:
-                        with open(match_file, 'w', encoding='utf-8') as f:
-                            json.dump(match, f, indent=2, ensure_ascii=False)
-                        saved_count += 1
-                    except Exception as e:
-                        print(f"⚠️  Failed to save {match_id}.json: {e}")
-                else:
-                    skipped_count += 1
+            publishable = pack_state.publishable_keys()
+            total_patches = len(publishable)
+            total_games = sum(
+                acc.games for key in publishable for acc in pack_state.packs[key].cells.values()
+            )
 
-            print(f"✅ Match files: {saved_count} saved, {skipped_count} already cached (global pool)")
+            # Save match ID list for this player (before COMPLETED wakes waiters that read it)
+            await asyncio.to_thread(self._save_match_ids, player_dir, match_ids_list)
 
-            # Save match ID list for this player
-            match_ids_file = player_dir / "match_ids.json"
-            try:
-                with open(match_ids_file, 'w', encoding='utf-8') as f:
-                    json.dump(match_ids_list, f, indent=2)
-                print(f"✅ Saved match_ids.json: {len(match_ids_list)} verified match IDs")
-            except Exception as e:
-                print(f"⚠️  Failed to save match_ids.json: {e}")
+            # Superseded by the match store
+            legacy_matches_file = player_dir / "matches_data.json"
+            if legacy_matches_file.exists():
+                legacy_matches_file.unlink()
 
-            # Save verified matches_data.json (only matches where player is present)
-            matches_file = player_dir / "matches_data.json"
-            try:
-                with open(matches_file, 'w', encoding='utf-8') as f:
-                    json.dump(verified_matches_data, f, indent=2, ensure_ascii=False)
-                print(f"✅ Saved matches_data.json: {len(verified_matches_data)} verified match details")
-            except Exception as e:
-                print(f"⚠️  Failed to save matches_data.json: {e}")
+            # Save latest pack to job.player_pack (for frontend display)
+            job.player_pack = pack_state.build_pack(publishable[-1], datetime.now(timezone.utc)) if publishable else {}
+            if bootstrap:
+                # A delta sync only loads the new matches, so count-based stats fall back to packs
+                job.matches_data = matches_data
+            job.progress = 1.0
+            job.status = DataStatus.COMPLETED
+            job.completed_at = datetime.utcnow()
 
             print(f"✅ Data preparation complete (phase 1): {game_name}#{tag_line}")
             print(f"   Total games: {total_games}")
@@ -372,26 +530,56 @@ class PlayerDataManager:
             print(f"   Cache location: {player_dir}")
             print(f"   ⚡ 65% of agents can now use the data")
 
-            # Phase 2-B: Timeline fetching (background async)
+            # Phase 2-B: Timeline fetching (persistent background queue, newest matches first)
             # After fixing 429 rate limit retry losing use_primary_key bug, timeline fetch can be safely enabled
             # Timeline API uses match_id (globally unique), no PUUID decryption issues
-            print(f"\n✅ Starting background timeline fetching for {len(match_ids)} matches")
-            asyncio.create_task(
-                self._fetch_timelines_background(
-                    match_ids=match_ids,
-                    region=job.region,
-                    puuid=job.puuid,
-                    player_dir=player_dir
-                )
+            await self._enqueue_timelines(
+                puuid=job.puuid,
+                region=job.region,
+                matches_data=matches_data,
+                applied=pack_state.timeline_applied
             )
 
         except Exception as e:
             print(f"❌ Data preparation failed: {e}")
-            job.status = DataStatus.FAILED
             job.error = str(e)
+            job.status = DataStatus.FAILED
             job.completed_at = datetime.utcnow()
 
-    async def _fetch_all_match_ids(self, puuid: str, platform: str, max_matches: int = None) -> List[str]:
+    def _load_known_match_ids(self, player_dir: Path) -> List[str]:
+        """Load the match IDs persisted by the previous sync (newest first), or [] if none"""
+        match_ids_file = player_dir / "match_ids.json"
+        if not match_ids_file.exists():
+            return []
+        try:
+            with open(match_ids_file, 'r', encoding='utf-8') as f:
+                match_ids = json.load(f)
+            return [mid for mid in match_ids if isinstance(mid, str)]
+        except Exception as e:
+            print(f"⚠️  Failed to read match_ids.json, falling back to full sync: {e}")
+            return []
+
+    def _save_match_ids(self, player_dir: Path, match_ids: List[str]):
+        """Persist the player's verified match IDs (newest first by gameCreation)"""
+        match_ids_file = player_dir / "match_ids.json"
+        try:
+            with open(match_ids_file, 'w', encoding='utf-8') as f:
+                json.dump(match_ids, f, indent=2)
+            print(f"✅ Saved match_ids.json: {len(match_ids)} verified match IDs")
+        except Exception as e:
+            print(f"⚠️  Failed to save match_ids.json: {e}")
+
+    def _load_cached_match(self, match_id: str) -> Optional[Dict[str, Any]]:
+        """Read match details from the shared match store, or None if not cached"""
+        return self.match_store.get_match(match_id)
+
+    async def _fetch_all_match_ids(
+        self,
+        puuid: str,
+        platform: str,
+        max_matches: int = None,
+        known_match_ids: Optional[List[str]] = None
+    ) -> List[str]:
         """Fetch recent match data for player (supports multiple queue types)
 
         Two-step filtering approach for 2024 data:
@@ -403,14 +591,20 @@ class PlayerDataManager:
         - Match IDs themselves contain no time information
         - Must fetch match details first to get gameCreation timestamp
 
+        Delta sync: Riot returns match IDs newest first, so when known_match_ids is given,
+        paging for a queue stops at the first already-persisted ID and only the newer IDs
+        are returned.
+
         Args:
             puuid: Player PUUID
             platform: Platform code (e.g., 'na1')
             max_matches: Max matches to fetch per queue (default 500 to ensure full 2024 coverage)
+            known_match_ids: Match IDs persisted by a previous sync (optional)
 
         Returns:
             List of match IDs (includes all queue types: 420=Solo/Duo, 440=Flex, 400=Normal)
         """
+        known = set(known_match_ids or [])
         # Pull enough match IDs to ensure coverage back to 2024-02-01
         # Active players: 450 matches covers ~9 months (Feb to Oct)
         max_matches_per_queue = max_matches if max_matches else 450
@@ -453,6 +647,14 @@ class PlayerDataManager:
                     print(f"      ✅ {queue_name} matches fetched: {len(queue_match_ids)} matches (reached end)")
                     break
 
+                if known:
+                    # Keep only IDs newer than the first already-persisted one
+                    known_idx = next((i for i, mid in enumerate(batch) if mid in known), None)
+                    if known_idx is not None:
+                        queue_match_ids.extend(batch[:known_idx])
+                        print(f"      ✅ Reached already-synced {queue_name} match, {len(queue_match_ids)} new")
+                        break
+
                 queue_match_ids.extend(batch)
                 print(f"      ✅ Batch retrieved {len(batch)} {queue_name} matches, total {len(queue_match_ids)}")
 
@@ -469,6 +671,136 @@ class PlayerDataManager:
         print(f"   ✅ All queue types fetched: {len(all_match_ids)} total matches")
         return all_match_ids
 
+    async def _stream_fetch_and_fold(
+        self,
+        job: PlayerDataJob,
+        match_ids: List[str],
+        player_dir: Path,
+        state: PlayerPackAccumulator,
+        bootstrap: bool
+    ) -> Tuple[List[Dict], List[str], Set[PackKey]]:
+        """
+        Producer/consumer match pipeline: download, filter, store and fold overlap
+
+        - MATCH_FETCH_WINDOW workers keep a continuous window of requests in flight
+          (no batch barrier: a slow match only holds up its own worker)
+        - Fetched matches go through a bounded queue (MATCH_RESULT_QUEUE_SIZE), so fetching
+          pauses when folding falls behind
+        - The consumer filters by date, stores the match and folds it immediately; dirty packs
+          are flushed every PACK_FLUSH_EVERY folded matches so agents can start on partial
+          packs, and job.progress (0.3 → 0.9) counts matches actually processed
+
+        Only the consumer touches state, so flushing it from a worker thread is safe.
+
+        Returns:
+            (matches_data, match_ids_list, dirty_packs)
+            - matches_data: kept matches, newest first (by gameCreation)
+            - match_ids_list: kept matches the player is verified in, newest first (for match_ids.json)
+            - dirty_packs: packs changed since the last flush
+        """
+        start = time.time()
+
+        total = len(match_ids)
+        pending_ids: asyncio.Queue = asyncio.Queue()
+        for match_id in match_ids:
+            pending_ids.put_nowait(match_id)
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.MATCH_RESULT_QUEUE_SIZE)
+
+        async def fetch_worker():
+            while True:
+                try:
+                    match_id = pending_ids.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    match = await self._fetch_match(match_id, job.region)
+                except Exception as e:
+                    print(f"      ⚠️  Skipping failed match {match_id}: {e}")
+                    match = None
+                await results.put((match_id, match))
+
+        workers = [
+            asyncio.create_task(fetch_worker())
+            for _ in range(min(self.MATCH_FETCH_WINDOW, total))
+        ]
+
+        kept: Dict[str, Dict] = {}
+        verified: Set[str] = set()
+        dirty_packs: Set[PackKey] = set()
+        filter_stats = self._new_fold_stats()
+        failed = 0
+        matches_before_2024 = 0
+        saved_count = 0
+        skipped_count = 0
+        folded_since_flush = 0
+        flushes = 0
+
+        try:
+            for processed in range(1, total + 1):
+                match_id, match = await results.get()
+
+                if not match:
+                    failed += 1
+                elif match.get('info', {}).get('gameCreation', 0) < self.YEAR_2024_START_MS:
+                    # Pre-2024 data, filter out
+                    matches_before_2024 += 1
+                else:
+                    kept[match_id] = match
+
+                    # Verify player is in this match before adding to match_ids / the match store
+                    if any(p.get('puuid') == job.puuid for p in match['info']['participants']):
+                        verified.add(match_id)
+                        # put_match is a no-op for matches already in the store (compression and
+                        # the locked shard append run off the event loop)
+                        try:
+                            if await asyncio.to_thread(self.match_store.put_match, match_id, match):
+                                saved_count += 1
+                            else:
+                                skipped_count += 1
+                        except Exception as e:
+                            print(f"⚠️  Failed to store match {match_id}: {e}")
+                    else:
+                        print(f"⚠️  Skipping {match_id}: Player not found in match")
+
+                    touched = self._fold_match(
+                        state, job.puuid, job.game_name, job.tag_line, match,
+                        None,  # Phase 1 doesn't use timeline
+                        filter_stats
+                    )
+                    if touched:
+                        dirty_packs |= touched
+                        folded_since_flush += 1
+
+                job.progress = 0.3 + 0.6 * processed / total
+
+                if folded_since_flush >= self.PACK_FLUSH_EVERY:
+                    # Progressive flush: partial packs become visible while the rest is fetched
+                    await asyncio.to_thread(self._write_player_packs, player_dir, state, dirty_packs, bootstrap)
+                    dirty_packs = set()
+                    folded_since_flush = 0
+                    flushes += 1
+
+                if processed % 50 == 0 or processed == total:
+                    print(f"   📦 {processed}/{total} matches processed | {len(kept)} kept | {time.time() - start:.1f}s")
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        if failed > 0:
+            print(f"⚠️  {failed} matches failed to fetch")
+        if matches_before_2024 > 0:
+            print(f"📅 Filtered out {matches_before_2024} matches before 2024-02-01")
+        print(f"✅ Match fetch complete: {len(kept)} matches (2024-02-01 onwards), {flushes} progressive pack flushes")
+        print(f"✅ Match store: {saved_count} saved, {skipped_count} already cached")
+        self._print_fold_stats(filter_stats, job.game_name, job.tag_line)
+
+        # match_ids is grouped by queue (420, 440, 400), so order by gameCreation instead
+        newest_first = sorted(kept, key=lambda mid: kept[mid]['info'].get('gameCreation', 0), reverse=True)
+        matches_data = [kept[mid] for mid in newest_first]
+        match_ids_list = [mid for mid in newest_first if mid in verified]
+        return matches_data, match_ids_list, dirty_packs
+
     async def _fetch_match(self, match_id: str, platform: str):
         """Fetch single match details only (pipeline optimization phase 1)
 
@@ -488,6 +820,11 @@ class PlayerDataManager:
             }
             region = PLATFORM_TO_REGION.get(platform.lower(), "americas")
 
+            # Global match pool hit: no Riot API call needed
+            cached_match = await asyncio.to_thread(self._load_cached_match, match_id)
+            if cached_match:
+                return cached_match
+
             # Debug logging to identify problematic matches
             print(f"         🔍 Fetching match: {match_id}")
 
@@ -548,165 +885,154 @@ class PlayerDataManager:
             print(f"⚠️  Failed to fetch timeline {match_id}: {e}")
             return None
 
-    def _generate_player_pack(
+    def _fold_matches(
         self,
+        state: PlayerPackAccumulator,
         puuid: str,
         game_name: str,
         tag_line: str,
         matches_data: List[Dict],
         timelines_data: List[Dict]
-    ) -> List[Dict[str, Any]]:
+    ) -> Set[PackKey]:
         """
-        Generate Player-Pack from match and timeline data
+        Fold matches into the player's pack accumulators
+
+        Matches already folded into state (by match_id) are skipped, so a refresh only
+        pays for new matches.
 
         Returns:
-            {
-                "puuid": str,
-                "generation_timestamp": str,
-                "total_games": int,
-                "by_cr": [
-                    {
-                        "champ_id": int,
-                        "role": str,
-                        "games": int,
-                        "wins": int,
-                        "losses": int,
-                        "p_hat": float,
-                        "p_hat_ci": [lower, upper],
-                        "kda_adj": float,
-                        "obj_rate": float,
-                        "cp_25": float,
-                        "build_core": [item_ids],
-                        "avg_time_to_core": float,
-                        "rune_keystone": int,
-                        "effective_n": int,
-                        "governance_tag": str
-                    }
-                ]
-            }
+            Set of (patch, queue_id) pack keys whose accumulators changed
         """
-        import time
         t0 = time.time()
 
         # Create timeline mapping
         timelines_map = {t['metadata']['matchId']: t for t in timelines_data}
-        print(f"     ⏱️  Creating timeline mapping: {time.time()-t0:.3f}s")
 
-        # Aggregate data by (patch, champ_id, role, queue_id)
-        # Structure: patch_cr_data[patch][(champ_id, role, queue_id)] = [game_stats]
-        patch_cr_data = defaultdict(lambda: defaultdict(list))
+        dirty: Set[PackKey] = set()
+        filter_stats = self._new_fold_stats()
+
+        for match in matches_data:
+            dirty |= self._fold_match(
+                state, puuid, game_name, tag_line, match,
+                timelines_map.get(match['metadata']['matchId']), filter_stats
+            )
+
+        print(f"     ⏱️  Data extraction loop ({len(matches_data)} matches): {time.time()-t0:.3f}s")
+        self._print_fold_stats(filter_stats, game_name, tag_line)
+        return dirty
 
-        # Add filter statistics
-        filter_stats = {
-            'total_matches': len(matches_data),
+    @staticmethod
+    def _new_fold_stats() -> Dict[str, Any]:
+        return {
+            'total_matches': 0,
+            'already_folded': 0,
             'player_not_found': 0,
             'invalid_role': 0,
-            'processed': 0
+            'processed': 0,
+            'filtered_matches_debug': []  # First 3 filtered matches (for debugging)
         }
 
-        # Record first 3 filtered matches (for debugging)
-        filtered_matches_debug = []
-
-        t1 = time.time()
-        earliest_match_date = None
-        latest_match_date = None
-        
-        # Past Season date range: patch 14.1 (2024-01-09) to patch 14.25 (2025-01-06)
-        past_season_start = datetime(2024, 1, 9, tzinfo=timezone.utc)
-        past_season_end = datetime(2025, 1, 6, 23, 59, 59, 999000, tzinfo=timezone.utc)
-        
-        # Past 365 Days: from today - 365 days to today
-        today = datetime.now(timezone.utc)
-        past_365_days_start = today - timedelta(days=365)
-        
-        # Track games count for each patch in time ranges
-        patch_past_season_games = defaultdict(int)
-        patch_past_365_games = defaultdict(int)
-        
-        for match in matches_data:
-            match_id = match['metadata']['matchId']
-            timeline = timelines_map.get(match_id)
-            
-            # Extract queue_id from match
-            queue_id = match['info'].get('queueId', 420)  # Default to Solo/Duo if not specified
-
-            # Extract match date from gameCreation timestamp
-            game_creation = match['info'].get('gameCreation', 0)
-            if game_creation:
-                match_date = datetime.fromtimestamp(game_creation / 1000, tz=timezone.utc)
-                if earliest_match_date is None or match_date < earliest_match_date:
-                    earliest_match_date = match_date
-                if latest_match_date is None or match_date > latest_match_date:
-                    latest_match_date = match_date
-
-            # Extract patch version
-            game_version = match['info'].get('gameVersion', '0.0.0.0')
-            patch = '.'.join(game_version.split('.')[:2])  # "15.1.123.456" → "15.1"
-
-            # Use gameName#tagLine matching (more reliable)
-            player_data = None
-            for p in match['info']['participants']:
-                # Support both PUUID and gameName#tagLine matching
-                puuid_match = p.get('puuid') == puuid
-                # Case-insensitive name matching (Riot API may return different casing)
-                name_match = (p.get('riotIdGameName', '').lower() == game_name.lower() and
-                             p.get('riotIdTagline', '').lower() == tag_line.lower())
-
-                if puuid_match or name_match:
-                    player_data = p
-                    break
-
-            if not player_data:
-                filter_stats['player_not_found'] += 1
-                # Record first 3 filtered matches for debugging
-                if len(filtered_matches_debug) < 3:
-                    filtered_matches_debug.append({
-                        'match_id': match_id,
-                        'reason': 'player_not_found',
-                        'queue_id': match['info'].get('queueId'),
-                        'target': f'{game_name}#{tag_line}',
-                        'participants_names': [f"{p.get('riotIdGameName', '?')}#{p.get('riotIdTagline', '?')}"
-                                              for p in match['info']['participants'][:3]]
-                    })
-                continue
-
-            champ_id = player_data['championId']
-            role = player_data['teamPosition']
-
-            if not role or role == 'Invalid':
-                filter_stats['invalid_role'] += 1
-                continue
-
-            # Check if this match is in Past Season or Past 365 Days (only count if player is in match)
-            if game_creation:
-                match_date = datetime.fromtimestamp(game_creation / 1000, tz=timezone.utc)
-                # Check Past Season (2024-01-09 to 2025-01-06)
-                if past_season_start <= match_date <= past_season_end:
-                    patch_past_season_games[patch] += 1
-                # Check Past 365 Days
-                if match_date >= past_365_days_start:
-                    patch_past_365_games[patch] += 1
-
-            # Extract single game statistics
-            game_stats = self._extract_game_stats(
-                player_data=player_data,
-                match_data=match,
-                timeline_data=timeline
-            )
-
-            # Aggregate data by (patch, queue_id, champ_id, role)
-            key = (champ_id, role, queue_id)
-            patch_cr_data[patch][key].append(game_stats)
-            filter_stats['processed'] += 1
+    def _fold_match(
+        self,
+        state: PlayerPackAccumulator,
+        puuid: str,
+        game_name: str,
+        tag_line: str,
+        match: Dict,
+        timeline: Optional[Dict],
+        filter_stats: Dict[str, Any]
+    ) -> Set[PackKey]:
+        """
+        Fold a single match into the accumulators
 
-        print(f"     ⏱️  Data extraction loop ({len(matches_data)} matches): {time.time()-t1:.3f}s")
+        Returns:
+            Pack keys touched by this match (empty if it was already folded)
+        """
+        filter_stats['total_matches'] += 1
+        match_id = match['metadata']['matchId']
+        if state.has_match(match_id):
+            filter_stats['already_folded'] += 1
+            return set()
+
+        # Extract queue_id from match
+        queue_id = match['info'].get('queueId', 420)  # Default to Solo/Duo if not specified
+
+        # Extract match date from gameCreation timestamp
+        game_creation = match['info'].get('gameCreation', 0)
+
+        # Extract patch version
+        game_version = match['info'].get('gameVersion', '0.0.0.0')
+        patch = '.'.join(game_version.split('.')[:2])  # "15.1.123.456" → "15.1"
+
+        # Every match counts toward its patch's date bounds; window counts only include processed games
+        dirty = state.add_match_seen(match_id, patch, queue_id, game_creation)
+
+        # Use gameName#tagLine matching (more reliable)
+        player_data = None
+        for p in match['info']['participants']:
+            # Support both PUUID and gameName#tagLine matching
+            puuid_match = p.get('puuid') == puuid
+            # Case-insensitive name matching (Riot API may return different casing)
+            name_match = (p.get('riotIdGameName', '').lower() == game_name.lower() and
+                         p.get('riotIdTagline', '').lower() == tag_line.lower())
+
+            if puuid_match or name_match:
+                player_data = p
+                break
+
+        if not player_data:
+            filter_stats['player_not_found'] += 1
+            # Record first 3 filtered matches for debugging
+            if len(filter_stats['filtered_matches_debug']) < 3:
+                filter_stats['filtered_matches_debug'].append({
+                    'match_id': match_id,
+                    'reason': 'player_not_found',
+                    'queue_id': match['info'].get('queueId'),
+                    'target': f'{game_name}#{tag_line}',
+                    'participants_names': [f"{p.get('riotIdGameName', '?')}#{p.get('riotIdTagline', '?')}"
+                                          for p in match['info']['participants'][:3]]
+                })
+            return dirty
+
+        champ_id = player_data['championId']
+        role = player_data['teamPosition']
+
+        if not role or role == 'Invalid':
+            filter_stats['invalid_role'] += 1
+            return dirty
+
+        # Extract single game statistics
+        game_stats = self._extract_game_stats(
+            player_data=player_data,
+            match_data=match,
+            timeline_data=timeline
+        )
+
+        # Fold into (patch, queue_id, champ_id, role) accumulator
+        dirty.add(state.add_game(
+            match_id=match_id,
+            patch=patch,
+            queue_id=queue_id,
+            champ_id=champ_id,
+            role=role,
+            participant_id=player_data.get('participantId'),
+            game_stats=game_stats,
+            game_creation=game_creation
+        ))
+        filter_stats['processed'] += 1
+        return dirty
+
+    @staticmethod
+    def _print_fold_stats(filter_stats: Dict[str, Any], game_name: str, tag_line: str):
         print(f"     📊 Filter statistics:")
         print(f"        - Total matches: {filter_stats['total_matches']}")
+        print(f"        - Already folded: {filter_stats['already_folded']}")
         print(f"        - Player not found: {filter_stats['player_not_found']}")
         print(f"        - Invalid role: {filter_stats['invalid_role']}")
         print(f"        - ✅ Successfully processed: {filter_stats['processed']}")
 
         # Output player matching debug info
+        filtered_matches_debug = filter_stats['filtered_matches_debug']
         if filtered_matches_debug:
             print(f"     🔍 Debug: First {len(filtered_matches_debug)} filtered matches player name comparison:")
             print(f"        Target player: {game_name}#{tag_line}")
@@ -714,165 +1040,126 @@ class PlayerDataManager:
                 print(f"        Match {i} (ID: {fm['match_id'][:20]}..., QueueID: {fm['queue_id']}):")
                 print(f"          Participant sample: {fm['participants_names']}")
 
-        # Generate one pack for each patch
-        t2 = time.time()
+    def _write_player_packs(
+        self,
+        player_dir: Path,
+        state: PlayerPackAccumulator,
+        dirty: Set[PackKey],
+        bootstrap: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Write affected pack_{patch}_{queue_id}.json files and persist the accumulators
+
+        Only dirty packs (plus packs whose past-365 window counts have aged) are written.
+        When bootstrap is True (no accumulator state existed yet), an existing pack file with
+        more games is kept to prevent smaller requests from overwriting larger datasets.
+
+        Returns:
+            List of pack dicts that were built
+        """
+        now = datetime.now(timezone.utc)
+        keys = state.keys_to_write(dirty, now)
+
+        # File naming: pack_{patch}_{queue_id}.json (e.g., pack_15.1_420.json for Solo/Duo)
+        queue_id_names = {420: 'solo', 440: 'flex', 400: 'normal'}
+
         packs = []
-        
-        # Create a mapping of patch to match dates for efficient lookup
-        patch_match_dates = defaultdict(lambda: {'earliest': None, 'latest': None})
-        for match in matches_data:
-            game_version = match['info'].get('gameVersion', '0.0.0.0')
-            patch = '.'.join(game_version.split('.')[:2])
-            game_creation = match['info'].get('gameCreation', 0)
-            if game_creation:
-                match_date = datetime.fromtimestamp(game_creation / 1000, tz=timezone.utc)
-                if patch_match_dates[patch]['earliest'] is None or match_date < patch_match_dates[patch]['earliest']:
-                    patch_match_dates[patch]['earliest'] = match_date
-                if patch_match_dates[patch]['latest'] is None or match_date > patch_match_dates[patch]['latest']:
-                    patch_match_dates[patch]['latest'] = match_date
-
-        # Generate packs for each patch and queue_id combination
-        for patch in sorted(patch_cr_data.keys()):
-            patch_data = patch_cr_data[patch]
-
-            # Group by queue_id first
-            queue_grouped_data = defaultdict(dict)
-            for (champ_id, role, queue_id), games_stats in patch_data.items():
-                queue_grouped_data[queue_id][(champ_id, role)] = games_stats
-
-            # Generate a pack for each queue_id
-            for queue_id in sorted(queue_grouped_data.keys()):
-                cr_data = queue_grouped_data[queue_id]
-
-                # Calculate aggregated metrics for each (champ_id, role)
-                by_cr = []
-
-                for (champ_id, role), games_stats in cr_data.items():
-                    if not games_stats:
-                        continue
+        written_packs = {}
+        for key in keys:
+            pack = state.build_pack(key, now)
+            packs.append(pack)
+            patch, queue_id = key
+            queue_name = queue_id_names.get(queue_id, str(queue_id))
 
-                    games = len(games_stats)
-                    wins = sum(1 for g in games_stats if g['win'])
-                    losses = games - wins
-
-                    # Win rate with Wilson CI
-                    p_hat = wins / games if games > 0 else 0.0
-                    _, ci_lower, ci_upper = wilson_confidence_interval(wins, games)
-
-                    # KDA adjusted (winsorized)
-                    kda_values = [g['kda_adj'] for g in games_stats]
-                    kda_winsorized = winsorize(kda_values)
-                    kda_adj = np.mean(kda_winsorized) if kda_winsorized else 0.0
-
-                    # Objective rate
-                    obj_rate = np.mean([g['obj_rate'] for g in games_stats])
-
-                    # Combat power at 25min
-                    cp_25 = np.mean([g['cp_25'] for g in games_stats])
-
-                    # Build core: most common items
-                    item_counts = defaultdict(int)
-                    for g in games_stats:
-                        for item_id in g['items_at_25']:
-                            item_counts[item_id] += 1
-                    build_core = sorted(item_counts.keys(), key=lambda x: item_counts[x], reverse=True)[:3]
-
-                    # Average time to core
-                    avg_time_to_core = np.mean([g['time_to_core'] for g in games_stats])
-
-                    # Most common rune keystone
-                    rune_counts = defaultdict(int)
-                    for g in games_stats:
-                        rune_counts[g['rune_keystone']] += 1
-                    rune_keystone = max(rune_counts.keys(), key=lambda x: rune_counts[x]) if rune_counts else 0
-
-                    # Governance tag
-                    if games >= 100:
-                        governance_tag = "CONFIDENT"
-                    elif games >= 30:
-                        governance_tag = "CAUTION"
-                    else:
-                        governance_tag = "CONTEXT"
-
-                    by_cr.append({
-                        "champ_id": champ_id,
-                        "role": role,
-                        "games": games,
-                        "wins": wins,
-                        "losses": losses,
-                        "p_hat": round(p_hat, 4),
-                        "p_hat_ci": [round(ci_lower, 4), round(ci_upper, 4)],
-                        "kda_adj": round(kda_adj, 2),
-                        "obj_rate": round(obj_rate, 3),
-                        "cp_25": round(cp_25, 1),
-                        "build_core": build_core,
-                        "avg_time_to_core": round(avg_time_to_core, 2),
-                        "rune_keystone": rune_keystone,
-                        "effective_n": games,
-                        "governance_tag": governance_tag
-                    })
+            cache_file = player_dir / f"pack_{patch}_{queue_id}.json"
 
-                # ✅ Create pack for this patch and queue_id
-                pack = {
-                    "puuid": puuid,
-                    "patch": patch,
-                    "queue_id": queue_id,  # Store queue_id in pack
-                    "generation_timestamp": datetime.utcnow().isoformat(),
-                    "total_games": sum(entry['games'] for entry in by_cr),
-                    "by_cr": by_cr
-                }
+            if bootstrap and cache_file.exists():
+                try:
+                    with open(cache_file, 'r', encoding='utf-8') as f:
+                        existing_games = json.load(f).get('total_games', 0)
+                    if pack['total_games'] < existing_games:
+                        print(f"⏭️  Skipping save pack_{patch}_{queue_id}.json: Existing data more complete ({existing_games} games vs {pack['total_games']} games)")
+                        continue
+                except Exception as e:
+                    print(f"⚠️  Cannot read existing pack_{patch}_{queue_id}.json, will overwrite: {e}")
+
+            # Atomic write (temp file + rename): readers never see a half-written pack, and the
+            # rename moves the directory mtime, so packs_manifest.json is re-validated on the next
+            # read even if the manifest refresh below never runs
+            tmp_file = cache_file.with_name(f".{cache_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(pack, f, indent=2, ensure_ascii=False)
+            tmp_file.replace(cache_file)
+            written_packs[cache_file.name] = pack
+            print(f"✅ Saved pack_{patch}_{queue_id}.json ({queue_name}): {pack['total_games']} games")
 
-                # Add match date range for this patch (filtered by queue_id)
-                # Calculate date range for this specific queue_id
-                queue_earliest = None
-                queue_latest = None
-                for match in matches_data:
-                    match_queue_id = match['info'].get('queueId', 420)
-                    if match_queue_id == queue_id:
-                        game_version = match['info'].get('gameVersion', '0.0.0.0')
-                        match_patch = '.'.join(game_version.split('.')[:2])
-                        if match_patch == patch:
-                            game_creation = match['info'].get('gameCreation', 0)
-                            if game_creation:
-                                match_date = datetime.fromtimestamp(game_creation / 1000, tz=timezone.utc)
-                                if queue_earliest is None or match_date < queue_earliest:
-                                    queue_earliest = match_date
-                                if queue_latest is None or match_date > queue_latest:
-                                    queue_latest = match_date
-
-                if queue_earliest:
-                    pack["earliest_match_date"] = queue_earliest.isoformat()
-                if queue_latest:
-                    pack["latest_match_date"] = queue_latest.isoformat()
-
-                # Add games count for Past Season and Past 365 Days (for this queue_id)
-                queue_past_season_games = 0
-                queue_past_365_games = 0
-                for match in matches_data:
-                    match_queue_id = match['info'].get('queueId', 420)
-                    if match_queue_id == queue_id:
-                        game_version = match['info'].get('gameVersion', '0.0.0.0')
-                        match_patch = '.'.join(game_version.split('.')[:2])
-                        if match_patch == patch:
-                            game_creation = match['info'].get('gameCreation', 0)
-                            if game_creation:
-                                match_date = datetime.fromtimestamp(game_creation / 1000, tz=timezone.utc)
-                                # Check Past Season
-                                if past_season_start <= match_date <= past_season_end:
-                                    queue_past_season_games += 1
-                                # Check Past 365 Days
-                                if match_date >= past_365_days_start:
-                                    queue_past_365_games += 1
-
-                pack["past_season_games"] = queue_past_season_games
-                pack["past_365_days_games"] = queue_past_365_games
-
-                packs.append(pack)
-
-        print(f"     ⏱️  Aggregation calculation + Pack generation: {time.time()-t2:.3f}s")
+        try:
+            state.save(player_dir)
+        except Exception as e:
+            print(f"⚠️  Failed to save pack accumulators: {e}")
+
+        if written_packs:
+            # mtime/size already invalidate cached packs; drop them eagerly so same-size rewrites
+            # within the filesystem's mtime granularity are never served stale
+            pack_cache.invalidate(player_dir)
+            # Refresh packs_manifest.json from the packs just built (no re-parse). Last write in
+            # the directory, so the manifest is not older than the directory and stays trusted
+            try:
+                pack_cache.load_manifest(player_dir, known_packs=written_packs)
+            except Exception as e:
+                print(f"⚠️  Failed to refresh pack manifest: {e}")
 
         return packs
 
+    def _generate_player_pack(
+        self,
+        puuid: str,
+        game_name: str,
+        tag_line: str,
+        matches_data: List[Dict],
+        timelines_data: List[Dict]
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate Player-Pack from match and timeline data (full, non-incremental build)
+
+        Returns:
+            [
+                {
+                    "puuid": str,
+                    "patch": str,
+                    "queue_id": int,
+                    "generation_timestamp": str,
+                    "total_games": int,
+                    "by_cr": [
+                        {
+                            "champ_id": int,
+                            "role": str,
+                            "games": int,
+                            "wins": int,
+                            "losses": int,
+                            "p_hat": float,
+                            "p_hat_ci": [lower, upper],
+                            "kda_adj": float,
+                            "obj_rate": float,
+                            "cp_25": float,
+                            "build_core": [item_ids],
+                            "avg_time_to_core": float,
+                            "rune_keystone": int,
+                            "effective_n": int,
+                            "governance_tag": str
+                        }
+                    ],
+                    "earliest_match_date": str,
+                    "latest_match_date": str,
+                    "past_season_games": int,
+                    "past_365_days_games": int
+                }
+            ]
+        """
+        state = PlayerPackAccumulator(puuid)
+        self._fold_matches(state, puuid, game_name, tag_line, matches_data, timelines_data)
+        return state.build_all_packs(datetime.now(timezone.utc))
+
     def _extract_game_stats(
         self,
         player_data: Dict,
@@ -958,9 +1245,18 @@ class PlayerDataManager:
         return 30.0
 
     def get_status(self, puuid: str) -> Dict[str, Any]:
-        """Get data preparation status"""
+        """Get data preparation status (may query the job registry: use asyncio.to_thread from async code)"""
         if puuid not in self.jobs:
-            return {"status": DataStatus.NOT_STARTED}
+            # Started by another worker, or before a restart
+            row = self.job_registry.get(puuid)
+            if row is None:
+                return {"status": DataStatus.NOT_STARTED}
+            job = PlayerDataJob(puuid, row["region"], row["game_name"], row["tag_line"], row["days"])
+            self._apply_registry_row(job, row)
+            if row["stale"]:
+                job.status = DataStatus.FAILED
+                job.error = "Data preparation was interrupted (worker stopped)"
+            return job.to_dict()
 
         return self.jobs[puuid].to_dict()
 
@@ -976,7 +1272,11 @@ class PlayerDataManager:
             Player-Pack data, or None (if failed/timeout)
         """
         if puuid not in self.jobs:
-            return None
+            # Another worker may be preparing it: follow its progress
+            row = await asyncio.to_thread(self.job_registry.get, puuid)
+            if row is None or row["status"] not in ACTIVE_STATUSES or row["stale"]:
+                return None
+            self._follow_job(row, row["game_name"], row["tag_line"], refresh=False)
 
         job = self.jobs[puuid]
 
@@ -984,18 +1284,48 @@ class PlayerDataManager:
         if job.status == DataStatus.COMPLETED and job.player_pack:
             return job.player_pack
 
-        # Wait for completion
-        for _ in range(timeout):
-            if job.status == DataStatus.COMPLETED:
-                return job.player_pack
-            elif job.status == DataStatus.FAILED:
-                return None
+        # Woken the moment the job completes (packs written) or fails
+        try:
+            await asyncio.wait_for(job.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️  Data wait timeout: {puuid}")
+            return None
 
-            await asyncio.sleep(1)
+        return job.player_pack if job.status == DataStatus.COMPLETED else None
 
-        # Timeout
-        print(f"⚠️  Data wait timeout: {puuid}")
-        return None
+    async def watch_job(self, puuid: str, timeout: float = 600) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield the job's status dict on every phase/progress change until it completes or fails
+
+        Changes that happen while the consumer is busy are coalesced into the latest state.
+        Jobs started by another worker are followed through the job registry.
+        """
+        if puuid not in self.jobs:
+            row = await asyncio.to_thread(self.job_registry.get, puuid)
+            if row is not None and row["status"] in ACTIVE_STATUSES and not row["stale"]:
+                self._follow_job(row, row["game_name"], row["tag_line"], refresh=False)
+            else:
+                # get_status reads the SQLite registry for jobs this worker doesn't hold
+                yield await asyncio.to_thread(self.get_status, puuid)
+                return
+
+        job = self.jobs[puuid]
+        deadline = time.time() + timeout
+        while True:
+            # Take the event before reading state so no change is missed in between
+            changed = job._changed
+            yield job.to_dict()
+            if job.done.is_set():
+                return
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                return
+            # A refresh may have replaced the job object
+            job = self.jobs.get(puuid, job)
 
     def get_data(self, puuid: str) -> Optional[Dict[str, Any]]:
         """
@@ -1029,8 +1359,8 @@ class PlayerDataManager:
 
     def get_role_stats(self, puuid: str, time_range: str = None, queue_id: int = None) -> List[Dict[str, Any]]:
         """
-        从Player-Pack中提取role统计数据（优先从summary.json，否则聚合所有pack文件）
-        
+        Role统计数据（来自预聚合的player summary）
+
         Args:
             puuid: Player PUUID
             time_range: Time range filter (optional)
@@ -1042,181 +1372,28 @@ class PlayerDataManager:
                 ...
             ]
         """
-        player_dir = self.cache_dir / puuid
-
-        if not player_dir.exists():
-            return []
-
-        try:
-            # Calculate time filter if needed
-            cutoff_timestamp = None
-            cutoff_end_timestamp = None
-
-            # Only support past-365 days time range
-            if time_range == "past-365":
-                cutoff_timestamp = (datetime.now(timezone.utc) - timedelta(days=365)).timestamp()
-            
-            # Build file pattern based on queue_id
-            if queue_id is not None:
-                pack_pattern = f"pack_*_{queue_id}.json"
-            else:
-                pack_pattern = "pack_*.json"
-            
-            pack_files = sorted(player_dir.glob(pack_pattern))
-            print(f"🔍 [get_role_stats] Looking for packs with pattern: {pack_pattern}, found {len(pack_files)} files")
-            print(f"🔍 [get_role_stats] Filter params: queue_id={queue_id}, time_range={time_range}")
-            
-            by_cr_data = []
-            for pack_file in pack_files:
-                with open(pack_file, 'r', encoding='utf-8') as f:
-                    pack = json.load(f)
-                
-                # Verify queue_id matches if specified
-                if queue_id is not None:
-                    pack_queue_id = pack.get('queue_id', 420)
-                    if pack_queue_id != queue_id:
-                        continue
-                
-                # Apply time range filter
-                has_match_in_range = True  # Default: include pack if no time filter
-                if cutoff_timestamp:
-                    has_match_in_range = False  # Reset for time filtering
-                    pack_earliest = pack.get("earliest_match_date")
-                    pack_latest = pack.get("latest_match_date")
-                    
-                    print(f"🔍 [get_role_stats] Pack {pack_file.name}: earliest={pack_earliest}, latest={pack_latest}, cutoff={cutoff_timestamp}, cutoff_end={cutoff_end_timestamp}")
-                    
-                    if pack_earliest or pack_latest:
-                        if pack_earliest:
-                            try:
-                                earliest_dt = datetime.fromisoformat(pack_earliest.replace('Z', '+00:00'))
-                                if earliest_dt.tzinfo:
-                                    earliest_dt = earliest_dt.replace(tzinfo=None)
-                                earliest_ts = earliest_dt.timestamp()
-                            except Exception as e:
-                                print(f"⚠️  [get_role_stats] Failed to parse earliest_match_date: {e}")
-                                earliest_ts = None
-                        else:
-                            earliest_ts = None
-                            
-                        if pack_latest:
-                            try:
-                                latest_dt = datetime.fromisoformat(pack_latest.replace('Z', '+00:00'))
-                                if latest_dt.tzinfo:
-                                    latest_dt = latest_dt.replace(tzinfo=None)
-                                latest_ts = latest_dt.timestamp()
-                            except Exception as e:
-                                print(f"⚠️  [get_role_stats] Failed to parse latest_match_date: {e}")
-                                latest_ts = None
-                        else:
-                            latest_ts = None
-                        
-                        if earliest_ts and latest_ts:
-                            if cutoff_end_timestamp:
-                                if earliest_ts <= cutoff_end_timestamp and latest_ts >= cutoff_timestamp:
-                                    has_match_in_range = True
-                                    print(f"✅ [get_role_stats] Pack {pack_file.name} matches time range (earliest={earliest_ts}, latest={latest_ts})")
-                            else:
-                                if latest_ts >= cutoff_timestamp:
-                                    has_match_in_range = True
-                                    print(f"✅ [get_role_stats] Pack {pack_file.name} matches time range (latest={latest_ts} >= cutoff={cutoff_timestamp})")
-                        elif latest_ts:
-                            if cutoff_end_timestamp:
-                                if latest_ts <= cutoff_end_timestamp and latest_ts >= cutoff_timestamp:
-                                    has_match_in_range = True
-                                    print(f"✅ [get_role_stats] Pack {pack_file.name} matches time range (latest={latest_ts})")
-                            else:
-                                if latest_ts >= cutoff_timestamp:
-                                    has_match_in_range = True
-                                    print(f"✅ [get_role_stats] Pack {pack_file.name} matches time range (latest={latest_ts} >= cutoff={cutoff_timestamp})")
-                    else:
-                        # Fallback: if pack has no match date info, include it if it has past_365_days_games count
-                        # This handles old packs that don't have earliest_match_date/latest_match_date
-                        if "past_365_days_games" in pack and pack["past_365_days_games"] > 0:
-                            has_match_in_range = True
-                            print(f"✅ [get_role_stats] Pack {pack_file.name} matches time range (has {pack['past_365_days_games']} past_365_days_games)")
-                        elif "generation_timestamp" in pack:
-                            # Last resort: use generation_timestamp, but only if it's recent (within 400 days to be safe)
-                            pack_timestamp = pack["generation_timestamp"]
-                            if isinstance(pack_timestamp, str):
-                                pack_timestamp = datetime.fromisoformat(pack_timestamp.replace('Z', '+00:00')).timestamp()
-                            # For past-365, if pack was generated recently (within 400 days), include it
-                            # This is a heuristic: if pack is old, it likely doesn't have recent data
-                            if cutoff_end_timestamp:
-                                if cutoff_timestamp <= pack_timestamp <= cutoff_end_timestamp:
-                                    has_match_in_range = True
-                                    print(f"✅ [get_role_stats] Pack {pack_file.name} matches time range (generation_timestamp={pack_timestamp})")
-                            else:
-                                # For past-365, check if generation_timestamp is within 400 days (to account for pack generation delay)
-                                generation_cutoff = (datetime.now(timezone.utc) - timedelta(days=400)).timestamp()
-                                if pack_timestamp >= generation_cutoff:
-                                    has_match_in_range = True
-                                    print(f"✅ [get_role_stats] Pack {pack_file.name} matches time range (generation_timestamp={pack_timestamp} >= generation_cutoff={generation_cutoff})")
-                                else:
-                                    print(f"⚠️  [get_role_stats] Pack {pack_file.name} generation_timestamp too old ({pack_timestamp}), excluding")
-                        else:
-                            # No time info at all - exclude to be safe
-                            print(f"⚠️  [get_role_stats] Pack {pack_file.name} has no time information, excluding")
-                    
-                    if not has_match_in_range:
-                        print(f"❌ [get_role_stats] Pack {pack_file.name} does NOT match time range, skipping")
-                        continue
-
-                # Add pack data to aggregation (after time filter)
-                by_cr_data.extend(pack.get("by_cr", []))
-
-            print(f"🔍 [get_role_stats] After filtering, found {len(by_cr_data)} by_cr entries")
-
-            if not by_cr_data:
-                print(f"⚠️  [get_role_stats] No data found for queue_id={queue_id}, time_range={time_range}")
-                return []
-
-            # 从 by_cr 聚合 role 统计
-            role_stats_dict = defaultdict(lambda: {
-                "games": 0,
-                "wins": 0,
-                "total_kda": 0.0
-            })
-
-            for cr in by_cr_data:
-                role = cr.get("role", "UNKNOWN")
-                role_stats_dict[role]["games"] += cr.get("games", 0)
-                role_stats_dict[role]["wins"] += cr.get("wins", 0)
-
-                # 使用 kda_adj * games 作为加权KDA
-                if "kda_adj" in cr:
-                    role_stats_dict[role]["total_kda"] += cr["kda_adj"] * cr.get("games", 0)
-
-            # 转换为数组格式
-            role_stats = []
-            for role, stats in role_stats_dict.items():
-                games = stats["games"]
-                wins = stats["wins"]
-                win_rate = (wins / games * 100) if games > 0 else 0
-                avg_kda = (stats["total_kda"] / games) if games > 0 else 0
-
-                role_stats.append({
-                    "role": role,
-                    "games": games,
-                    "wins": wins,
-                    "win_rate": round(win_rate, 1),
-                    "avg_kda": round(avg_kda, 2)
-                })
-
-            # 按游戏数排序
-            role_stats.sort(key=lambda x: x["games"], reverse=True)
-            print(f"✅ [get_role_stats] Returning {len(role_stats)} role stats")
-            return role_stats
+        summary = self.get_player_summary(puuid, time_range=time_range, queue_id=queue_id)
+        return summary["role_stats"] if summary else []
 
-        except Exception as e:
-            print(f"⚠️  Failed to get role stats: {e}")
-            import traceback
-            traceback.print_exc()
-            return []
+    @staticmethod
+    def _pack_in_past_365(row: Dict[str, Any], cutoff_timestamp: float) -> bool:
+        """
+        past-365过滤（pack索引行）：优先按比赛日期判断；旧pack没有比赛日期时，
+        有past_365_days_games或generation_timestamp在400天内（考虑生成延迟）即保留
+        """
+        if row["earliest_match_date"] or row["latest_match_date"]:
+            return pack_in_time_range(row, cutoff_timestamp)
+        if (row["past_365_days_games"] or 0) > 0:
+            return True
+        if row["generation_ts"] is not None:
+            generation_cutoff = (datetime.now(timezone.utc) - timedelta(days=400)).timestamp()
+            return row["generation_ts"] >= generation_cutoff
+        # No time info at all - exclude to be safe
+        return False
 
     def get_best_champions(self, puuid: str, limit: int = 5, time_range: str = None, queue_id: int = None) -> List[Dict[str, Any]]:
         """
-        从Player-Pack中提取最佳英雄数据（按游戏数排序）
+        最佳英雄数据（按游戏数排序，来自预聚合的player summary）
 
         Args:
             puuid: Player PUUID
@@ -1230,150 +1407,114 @@ class PlayerDataManager:
                 ...
             ]
         """
-        player_dir = self.cache_dir / puuid
-        if not player_dir.exists():
-            return []
+        summary = self.get_player_summary(puuid, time_range=time_range, queue_id=queue_id)
+        return summary["champions"][:limit] if summary else []
 
-        try:
-            # Calculate time filter if needed
-            cutoff_timestamp = None
-            cutoff_end_timestamp = None
-
-            # Only support past-365 days time range
-            if time_range == "past-365":
-                cutoff_timestamp = (datetime.now(timezone.utc) - timedelta(days=365)).timestamp()
-            
-            # Build file pattern based on queue_id
-            # Note: Champion Mastery uses all game modes, so queue_id is typically None
-            if queue_id is not None:
-                pack_pattern = f"pack_*_{queue_id}.json"
-            else:
-                pack_pattern = "pack_*.json"
-
-            pack_files = sorted(player_dir.glob(pack_pattern))
-
-            # 聚合所有pack文件中的champion数据
-            champion_stats = defaultdict(lambda: {
-                "games": 0,
-                "wins": 0,
-                "total_kda": 0.0
-            })
-
-            # Read all pack files (removed verbose logging for performance)
-            for pack_file in pack_files:
-                with open(pack_file, 'r', encoding='utf-8') as f:
-                    pack = json.load(f)
-
-                # Verify queue_id matches if specified
-                if queue_id is not None:
-                    pack_queue_id = pack.get('queue_id', 420)
-                    if pack_queue_id != queue_id:
-                        continue
-                
-                # Apply time range filter
-                has_match_in_range = True  # Default: include pack if no time filter
-                if cutoff_timestamp:
-                    has_match_in_range = False  # Reset for time filtering
-                    pack_earliest = pack.get("earliest_match_date")
-                    pack_latest = pack.get("latest_match_date")
-                    
-                    if pack_earliest or pack_latest:
-                        if pack_earliest:
-                            try:
-                                earliest_dt = datetime.fromisoformat(pack_earliest.replace('Z', '+00:00'))
-                                if earliest_dt.tzinfo:
-                                    earliest_dt = earliest_dt.replace(tzinfo=None)
-                                earliest_ts = earliest_dt.timestamp()
-                            except:
-                                earliest_ts = None
-                        else:
-                            earliest_ts = None
-                            
-                        if pack_latest:
-                            try:
-                                latest_dt = datetime.fromisoformat(pack_latest.replace('Z', '+00:00'))
-                                if latest_dt.tzinfo:
-                                    latest_dt = latest_dt.replace(tzinfo=None)
-                                latest_ts = latest_dt.timestamp()
-                            except:
-                                latest_ts = None
-                        else:
-                            latest_ts = None
-                        
-                        if earliest_ts and latest_ts:
-                            if cutoff_end_timestamp:
-                                if earliest_ts <= cutoff_end_timestamp and latest_ts >= cutoff_timestamp:
-                                    has_match_in_range = True
-                            else:
-                                if latest_ts >= cutoff_timestamp:
-                                    has_match_in_range = True
-                        elif latest_ts:
-                            if cutoff_end_timestamp:
-                                if latest_ts <= cutoff_end_timestamp and latest_ts >= cutoff_timestamp:
-                                    has_match_in_range = True
-                            else:
-                                if latest_ts >= cutoff_timestamp:
-                                    has_match_in_range = True
-                    else:
-                        # Fallback to generation_timestamp
-                        if "generation_timestamp" in pack:
-                            pack_timestamp = pack["generation_timestamp"]
-                            if isinstance(pack_timestamp, str):
-                                pack_timestamp = datetime.fromisoformat(pack_timestamp.replace('Z', '+00:00')).timestamp()
-                            if cutoff_end_timestamp:
-                                if cutoff_timestamp <= pack_timestamp <= cutoff_end_timestamp:
-                                    has_match_in_range = True
-                            else:
-                                if pack_timestamp >= cutoff_timestamp:
-                                    has_match_in_range = True
+    # ------------------------------------------------------------------
+    # Pre-aggregated player summaries
+    # ------------------------------------------------------------------
 
-                if not has_match_in_range:
-                    continue
+    def _build_player_summary(
+        self,
+        player_dir: Path,
+        time_range: Optional[str],
+        queue_id: Optional[int],
+        champion_mapping: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Aggregate role stats, champion stats, per-patch trends and skill radar inputs
+        for one (time_range, queue) combination
 
-                by_cr_data = pack.get("by_cr", [])
+        Only "past-365" is a supported time filter (anything else means all data).
+        """
+        manifest = pack_cache.load_manifest(player_dir)
+        rows = [manifest.row(i) for i in manifest.select(queue_id=queue_id, time_range=time_range)]
+
+        # Role stats keep their own past-365 rule (tolerates legacy packs without match dates)
+        if time_range == "past-365":
+            cutoff_timestamp = (datetime.now(timezone.utc) - timedelta(days=365)).timestamp()
+            role_rows = [
+                manifest.row(i) for i in manifest.select(queue_id=queue_id)
+                if self._pack_in_past_365(manifest.row(i), cutoff_timestamp)
+            ]
+        else:
+            role_rows = rows
+
+        def load(selected: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            packs = []
+            for row in selected:
+                pack = pack_cache.get(player_dir / row["file"])
+                if pack is not None:
+                    packs.append(pack.data)
+            return packs
+
+        packs = load(rows)
+        return {
+            "version": SUMMARY_VERSION,
+            "data_version": manifest.data_version,
+            "built_at": time.time(),
+            "time_range": time_range,
+            "queue_id": queue_id,
+            "packs": [row["file"][len("pack_"):-len(".json")] for row in rows],
+            "total_games": sum(row["total_games"] or 0 for row in rows),
+            "role_stats": aggregate_role_stats(load(role_rows) if role_rows is not rows else packs),
+            "champions": aggregate_champions(packs),
+            "progress": aggregate_progress(packs),
+            "skills": aggregate_skills(packs, champion_mapping if champion_mapping is not None else load_champion_mapping())
+        }
 
-                for cr in by_cr_data:
-                    champ_id = cr.get("champ_id")
-                    if not champ_id:
-                        continue
+    def _materialise_player_summaries(self, player_dir: Path):
+        """Build and write the summary for every (time_range, queue) dashboard combination"""
+        start = time.time()
+        champion_mapping = load_champion_mapping()
+        written = 0
+        for time_range in SUMMARY_TIME_RANGES:
+            for queue_id in SUMMARY_QUEUE_IDS:
+                try:
+                    write_summary(player_dir, self._build_player_summary(player_dir, time_range, queue_id, champion_mapping))
+                    written += 1
+                except Exception as e:
+                    print(f"⚠️  Failed to materialise summary ({time_range}, {queue_id}): {e}")
+        print(f"✅ Materialised {written} player summaries in {time.time() - start:.2f}s")
 
-                    games = cr.get("games", 0)
-                    wins = cr.get("wins", 0)
-                    kda_adj = cr.get("kda_adj", 0)
-
-                    champion_stats[champ_id]["games"] += games
-                    champion_stats[champ_id]["wins"] += wins
-                    champion_stats[champ_id]["total_kda"] += kda_adj * games
-
-            # 转换为数组格式
-            best_champions = []
-            for champ_id, stats in champion_stats.items():
-                games = stats["games"]
-                wins = stats["wins"]
-                win_rate = (wins / games * 100) if games > 0 else 0
-                avg_kda = (stats["total_kda"] / games) if games > 0 else 0
-
-                # 获取英雄名称
-                champion_name = get_champion_name(champ_id)
-
-                best_champions.append({
-                    "champ_id": champ_id,
-                    "name": champion_name,
-                    "games": games,
-                    "wins": wins,
-                    "win_rate": round(win_rate, 1),
-                    "avg_kda": round(avg_kda, 2)
-                })
+    def get_player_summary(
+        self,
+        puuid: str,
+        time_range: Optional[str] = None,
+        queue_id: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Pre-aggregated summary for one (time_range, queue) combination
 
-            # 按游戏数排序，返回前N个
-            best_champions.sort(key=lambda x: x["games"], reverse=True)
-            return best_champions[:limit]
+        Served from summary_{time_range}_{queue}.json; rebuilt (and rewritten) when missing or
+        when the packs changed since it was materialised.
+
+        Returns:
+            Summary dict, or None if the player has no data
+        """
+        player_dir = self.cache_dir / puuid
+        if not player_dir.exists():
+            return None
+        time_range = "past-365" if time_range == "past-365" else None
+
+        try:
+            data_version = pack_cache.data_version(player_dir)
+            summary = read_summary(player_dir, time_range, queue_id)
+            if summary_is_fresh(summary, data_version):
+                return summary
+
+            summary = self._build_player_summary(player_dir, time_range, queue_id)
+            try:
+                write_summary(player_dir, summary)
+            except Exception as e:
+                print(f"⚠️  Failed to write player summary: {e}")
+            return summary
 
         except Exception as e:
-            print(f"⚠️  Failed to get best champions: {e}")
+            print(f"⚠️  Failed to get player summary: {e}")
             import traceback
             traceback.print_exc()
-            return []
+            return None
 
     def get_recent_matches(self, puuid: str, limit: int = 20) -> List[Dict[str, Any]]:
         """
@@ -1389,54 +1530,29 @@ class PlayerDataManager:
             List[Dict]: 比赛信息列表
         """
         try:
-            # 检查timeline目录，获取有timeline文件的match_ids
+            # match_ids.json lists the verified matches of this player; raw data lives in the match store
             player_dir = self.cache_dir / puuid
-            timelines_dir = player_dir / "timelines"
-
-            available_match_ids = set()
-            if timelines_dir.exists():
-                for timeline_file in timelines_dir.glob("*_timeline.json"):
-                    match_id = timeline_file.stem.replace("_timeline", "")
-                    available_match_ids.add(match_id)
-            print(f"🔍 Available timeline files: {len(available_match_ids)} matches")
-            print(f"   Match IDs: {available_match_ids}")
-
-            # Get matches data from job (memory) or matches_data.json (disk)
-            job = self.jobs.get(puuid)
-            matches_data = None
-
-            if job and job.matches_data:
-                # Use in-memory data if available
-                matches_data = job.matches_data
-            else:
-                # Try to load from disk cache
-                matches_file = player_dir / "matches_data.json"
-                if matches_file.exists():
-                    try:
-                        with open(matches_file, 'r', encoding='utf-8') as f:
-                            matches_data = json.load(f)
-                        print(f"✅ Loaded matches_data.json from disk: {len(matches_data)} matches")
-                    except Exception as e:
-                        print(f"⚠️  Failed to load matches_data.json: {e}")
-
-            # If no matches data available, return empty list
-            if not matches_data:
+            match_ids = self._load_known_match_ids(player_dir)
+            if not match_ids:
                 print(f"⚠️  No matches data available for {puuid}")
                 return []
 
+            # 只保留有timeline的matches
+            available_match_ids = [
+                match_id for match_id in match_ids
+                if self.match_store.has_timeline(match_id, puuid=puuid)
+            ]
+            print(f"🔍 Available timelines: {len(available_match_ids)}/{len(match_ids)} matches")
+
+            # match_ids.json is sorted newest first (by gameCreation), so only the first `limit` matches need to be read
+            matches_data = self.match_store.get_matches(available_match_ids[:limit])
+
             # Convert to frontend format, only include matches with timeline files
             matches = []
             for match in matches_data:
                 try:
                     # 提取基础信息
                     match_id = match['metadata']['matchId']
-                    print(f"🔍 Processing match: {match_id}")
-
-                    # 🔍 只返回有timeline文件的matches
-                    if match_id not in available_match_ids:
-                        print(f"   ❌ Skipped: No timeline file for {match_id}")
-                        continue
-                    print(f"   ✅ Has timeline file")
 
                     game_creation = match['info']['gameCreation']
                     game_duration = match['info']['gameDuration']
@@ -1451,10 +1567,7 @@ class PlayerDataManager:
 
                     if not player_data:
                         print(f"   ❌ Player not found in match {match_id}")
-                        print(f"      Looking for PUUID: {puuid}")
-                        print(f"      Available PUUIDs: {[p.get('puuid') for p in participants]}")
                         continue
-                    print(f"   ✅ Found player data")
 
                     # 提取玩家数据
                     champion_id = player_data.get('championId', 0)
@@ -1497,254 +1610,191 @@ class PlayerDataManager:
             traceback.print_exc()
             return []
 
-    def _cleanup_cache_if_needed(self):
-        """
-        Clean up old cache if total cache size exceeds 20GB
-        Deletes oldest player directories first
-        """
-        try:
-            import shutil
-
-            # Calculate total cache size
-            total_size = 0
-            player_dirs = []
-
-            for player_dir in self.cache_dir.iterdir():
-                if player_dir.is_dir():
-                    dir_size = sum(f.stat().st_size for f in player_dir.rglob('*') if f.is_file())
-                    # Get oldest file mtime as directory age
-                    oldest_mtime = min((f.stat().st_mtime for f in player_dir.rglob('*') if f.is_file()), default=0)
-                    player_dirs.append((player_dir, dir_size, oldest_mtime))
-                    total_size += dir_size
-
-            # Convert to GB
-            total_size_gb = total_size / (1024 ** 3)
-
-            if total_size_gb > 20:
-                print(f"⚠️  Cache size {total_size_gb:.2f}GB exceeds 20GB limit, cleaning up...")
-
-                # Sort by oldest first
-                player_dirs.sort(key=lambda x: x[2])
-
-                # Delete oldest directories until under 18GB (2GB buffer)
-                for player_dir, dir_size, mtime in player_dirs:
-                    if total_size_gb <= 18:
-                        break
-
-                    print(f"🗑️  Deleting old cache: {player_dir.name} ({dir_size / (1024**2):.1f}MB)")
-                    shutil.rmtree(player_dir)
-                    total_size_gb -= dir_size / (1024 ** 3)
-
-                print(f"✅ Cache cleaned up, new size: {total_size_gb:.2f}GB")
-
-        except Exception as e:
-            print(f"⚠️  Cache cleanup failed: {e}")
-
-    async def _fetch_timelines_background(
+    async def _enqueue_timelines(
         self,
-        match_ids: List[str],
-        region: str,
         puuid: str,
-        player_dir: Path
+        region: str,
+        matches_data: List[Dict],
+        applied: Set[str] = frozenset()
     ):
         """
-        后台任务：拉取timelines并更新time_to_core
+        把比赛的timeline任务加入持久化队列（按gameCreation从新到旧），并启动后台worker
 
-        这个任务在第一阶段完成后运行，不阻塞agent使用数据
+        time_to_core已写入累加器的比赛（applied）不再加入；队列里已有的任务不会重复加入；
+        timeline已在match store中的任务不会请求Riot API，只重新计算time_to_core
+        （全量重建后累加器是新的，applied为空，所有比赛都会重新计算）
         """
-        try:
-            import time
-            bg_start = time.time()
-            print(f"\n🔄 Background task started: Fetching {len(match_ids)} timelines")
-
-            timelines_data = []
-
-            # 分批拉取timelines
-            batch_size = 50
-            total_batches = (len(match_ids) + batch_size - 1) // batch_size
-
-            for batch_idx in range(total_batches):
-                start_idx = batch_idx * batch_size
-                end_idx = min(start_idx + batch_size, len(match_ids))
-                batch_match_ids = match_ids[start_idx:end_idx]
-
-                batch_start = time.time()
-                print(f"   📦 Background batch {batch_idx + 1}/{total_batches}: Fetching {len(batch_match_ids)} timelines...")
-
-                # 并行拉取本批次的timelines
-                batch_tasks = [self._fetch_timeline(match_id, region) for match_id in batch_match_ids]
-                batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
-                batch_duration = time.time() - batch_start
-
-                # 收集结果
-                batch_success = 0
-                for result in batch_results:
-                    if isinstance(result, Exception):
-                        continue
-                    if result:
-                        timelines_data.append(result)
-                        batch_success += 1
-
-                print(f"      ✅ Background batch successful {batch_success}/{len(batch_match_ids)} timelines (took: {batch_duration:.1f}s)")
-
-            bg_duration = time.time() - bg_start
-            print(f"✅ Background timeline fetch complete: {len(timelines_data)} timelines (total time: {bg_duration:.1f}s)")
-
-            # 保存timeline数据到job（供API使用）
-            job = self.jobs.get(puuid)
-            if job:
-                job.timelines_data = timelines_data
-                print(f"💾 Timeline data saved to job: {len(timelines_data)} timelines")
-
-            # 保存timeline数据到磁盘（供timeline_deep_dive agent使用）
-            timelines_dir = player_dir / "timelines"
-            timelines_dir.mkdir(exist_ok=True)
-
-            saved_count = 0
-            skipped_count = 0  # 🛡️ 统计被过滤的timeline数量
+        tasks = [
+            (puuid, match['metadata']['matchId'], region, match['info'].get('gameCreation'))
+            for match in matches_data
+            if match['metadata']['matchId'] not in applied
+        ]
+        added = await asyncio.to_thread(self.timeline_queue.push_many, tasks) if tasks else 0
+        queued = await asyncio.to_thread(len, self.timeline_queue)
+        print(f"\n✅ Timeline queue: {added} tasks added ({len(matches_data) - len(tasks)} already applied, {queued} queued)")
+        self._ensure_timeline_workers()
+
+    async def resume_timeline_queue(self):
+        """服务启动时调用：继续处理上次未完成的timeline任务（包括其他worker留下的过期任务）"""
+        if await asyncio.to_thread(len, self.timeline_queue):
+            self._ensure_timeline_workers()
+
+    def _ensure_timeline_workers(self):
+        while len(self._timeline_workers) < self.TIMELINE_WORKERS:
+            worker = asyncio.create_task(self._timeline_worker())
+            self._timeline_workers.add(worker)
+            worker.add_done_callback(self._timeline_workers.discard)
+
+    async def _timeline_worker(self):
+        """
+        后台worker：按优先级领取任务（租约，见TimelineQueue.pop），timeline到达即写入
+        match store并计算time_to_core
 
-            for timeline in timelines_data:
+        每个玩家累计 TIME_TO_CORE_FLUSH_EVERY 个结果或该玩家任务全部完成时写一次pack，
+        任务在结果写入pack后才从队列移除（ack），进程退出后未写入的任务租约过期，会被重新领取
+        """
+        try:
+            while True:
+                task = await asyncio.to_thread(self.timeline_queue.pop, self.worker_id)
+                if task is None:
+                    break
                 try:
-                    match_id = timeline['metadata']['matchId']
-                    participants = timeline['metadata']['participants']
-
-                    # 🛡️ 【关键验证】：只保存包含目标玩家的timeline
-                    if puuid not in participants:
-                        skipped_count += 1
-                        print(f"⚠️  Skipping timeline {match_id}: Does not contain target player")
-                        print(f"     Target PUUID: {puuid[:40]}...")
-                        print(f"     First participant: {participants[0][:40]}...")
-                        continue
-
-                    # ✅ 验证通过，保存timeline
-                    timeline_file = timelines_dir / f"{match_id}_timeline.json"
-                    with open(timeline_file, 'w', encoding='utf-8') as f:
-                        json.dump(timeline, f, indent=2, ensure_ascii=False)
-                    saved_count += 1
-
+                    await self._process_timeline_task(task)
                 except Exception as e:
-                    print(f"⚠️  Failed to save timeline: {e}")
-
-            print(f"💾 Timeline files saved to disk: {saved_count}/{len(timelines_data)} timelines")
-            if skipped_count > 0:
-                print(f"🛡️ Data security: Filtered out {skipped_count} timelines not belonging to target player")
+                    print(f"⚠️  Timeline task {task['match_id']} failed: {e}")
+                    await asyncio.to_thread(self.timeline_queue.retry, task['key'])
+        finally:
+            # 最后一个退出的worker：写入所有剩余的time_to_core
+            if len(self._timeline_workers) <= 1:
+                for puuid in list(self._pending_time_to_core):
+                    try:
+                        await self._flush_time_to_core(puuid)
+                    except Exception as e:
+                        print(f"⚠️  Failed to update time_to_core for {puuid[:20]}...: {e}")
+                print(f"✅ Timeline queue drained, timeline_deep_dive agent can now use full data")
+
+    async def _process_timeline_task(self, task: Dict[str, Any]):
+        puuid = task['puuid']
+        match_id = task['match_id']
+
+        # Timelines already in the match store (any player's previous sync) are reused
+        timeline = await asyncio.to_thread(self.match_store.get_timeline, match_id, puuid=puuid)
+        fetched = timeline is None
+        if fetched:
+            timeline = await self._fetch_timeline(match_id, task['region'])
+            if timeline is None:
+                if not await asyncio.to_thread(self.timeline_queue.retry, task['key']):
+                    print(f"⚠️  Giving up on timeline {match_id} after {self.timeline_queue.max_attempts} attempts")
+                    await self._maybe_flush_time_to_core(puuid)
+                return
 
-            # 更新player packs中的time_to_core
-            print(f"🔄 Updating time_to_core...")
-            await self._update_time_to_core(puuid, player_dir, timelines_data)
-            print(f"✅ Background task complete, timeline_deep_dive agent can now use full data")
+        participants = timeline['metadata']['participants']
+
+        # 🛡️ 【关键验证】：只保存包含目标玩家的timeline
+        if puuid not in participants:
+            if fetched:
+                print(f"⚠️  Skipping timeline {match_id}: Does not contain target player")
+                print(f"     Target PUUID: {puuid[:40]}...")
+                print(f"     First participant: {participants[0][:40]}...")
+            await asyncio.to_thread(self.timeline_queue.ack, [task['key']])
+            await self._maybe_flush_time_to_core(puuid)
+            return
+
+        # ✅ 验证通过，立即保存timeline（deep-dive马上可用）
+        if fetched:
+            await asyncio.to_thread(self.match_store.put_timeline, match_id, timeline)
+
+        # timeline的participants顺序即participantId（1-10）
+        time_to_core = self._calculate_time_to_core(timeline, participants.index(puuid) + 1)
+        self._pending_time_to_core.setdefault(puuid, {})[match_id] = time_to_core
+        await self._maybe_flush_time_to_core(puuid)
+
+    async def _maybe_flush_time_to_core(self, puuid: str):
+        """攒够一批，或该玩家的任务只剩已到达未写入的结果时，写入pack"""
+        pending = self._pending_time_to_core.get(puuid)
+        if not pending:
+            return
+        if len(pending) >= self.TIME_TO_CORE_FLUSH_EVERY or \
+                await asyncio.to_thread(self.timeline_queue.outstanding, puuid) <= len(pending):
+            await self._flush_time_to_core(puuid)
+
+    async def _sync_running(self, puuid: str) -> bool:
+        """Whether a sync for this player is rewriting its accumulators (in this or another worker)"""
+        job = self.jobs.get(puuid)
+        if job and not job.follower and job.status in (DataStatus.FETCHING_MATCHES, DataStatus.CALCULATING_METRICS):
+            return True
+        row = await asyncio.to_thread(self.job_registry.get, puuid)
+        return bool(row) and row["status"] in ACTIVE_STATUSES and not row["stale"] and row["owner"] != self.worker_id
+
+    async def _flush_time_to_core(self, puuid: str):
+        if not self._pending_time_to_core.get(puuid):
+            return
+        if await self._sync_running(puuid):
+            # 同步进行中，它会重写累加器；同步结束后再写（本进程的同步结束时由
+            # _flush_deferred_time_to_core 补写，其他worker的同步由 _retry_deferred_flush 等待）
+            if puuid not in self._deferred_flushes:
+                self._deferred_flushes[puuid] = asyncio.create_task(self._retry_deferred_flush(puuid))
+            return
+
+        # 同一玩家的写入串行执行: 并发的 load → save 会互相覆盖，丢失的结果却已被ack
+        async with self._time_to_core_locks.setdefault(puuid, asyncio.Lock()):
+            pending = self._pending_time_to_core.pop(puuid, None)
+            if not pending:
+                # Flushed by a concurrent caller while the registry was checked
+                return
+            player_dir = self.cache_dir / puuid
+            await asyncio.to_thread(self._update_time_to_core, puuid, player_dir, pending)
+            await asyncio.to_thread(self.timeline_queue.ack, [task_key(puuid, match_id) for match_id in pending])
 
+    async def _retry_deferred_flush(self, puuid: str):
+        """Hold the leases of deferred results until the running sync ends, then write them"""
+        try:
+            while self._pending_time_to_core.get(puuid) and await self._sync_running(puuid):
+                await asyncio.sleep(self.JOB_FOLLOW_INTERVAL)
+                pending = self._pending_time_to_core.get(puuid) or {}
+                await asyncio.to_thread(
+                    self.timeline_queue.renew,
+                    [task_key(puuid, match_id) for match_id in pending],
+                    self.worker_id
+                )
+        finally:
+            self._deferred_flushes.pop(puuid, None)
+        try:
+            await self._flush_time_to_core(puuid)
         except Exception as e:
-            print(f"⚠️  Background timeline fetch failed (does not affect other agents): {e}")
+            print(f"⚠️  Failed to update time_to_core for {puuid[:20]}...: {e}")
 
-    async def _update_time_to_core(
+    def _update_time_to_core(
         self,
         puuid: str,
         player_dir: Path,
-        timelines_data: List[Dict]
+        time_to_core: Dict[str, float]
     ):
         """
         更新已保存的player packs，用真实的time_to_core替换默认值
-        """
-        try:
-            # 创建timeline映射: match_id -> timeline_data
-            timelines_map = {t['metadata']['matchId']: t for t in timelines_data}
-            print(f"   📊 Available timeline data: {len(timelines_map)} timelines")
-
-            # 从job中获取原始matches_data
-            job = self.jobs.get(puuid)
-            if not job or not job.matches_data:
-                print(f"   ⚠️  Original match data not found, cannot update time_to_core")
-                return
-
-            matches_data = job.matches_data
-            print(f"   📊 Available match data: {len(matches_data)} matches")
-
-            # 为每场比赛计算真实的time_to_core
-            match_time_to_core = {}  # {match_id: {participant_id: time_to_core}}
-
-            for match_data in matches_data:
-                match_id = match_data['metadata']['matchId']
-                if match_id not in timelines_map:
-                    continue  # 没有timeline数据，跳过
-
-                timeline_data = timelines_map[match_id]
-
-                # 为这场比赛的每个玩家计算time_to_core
-                for participant in match_data['info']['participants']:
-                    if participant['puuid'] != puuid:
-                        continue  # 只处理目标玩家
 
-                    participant_id = participant['participantId']
-                    time_to_core = self._calculate_time_to_core(timeline_data, participant_id)
-
-                    if match_id not in match_time_to_core:
-                        match_time_to_core[match_id] = {}
-                    match_time_to_core[match_id][participant_id] = time_to_core
-
-            print(f"   ✅ Calculation complete: {len(match_time_to_core)} matches time_to_core")
-
-            # 更新每个pack文件
-            updated_packs = 0
-            for pack_file in player_dir.glob("pack_*.json"):
-                with open(pack_file, 'r', encoding='utf-8') as f:
-                    pack = json.load(f)
-
-                # 重新聚合time_to_core（按champion-role分组）
-                cr_time_to_core = defaultdict(list)  # {(champ_id, role): [time_to_core_values]}
-
-                for match_data in matches_data:
-                    match_id = match_data['metadata']['matchId']
-                    game_version = match_data['info']['gameVersion']
-                    patch = '.'.join(game_version.split('.')[:2])
-
-                    # 只处理当前pack的patch
-                    if patch != pack['patch']:
-                        continue
-
-                    if match_id not in match_time_to_core:
-                        continue
-
-                    for participant in match_data['info']['participants']:
-                        if participant['puuid'] != puuid:
-                            continue
-
-                        champ_id = participant['championId']
-                        role = participant.get('teamPosition', 'UTILITY')
-                        participant_id = participant['participantId']
-
-                        if participant_id in match_time_to_core[match_id]:
-                            time_to_core = match_time_to_core[match_id][participant_id]
-                            cr_time_to_core[(champ_id, role)].append(time_to_core)
-
-                # 更新pack中的avg_time_to_core
-                modified = False
-                for cr_entry in pack.get('by_cr', []):
-                    champ_id = cr_entry['champ_id']
-                    role = cr_entry['role']
-
-                    if (champ_id, role) in cr_time_to_core:
-                        times = cr_time_to_core[(champ_id, role)]
-                        avg_time = np.mean(times)
-                        old_time = cr_entry.get('avg_time_to_core', 30.0)
-                        cr_entry['avg_time_to_core'] = round(avg_time, 2)
-
-                        if abs(avg_time - old_time) > 0.1:  # 有实质性变化
-                            modified = True
-
-                # 如果有修改，保存pack文件
-                if modified:
-                    with open(pack_file, 'w', encoding='utf-8') as f:
-                        json.dump(pack, f, indent=2, ensure_ascii=False)
-                    updated_packs += 1
-                    print(f"   ✅ Updated {pack_file.name}: avg_time_to_core updated")
-
-            print(f"   ✅ Background update complete: {updated_packs} pack files updated")
-
-        except Exception as e:
-            print(f"⚠️  Failed to update time_to_core: {e}")
-            import traceback
-            traceback.print_exc()
+        每场比赛的time_to_core写入对应的pack累加器，只重写受影响的pack文件
+        """
+        pack_state = PlayerPackAccumulator.load(player_dir, puuid)
+        if pack_state is None:
+            print(f"   ⚠️  Pack accumulators not found, cannot update time_to_core")
+            return
+
+        dirty = set()
+        updated_matches = 0
+        for match_id, value in time_to_core.items():
+            pack_key = pack_state.set_time_to_core(match_id, value)
+            if pack_key:
+                dirty.add(pack_key)
+                updated_matches += 1
+
+        # 只重写受影响的pack文件
+        if dirty:
+            updated_packs = self._write_player_packs(player_dir, pack_state, dirty)
+            print(f"   ✅ time_to_core updated: {updated_matches} matches, {len(updated_packs)} pack files")
+        else:
+            # timeline_applied still changed: the next sync must not re-enqueue these matches
+            pack_state.save(player_dir)
 
 
 # 全局单例
@@ -0,0 +1,328 @@
+"""
+Player Summary - Pre-aggregated per-player dashboard data
+
+The dashboard endpoints (/champions, /role-stats, /progress, /skills) and the chat context
+used to re-aggregate by_cr across every pack on each request. PlayerDataManager now
+materialises one small summary file per (time_range, queue) combination when packs are
+written, and the endpoints serve it directly (with an ETag):
+
+    data/player_packs/{puuid}/summary_{time_range}_{queue}.json
+
+- A summary records the pack manifest's data_version; a summary whose version no longer
+  matches (packs rewritten since) is rebuilt on read
+- past-365 summaries depend on "now" as well, so they are also rebuilt after SUMMARY_MAX_AGE
+- Writes are atomic (temp file + rename)
+
+The aggregation functions here are pure: they take the selected pack dicts.
+"""
+import hashlib
+import json
+import os
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.utils.id_mappings import get_champion_name
+
+
+SUMMARY_VERSION = 1
+
+# Combinations materialised at ingest time (other queues are built on first read)
+SUMMARY_TIME_RANGES = (None, "past-365")
+SUMMARY_QUEUE_IDS = (None, 420, 440, 400)
+
+# past-365 windows move with the clock
+SUMMARY_MAX_AGE = 24 * 3600
+
+CHAMPION_MAPPING_FILE = Path("data/static/mappings/champions.json")
+
+
+def summary_filename(time_range: Optional[str] = None, queue_id: Optional[int] = None) -> str:
+    """summary_{time_range}_{queue}.json ("all" for no filter)"""
+    return f"summary_{time_range or 'all'}_{queue_id if queue_id is not None else 'all'}.json"
+
+
+def summary_etag(summary: Dict[str, Any], *parts: Any) -> str:
+    """Strong ETag for a response derived from a summary (plus response parameters like limit)"""
+    raw = "|".join(str(p) for p in (summary.get("data_version"), summary.get("built_at"), *parts))
+    return '"' + hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+def summary_is_fresh(summary: Optional[Dict[str, Any]], data_version: Optional[str]) -> bool:
+    """Summary matches the current packs (and, for past-365, is not older than SUMMARY_MAX_AGE)"""
+    if not summary or summary.get("version") != SUMMARY_VERSION:
+        return False
+    if summary.get("data_version") != data_version:
+        return False
+    if summary.get("time_range") and time.time() - summary.get("built_at", 0) >= SUMMARY_MAX_AGE:
+        return False
+    return True
+
+
+def read_summary(player_dir: Path, time_range: Optional[str] = None, queue_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    summary_file = Path(player_dir) / summary_filename(time_range, queue_id)
+    if not summary_file.exists():
+        return None
+    try:
+        with open(summary_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️  Corrupt player summary {summary_file}, rebuilding: {e}")
+        return None
+
+
+def write_summary(player_dir: Path, summary: Dict[str, Any]):
+    """Atomic write (temp file + rename)"""
+    summary_file = Path(player_dir) / summary_filename(summary.get("time_range"), summary.get("queue_id"))
+    tmp_file = summary_file.with_name(f".{summary_file.name}.{os.getpid()}.tmp")
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, separators=(",", ":"))
+    tmp_file.replace(summary_file)
+
+
+def load_champion_mapping() -> Dict[str, str]:
+    """Champion ID → name mapping used by the skills radar"""
+    if CHAMPION_MAPPING_FILE.exists():
+        try:
+            with open(CHAMPION_MAPPING_FILE, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"⚠️  Failed to load champion mapping: {e}")
+    return {}
+
+
+# ============================================================================
+# Aggregations
+# ============================================================================
+
+def aggregate_role_stats(packs: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Role statistics from by_cr (sorted by games)"""
+    role_stats_dict = defaultdict(lambda: {
+        "games": 0,
+        "wins": 0,
+        "total_kda": 0.0
+    })
+
+    for pack in packs:
+        for cr in pack.get("by_cr", []):
+            role = cr.get("role", "UNKNOWN")
+            role_stats_dict[role]["games"] += cr.get("games", 0)
+            role_stats_dict[role]["wins"] += cr.get("wins", 0)
+
+            # 使用 kda_adj * games 作为加权KDA
+            if "kda_adj" in cr:
+                role_stats_dict[role]["total_kda"] += cr["kda_adj"] * cr.get("games", 0)
+
+    role_stats = []
+    for role, stats in role_stats_dict.items():
+        games = stats["games"]
+        wins = stats["wins"]
+        win_rate = (wins / games * 100) if games > 0 else 0
+        avg_kda = (stats["total_kda"] / games) if games > 0 else 0
+
+        role_stats.append({
+            "role": role,
+            "games": games,
+            "wins": wins,
+            "win_rate": round(win_rate, 1),
+            "avg_kda": round(avg_kda, 2)
+        })
+
+    role_stats.sort(key=lambda x: x["games"], reverse=True)
+    return role_stats
+
+
+def aggregate_champions(packs: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Champion statistics from by_cr (all champions, sorted by games)"""
+    champion_stats = defaultdict(lambda: {
+        "games": 0,
+        "wins": 0,
+        "total_kda": 0.0
+    })
+
+    for pack in packs:
+        for cr in pack.get("by_cr", []):
+            champ_id = cr.get("champ_id")
+            if not champ_id:
+                continue
+
+            games = cr.get("games", 0)
+            champion_stats[champ_id]["games"] += games
+            champion_stats[champ_id]["wins"] += cr.get("wins", 0)
+            champion_stats[champ_id]["total_kda"] += cr.get("kda_adj", 0) * games
+
+    champions = []
+    for champ_id, stats in champion_stats.items():
+        games = stats["games"]
+        wins = stats["wins"]
+        win_rate = (wins / games * 100) if games > 0 else 0
+        avg_kda = (stats["total_kda"] / games) if games > 0 else 0
+
+        champions.append({
+            "champ_id": champ_id,
+            "name": get_champion_name(champ_id),
+            "games": games,
+            "wins": wins,
+            "win_rate": round(win_rate, 1),
+            "avg_kda": round(avg_kda, 2)
+        })
+
+    champions.sort(key=lambda x: x["games"], reverse=True)
+    return champions
+
+
+def aggregate_progress(packs: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per-pack metric trends (combat power, KDA, win rate, objectives, gold), sorted by patch"""
+    progress_data = []
+
+    for pack in packs:
+        by_cr = pack.get("by_cr", [])
+        if not by_cr:
+            continue
+
+        total_games = 0
+        total_wins = 0
+        total_combat_power = 0
+        total_kda = 0
+        total_obj_rate = 0
+        total_gold = 0
+
+        for cr in by_cr:
+            games = cr.get("games", 0)
+            total_games += games
+            total_wins += cr.get("wins", 0)
+
+            # Weight by games
+            total_combat_power += cr.get("combat_power", 0) * games
+            total_kda += cr.get("kda_adj", 0) * games
+            total_obj_rate += cr.get("obj_rate", 0) * games
+            total_gold += cr.get("gold_per_min", 0) * games
+
+        if total_games == 0:
+            continue
+
+        progress_data.append({
+            "patch": pack.get("patch", "unknown"),
+            "combat_power": round(total_combat_power / total_games, 2),
+            "kda": round(total_kda / total_games, 2),
+            "win_rate": round(total_wins / total_games, 3),
+            "objective_rate": round(total_obj_rate / total_games, 3),
+            "gold_per_min": round(total_gold / total_games, 1),
+            "games": total_games
+        })
+
+    progress_data.sort(key=lambda x: x["patch"])
+    return progress_data
+
+
+def aggregate_skills(packs: Iterable[Dict[str, Any]], champion_mapping: Dict[str, str]) -> List[Dict[str, Any]]:
+    """5-dimensional skill radar per champion-role (0-100 scale), sorted by games"""
+    champion_data = {}
+
+    for pack in packs:
+        for cr in pack.get("by_cr", []):
+            champ_id = cr.get("champ_id")
+            if champ_id is None:
+                continue
+
+            champion = champion_mapping.get(str(champ_id), "Unknown")
+            role = cr.get("role", "")
+            games = cr.get("games", 0)
+
+            if games == 0:
+                continue
+
+            # Create unique key for champion-role
+            key = f"{champion}_{role}" if role else champion
+
+            if key not in champion_data:
+                champion_data[key] = {
+                    "champion": champion,
+                    "champion_id": champ_id,
+                    "role": role,
+                    "games": 0,
+                    "wins": 0,
+                    "kills": 0,
+                    "deaths": 0,
+                    "assists": 0,
+                    "damage_dealt": 0,
+                    "damage_taken": 0,
+                    "gold": 0,
+                    "combat_power": 0,
+                    "obj_rate": 0,
+                    "vision_score": 0
+                }
+
+            # Aggregate metrics (weighted by games)
+            data = champion_data[key]
+            data["games"] += games
+            data["wins"] += cr.get("wins", 0)
+            data["kills"] += cr.get("kills", 0) * games
+            data["deaths"] += cr.get("deaths", 0) * games
+            data["assists"] += cr.get("assists", 0) * games
+            data["damage_dealt"] += cr.get("damage_dealt", 0) * games
+            data["damage_taken"] += cr.get("damage_taken", 0) * games
+            data["gold"] += cr.get("gold_per_min", 0) * games
+            data["combat_power"] += cr.get("combat_power", 0) * games
+            data["obj_rate"] += cr.get("obj_rate", 0) * games
+            data["vision_score"] += cr.get("vision_score", 0) * games
+
+    skills_data = []
+    for data in champion_data.values():
+        games = data["games"]
+
+        avg_kills = data["kills"] / games
+        avg_deaths = data["deaths"] / games
+        avg_assists = data["assists"] / games
+        avg_damage_dealt = data["damage_dealt"] / games
+        avg_damage_taken = data["damage_taken"] / games
+        avg_gold = data["gold"] / games
+        avg_combat_power = data["combat_power"] / games
+        avg_obj_rate = data["obj_rate"] / games
+        avg_vision = data["vision_score"] / games
+        win_rate = data["wins"] / games
+
+        # 1. Offense: damage dealt, kills, combat power
+        offense_score = min(100, (
+            (avg_damage_dealt / 600) * 40 +  # Normalize damage (assume 600 avg)
+            (avg_kills / 8) * 30 +             # Normalize kills (assume 8 avg)
+            (avg_combat_power / 1200) * 30    # Normalize combat power
+        ))
+
+        # 2. Defense: survival (inverse deaths), damage taken mitigation
+        death_score = max(0, 100 - (avg_deaths / 8) * 100)  # Assume 8 deaths = 0 score
+        defense_score = min(100, (
+            death_score * 0.6 +                              # 60% weight on survival
+            min(100, (avg_damage_taken / 25000) * 100) * 0.4  # 40% weight on tankiness
+        ))
+
+        # 3. Teamwork: assists, objective rate
+        teamwork_score = min(100, (
+            (avg_assists / 10) * 60 +          # Normalize assists (assume 10 avg)
+            (avg_obj_rate) * 100 * 0.4         # obj_rate already 0-1
+        ))
+
+        # 4. Economy: gold per minute (400 gold/min = 100 score)
+        economy_score = min(100, (avg_gold / 400) * 100)
+
+        # 5. Vision: vision score (60 vision score = 100 score)
+        vision_score = min(100, (avg_vision / 60) * 100)
+
+        skills_data.append({
+            "champion": data["champion"],
+            "champion_id": data["champion_id"],
+            "role": data["role"],
+            "games": games,
+            "win_rate": round(win_rate, 3),
+            "skills": [
+                {"subject": "Offense", "value": round(offense_score, 1), "fullMark": 100},
+                {"subject": "Defense", "value": round(defense_score, 1), "fullMark": 100},
+                {"subject": "Teamwork", "value": round(teamwork_score, 1), "fullMark": 100},
+                {"subject": "Economy", "value": round(economy_score, 1), "fullMark": 100},
+                {"subject": "Vision", "value": round(vision_score, 1), "fullMark": 100}
+            ]
+        })
+
+    skills_data.sort(key=lambda x: x["games"], reverse=True)
+    return skills_data
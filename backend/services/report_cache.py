@@ -1,24 +1,45 @@
 """
 Report Cache Manager
 Caches generated analysis reports to avoid redundant LLM calls
+
+Two tiers: a bounded in-memory LRU in front of the per-player JSON files on disk.
+A cached report is valid while the player's data version (precomputed in the pack
+manifest when packs are written, see pack_manifest.py) is unchanged, so a hit costs
+one stat instead of parsing packs.
+
+cached_agent_stream is single-flight: concurrent identical requests attach to the one
+generation in progress and receive all of its chunks.
 """
 
 import json
 import hashlib
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+
+from src.agents.shared.pack_cache import pack_cache
+
+
+# Reports kept in the in-memory tier
+DEFAULT_MEMORY_ENTRIES = 256
 
 
 class ReportCache:
     """Manages caching of agent analysis reports"""
 
-    def __init__(self, cache_dir: Path = None):
+    def __init__(self, cache_dir: Path = None, memory_entries: int = DEFAULT_MEMORY_ENTRIES):
         if cache_dir is None:
             cache_dir = Path(__file__).parent.parent / "data" / "report_cache"
         self.cache_dir = cache_dir
         self.cache_dir.mkdir(parents=True, exist_ok=True)
 
+        # (puuid, cache_key) → cache_data
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
     def _get_cache_key(
         self,
         puuid: str,
@@ -68,46 +89,31 @@ class ReportCache:
 
     def _get_cache_path(self, puuid: str, cache_key: str) -> Path:
         """Get cache file path for a specific player and cache key"""
-        player_cache_dir = self.cache_dir / puuid
-        player_cache_dir.mkdir(parents=True, exist_ok=True)
-        return player_cache_dir / f"{cache_key}.json"
+        return self.cache_dir / puuid / f"{cache_key}.json"
 
-    def _get_latest_match_id(self, packs_dir: Path) -> Optional[str]:
+    def _get_data_version(self, packs_dir: Path) -> Optional[str]:
         """
-        Get the latest match ID from player packs
+        Current data version of the player's packs (changes only when new matches arrive)
 
         Args:
             packs_dir: Path to player_packs directory
 
         Returns:
-            Latest match ID or None
+            Data version or None if the player has no packs
         """
         try:
-            # Find all pack files
-            pack_files = sorted(packs_dir.glob("pack_*.json"))
-            if not pack_files:
-                return None
-
-            # Read the most recent pack
-            latest_pack = pack_files[-1]
-            with open(latest_pack, 'r', encoding='utf-8') as f:
-                pack_data = json.load(f)
-
-            # Extract latest match ID from by_cr entries
-            latest_match_id = None
-            for cr in pack_data.get("by_cr", []):
-                for match in cr.get("matches", []):
-                    match_id = match.get("match_id")
-                    if match_id:
-                        if latest_match_id is None or match_id > latest_match_id:
-                            latest_match_id = match_id
-
-            return latest_match_id
-
+            return pack_cache.data_version(packs_dir)
         except Exception as e:
-            print(f"⚠️ Error getting latest match ID: {e}")
+            print(f"⚠️ Error getting data version: {e}")
             return None
 
+    def _remember(self, puuid: str, cache_key: str, cache_data: Dict[str, Any]):
+        with self._lock:
+            self._memory[(puuid, cache_key)] = cache_data
+            self._memory.move_to_end((puuid, cache_key))
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
     def get(
         self,
         puuid: str,
@@ -137,28 +143,35 @@ class ReportCache:
             cache_key = self._get_cache_key(
                 puuid, agent_id, time_range, queue_id, recent_count, **kwargs
             )
-            cache_path = self._get_cache_path(puuid, cache_key)
-
-            if not cache_path.exists():
-                print(f"❌ Cache MISS: {cache_key} (file not found)")
-                return None
-
-            # Read cached data
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
+            data_version = self._get_data_version(packs_dir)
+
+            # Memory tier
+            with self._lock:
+                cache_data = self._memory.get((puuid, cache_key))
+                if cache_data is not None:
+                    self._memory.move_to_end((puuid, cache_key))
+
+            if cache_data is None:
+                # Disk tier
+                cache_path = self._get_cache_path(puuid, cache_key)
+                if not cache_path.exists():
+                    print(f"❌ Cache MISS: {cache_key} (file not found)")
+                    return None
+
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    cache_data = json.load(f)
+                self._remember(puuid, cache_key, cache_data)
 
             # Check if cache is still valid (no new matches)
-            latest_match_id = self._get_latest_match_id(packs_dir)
-            cached_match_id = cache_data.get("last_match_id")
-
-            if latest_match_id and cached_match_id and latest_match_id != cached_match_id:
+            cached_version = cache_data.get("data_version")
+            if data_version and cached_version != data_version:
                 print(f"❌ Cache INVALID: {cache_key} (new matches detected)")
-                print(f"   Cached: {cached_match_id}, Latest: {latest_match_id}")
+                print(f"   Cached: {cached_version}, Latest: {data_version}")
                 return None
 
             print(f"✅ Cache HIT: {cache_key}")
             print(f"   Generated: {cache_data.get('generated_at')}")
-            print(f"   Last match: {cached_match_id}")
+            print(f"   Data version: {cached_version}")
 
             return cache_data
 
@@ -176,6 +189,7 @@ class ReportCache:
         time_range: Optional[str] = None,
         queue_id: Optional[int] = None,
         recent_count: Optional[int] = None,
+        data_version: Optional[str] = None,
         **kwargs
     ) -> bool:
         """
@@ -190,6 +204,7 @@ class ReportCache:
             time_range: Time range filter
             queue_id: Queue type filter
             recent_count: Number of recent matches
+            data_version: Data version the report was generated from (default: current)
             **kwargs: Additional parameters
 
         Returns:
@@ -201,15 +216,15 @@ class ReportCache:
             )
             cache_path = self._get_cache_path(puuid, cache_key)
 
-            # Get latest match ID
-            latest_match_id = self._get_latest_match_id(packs_dir)
+            if data_version is None:
+                data_version = self._get_data_version(packs_dir)
 
             # Prepare cache data
             cache_data = {
                 "cache_key": cache_key,
                 "agent_id": agent_id,
                 "generated_at": datetime.now(timezone.utc).isoformat(),
-                "last_match_id": latest_match_id,
+                "data_version": data_version,
                 "parameters": {
                     "time_range": time_range,
                     "queue_id": queue_id,
@@ -220,13 +235,16 @@ class ReportCache:
                 "analysis_data": analysis_data
             }
 
+            self._remember(puuid, cache_key, cache_data)
+
             # Write to cache
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
             with open(cache_path, 'w', encoding='utf-8') as f:
                 json.dump(cache_data, f, ensure_ascii=False, indent=2)
 
             print(f"💾 Cache SAVED: {cache_key}")
             print(f"   Path: {cache_path}")
-            print(f"   Last match: {latest_match_id}")
+            print(f"   Data version: {data_version}")
 
             return True
 
@@ -246,6 +264,11 @@ class ReportCache:
             Number of cache files deleted
         """
         try:
+            with self._lock:
+                for key in [k for k in self._memory if k[0] == puuid]:
+                    if agent_id is None or self._memory[key].get("agent_id") == agent_id:
+                        del self._memory[key]
+
             player_cache_dir = self.cache_dir / puuid
             if not player_cache_dir.exists():
                 return 0
@@ -310,11 +333,107 @@ class ReportCache:
 report_cache = ReportCache()
 
 
+class _Flight:
+    """One report generation in progress; every attached request receives all of its messages"""
+
+    def __init__(self):
+        self.messages: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.cond = threading.Condition()
+
+    def publish(self, message: str):
+        with self.cond:
+            self.messages.append(message)
+            self.cond.notify_all()
+
+    def finish(self, error: Optional[BaseException] = None):
+        with self.cond:
+            self.done = True
+            self.error = error
+            self.cond.notify_all()
+
+    def subscribe(self) -> Iterator[str]:
+        """Replay messages so far, then follow until the generation ends"""
+        index = 0
+        while True:
+            with self.cond:
+                while index >= len(self.messages) and not self.done:
+                    self.cond.wait()
+                batch = self.messages[index:]
+                finished = self.done
+            for message in batch:
+                yield message
+            index += len(batch)
+            if finished:
+                if self.error is not None:
+                    raise self.error
+                return
+
+
+# flight key → generation in progress
+_flights: Dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
+
+
+def _lead_flight(
+    flight_key: str,
+    flight: _Flight,
+    agent_id: str,
+    agent_run_stream_func,
+    puuid: str,
+    packs_dir: Path,
+    data_version: Optional[str],
+    kwargs: Dict[str, Any]
+) -> Iterator[str]:
+    """
+    Run one generation to completion and cache it, yielding its messages
+
+    Runs on the leader request's own thread (the stream_in_worker pool), so
+    generations are bounded by that pool instead of each getting a new thread.
+    """
+    error = None
+    try:
+        report_content = ""
+        for message in agent_run_stream_func():
+            # Extract content from SSE message
+            if '"type": "chunk"' in message:
+                try:
+                    msg_data = json.loads(message.split("data: ")[1])
+                    report_content += msg_data.get("content", "")
+                except:
+                    pass
+            flight.publish(message)
+            yield message
+
+        # Cache the generated report (before leaving _flights, so later requests hit it)
+        if report_content:
+            report_cache.set(
+                puuid=puuid,
+                agent_id=agent_id,
+                packs_dir=packs_dir,
+                report_content=report_content,
+                data_version=data_version,
+                **kwargs
+            )
+    except Exception as e:
+        print(f"⚠️ Report generation failed for {agent_id}: {e}")
+        error = e
+    finally:
+        with _flights_lock:
+            _flights.pop(flight_key, None)
+        flight.finish(error)
+    if error is not None:
+        raise error
+
+
 # Streaming cache wrapper helper
 def cached_agent_stream(agent_id: str, agent_run_stream_func, puuid: str, packs_dir: Path, **kwargs):
     """
     Wrapper for agent streaming with automatic caching
 
+    Concurrent identical requests share one generation (single-flight).
+
     Args:
         agent_id: Agent identifier
         agent_run_stream_func: Agent's run_stream function
@@ -325,8 +444,6 @@ def cached_agent_stream(agent_id: str, agent_run_stream_func, puuid: str, packs_
     Yields:
         SSE stream messages
     """
-    import json
-
     # Check cache
     cached_report = report_cache.get(
         puuid=puuid,
@@ -342,26 +459,29 @@ def cached_agent_stream(agent_id: str, agent_run_stream_func, puuid: str, packs_
         yield f'data: {{"type": "complete"}}\n\n'
         return
 
-    print(f"❌ Cache MISS for {agent_id} - generating new report")
-
-    # Generate and cache new report
-    report_content = ""
-    for message in agent_run_stream_func():
-        # Extract content from SSE message
-        if '"type": "chunk"' in message:
-            try:
-                msg_data = json.loads(message.split("data: ")[1])
-                report_content += msg_data.get("content", "")
-            except:
-                pass
-        yield message
-
-    # Cache the generated report
-    if report_content:
-        report_cache.set(
-            puuid=puuid,
-            agent_id=agent_id,
-            packs_dir=packs_dir,
-            report_content=report_content,
-            **kwargs
+    # Single-flight: attach to an identical generation already in progress
+    data_version = report_cache._get_data_version(packs_dir)
+    flight_key = f"{puuid}:{report_cache._get_cache_key(puuid, agent_id, **kwargs)}:{data_version}"
+    with _flights_lock:
+        flight = _flights.get(flight_key)
+        leader = flight is None
+        if leader:
+            flight = _flights[flight_key] = _Flight()
+
+    if leader:
+        print(f"❌ Cache MISS for {agent_id} - generating new report")
+        messages = _lead_flight(
+            flight_key, flight, agent_id, agent_run_stream_func, puuid, packs_dir, data_version, kwargs
         )
+        try:
+            for message in messages:
+                yield message
+        finally:
+            # If the leader's client disconnects (this generator is closed), finish the
+            # generation anyway: attached requests and the cache still get the report
+            for _ in messages:
+                pass
+        return
+
+    print(f"🔗 Attaching to in-progress generation for {agent_id}")
+    yield from flight.subscribe()
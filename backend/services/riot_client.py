@@ -4,15 +4,15 @@ Multi-key rotation support for production rate limiting
 Per-endpoint rate limiting for optimal API utilization
 """
 import asyncio
-from collections import deque
 import aiohttp
-from datetime import datetime, timedelta
+import time
 from typing import Dict, List, Optional, Any, Tuple
 from urllib.parse import quote
 import json
 import os
 from dotenv import load_dotenv
-from .endpoint_rate_limiter import EndpointRateLimiter
+from .endpoint_rate_limiter import EndpointRateLimiter, RateLimitGroup, DEFAULT_RETRY_AFTER
+from .account_cache import account_cache, key_fingerprint
 
 load_dotenv()
 
@@ -36,59 +36,27 @@ class RiotAPIError(Exception):
 
 
 class RateLimiter:
-    """Sliding-window rate limiter for Riot API requests"""
+    """Standalone multi-window token-bucket limiter (monotonic clock)"""
 
     def __init__(self, rate_limits: Optional[List[Tuple[int, int]]] = None):
         """
         Create limiter with (max_requests, window_seconds) tuples.
 
-        Default uses production API limits (most restrictive across endpoints):
-        - match-v5: 2000 req/10s
-        - account-v1: 1000 req/60s
-        - summoner-v4: 1600 req/60s
-
-        Using conservative 90% of limits: 1800 req/10s, 1440 req/60s
-
-        ⚡ Optimization: Increased 60s window from 900 to 1440 (90% of 1600, Summoner API limit)
-        This allows batch fetching of 600+ matches without hitting 60s bottleneck
+        Default: 90% of production limits, 1800 req/10s and 1440 req/60s.
+        RiotAPIClient itself uses the header-driven EndpointRateLimiter.
         """
-        # Production limits (90% of official to be safe)
         self.rate_limits = rate_limits or [(1800, 10), (1440, 60)]
-
-        # Maintain independent timestamp deques per window for fast eviction
-        self._windows = [deque() for _ in self.rate_limits]
-        self._lock = asyncio.Lock()
+        self._group = RateLimitGroup(self.rate_limits, time.monotonic())
 
     async def acquire(self):
         """Acquire rate limit permission respecting all configured windows."""
         while True:
-            async with self._lock:
-                now = datetime.utcnow()
-                sleep_durations: List[float] = []
-
-                for idx, (max_requests, window_seconds) in enumerate(self.rate_limits):
-                    window = self._windows[idx]
-                    cutoff = now - timedelta(seconds=window_seconds)
-
-                    # Drop timestamps outside the active window
-                    while window and window[0] <= cutoff:
-                        window.popleft()
-
-                    if len(window) >= max_requests:
-                        oldest = window[0]
-                        remaining = window_seconds - (now - oldest).total_seconds()
-                        if remaining > 0:
-                            sleep_durations.append(remaining)
-
-                if not sleep_durations:
-                    for window in self._windows:
-                        window.append(now)
-                    return
-
-                sleep_time = max(sleep_durations)
-
-            # Sleep outside of the lock to avoid blocking other waiters
-            await asyncio.sleep(sleep_time)
+            now = time.monotonic()
+            wait = self._group.wait_time(now)
+            if wait <= 0:
+                self._group.consume(now)
+                return
+            await asyncio.sleep(wait)
 
 
 class RiotAPIClient:
@@ -136,10 +104,20 @@ class RiotAPIClient:
         "oc1": "sea", "ph2": "sea", "sg2": "sea", "th2": "sea", "tw2": "sea", "vn2": "sea",
     }
 
-    def __init__(self, api_key: str = None, default_region: str = "na1", rate_limit_enabled: bool = True):
+    # 429 retries per request before giving up
+    MAX_RATE_LIMIT_RETRIES = 5
+
+    def __init__(
+        self,
+        api_key: str = None,
+        default_region: str = "na1",
+        rate_limit_enabled: bool = True,
+        base_url: str = None
+    ):
         # Multi-key rotation support
         if api_key:
             self.api_keys = [api_key]
+            self.primary_key = api_key
         else:
             # Multi-key rotation strategy:
             # - Account/Summoner API: Use PRIMARY key only (PUUID is per-key encrypted)
@@ -187,11 +165,25 @@ class RiotAPIClient:
         # Request timeout
         self.timeout = aiohttp.ClientTimeout(total=30)
 
-    def _get_next_api_key(self) -> str:
-        """Get next API key in rotation"""
-        key = self.api_keys[self.current_key_index]
+        # Optional override of every Riot host (e.g. a local mock server for the bulk crawler):
+        # https://na1.api.riotgames.com/lol/... → {base_url}/lol/...
+        # Rate limiting still keys on the original host/endpoint.
+        self.base_url = (base_url or os.getenv('RIOT_API_BASE_URL') or '').rstrip('/') or None
+
+    def _route(self, url: str) -> str:
+        """Apply base_url override (if any) to a Riot API URL"""
+        if not self.base_url or not url.startswith("https://"):
+            return url
+        host_end = url.find("/", len("https://"))
+        if not url[len("https://"):host_end if host_end != -1 else None].endswith("api.riotgames.com"):
+            return url
+        return self.base_url + (url[host_end:] if host_end != -1 else "")
+
+    def _get_next_key_index(self) -> int:
+        """Get next API key index in rotation (used when rate limiting is disabled)"""
+        key_index = self.current_key_index
         self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
-        return key
+        return key_index
 
     async def initialize(self):
         """Initialize HTTP session"""
@@ -248,81 +240,114 @@ class RiotAPIClient:
             self.session = None
 
     async def _make_request(self, method: str, url: str, use_primary_key: bool = False, **kwargs) -> Optional[Dict[str, Any]]:
-        """Make HTTP request with per-endpoint rate limiting and error handling
+        """Make HTTP request with adaptive per-key/per-endpoint rate limiting and error handling
 
         Args:
             use_primary_key: If True, always use primary_key (for Account/Summoner API where PUUID must be consistent)
-                           If False, rotate through all available keys (for Match API where Match ID is global)
+                           If False, use whichever key has the most headroom (for Match API where Match ID is global)
+
+        429 responses freeze the offending bucket for Retry-After and the request is retried
+        in a loop (up to MAX_RATE_LIMIT_RETRIES), possibly on another key.
         """
-        import time
         request_start = time.time()
 
         if not self.session:
             await self.initialize()
 
-        # Apply per-endpoint rate limiting
-        if self.endpoint_rate_limiter:
-            rate_limit_start = time.time()
-            await self.endpoint_rate_limiter.acquire(url)
-            rate_limit_duration = time.time() - rate_limit_start
-            if rate_limit_duration > 5:
-                print(f"⏱️  Rate limiter等待了 {rate_limit_duration:.1f}秒")
-
-        # Get API key: use primary key for PUUID-based APIs, rotate for Match API
-        if use_primary_key and hasattr(self, 'primary_key'):
-            api_key = self.primary_key
-        else:
-            api_key = self._get_next_api_key()
-
-        # Add API key to headers
-        headers = kwargs.get('headers', {})
-        headers['X-Riot-Token'] = api_key
-        kwargs['headers'] = headers
+        # Candidate keys: primary key only for PUUID-based APIs, any key otherwise
+        key_indices = [0] if use_primary_key else list(range(len(self.api_keys)))
 
         # ⚡ 添加代理支持（如果配置了代理）
         if hasattr(self, 'proxy_url') and self.proxy_url:
             kwargs['proxy'] = self.proxy_url
 
-        try:
-            http_start = time.time()
-            async with self.session.request(method, url, **kwargs) as response:
-                http_duration = time.time() - http_start
-                total_duration = time.time() - request_start
-                if total_duration > 5:
-                    print(f"🐌 慢请求: HTTP {http_duration:.1f}s, 总计 {total_duration:.1f}s - {url[:80]}")
-                if response.status == 200:
-                    return await response.json()
-                elif response.status == 404:
-                    logger.debug(f"Resource not found: {url}")
-                    return None
-                elif response.status == 429:
-                    # Rate limited - get retry after header
-                    retry_after = response.headers.get("Retry-After", "1")
-                    await asyncio.sleep(int(retry_after))
-                    # ⚠️  重要：重试时必须保留use_primary_key参数，否则会导致PUUID解密失败
-                    return await self._make_request(method, url, use_primary_key=use_primary_key, **kwargs)
-                else:
-                    response_text = await response.text()
-                    # Provide more helpful error messages for common issues
-                    error_message = f"API request failed: {response_text}"
-                    if response.status == 400 and "decrypting" in response_text.lower():
-                        error_message = f"Riot API authentication error (400): Invalid or expired API key. The API key may not be able to decrypt the encrypted PUUID. Please check your RIOT_API_KEY_PRIMARY environment variable. Original error: {response_text}"
-                    raise RiotAPIError(
-                        status_code=response.status,
-                        message=error_message,
-                        response_data={"url": url, "response": response_text}
-                    )
-
-        except aiohttp.ClientError as e:
-            logger.error(f"HTTP client error: {e}, url: {url}")
-            raise RiotAPIError(500, f"HTTP client error: {str(e)}")
+        for attempt in range(self.MAX_RATE_LIMIT_RETRIES + 1):
+            # Apply adaptive rate limiting and pick the key with the most headroom
+            if self.endpoint_rate_limiter:
+                key_index = await self.endpoint_rate_limiter.acquire(url, key_indices)
+            elif use_primary_key:
+                key_index = 0
+            else:
+                key_index = self._get_next_key_index()
+            api_key = self.api_keys[key_index]
+
+            # Add API key to headers
+            headers = dict(kwargs.get('headers') or {})
+            headers['X-Riot-Token'] = api_key
+            kwargs['headers'] = headers
+
+            try:
+                http_start = time.time()
+                async with self.session.request(method, self._route(url), **kwargs) as response:
+                    http_duration = time.time() - http_start
+                    total_duration = time.time() - request_start
+                    if total_duration > 5:
+                        print(f"🐌 慢请求: HTTP {http_duration:.1f}s, 总计 {total_duration:.1f}s - {url[:80]}")
+
+                    if self.endpoint_rate_limiter:
+                        self.endpoint_rate_limiter.update_from_headers(url, key_index, response.headers)
+
+                    if response.status == 200:
+                        return await response.json()
+                    elif response.status == 404:
+                        logger.debug(f"Resource not found: {url}")
+                        return None
+                    elif response.status == 429:
+                        # Rate limited - freeze the bucket that tripped and retry (no recursion)
+                        retry_after = response.headers.get("Retry-After")
+                        try:
+                            retry_after = float(retry_after) if retry_after is not None else None
+                        except ValueError:
+                            retry_after = None
+                        limit_type = response.headers.get("X-Rate-Limit-Type")
+                        if attempt >= self.MAX_RATE_LIMIT_RETRIES:
+                            break
+                        print(f"⚠️  429 ({limit_type or 'unknown'}) on key #{key_index}, retry after {retry_after or DEFAULT_RETRY_AFTER}s - {url[:80]}")
+                        if self.endpoint_rate_limiter:
+                            self.endpoint_rate_limiter.penalize(url, key_index, retry_after, limit_type)
+                        else:
+                            await asyncio.sleep(retry_after or DEFAULT_RETRY_AFTER)
+                        # ⚠️  重要：重试时仍只用候选key（use_primary_key时只有primary key），否则会导致PUUID解密失败
+                        continue
+                    else:
+                        response_text = await response.text()
+                        # Provide more helpful error messages for common issues
+                        error_message = f"API request failed: {response_text}"
+                        if response.status == 400 and "decrypting" in response_text.lower():
+                            error_message = f"Riot API authentication error (400): Invalid or expired API key. The API key may not be able to decrypt the encrypted PUUID. Please check your RIOT_API_KEY_PRIMARY environment variable. Original error: {response_text}"
+                        raise RiotAPIError(
+                            status_code=response.status,
+                            message=error_message,
+                            response_data={"url": url, "response": response_text}
+                        )
+
+            except aiohttp.ClientError as e:
+                logger.error(f"HTTP client error: {e}, url: {url}")
+                raise RiotAPIError(500, f"HTTP client error: {str(e)}")
+
+        raise RiotAPIError(
+            status_code=429,
+            message=f"Rate limited after {self.MAX_RATE_LIMIT_RETRIES} retries",
+            response_data={"url": url}
+        )
 
     # Account API (Regional routing)
     async def get_account_by_riot_id(self, game_name: str, tag_line: str, region: str = "americas") -> Optional[Dict[str, Any]]:
         """Get account by Riot ID (game name + tag line)
 
+        Resolved through the shared account cache (TTL, negative caching, single-flight),
+        so repeated polls for the same Riot ID don't spend primary-key quota.
+
         IMPORTANT: Always uses primary_key because PUUID is per-key encrypted
         """
+        return await account_cache.resolve(
+            game_name, tag_line, region,
+            key_fingerprint(getattr(self, 'primary_key', None) or self.api_keys[0]),
+            fetch=lambda: self._fetch_account_by_riot_id(game_name, tag_line, region)
+        )
+
+    async def _fetch_account_by_riot_id(self, game_name: str, tag_line: str, region: str = "americas") -> Optional[Dict[str, Any]]:
+        """Uncached account-v1 lookup by Riot ID"""
         host = self.REGIONAL_HOSTS.get(region, self.REGIONAL_HOSTS["americas"])
         encoded_game_name = quote(game_name)
         encoded_tag_line = quote(tag_line)
@@ -0,0 +1,156 @@
+"""
+Static Response Cache - Precomputed, pre-compressed HTTP bodies for static-data endpoints
+
+Static data (DDragon champions/items/runes, champion base power, patch list) changes once
+per patch, yet these are among the most frequently hit routes and each call reshaped and
+re-serialised the same JSON. Each response is now built once per data version and kept as:
+
+- the serialised JSON body, plus gzip (and brotli, if installed) encodings
+- a strong ETag (hash of the body): If-None-Match returns 304 without touching the body
+- Cache-Control so browsers / CDNs can skip the request entirely
+
+The version passed by the endpoint (DDragon version, patch list, build signature) decides
+when an entry is rebuilt. Entries are kept in an LRU (per-champion/patch routes add up).
+"""
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+DEFAULT_MAX_ENTRIES = 2048
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 512
+
+
+class PrecomputedResponse:
+    """One serialised JSON body with its encodings and ETag"""
+
+    __slots__ = ("version", "body", "gzip_body", "br_body", "etag")
+
+    def __init__(self, version: str, content: Any):
+        self.version = version
+        # Same serialisation as FastAPI's JSONResponse
+        self.body = json.dumps(
+            content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+        ).encode("utf-8")
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest() + '"'
+        compress = len(self.body) >= MIN_COMPRESS_BYTES
+        self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0) if compress else None
+        self.br_body = brotli.compress(self.body) if compress and brotli is not None else None
+
+    def respond(self, request: Request, cache_control: str) -> Response:
+        """200 with the best encoding the client accepts, or 304 if its ETag matches"""
+        headers = {"ETag": self.etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or self.etag in [
+            tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+        ]):
+            return Response(status_code=304, headers=headers)
+
+        accept_encoding = request.headers.get("accept-encoding", "")
+        accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+        if self.br_body is not None and "br" in accepted:
+            body, headers["Content-Encoding"] = self.br_body, "br"
+        elif self.gzip_body is not None and "gzip" in accepted:
+            body, headers["Content-Encoding"] = self.gzip_body, "gzip"
+        else:
+            body = self.body
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+class StaticResponseCache:
+    """
+    Precomputed responses keyed by route, rebuilt when the data version changes
+
+    使用示例:
+        entry = static_responses.lookup("static:items", data_dragon.version) or \
+            await run_in_worker(static_responses.get, "static:items", data_dragon.version, build_items_payload)
+        return entry.respond(http_request, STATIC_CACHE_CONTROL)
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, PrecomputedResponse]" = OrderedDict()
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+
+    def lookup(self, key: str, version: Any) -> Optional[PrecomputedResponse]:
+        """Cached response if present and built for this version (never builds)"""
+        version = str(version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def get(self, key: str, version: Any, build: Callable[[], Any]) -> PrecomputedResponse:
+        """
+        Cached response for key, built with build() on a miss or a version change
+
+        build() runs once per key even under concurrent requests; exceptions (e.g.
+        HTTPException 404) propagate and nothing is cached.
+        """
+        version = str(version)
+        entry = self.lookup(key, version)
+        if entry is not None:
+            return entry
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        try:
+            with build_lock:
+                entry = self.lookup(key, version)
+                if entry is not None:
+                    return entry
+                entry = PrecomputedResponse(version, build())
+                with self._lock:
+                    self.builds += 1
+                    self._entries[key] = entry
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                return entry
+        finally:
+            # The build lock only lives while building (also when build() raises, e.g. a 404
+            # for a name taken from the URL, or the dict would grow without bound); threads
+            # already waiting hold the same lock and then hit the cache
+            with self._lock:
+                if self._build_locks.get(key) is build_lock:
+                    del self._build_locks[key]
+
+    def invalidate(self, prefix: str = ""):
+        """Drop entries whose key starts with prefix (everything by default)"""
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "builds": self.builds,
+                "brotli": brotli is not None,
+                "bytes": sum(len(e.body) for e in self._entries.values())
+            }
+
+
+# Global singleton
+static_responses = StaticResponseCache()
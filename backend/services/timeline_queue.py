@@ -0,0 +1,245 @@
+"""
+Timeline Queue - Persistent, prioritised timeline work queue shared by all worker processes
+
+One task per (player, match): fetch the match timeline (or reuse the one in the match
+store), store it, and fold its time_to_core into the player's packs.
+
+- Most recent matches first (priority = gameCreation ms), so the matches shown by
+  get_recent_matches / timeline-deep-dive get their timelines within seconds
+- Failed tasks are retried behind every fresh task, up to MAX_ATTEMPTS
+- A task stays queued until its result has been applied to the player's packs (ack)
+
+Tasks live in the job registry's SQLite database (data/jobs.db, WAL mode), so every uvicorn
+worker sees the same queue:
+
+- pop() claims a task atomically (BEGIN IMMEDIATE) with a lease; a task whose worker stopped
+  renewing it for LEASE_SECONDS (crash, restart) can be claimed again
+- A player's tasks are only handed to the worker already holding claims for that player, so
+  one process applies that player's time_to_core results (no concurrent pack rewrites)
+
+Only task metadata lives here - timelines go straight to the match store.
+"""
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+MAX_ATTEMPTS = 3
+# A claimed task must be acked, retried or renewed within this window or it can be re-claimed
+LEASE_SECONDS = 120
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS timeline_tasks (
+        key         TEXT PRIMARY KEY,
+        puuid       TEXT NOT NULL,
+        match_id    TEXT NOT NULL,
+        region      TEXT,
+        priority    INTEGER NOT NULL,
+        attempts    INTEGER NOT NULL DEFAULT 0,
+        queued_at   REAL NOT NULL,
+        claimed_by  TEXT,
+        claimed_at  REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_timeline_tasks_order ON timeline_tasks (attempts, priority DESC, queued_at)",
+    "CREATE INDEX IF NOT EXISTS idx_timeline_tasks_puuid ON timeline_tasks (puuid)",
+)
+
+
+def task_key(puuid: str, match_id: str) -> str:
+    return f"{puuid}|{match_id}"
+
+
+def match_id_priority(match_id: str) -> int:
+    """Fallback priority when gameCreation is unknown: match IDs grow over time per platform"""
+    try:
+        return int(match_id.rsplit("_", 1)[-1])
+    except ValueError:
+        return 0
+
+
+class TimelineQueue:
+    """
+    SQLite-backed priority queue of timeline tasks with leased claims
+
+    Every method is a blocking SQLite call: call it through asyncio.to_thread from async code.
+
+    使用示例:
+        timeline_queue.push_many([(puuid, match_id, region, game_creation), ...])
+        task = timeline_queue.pop(owner=worker_id)
+        ...
+        timeline_queue.ack([task["key"]])       # applied, drop it
+        timeline_queue.retry(task["key"])       # failed, try again later
+    """
+
+    def __init__(self, db_file: Path = None, max_attempts: int = MAX_ATTEMPTS, lease_seconds: int = LEASE_SECONDS):
+        self.db_file = db_file or Path("data/jobs.db")
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self._local = threading.local()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Per-thread connection (autocommit; transactions are explicit)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        with self._init_lock:
+            if not self._initialized:
+                self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_file), timeout=10, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._init_lock:
+            if not self._initialized:
+                for statement in _SCHEMA:
+                    conn.execute(statement)
+                self._initialized = True
+        self._local.conn = conn
+        return conn
+
+    def push_many(self, tasks: Iterable[Tuple[str, str, str, Optional[int]]]) -> int:
+        """
+        Add tasks (puuid, match_id, region, priority) in one transaction
+
+        Returns:
+            Number of tasks added (tasks already queued are left as they are)
+        """
+        now = time.time()
+        rows = [
+            (task_key(puuid, match_id), puuid, match_id, region,
+             priority if priority is not None else match_id_priority(match_id), now)
+            for puuid, match_id, region, priority in tasks
+        ]
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = conn.total_changes
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO timeline_tasks (key, puuid, match_id, region, priority, queued_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                rows
+            )
+            added = conn.total_changes - before
+            conn.execute("COMMIT")
+            return added
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def push(self, puuid: str, match_id: str, region: str, priority: int = None) -> bool:
+        """Add a task; returns False if it is already queued"""
+        return self.push_many([(puuid, match_id, region, priority)]) == 1
+
+    def pop(self, owner: str) -> Optional[Dict[str, Any]]:
+        """
+        Claim the highest priority task that is not claimed by a live worker
+
+        Players with live claims held by another worker are skipped.
+        """
+        conn = self._connect()
+        now = time.time()
+        expired = now - self.lease_seconds
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                """
+                SELECT * FROM timeline_tasks AS t
+                WHERE (t.claimed_by IS NULL OR t.claimed_at < ?)
+                  AND NOT EXISTS (
+                      SELECT 1 FROM timeline_tasks AS other
+                      WHERE other.puuid = t.puuid AND other.claimed_by IS NOT NULL
+                        AND other.claimed_by != ? AND other.claimed_at >= ?
+                  )
+                ORDER BY t.attempts, t.priority DESC, t.queued_at
+                LIMIT 1
+                """,
+                (expired, owner, expired)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE timeline_tasks SET claimed_by = ?, claimed_at = ? WHERE key = ?",
+                    (owner, now, row["key"])
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return dict(row) if row is not None else None
+
+    def renew(self, keys: Iterable[str], owner: str):
+        """Extend the lease of claimed tasks whose results are waiting to be applied"""
+        now = time.time()
+        self._connect().executemany(
+            "UPDATE timeline_tasks SET claimed_at = ? WHERE key = ? AND claimed_by = ?",
+            [(now, key, owner) for key in keys]
+        )
+
+    def ack(self, keys: Iterable[str]):
+        """Tasks done (results applied): remove them"""
+        self._connect().executemany("DELETE FROM timeline_tasks WHERE key = ?", [(key,) for key in keys])
+
+    def retry(self, key: str) -> bool:
+        """
+        Task failed: release it and queue it again behind fresh tasks
+
+        Returns:
+            False if it ran out of attempts and was dropped
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT attempts FROM timeline_tasks WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return False
+            attempts = row["attempts"] + 1
+            if attempts >= self.max_attempts:
+                conn.execute("DELETE FROM timeline_tasks WHERE key = ?", (key,))
+            else:
+                conn.execute(
+                    """
+                    UPDATE timeline_tasks SET attempts = ?, queued_at = ?, claimed_by = NULL, claimed_at = NULL
+                    WHERE key = ?
+                    """,
+                    (attempts, time.time(), key)
+                )
+            conn.execute("COMMIT")
+            return attempts < self.max_attempts
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def outstanding(self, puuid: str) -> int:
+        """Tasks not yet acked for a player (queued or in progress)"""
+        row = self._connect().execute(
+            "SELECT COUNT(*) AS n FROM timeline_tasks WHERE puuid = ?", (puuid,)
+        ).fetchone()
+        return row["n"]
+
+    def __len__(self) -> int:
+        """Tasks waiting to be claimed (unclaimed or with an expired lease)"""
+        row = self._connect().execute(
+            "SELECT COUNT(*) AS n FROM timeline_tasks WHERE claimed_by IS NULL OR claimed_at < ?",
+            (time.time() - self.lease_seconds,)
+        ).fetchone()
+        return row["n"]
+
+    def get_stats(self) -> Dict[str, Any]:
+        row = self._connect().execute(
+            """
+            SELECT COUNT(*) AS tasks,
+                   SUM(CASE WHEN claimed_by IS NOT NULL AND claimed_at >= ? THEN 1 ELSE 0 END) AS in_progress
+            FROM timeline_tasks
+            """,
+            (time.time() - self.lease_seconds,)
+        ).fetchone()
+        tasks, in_progress = row["tasks"], row["in_progress"] or 0
+        return {"tasks": tasks, "queued": tasks - in_progress, "in_progress": in_progress}
@@ -65,6 +65,7 @@ class AgentContext:
 
         # Phase 4 Day 3: 缓存预热相关
         self._preload_futures: Dict[str, Future] = {}  # 存储后台加载任务
+        self._filtered_packs_filters: Optional[tuple] = None  # filtered_packs 预热使用的 (queue_id, time_range)
 
     def add_agent_result(
         self,
@@ -382,7 +383,12 @@ class AgentContext:
 
         return context_for_agent
 
-    def prewarm_cache(self, workflow_name: str) -> None:
+    def prewarm_cache(
+        self,
+        workflow_name: str,
+        queue_id: Optional[int] = None,
+        time_range: Optional[str] = None
+    ) -> None:
         """
         缓存预热：在工作流开始前后台并行加载数据（Phase 4 Day 3）
 
@@ -391,6 +397,8 @@ class AgentContext:
 
         Args:
             workflow_name: 工作流名称
+            queue_id: 队列过滤（dashboard工作流）
+            time_range: 时间范围过滤（dashboard工作流）
 
         使用示例:
             context = AgentContext("用户请求", "data/packs/player")
@@ -406,6 +414,7 @@ class AgentContext:
             "comprehensive_profile": ["all_packs"],
             "role_mastery": ["all_packs"],
             "seasonal_review": ["all_packs"],
+            "dashboard": ["filtered_packs"],
         }
 
         requirements = workflow_requirements.get(workflow_name, [])
@@ -431,6 +440,13 @@ class AgentContext:
                 self._preload_futures["all_packs"] = future
                 print(f"   🔄 后台加载: 所有版本")
 
+            elif req == "filtered_packs":
+                # 后台加载符合queue_id/time_range的pack（写入进程级pack缓存，各Agent直接命中）
+                future = executor.submit(self._preload_filtered_packs, queue_id, time_range)
+                self._preload_futures["filtered_packs"] = future
+                self._filtered_packs_filters = (queue_id, time_range)
+                print(f"   🔄 后台加载: queue_id={queue_id}, time_range={time_range}")
+
         executor.shutdown(wait=False)  # 不等待，让任务在后台运行
 
     def _preload_recent_packs(self, n: int = 5):
@@ -474,6 +490,47 @@ class AgentContext:
         except Exception as e:
             print(f"   ⚠️  预热失败: all_packs - {e}")
 
+    def _preload_filtered_packs(self, queue_id: Optional[int] = None, time_range: Optional[str] = None):
+        """后台加载按queue_id/time_range过滤后的版本"""
+        from src.agents.shared.pack_cache import pack_cache
+
+        try:
+            packs = pack_cache.load_packs(self.packs_dir, queue_id=queue_id, time_range=time_range)
+
+            # 存CachedPack引用：pack数据由pack_cache持有和计量，这里不重复计算大小
+            self.add_shared_data(
+                key="filtered_packs",
+                data=packs,
+                summary=f"{len(packs)}个版本（queue_id={queue_id}, time_range={time_range}，预热加载）"
+            )
+            print(f"   ✅ 预热完成: filtered_packs ({len(packs)} 个版本)")
+
+        except Exception as e:
+            print(f"   ⚠️  预热失败: filtered_packs - {e}")
+
+    def shared_packs(
+        self,
+        queue_id: Optional[int] = None,
+        time_range: Optional[str] = None,
+        timeout: float = 60.0
+    ) -> Optional[List[Any]]:
+        """
+        获取预热的过滤后pack（CachedPack列表），过滤条件必须与预热时一致
+
+        Args:
+            queue_id: 队列过滤
+            time_range: 时间范围过滤
+            timeout: 预热仍在进行时的等待超时（秒）
+
+        Returns:
+            CachedPack列表；没有按这组过滤条件预热（或预热失败）时返回None，调用方自行加载
+        """
+        if self._filtered_packs_filters != (queue_id, time_range):
+            return None
+        if not self.wait_for_preload("filtered_packs", timeout):
+            return None
+        return self.get_shared_data("filtered_packs")
+
     def wait_for_preload(self, key: str, timeout: float = 30.0) -> bool:
         """
         等待特定预热任务完成（Phase 4 Day 3）
@@ -6,7 +6,7 @@ Generates comprehensive annual summary reports for entire season (40-50 patches)
 
 import json
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import sys
 
 # Add parent path for imports
@@ -15,6 +15,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 from src.agents.shared import BedrockLLM, get_config
 from src.agents.shared.data_auto_fetcher import DataAutoFetcher
 from src.agents.shared.prompt_optimizer import PromptOptimizer
+from src.agents.shared.analysis_cache import analysis_cache
 from .tools import (
     load_all_annual_packs,
     generate_comprehensive_annual_analysis,
@@ -23,6 +24,40 @@ from .tools import (
 from .prompts import build_narrative_prompt
 
 
+def get_annual_analysis(
+    packs_dir: str,
+    time_range: Optional[str] = None,
+    queue_id: Optional[int] = None,
+    packs: Optional[List] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Comprehensive annual analysis and its prompts, memoised per player data version and filters
+
+    Shared by the annual-summary endpoint (frontend widgets) and AnnualSummaryAgent.run_stream,
+    so one request aggregates the season once.
+
+    Args:
+        packs: CachedPacks already filtered by queue_id/time_range (optional, from AgentContext.shared_packs)
+
+    Returns:
+        {"analysis": ..., "prompts": {"system", "user"}}, or None if no packs match the filters
+    """
+    def compute() -> Optional[Dict[str, Any]]:
+        all_packs = load_all_annual_packs(packs_dir, time_range=time_range, queue_id=queue_id, packs=packs)
+        if not all_packs:
+            return None
+        analysis = generate_comprehensive_annual_analysis(all_packs)
+        formatted = format_analysis_for_prompt(analysis)
+        return {
+            "analysis": analysis,
+            "prompts": build_narrative_prompt(analysis, formatted, time_range)
+        }
+
+    return analysis_cache.get_or_compute(
+        "annual-summary", packs_dir, compute, time_range=time_range, queue_id=queue_id
+    )
+
+
 class AnnualSummaryAgent(DataAutoFetcher):
     """
     Annual Season Summary Agent (with Auto Data Fetching)
@@ -233,19 +268,24 @@ class AnnualSummaryAgent(DataAutoFetcher):
         Yields:
             SSE formatted messages for streaming
         """
-        from src.agents.shared.stream_helper import stream_agent_with_thinking
+        # Load all annual packs and generate comprehensive analysis (memoised)
+        result = get_annual_analysis(packs_dir, time_range=time_range, queue_id=queue_id)
+        yield from self.stream_analysis(result)
 
-        # Load all annual packs
-        all_packs = load_all_annual_packs(packs_dir, time_range=time_range, queue_id=queue_id)
+    def stream_analysis(self, result: Optional[Dict[str, Any]]):
+        """
+        Stream the annual report for a get_annual_analysis() result (the LLM stage only)
+
+        Yields:
+            SSE formatted messages for streaming
+        """
+        from src.agents.shared.stream_helper import stream_agent_with_thinking
 
-        if not all_packs or len(all_packs) == 0:
+        if result is None:
             yield f"data: {{\"error\": \"No annual data found\"}}\n\n"
             return
 
-        # Generate comprehensive analysis
-        analysis = generate_comprehensive_annual_analysis(all_packs)
-        formatted = format_analysis_for_prompt(analysis)
-        prompts = build_narrative_prompt(analysis, formatted, time_range)
+        prompts = result['prompts']
 
         # Stream response
         for message in stream_agent_with_thinking(
@@ -4,9 +4,8 @@ Annual Summary Tools - Data Processing Tools for Annual Analysis
 Provides all data processing functions required for annual analysis
 """
 
-import json
 from pathlib import Path
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Optional, Tuple
 from collections import defaultdict
 from datetime import datetime, timedelta
 import sys
@@ -23,8 +22,11 @@ from src.agents.player_analysis.multi_version.tools import (
 # Import ID mappings
 from src.utils.id_mappings import get_champion_name
 
+# Shared process-wide pack cache
+from src.agents.shared.pack_cache import pack_cache
 
-def load_all_annual_packs(packs_dir: str, time_range: str = None, queue_id: int = None) -> Dict[str, Any]:
+
+def load_all_annual_packs(packs_dir: str, time_range: str = None, queue_id: int = None, packs: Optional[List] = None) -> Dict[str, Any]:
     """
     Load all Player-Pack files for the entire season
 
@@ -39,6 +41,7 @@ def load_all_annual_packs(packs_dir: str, time_range: str = None, queue_id: int
             - 440: Ranked Flex
             - 400: Normal
             - None: Load all queue types
+        packs: CachedPacks already filtered by queue_id/time_range (optional, from AgentContext.shared_packs)
 
     Returns:
         {
@@ -47,137 +50,20 @@ def load_all_annual_packs(packs_dir: str, time_range: str = None, queue_id: int
             ...
         }
     """
-    packs_path = Path(packs_dir)
-    all_packs = {}
-
-    # Calculate time filter if needed
-    cutoff_timestamp = None
-    cutoff_end_timestamp = None  # For date range filtering
-    
     if time_range == "2024-01-01":
-        # Past Season 2024: patch 14.1 (2024-01-09) to patch 14.25 (2025-01-06)
-        cutoff_timestamp = datetime(2024, 1, 9).timestamp()
-        cutoff_end_timestamp = datetime(2025, 1, 6, 23, 59, 59, 999000).timestamp()
         print(f"📅 [Annual Summary] Filtering for Season 2024: {datetime(2024, 1, 9)} to {datetime(2025, 1, 6)}")
     elif time_range == "past-365":
-        cutoff_timestamp = (datetime.now() - timedelta(days=365)).timestamp()
-        print(f"📅 [Annual Summary] Filtering for Past 365 Days: from {datetime.fromtimestamp(cutoff_timestamp)} to now")
+        print(f"📅 [Annual Summary] Filtering for Past 365 Days: from {datetime.now() - timedelta(days=365)} to now")
     elif time_range is None:
         print(f"📅 [Annual Summary] No time filter - loading all available data")
 
-    # Build file pattern based on queue_id
-    if queue_id is not None:
-        # Load specific queue_id packs: pack_{patch}_{queue_id}.json
-        pack_pattern = f"pack_*_{queue_id}.json"
-    else:
-        # Load all packs (legacy format: pack_{patch}.json or new format: pack_{patch}_{queue_id}.json)
-        pack_pattern = "pack_*.json"
-
-    for pack_file in sorted(packs_path.glob(pack_pattern)):
-        # Extract patch version from filename
-        # pack_15.18_420.json → 15.18 (new format)
-        # pack_15.18.json → 15.18 (legacy format)
-        filename = pack_file.stem
-        if filename.startswith("pack_"):
-            patch_version = filename.replace("pack_", "")
-            # Remove queue_id suffix if present (e.g., "15.18_420" → "15.18")
-            if "_" in patch_version:
-                patch_version = patch_version.rsplit("_", 1)[0]
-        else:
-            continue
-
-        with open(pack_file, 'r', encoding='utf-8') as f:
-            pack_data = json.load(f)
-            
-            # Verify queue_id matches if specified
-            if queue_id is not None:
-                pack_queue_id = pack_data.get('queue_id', 420)  # Default to Solo/Duo for legacy packs
-                if pack_queue_id != queue_id:
-                    continue
-
-            # Apply time range filter based on match dates, not generation timestamp
-            if cutoff_timestamp:
-                # Check match dates first (more accurate)
-                pack_earliest = pack_data.get("earliest_match_date")
-                pack_latest = pack_data.get("latest_match_date")
-                
-                has_match_in_range = False
-                
-                if pack_earliest or pack_latest:
-                    # Parse dates
-                    earliest_dt = None
-                    latest_dt = None
-                    
-                    if pack_earliest:
-                        try:
-                            if isinstance(pack_earliest, str):
-                                earliest_dt = datetime.fromisoformat(pack_earliest.replace('Z', '+00:00'))
-                            else:
-                                earliest_dt = pack_earliest
-                            if earliest_dt.tzinfo:
-                                earliest_dt = earliest_dt.replace(tzinfo=None)
-                        except:
-                            pass
-                    
-                    if pack_latest:
-                        try:
-                            if isinstance(pack_latest, str):
-                                latest_dt = datetime.fromisoformat(pack_latest.replace('Z', '+00:00'))
-                            else:
-                                latest_dt = pack_latest
-                            if latest_dt.tzinfo:
-                                latest_dt = latest_dt.replace(tzinfo=None)
-                        except:
-                            pass
-                    
-                    # Check if date range overlaps with the filter range
-                    if earliest_dt and latest_dt:
-                        earliest_ts = earliest_dt.timestamp()
-                        latest_ts = latest_dt.timestamp()
-                        
-                        if cutoff_end_timestamp:
-                            # Date range filter: check if pack date range overlaps with filter range
-                            # Pack overlaps if: pack_earliest <= filter_end AND pack_latest >= filter_start
-                            if earliest_ts <= cutoff_end_timestamp and latest_ts >= cutoff_timestamp:
-                                has_match_in_range = True
-                        else:
-                            # Single cutoff: check if pack has matches after cutoff
-                            if latest_ts >= cutoff_timestamp:
-                                has_match_in_range = True
-                    elif earliest_dt:
-                        earliest_ts = earliest_dt.timestamp()
-                        if cutoff_end_timestamp:
-                            if earliest_ts <= cutoff_end_timestamp and earliest_ts >= cutoff_timestamp:
-                                has_match_in_range = True
-                        else:
-                            if earliest_ts >= cutoff_timestamp:
-                                has_match_in_range = True
-                    elif latest_dt:
-                        latest_ts = latest_dt.timestamp()
-                        if cutoff_end_timestamp:
-                            if latest_ts <= cutoff_end_timestamp and latest_ts >= cutoff_timestamp:
-                                has_match_in_range = True
-                        else:
-                            if latest_ts >= cutoff_timestamp:
-                                has_match_in_range = True
-                else:
-                    # Fallback to generation_timestamp if match dates not available
-                    if "generation_timestamp" in pack_data:
-                        pack_timestamp = pack_data["generation_timestamp"]
-                        if isinstance(pack_timestamp, str):
-                            pack_timestamp = datetime.fromisoformat(pack_timestamp.replace('Z', '+00:00')).timestamp()
-                        if cutoff_end_timestamp:
-                            if cutoff_timestamp <= pack_timestamp <= cutoff_end_timestamp:
-                                has_match_in_range = True
-                        else:
-                            if pack_timestamp >= cutoff_timestamp:
-                                has_match_in_range = True
-                
-                # Skip if no matches in the time range
-                if not has_match_in_range:
-                    continue
-
-            all_packs[patch_version] = pack_data
+    # Shared process-wide pack cache (parsed once, dates pre-parsed)
+    # pack_15.18_420.json → 15.18 (new format), pack_15.18.json → 15.18 (legacy format)
+    if packs is None:
+        packs = pack_cache.load_packs(packs_dir, queue_id=queue_id, time_range=time_range)
+    all_packs = {}
+    for pack in packs:
+        all_packs[pack.patch] = pack.data
 
     print(f"✅ [Annual Summary] Loaded {len(all_packs)} patches after filtering (time_range: {time_range}, queue_id: {queue_id})")
     return all_packs
@@ -4,14 +4,13 @@ ChampionMasteryAgent - Data Processing Tools
 Analyzes player mastery of a single champion across all available match history.
 """
 
-import json
-from pathlib import Path
 from typing import Dict, Any, List, Tuple
 from collections import defaultdict
 from datetime import datetime
 
 from src.core.statistical_utils import wilson_ci_tuple as wilson_confidence_interval
 from src.utils.id_mappings import get_champion_name
+from src.agents.shared.pack_cache import pack_cache
 
 
 def load_champion_data(packs_dir: str, champion_id: int, all_packs_data: List[Dict] = None, time_range: str = None, queue_id: int = None) -> Dict[str, Any]:
@@ -30,142 +29,17 @@ def load_champion_data(packs_dir: str, champion_id: int, all_packs_data: List[Di
     Returns:
         按patch组织的英雄数据，包含timeline信息
     """
-    from datetime import datetime, timedelta
-    
     champion_data = {}
 
-    # Calculate time filter if needed
-    cutoff_timestamp = None
-    cutoff_end_timestamp = None  # For date range filtering
-    
-    if time_range == "2024-01-01":
-        # Past Season 2024: patch 14.1 (2024-01-09) to patch 14.25 (2025-01-06)
-        cutoff_timestamp = datetime(2024, 1, 9).timestamp()
-        cutoff_end_timestamp = datetime(2025, 1, 6, 23, 59, 59, 999000).timestamp()
-    elif time_range == "past-365":
-        cutoff_timestamp = (datetime.now() - timedelta(days=365)).timestamp()
-
     # 如果提供了缓存数据，直接使用
     if all_packs_data is not None:
         packs = all_packs_data
     else:
-        # Otherwise read from file system
-        packs_dir = Path(packs_dir)
-        # Build file pattern based on queue_id
-        if queue_id is not None:
-            pack_pattern = f"pack_*_{queue_id}.json"
-        else:
-            pack_pattern = "pack_*.json"
-        pack_files = sorted(packs_dir.glob(pack_pattern))
-        packs = []
-        for pack_file in pack_files:
-            # Extract patch version from filename
-            filename = pack_file.stem
-            if filename.startswith("pack_"):
-                patch = filename.replace("pack_", "")
-                # Remove queue_id suffix if present
-                if "_" in patch:
-                    patch = patch.rsplit("_", 1)[0]
-            else:
-                continue
-                
-            with open(pack_file, 'r', encoding='utf-8') as f:
-                pack_data = json.load(f)
-                
-                # Verify queue_id matches if specified
-                if queue_id is not None:
-                    pack_queue_id = pack_data.get('queue_id', 420)
-                    if pack_queue_id != queue_id:
-                        continue
-                
-                # Apply time range filter based on match dates, not generation timestamp
-                if cutoff_timestamp:
-                    # Check match dates first (more accurate)
-                    pack_earliest = pack_data.get("earliest_match_date")
-                    pack_latest = pack_data.get("latest_match_date")
-                    
-                    has_match_in_range = False
-                    
-                    if pack_earliest or pack_latest:
-                        # Parse dates
-                        earliest_dt = None
-                        latest_dt = None
-                        
-                        if pack_earliest:
-                            try:
-                                if isinstance(pack_earliest, str):
-                                    date_str = pack_earliest.replace('Z', '+00:00')
-                                    if '+' not in date_str and 'T' in date_str:
-                                        date_str = date_str + '+00:00'
-                                    earliest_dt = datetime.fromisoformat(date_str)
-                                else:
-                                    earliest_dt = pack_earliest
-                                if earliest_dt.tzinfo:
-                                    earliest_dt = earliest_dt.replace(tzinfo=None)
-                            except:
-                                pass
-                        
-                        if pack_latest:
-                            try:
-                                if isinstance(pack_latest, str):
-                                    date_str = pack_latest.replace('Z', '+00:00')
-                                    if '+' not in date_str and 'T' in date_str:
-                                        date_str = date_str + '+00:00'
-                                    latest_dt = datetime.fromisoformat(date_str)
-                                else:
-                                    latest_dt = pack_latest
-                                if latest_dt.tzinfo:
-                                    latest_dt = latest_dt.replace(tzinfo=None)
-                            except:
-                                pass
-                        
-                        # Check if date range overlaps with the filter range
-                        if earliest_dt and latest_dt:
-                            earliest_ts = earliest_dt.timestamp()
-                            latest_ts = latest_dt.timestamp()
-                            
-                            if cutoff_end_timestamp:
-                                # Date range filter: check if pack date range overlaps with filter range
-                                if earliest_ts <= cutoff_end_timestamp and latest_ts >= cutoff_timestamp:
-                                    has_match_in_range = True
-                            else:
-                                # Single cutoff: check if pack has matches after cutoff
-                                if latest_ts >= cutoff_timestamp:
-                                    has_match_in_range = True
-                        elif earliest_dt:
-                            earliest_ts = earliest_dt.timestamp()
-                            if cutoff_end_timestamp:
-                                if earliest_ts <= cutoff_end_timestamp and earliest_ts >= cutoff_timestamp:
-                                    has_match_in_range = True
-                            else:
-                                if earliest_ts >= cutoff_timestamp:
-                                    has_match_in_range = True
-                        elif latest_dt:
-                            latest_ts = latest_dt.timestamp()
-                            if cutoff_end_timestamp:
-                                if latest_ts <= cutoff_end_timestamp and latest_ts >= cutoff_timestamp:
-                                    has_match_in_range = True
-                            else:
-                                if latest_ts >= cutoff_timestamp:
-                                    has_match_in_range = True
-                    else:
-                        # Fallback to generation_timestamp if match dates not available
-                        if "generation_timestamp" in pack_data:
-                            pack_timestamp = pack_data["generation_timestamp"]
-                            if isinstance(pack_timestamp, str):
-                                pack_timestamp = datetime.fromisoformat(pack_timestamp.replace('Z', '+00:00')).timestamp()
-                            if cutoff_end_timestamp:
-                                if cutoff_timestamp <= pack_timestamp <= cutoff_end_timestamp:
-                                    has_match_in_range = True
-                            else:
-                                if pack_timestamp >= cutoff_timestamp:
-                                    has_match_in_range = True
-                    
-                    # Skip if no matches in the time range
-                    if not has_match_in_range:
-                        continue
-                
-                packs.append(pack_data)
+        # Otherwise read through the shared process-wide pack cache
+        packs = [
+            pack.data
+            for pack in pack_cache.load_packs(packs_dir, queue_id=queue_id, time_range=time_range)
+        ]
 
     # 处理pack数据
     for pack in packs:
@@ -2,7 +2,7 @@
 
 import json
 from pathlib import Path
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 from src.agents.shared.config import get_config
 from src.agents.shared.bedrock_adapter import BedrockLLM
 from .tools import analyze_champion_pool, generate_recommendations, format_analysis_for_prompt
@@ -144,15 +144,31 @@ class ChampionRecommendationAgent:
         Yields:
             SSE formatted messages for streaming
         """
-        from src.agents.shared.stream_helper import stream_agent_with_thinking
+        analysis = self.analyze(packs_dir, time_range=time_range, queue_id=queue_id)
+        yield from self.stream_analysis(analysis)
 
+    def analyze(
+        self,
+        packs_dir: str,
+        time_range: Optional[str] = None,
+        queue_id: Optional[int] = None,
+        packs: Optional[List] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Analyze the champion pool, rank recommendations and build prompts (the deterministic stage)
+
+        Args:
+            packs: CachedPacks already filtered by queue_id/time_range (optional, from AgentContext.shared_packs)
+
+        Returns:
+            {"champion_pool", "recommendations", "prompts"}, or None if the player has no core champions
+        """
         # Analyze champion pool
-        champion_pool = analyze_champion_pool(packs_dir, time_range=time_range, queue_id=queue_id)
+        champion_pool = analyze_champion_pool(packs_dir, time_range=time_range, queue_id=queue_id, packs=packs)
 
         # Check if no core champions found
         if not champion_pool["core_champions"]:
-            yield f"data: {{\"error\": \"No core champions found. Play at least 20 games with a champion to get recommendations.\"}}\n\n"
-            return
+            return None
 
         # Generate recommendations
         recommendations = generate_recommendations(champion_pool)
@@ -168,7 +184,26 @@ class ChampionRecommendationAgent:
 
         # Format data and build prompts
         formatted_data = format_analysis_for_prompt(champion_pool, recommendations)
-        prompts = build_narrative_prompt(champion_pool, recommendations, formatted_data)
+        return {
+            "champion_pool": champion_pool,
+            "recommendations": recommendations,
+            "prompts": build_narrative_prompt(champion_pool, recommendations, formatted_data)
+        }
+
+    def stream_analysis(self, analysis: Optional[Dict[str, Any]]):
+        """
+        Stream the recommendation report for an analysis from analyze() (the LLM stage only)
+
+        Yields:
+            SSE formatted messages for streaming
+        """
+        from src.agents.shared.stream_helper import stream_agent_with_thinking
+
+        if analysis is None:
+            yield f"data: {{\"error\": \"No core champions found. Play at least 20 games with a champion to get recommendations.\"}}\n\n"
+            return
+
+        prompts = analysis['prompts']
 
         # Stream response
         for message in stream_agent_with_thinking(
@@ -2,152 +2,26 @@
 
 import json
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from src.analytics import ChampionSimilarityCalculator, MetaTierClassifier
 from src.utils.id_mappings import get_champion_name
+from src.agents.shared.pack_cache import pack_cache
 
 
-def analyze_champion_pool(packs_dir: str, time_range: str = None, queue_id: int = None) -> Dict[str, Any]:
-    """分析玩家英雄池特征"""
-    from datetime import datetime, timedelta
-    
-    packs_dir = Path(packs_dir)
-    
-    # Calculate time filter if needed
-    cutoff_timestamp = None
-    cutoff_end_timestamp = None  # For date range filtering
-    
-    if time_range == "2024-01-01":
-        # Past Season 2024: patch 14.1 (2024-01-09) to patch 14.25 (2025-01-06)
-        cutoff_timestamp = datetime(2024, 1, 9).timestamp()
-        cutoff_end_timestamp = datetime(2025, 1, 6, 23, 59, 59, 999000).timestamp()
-    elif time_range == "past-365":
-        cutoff_timestamp = (datetime.now() - timedelta(days=365)).timestamp()
-    
-    # Build file pattern based on queue_id
-    if queue_id is not None:
-        pack_pattern = f"pack_*_{queue_id}.json"
-    else:
-        pack_pattern = "pack_*.json"
-
-    pack_files = sorted(packs_dir.glob(pack_pattern))
-
-    # Aggregate all champion data
+def analyze_champion_pool(packs_dir: str, time_range: str = None, queue_id: int = None, packs: Optional[List] = None) -> Dict[str, Any]:
+    """分析玩家英雄池特征（packs: 已过滤的CachedPack列表，可选，来自AgentContext.shared_packs）"""
+    # Aggregate all champion data (packs read through the shared process-wide pack cache)
+    if packs is None:
+        packs = pack_cache.load_packs(packs_dir, queue_id=queue_id, time_range=time_range)
     champion_stats = {}
-    for pack_file in pack_files:
-        # Extract patch version from filename
-        filename = pack_file.stem
-        if filename.startswith("pack_"):
-            patch = filename.replace("pack_", "")
-            # Remove queue_id suffix if present
-            if "_" in patch:
-                patch = patch.rsplit("_", 1)[0]
-        else:
-            continue
-            
-        with open(pack_file, 'r') as f:
-            pack_data = json.load(f)
-            
-            # Verify queue_id matches if specified
-            if queue_id is not None:
-                pack_queue_id = pack_data.get('queue_id', 420)
-                if pack_queue_id != queue_id:
-                    continue
-            
-            # Apply time range filter based on match dates, not generation timestamp
-            if cutoff_timestamp:
-                # Check match dates first (more accurate)
-                pack_earliest = pack_data.get("earliest_match_date")
-                pack_latest = pack_data.get("latest_match_date")
-                
-                has_match_in_range = False
-                
-                if pack_earliest or pack_latest:
-                    # Parse dates
-                    earliest_dt = None
-                    latest_dt = None
-                    
-                    if pack_earliest:
-                        try:
-                            if isinstance(pack_earliest, str):
-                                date_str = pack_earliest.replace('Z', '+00:00')
-                                if '+' not in date_str and 'T' in date_str:
-                                    date_str = date_str + '+00:00'
-                                earliest_dt = datetime.fromisoformat(date_str)
-                            else:
-                                earliest_dt = pack_earliest
-                            if earliest_dt.tzinfo:
-                                earliest_dt = earliest_dt.replace(tzinfo=None)
-                        except:
-                            pass
-                    
-                    if pack_latest:
-                        try:
-                            if isinstance(pack_latest, str):
-                                date_str = pack_latest.replace('Z', '+00:00')
-                                if '+' not in date_str and 'T' in date_str:
-                                    date_str = date_str + '+00:00'
-                                latest_dt = datetime.fromisoformat(date_str)
-                            else:
-                                latest_dt = pack_latest
-                            if latest_dt.tzinfo:
-                                latest_dt = latest_dt.replace(tzinfo=None)
-                        except:
-                            pass
-                    
-                    # Check if date range overlaps with the filter range
-                    if earliest_dt and latest_dt:
-                        earliest_ts = earliest_dt.timestamp()
-                        latest_ts = latest_dt.timestamp()
-                        
-                        if cutoff_end_timestamp:
-                            # Date range filter: check if pack date range overlaps with filter range
-                            if earliest_ts <= cutoff_end_timestamp and latest_ts >= cutoff_timestamp:
-                                has_match_in_range = True
-                        else:
-                            # Single cutoff: check if pack has matches after cutoff
-                            if latest_ts >= cutoff_timestamp:
-                                has_match_in_range = True
-                    elif earliest_dt:
-                        earliest_ts = earliest_dt.timestamp()
-                        if cutoff_end_timestamp:
-                            if earliest_ts <= cutoff_end_timestamp and earliest_ts >= cutoff_timestamp:
-                                has_match_in_range = True
-                        else:
-                            if earliest_ts >= cutoff_timestamp:
-                                has_match_in_range = True
-                    elif latest_dt:
-                        latest_ts = latest_dt.timestamp()
-                        if cutoff_end_timestamp:
-                            if latest_ts <= cutoff_end_timestamp and latest_ts >= cutoff_timestamp:
-                                has_match_in_range = True
-                        else:
-                            if latest_ts >= cutoff_timestamp:
-                                has_match_in_range = True
-                else:
-                    # Fallback to generation_timestamp if match dates not available
-                    if "generation_timestamp" in pack_data:
-                        pack_timestamp = pack_data["generation_timestamp"]
-                        if isinstance(pack_timestamp, str):
-                            pack_timestamp = datetime.fromisoformat(pack_timestamp.replace('Z', '+00:00')).timestamp()
-                        if cutoff_end_timestamp:
-                            if cutoff_timestamp <= pack_timestamp <= cutoff_end_timestamp:
-                                has_match_in_range = True
-                        else:
-                            if pack_timestamp >= cutoff_timestamp:
-                                has_match_in_range = True
-                
-                # Skip if no matches in the time range
-                if not has_match_in_range:
-                    continue
-            
-            for cr in pack_data.get("by_cr", []):
-                champ_id = cr["champ_id"]
-                if champ_id not in champion_stats:
-                    champion_stats[champ_id] = {"games": 0, "wins": 0, "roles": set()}
-                champion_stats[champ_id]["games"] += cr["games"]
-                champion_stats[champ_id]["wins"] += cr["wins"]
-                champion_stats[champ_id]["roles"].add(cr["role"])
+    for pack in packs:
+        for cr in pack.data.get("by_cr", []):
+            champ_id = cr["champ_id"]
+            if champ_id not in champion_stats:
+                champion_stats[champ_id] = {"games": 0, "wins": 0, "roles": set()}
+            champion_stats[champ_id]["games"] += cr["games"]
+            champion_stats[champ_id]["wins"] += cr["wins"]
+            champion_stats[champ_id]["roles"].add(cr["role"])
 
     # 识别核心英雄
     core_champions = []
@@ -7,7 +7,7 @@ Provides BP recommendations based on counter relationships and composition analy
 import json
 import logging
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 
 from src.agents.shared.bedrock_adapter import BedrockLLM
@@ -43,19 +43,25 @@ class DraftingCoachAgent:
         self,
         model_id: str = None,
         power_curves_path: str = "data/baselines/power_curves.json",
+        gold_parquet_path: str = "data/gold/parquet/fact_match_performance.parquet",
+        matchup_cube_dir: Optional[str] = None,
         counter_matrix_path: str = "data/baselines/counter_matrix.json"
     ):
         """
         Args:
             model_id: Bedrock model ID for LLM
             power_curves_path: Path to power curves baseline data
-            counter_matrix_path: Path to counter matrix baseline data
+            gold_parquet_path: Gold layer the matchup cube is built from
+            matchup_cube_dir: Matchup cube directory (default: <gold>/matchup_cube)
+            counter_matrix_path: Counter matrix baseline used when there is no cube
         """
         if model_id is None:
             config = get_config()
             model_id = config.default_model
         self.model_id = model_id
         self.power_curves_path = power_curves_path
+        self.gold_parquet_path = gold_parquet_path
+        self.matchup_cube_dir = matchup_cube_dir
         self.counter_matrix_path = counter_matrix_path
         self.llm = BedrockLLM(model=model_id)
 
@@ -63,7 +69,9 @@ class DraftingCoachAgent:
         self,
         our_composition: List[Dict[str, Any]],
         enemy_composition: List[Dict[str, Any]],
-        output_dir: str = None
+        output_dir: str = None,
+        patch_from: Optional[str] = None,
+        patch_to: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Run complete BP analysis and generate recommendations
@@ -74,6 +82,8 @@ class DraftingCoachAgent:
             enemy_composition: Enemy team composition (can be partial)
                 [{"champion_id": 122, "role": "TOP"}, ...]
             output_dir: Optional output directory for saving results
+            patch_from: First patch of the matchup window (inclusive, default: earliest)
+            patch_to: Last patch of the matchup window (inclusive, default: latest)
 
         Returns:
             {
@@ -93,7 +103,11 @@ class DraftingCoachAgent:
             our_composition=our_composition,
             enemy_composition=enemy_composition,
             power_curves_path=self.power_curves_path,
-            counter_matrix_path=self.counter_matrix_path
+            gold_parquet_path=self.gold_parquet_path,
+            matchup_cube_dir=self.matchup_cube_dir,
+            counter_matrix_path=self.counter_matrix_path,
+            patch_from=patch_from,
+            patch_to=patch_to
         )
 
         print(f"✅ BP state analysis complete")
@@ -160,7 +174,8 @@ class DraftingCoachAgent:
                 "generated_at": datetime.now().isoformat(),
                 "model_id": self.model_id,
                 "our_composition": our_composition,
-                "enemy_composition": enemy_composition
+                "enemy_composition": enemy_composition,
+                "patch_window": bp_state["patch_window"]
             }
         }
 
@@ -6,37 +6,58 @@ Core functions for BP analysis and recommendations.
 
 import json
 from pathlib import Path
-from typing import Dict, Any, List
-from src.analytics import CompositionAnalyzer, load_counter_matrix
+from typing import Dict, Any, List, Optional
+from src.analytics import CompositionAnalyzer, load_matchup_cube
+from src.analytics.counter_matrix import COUNTER_THRESHOLD
+from src.analytics.matchup_cube import DEFAULT_MIN_MATCHUPS
 from src.agents.player_analysis.risk_forecaster.tools import load_power_curves
 from src.utils.id_mappings import get_champion_name
 
 
 def load_bp_data(
     power_curves_path: str = "data/baselines/power_curves.json",
+    gold_parquet_path: str = "data/gold/parquet/fact_match_performance.parquet",
+    matchup_cube_dir: Optional[str] = None,
     counter_matrix_path: str = "data/baselines/counter_matrix.json"
 ) -> tuple:
     """
     加载BP分析所需的基线数据
 
+    对抗数据优先来自对抗立方体（请求路径不刷新，Gold层更新后由
+    python -m src.analytics.matchup_cube 刷新）；没有立方体也没有Gold层时
+    退回预计算的克制关系矩阵（不支持patch窗口）
+
     Args:
         power_curves_path: Path to power_curves.json
-        counter_matrix_path: Path to counter_matrix.json
+        gold_parquet_path: Gold layer the matchup cube is built from
+        matchup_cube_dir: Matchup cube directory (default: <gold>/matchup_cube)
+        counter_matrix_path: Counter matrix baseline used when there is no cube
 
     Returns:
-        (power_curves_data, counter_matrix_data)
+        (power_curves_data, matchup_cube, counter_matrix_data)，后两者只有一个不为None
     """
     power_curves_data = load_power_curves(power_curves_path)
-    counter_matrix_data = load_counter_matrix(counter_matrix_path)
+    try:
+        matchup_cube = load_matchup_cube(gold_parquet_path, matchup_cube_dir, refresh=False)
+        return power_curves_data, matchup_cube, None
+    except FileNotFoundError:
+        print(f"⚠️  No matchup cube or Gold layer, using counter matrix baseline: {counter_matrix_path}")
+
+    with open(counter_matrix_path, 'r', encoding='utf-8') as f:
+        counter_matrix_data = json.load(f)
 
-    return power_curves_data, counter_matrix_data
+    return power_curves_data, None, counter_matrix_data
 
 
 def analyze_bp_state(
     our_composition: List[Dict[str, Any]],
     enemy_composition: List[Dict[str, Any]],
     power_curves_path: str = "data/baselines/power_curves.json",
-    counter_matrix_path: str = "data/baselines/counter_matrix.json"
+    gold_parquet_path: str = "data/gold/parquet/fact_match_performance.parquet",
+    matchup_cube_dir: Optional[str] = None,
+    counter_matrix_path: str = "data/baselines/counter_matrix.json",
+    patch_from: Optional[str] = None,
+    patch_to: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     分析当前BP状态
@@ -45,18 +66,34 @@ def analyze_bp_state(
         our_composition: Our team composition (can be partial)
         enemy_composition: Enemy team composition (can be partial)
         power_curves_path: Path to power curves data
-        counter_matrix_path: Path to counter matrix data
+        gold_parquet_path: Gold layer the matchup cube is built from
+        matchup_cube_dir: Matchup cube directory (default: <gold>/matchup_cube)
+        counter_matrix_path: Counter matrix baseline used when there is no cube
+        patch_from: First patch of the matchup window (inclusive, default: earliest; cube only)
+        patch_to: Last patch of the matchup window (inclusive, default: latest; cube only)
 
     Returns:
         Complete BP state analysis
     """
     # Load baseline data
-    power_curves_data, counter_matrix_data = load_bp_data(
-        power_curves_path, counter_matrix_path
+    power_curves_data, matchup_cube, counter_matrix_data = load_bp_data(
+        power_curves_path, gold_parquet_path, matchup_cube_dir, counter_matrix_path
     )
 
     # Create analyzer
-    analyzer = CompositionAnalyzer(power_curves_data, counter_matrix_data)
+    if matchup_cube is not None:
+        analyzer = CompositionAnalyzer(
+            power_curves_data, matchup_cube=matchup_cube, patch_from=patch_from, patch_to=patch_to
+        )
+        patch_window = {
+            "patch_from": patch_from,
+            "patch_to": patch_to,
+            "patches": matchup_cube.window_patches(patch_from, patch_to)
+        }
+    else:
+        # 克制关系矩阵覆盖全部数据，没有patch窗口
+        analyzer = CompositionAnalyzer(power_curves_data, counter_matrix_data=counter_matrix_data)
+        patch_window = {"patch_from": None, "patch_to": None, "patches": None}
 
     # Analyze compositions
     if our_composition:
@@ -82,10 +119,66 @@ def analyze_bp_state(
         "enemy_analysis": enemy_analysis,
         "matchup_analysis": matchup_analysis,
         "power_curves": power_curves_data,
-        "counter_matrix": counter_matrix_data
+        "matchup_cube": matchup_cube,
+        "counter_matrix": counter_matrix_data,
+        "patch_window": patch_window
+    }
+
+
+def _role_champions(bp_state: Dict[str, Any], role: str) -> List[str]:
+    """该位置有可靠对抗数据的英雄ID"""
+    matchup_cube = bp_state["matchup_cube"]
+    if matchup_cube is not None:
+        window = bp_state["patch_window"]
+        return [str(champ) for champ in matchup_cube.champions(
+            role, window["patch_from"], window["patch_to"], min_games=DEFAULT_MIN_MATCHUPS
+        )]
+
+    return [
+        champ_id for champ_id, champ_data in bp_state["counter_matrix"]["champions"].items()
+        if role in champ_data["roles"]
+    ]
+
+
+def _role_matchups(bp_state: Dict[str, Any], champ_id: str, role: str) -> Dict[str, Dict[str, Any]]:
+    """英雄在某位置的可靠对抗: {对手ID: {"games", "wins", "winrate"}}"""
+    matchup_cube = bp_state["matchup_cube"]
+    if matchup_cube is not None:
+        window = bp_state["patch_window"]
+        matchups = matchup_cube.matchups(
+            champ_id, role, window["patch_from"], window["patch_to"], min_games=DEFAULT_MIN_MATCHUPS
+        )
+        return {str(opponent): stats for opponent, stats in matchups.items()}
+
+    # 矩阵里只保存了达到最小对局数的对抗
+    role_data = bp_state["counter_matrix"]["champions"].get(champ_id, {}).get("roles", {}).get(role)
+    if role_data is None:
+        return {}
+    return {
+        opponent: {"games": stats["matchup_count"], "wins": stats["wins"], "winrate": stats["winrate"]}
+        for opponent, stats in role_data.get("matchup_stats", {}).items()
     }
 
 
+def _matchup_stats(bp_state: Dict[str, Any], champ_id: str, enemy_champ_id: str, role: str) -> Optional[Dict[str, Any]]:
+    """单个可靠对抗的统计，数据不足时返回None"""
+    matchup_cube = bp_state["matchup_cube"]
+    if matchup_cube is not None:
+        window = bp_state["patch_window"]
+        stats = matchup_cube.matchup(champ_id, enemy_champ_id, role, window["patch_from"], window["patch_to"])
+        if stats is None or stats["games"] < DEFAULT_MIN_MATCHUPS:
+            return None
+        return stats
+
+    return _role_matchups(bp_state, champ_id, role).get(str(enemy_champ_id))
+
+
+def _champion_name(bp_state: Dict[str, Any], champ_id: str) -> Optional[str]:
+    if bp_state["matchup_cube"] is not None:
+        return bp_state["matchup_cube"].champion_name(champ_id)
+    return bp_state["counter_matrix"]["champions"].get(champ_id, {}).get("name")
+
+
 def generate_pick_recommendations(
     bp_state: Dict[str, Any],
     missing_roles: List[str],
@@ -106,33 +199,25 @@ def generate_pick_recommendations(
 
     our_comp = bp_state["our_composition"]
     enemy_comp = bp_state["enemy_composition"]
-    counter_matrix = bp_state["counter_matrix"]["champions"]
     power_curves = bp_state["power_curves"]["champions"]
 
     for role in missing_roles:
         role_recs = []
+        enemy_champ_ids = [member["champion_id"] for member in enemy_comp if member["role"] == role]
 
-        # Find champions for this role
-        for champ_id, champ_data in counter_matrix.items():
-            if role not in champ_data["roles"]:
-                continue
-
+        # Find champions for this role (with reliable matchup data in the patch window)
+        for champ_id in _role_champions(bp_state, role):
             # Calculate score based on counter matchups
             score = 0.5  # Base score
             counters_count = 0
 
             # Check matchups against enemy champions in same role
-            role_data = champ_data["roles"][role]
-            matchup_stats = role_data.get("matchup_stats", {})
+            for enemy_champ_id in enemy_champ_ids:
+                stats = _matchup_stats(bp_state, champ_id, enemy_champ_id, role)
 
-            for enemy_member in enemy_comp:
-                enemy_champ_id = str(enemy_member["champion_id"])
-                enemy_role = enemy_member["role"]
-
-                if enemy_role == role and enemy_champ_id in matchup_stats:
+                if stats is not None:
                     # Found a matchup
-                    winrate = matchup_stats[enemy_champ_id]["winrate"]
-                    score = winrate  # Use actual winrate as score
+                    score = stats["winrate"]  # Use actual winrate as score
                     counters_count += 1
                     break
 
@@ -150,7 +235,7 @@ def generate_pick_recommendations(
 
             role_recs.append({
                 "champion_id": champ_id,
-                "champion_name": champ_data["name"],
+                "champion_name": _champion_name(bp_state, champ_id),
                 "role": role,
                 "score": round(final_score, 3),
                 "has_matchup_data": counters_count > 0
@@ -180,34 +265,25 @@ def generate_ban_recommendations(
     ban_recommendations = []
 
     our_comp = bp_state["our_composition"]
-    counter_matrix = bp_state["counter_matrix"]["champions"]
 
     # Find champions that counter our composition
     for our_member in our_comp:
         our_champ_id = str(our_member["champion_id"])
         our_role = our_member["role"]
 
-        if our_champ_id not in counter_matrix:
-            continue
-
-        our_champ_data = counter_matrix[our_champ_id]
-        if our_role not in our_champ_data["roles"]:
-            continue
-
-        # Get counters (champions we struggle against)
-        counters = our_champ_data["roles"][our_role].get("counters", {})
+        for counter_champ, stats in _role_matchups(bp_state, our_champ_id, our_role).items():
+            # Get counters (champions we struggle against)
+            winrate = stats["winrate"]
+            if stats["wins"] / stats["games"] >= COUNTER_THRESHOLD:
+                continue
 
-        for counter_champ_id, winrate in counters.items():
             # Lower winrate means stronger counter
             threat_score = 0.5 - winrate  # e.g., 0.35 winrate = 0.15 threat
 
-            if counter_champ_id in counter_matrix:
-                counter_name = counter_matrix[counter_champ_id]["name"]
-            else:
-                counter_name = f"Champion {counter_champ_id}"
+            counter_name = _champion_name(bp_state, counter_champ) or f"Champion {counter_champ}"
 
             ban_recommendations.append({
-                "champion_id": counter_champ_id,
+                "champion_id": counter_champ,
                 "champion_name": counter_name,
                 "counters_our_champion": our_champ_id,
                 "our_winrate_against": winrate,
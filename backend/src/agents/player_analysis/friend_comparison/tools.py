@@ -1,10 +1,10 @@
 """FriendComparisonAgent - Friend Comparison Tools (Enhanced with Quantitative Metrics)"""
 
-import json
-from pathlib import Path
 from typing import Dict, Any, Optional, List, Tuple
 from collections import defaultdict
 from src.core.statistical_utils import wilson_confidence_interval
+from src.agents.shared.pack_cache import pack_cache, pack_in_time_range
+from src.agents.shared.pack_manifest import time_range_bounds
 
 
 def load_player_data(packs_dir: str, all_packs_data: Optional[list] = None, time_range: str = None, queue_id: int = None) -> Dict[str, Any]:
@@ -20,184 +20,21 @@ def load_player_data(packs_dir: str, all_packs_data: Optional[list] = None, time
     Returns:
         包含完整量化指标的玩家数据
     """
-    from datetime import datetime, timedelta
-    
     # 加载pack数据
     if all_packs_data is not None:
-        packs = all_packs_data
+        # 如果提供了缓存数据，在这里过滤
+        cutoff_timestamp, cutoff_end_timestamp = time_range_bounds(time_range)
+        packs = [
+            pack for pack in all_packs_data
+            if (queue_id is None or pack.get('queue_id', 420) == queue_id)
+            and pack_in_time_range(pack, cutoff_timestamp, cutoff_end_timestamp)
+        ]
     else:
-        packs_dir = Path(packs_dir)
-        
-        # Build file pattern based on queue_id
-        if queue_id is not None:
-            pack_pattern = f"pack_*_{queue_id}.json"
-        else:
-            pack_pattern = "pack_*.json"
-        
-        pack_files = sorted(packs_dir.glob(pack_pattern))
-        packs = []
-        for pack_file in pack_files:
-            with open(pack_file, 'r') as f:
-                pack_data = json.load(f)
-                
-                # Verify queue_id matches if specified
-                if queue_id is not None:
-                    pack_queue_id = pack_data.get('queue_id', 420)
-                    if pack_queue_id != queue_id:
-                        continue
-                
-                # Apply time range filter
-                if time_range:
-                    cutoff_timestamp = None
-                    cutoff_end_timestamp = None
-                    
-                    if time_range == "2024-01-01":
-                        cutoff_timestamp = datetime(2024, 1, 9).timestamp()
-                        cutoff_end_timestamp = datetime(2025, 1, 6, 23, 59, 59, 999000).timestamp()
-                    elif time_range == "past-365":
-                        cutoff_timestamp = (datetime.now() - timedelta(days=365)).timestamp()
-                    
-                    if cutoff_timestamp:
-                        has_match_in_range = False
-                        pack_earliest = pack_data.get("earliest_match_date")
-                        pack_latest = pack_data.get("latest_match_date")
-                        
-                        if pack_earliest or pack_latest:
-                            if pack_earliest:
-                                try:
-                                    earliest_dt = datetime.fromisoformat(pack_earliest.replace('Z', '+00:00'))
-                                    if earliest_dt.tzinfo:
-                                        earliest_dt = earliest_dt.replace(tzinfo=None)
-                                    earliest_ts = earliest_dt.timestamp()
-                                except:
-                                    earliest_ts = None
-                            else:
-                                earliest_ts = None
-                                
-                            if pack_latest:
-                                try:
-                                    latest_dt = datetime.fromisoformat(pack_latest.replace('Z', '+00:00'))
-                                    if latest_dt.tzinfo:
-                                        latest_dt = latest_dt.replace(tzinfo=None)
-                                    latest_ts = latest_dt.timestamp()
-                                except:
-                                    latest_ts = None
-                            else:
-                                latest_ts = None
-                            
-                            if earliest_ts and latest_ts:
-                                if cutoff_end_timestamp:
-                                    if earliest_ts <= cutoff_end_timestamp and latest_ts >= cutoff_timestamp:
-                                        has_match_in_range = True
-                                else:
-                                    if latest_ts >= cutoff_timestamp:
-                                        has_match_in_range = True
-                            elif latest_ts:
-                                if cutoff_end_timestamp:
-                                    if latest_ts <= cutoff_end_timestamp and latest_ts >= cutoff_timestamp:
-                                        has_match_in_range = True
-                                else:
-                                    if latest_ts >= cutoff_timestamp:
-                                        has_match_in_range = True
-                        else:
-                            # Fallback to generation_timestamp
-                            if "generation_timestamp" in pack_data:
-                                pack_timestamp = pack_data["generation_timestamp"]
-                                if isinstance(pack_timestamp, str):
-                                    pack_timestamp = datetime.fromisoformat(pack_timestamp.replace('Z', '+00:00')).timestamp()
-                                if cutoff_end_timestamp:
-                                    if cutoff_timestamp <= pack_timestamp <= cutoff_end_timestamp:
-                                        has_match_in_range = True
-                                else:
-                                    if pack_timestamp >= cutoff_timestamp:
-                                        has_match_in_range = True
-                        
-                        if not has_match_in_range:
-                            continue
-                
-                packs.append(pack_data)
-    
-    # 如果提供了缓存数据但需要过滤，在这里过滤
-    if all_packs_data is not None and (time_range or queue_id):
-        filtered_packs = []
-        for pack in packs:
-            # Verify queue_id matches if specified
-            if queue_id is not None:
-                pack_queue_id = pack.get('queue_id', 420)
-                if pack_queue_id != queue_id:
-                    continue
-            
-            # Apply time range filter (same logic as above)
-            if time_range:
-                cutoff_timestamp = None
-                cutoff_end_timestamp = None
-                
-                if time_range == "2024-01-01":
-                    cutoff_timestamp = datetime(2024, 1, 9).timestamp()
-                    cutoff_end_timestamp = datetime(2025, 1, 6, 23, 59, 59, 999000).timestamp()
-                elif time_range == "past-365":
-                    cutoff_timestamp = (datetime.now() - timedelta(days=365)).timestamp()
-                
-                if cutoff_timestamp:
-                    has_match_in_range = False
-                    pack_earliest = pack.get("earliest_match_date")
-                    pack_latest = pack.get("latest_match_date")
-                    
-                    if pack_earliest or pack_latest:
-                        if pack_earliest:
-                            try:
-                                earliest_dt = datetime.fromisoformat(pack_earliest.replace('Z', '+00:00'))
-                                if earliest_dt.tzinfo:
-                                    earliest_dt = earliest_dt.replace(tzinfo=None)
-                                earliest_ts = earliest_dt.timestamp()
-                            except:
-                                earliest_ts = None
-                        else:
-                            earliest_ts = None
-                            
-                        if pack_latest:
-                            try:
-                                latest_dt = datetime.fromisoformat(pack_latest.replace('Z', '+00:00'))
-                                if latest_dt.tzinfo:
-                                    latest_dt = latest_dt.replace(tzinfo=None)
-                                latest_ts = latest_dt.timestamp()
-                            except:
-                                latest_ts = None
-                        else:
-                            latest_ts = None
-                        
-                        if earliest_ts and latest_ts:
-                            if cutoff_end_timestamp:
-                                if earliest_ts <= cutoff_end_timestamp and latest_ts >= cutoff_timestamp:
-                                    has_match_in_range = True
-                            else:
-                                if latest_ts >= cutoff_timestamp:
-                                    has_match_in_range = True
-                        elif latest_ts:
-                            if cutoff_end_timestamp:
-                                if latest_ts <= cutoff_end_timestamp and latest_ts >= cutoff_timestamp:
-                                    has_match_in_range = True
-                            else:
-                                if latest_ts >= cutoff_timestamp:
-                                    has_match_in_range = True
-                    else:
-                        # Fallback to generation_timestamp
-                        if "generation_timestamp" in pack:
-                            pack_timestamp = pack["generation_timestamp"]
-                            if isinstance(pack_timestamp, str):
-                                pack_timestamp = datetime.fromisoformat(pack_timestamp.replace('Z', '+00:00')).timestamp()
-                            if cutoff_end_timestamp:
-                                if cutoff_timestamp <= pack_timestamp <= cutoff_end_timestamp:
-                                    has_match_in_range = True
-                            else:
-                                if pack_timestamp >= cutoff_timestamp:
-                                    has_match_in_range = True
-                    
-                    if not has_match_in_range:
-                        continue
-            
-            filtered_packs.append(pack)
-        packs = filtered_packs
+        # 否则通过进程级pack缓存读取
+        packs = [
+            pack.data
+            for pack in pack_cache.load_packs(packs_dir, queue_id=queue_id, time_range=time_range)
+        ]
 
     # 初始化聚合数据
     total_games = total_wins = 0
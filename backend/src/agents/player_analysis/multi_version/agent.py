@@ -5,7 +5,7 @@ Multi-version trend analysis using Bedrock Haiku
 
 import json
 from pathlib import Path
-from typing import Dict, Any, Tuple, Optional
+from typing import Dict, Any, List, Tuple, Optional
 
 # Import shared modules
 import sys
@@ -143,15 +143,31 @@ class MultiVersionAgent:
         Yields:
             SSE formatted messages for streaming
         """
-        from src.agents.shared.stream_helper import stream_agent_with_thinking
+        analysis = self.analyze(packs_dir, time_range=time_range, queue_id=queue_id)
+        yield from self.stream_analysis(analysis)
+
+    def analyze(
+        self,
+        packs_dir: str,
+        time_range: Optional[str] = None,
+        queue_id: Optional[int] = None,
+        packs: Optional[List] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Cross-version trend analysis and its prompts (the deterministic stage)
 
+        Args:
+            packs: CachedPacks already filtered by queue_id/time_range (optional, from AgentContext.shared_packs)
+
+        Returns:
+            {"analysis": ..., "prompts": {"system", "user"}}, or None if no version data matches the filters
+        """
         # Load all packs with filters
-        all_packs = load_all_packs(packs_dir, time_range=time_range, queue_id=queue_id)
+        all_packs = load_all_packs(packs_dir, time_range=time_range, queue_id=queue_id, packs=packs)
 
         # Check if no data found
-        if not all_packs or len(all_packs) == 0:
-            yield f"data: {{\"error\": \"No version data found\"}}\n\n"
-            return
+        if not all_packs:
+            return None
 
         # Analyze trends
         trends = analyze_trends(all_packs)
@@ -170,10 +186,27 @@ class MultiVersionAgent:
 Generate professional cross-patch adaptation analysis reports based on player performance data across multiple game versions.
 Focus on data-driven insights, highlight key points, and provide actionable recommendations."""
 
+        return {"analysis": analysis, "prompts": {"system": system_prompt, "user": user_prompt}}
+
+    def stream_analysis(self, analysis: Optional[Dict[str, Any]]):
+        """
+        Stream the multi-version report for an analysis from analyze() (the LLM stage only)
+
+        Yields:
+            SSE formatted messages for streaming
+        """
+        from src.agents.shared.stream_helper import stream_agent_with_thinking
+
+        if analysis is None:
+            yield f"data: {{\"error\": \"No version data found\"}}\n\n"
+            return
+
+        prompts = analysis['prompts']
+
         # Stream response
         for message in stream_agent_with_thinking(
-            prompt=user_prompt,
-            system_prompt=system_prompt,
+            prompt=prompts['user'],
+            system_prompt=prompts['system'],
             model=self.llm.model_id,
             max_tokens=8000,
             enable_thinking=False
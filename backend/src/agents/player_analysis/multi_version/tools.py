@@ -3,9 +3,9 @@ Multi-Version Analysis Tools
 数据构建和分析工具（从原 MultiVersionAnalyzer 迁移）
 """
 
-import json
-from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+
+from src.agents.shared.pack_cache import pack_cache
 
 
 def version_sort_key(patch: str) -> tuple:
@@ -29,7 +29,7 @@ def version_sort_key(patch: str) -> tuple:
         return (0, 0)
 
 
-def load_all_packs(packs_dir: str, time_range: str = None, queue_id: int = None) -> Dict[str, Any]:
+def load_all_packs(packs_dir: str, time_range: str = None, queue_id: int = None, packs: Optional[List] = None) -> Dict[str, Any]:
     """
     Load all Player-Pack files
 
@@ -44,141 +44,17 @@ def load_all_packs(packs_dir: str, time_range: str = None, queue_id: int = None)
             - 440: Ranked Flex
             - 400: Normal
             - None: Load all queue types
+        packs: CachedPacks already filtered by queue_id/time_range (optional, from AgentContext.shared_packs)
 
     Returns:
         dict: {patch: pack_data}
     """
-    from datetime import datetime, timedelta
-    
-    packs_path = Path(packs_dir)
+    # Shared process-wide pack cache (parsed once, dates pre-parsed)
+    if packs is None:
+        packs = pack_cache.load_packs(packs_dir, queue_id=queue_id, time_range=time_range)
     all_packs = {}
-
-    # Calculate time filter if needed
-    cutoff_timestamp = None
-    cutoff_end_timestamp = None  # For date range filtering
-    
-    if time_range == "2024-01-01":
-        # Past Season 2024: patch 14.1 (2024-01-09) to patch 14.25 (2025-01-06)
-        cutoff_timestamp = datetime(2024, 1, 9).timestamp()
-        cutoff_end_timestamp = datetime(2025, 1, 6, 23, 59, 59, 999000).timestamp()
-    elif time_range == "past-365":
-        cutoff_timestamp = (datetime.now() - timedelta(days=365)).timestamp()
-
-    # Build file pattern based on queue_id
-    if queue_id is not None:
-        pack_pattern = f"pack_*_{queue_id}.json"
-    else:
-        pack_pattern = "pack_*.json"
-
-    pack_files = sorted(packs_path.glob(pack_pattern))
-    for pack_file in pack_files:
-        # Extract patch version from filename
-        filename = pack_file.stem
-        if filename.startswith("pack_"):
-            patch = filename.replace("pack_", "")
-            # Remove queue_id suffix if present
-            if "_" in patch:
-                patch = patch.rsplit("_", 1)[0]
-        else:
-            continue
-            
-        with open(pack_file, 'r', encoding='utf-8') as f:
-            pack_data = json.load(f)
-            
-            # Verify queue_id matches if specified
-            if queue_id is not None:
-                pack_queue_id = pack_data.get('queue_id', 420)
-                if pack_queue_id != queue_id:
-                    continue
-            
-            # Apply time range filter based on match dates, not generation timestamp
-            if cutoff_timestamp:
-                # Check match dates first (more accurate)
-                pack_earliest = pack_data.get("earliest_match_date")
-                pack_latest = pack_data.get("latest_match_date")
-                
-                has_match_in_range = False
-                
-                if pack_earliest or pack_latest:
-                    # Parse dates
-                    earliest_dt = None
-                    latest_dt = None
-                    
-                    if pack_earliest:
-                        try:
-                            if isinstance(pack_earliest, str):
-                                date_str = pack_earliest.replace('Z', '+00:00')
-                                if '+' not in date_str and 'T' in date_str:
-                                    date_str = date_str + '+00:00'
-                                earliest_dt = datetime.fromisoformat(date_str)
-                            else:
-                                earliest_dt = pack_earliest
-                            if earliest_dt.tzinfo:
-                                earliest_dt = earliest_dt.replace(tzinfo=None)
-                        except:
-                            pass
-                    
-                    if pack_latest:
-                        try:
-                            if isinstance(pack_latest, str):
-                                date_str = pack_latest.replace('Z', '+00:00')
-                                if '+' not in date_str and 'T' in date_str:
-                                    date_str = date_str + '+00:00'
-                                latest_dt = datetime.fromisoformat(date_str)
-                            else:
-                                latest_dt = pack_latest
-                            if latest_dt.tzinfo:
-                                latest_dt = latest_dt.replace(tzinfo=None)
-                        except:
-                            pass
-                    
-                    # Check if date range overlaps with the filter range
-                    if earliest_dt and latest_dt:
-                        earliest_ts = earliest_dt.timestamp()
-                        latest_ts = latest_dt.timestamp()
-                        
-                        if cutoff_end_timestamp:
-                            # Date range filter: check if pack date range overlaps with filter range
-                            if earliest_ts <= cutoff_end_timestamp and latest_ts >= cutoff_timestamp:
-                                has_match_in_range = True
-                        else:
-                            # Single cutoff: check if pack has matches after cutoff
-                            if latest_ts >= cutoff_timestamp:
-                                has_match_in_range = True
-                    elif earliest_dt:
-                        earliest_ts = earliest_dt.timestamp()
-                        if cutoff_end_timestamp:
-                            if earliest_ts <= cutoff_end_timestamp and earliest_ts >= cutoff_timestamp:
-                                has_match_in_range = True
-                        else:
-                            if earliest_ts >= cutoff_timestamp:
-                                has_match_in_range = True
-                    elif latest_dt:
-                        latest_ts = latest_dt.timestamp()
-                        if cutoff_end_timestamp:
-                            if latest_ts <= cutoff_end_timestamp and latest_ts >= cutoff_timestamp:
-                                has_match_in_range = True
-                        else:
-                            if latest_ts >= cutoff_timestamp:
-                                has_match_in_range = True
-                else:
-                    # Fallback to generation_timestamp if match dates not available
-                    if "generation_timestamp" in pack_data:
-                        pack_timestamp = pack_data["generation_timestamp"]
-                        if isinstance(pack_timestamp, str):
-                            pack_timestamp = datetime.fromisoformat(pack_timestamp.replace('Z', '+00:00')).timestamp()
-                        if cutoff_end_timestamp:
-                            if cutoff_timestamp <= pack_timestamp <= cutoff_end_timestamp:
-                                has_match_in_range = True
-                        else:
-                            if pack_timestamp >= cutoff_timestamp:
-                                has_match_in_range = True
-                
-                # Skip if no matches in the time range
-                if not has_match_in_range:
-                    continue
-            
-            all_packs[patch] = pack_data
+    for pack in packs:
+        all_packs[pack.patch] = pack.data
 
     return all_packs
 
@@ -1,13 +1,11 @@
 """ProgressTrackerAgent - Progress Tracking Tools"""
 
-import json
-from pathlib import Path
-from typing import Dict, Any
-from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
 from src.core.statistical_utils import wilson_ci_tuple as wilson_confidence_interval
+from src.agents.shared.pack_cache import pack_cache
 
 
-def load_recent_packs(packs_dir: str, window_size: int = 10, time_range: str = None, queue_id: int = None) -> Dict[str, Any]:
+def load_recent_packs(packs_dir: str, window_size: int = 10, time_range: str = None, queue_id: int = None, packs: Optional[List] = None) -> Dict[str, Any]:
     """
     Load recent N patch versions of Player-Packs
 
@@ -23,148 +21,29 @@ def load_recent_packs(packs_dir: str, window_size: int = 10, time_range: str = N
             - 440: Ranked Flex
             - 400: Normal
             - None: Load all queue types
+        packs: CachedPacks already filtered by queue_id/time_range (optional, from AgentContext.shared_packs)
 
     Returns:
         Dict of packs keyed by patch version
     """
-    packs_dir = Path(packs_dir)
-
-    # Calculate time filter if needed
-    cutoff_timestamp = None
-    cutoff_end_timestamp = None  # For date range filtering
-    
-    if time_range == "2024-01-01":
-        # Past Season 2024: patch 14.1 (2024-01-09) to patch 14.25 (2025-01-06)
-        cutoff_timestamp = datetime(2024, 1, 9).timestamp()
-        cutoff_end_timestamp = datetime(2025, 1, 6, 23, 59, 59, 999000).timestamp()
-    elif time_range == "past-365":
-        cutoff_timestamp = (datetime.now() - timedelta(days=365)).timestamp()
-
-    # Build file pattern based on queue_id
-    if queue_id is not None:
-        pack_pattern = f"pack_*_{queue_id}.json"
+    # Shared process-wide pack cache (parsed once, dates pre-parsed)
+    if packs is None:
+        packs = pack_cache.load_packs(packs_dir, queue_id=queue_id, time_range=time_range)
+    if time_range in ("2024-01-01", "past-365"):
+        # Time filter keeps every pack in range
+        selected = packs
     else:
-        pack_pattern = "pack_*.json"
-
-    # Get all pack files
-    all_pack_files = sorted(packs_dir.glob(pack_pattern))
-
-    # Apply time filter if specified
-    if cutoff_timestamp:
-        filtered_pack_files = []
-        for pack_file in all_pack_files:
-            with open(pack_file, 'r') as f:
-                pack_data = json.load(f)
-            
-            # Verify queue_id matches if specified
-            if queue_id is not None:
-                pack_queue_id = pack_data.get('queue_id', 420)
-                if pack_queue_id != queue_id:
-                    continue
-                
-                # Check match dates first (more accurate)
-                pack_earliest = pack_data.get("earliest_match_date")
-                pack_latest = pack_data.get("latest_match_date")
-                
-                has_match_in_range = False
-                
-                if pack_earliest or pack_latest:
-                    # Parse dates
-                    earliest_dt = None
-                    latest_dt = None
-                    
-                    if pack_earliest:
-                        try:
-                            if isinstance(pack_earliest, str):
-                                date_str = pack_earliest.replace('Z', '+00:00')
-                                if '+' not in date_str and 'T' in date_str:
-                                    date_str = date_str + '+00:00'
-                                earliest_dt = datetime.fromisoformat(date_str)
-                            else:
-                                earliest_dt = pack_earliest
-                            if earliest_dt.tzinfo:
-                                earliest_dt = earliest_dt.replace(tzinfo=None)
-                        except:
-                            pass
-                    
-                    if pack_latest:
-                        try:
-                            if isinstance(pack_latest, str):
-                                date_str = pack_latest.replace('Z', '+00:00')
-                                if '+' not in date_str and 'T' in date_str:
-                                    date_str = date_str + '+00:00'
-                                latest_dt = datetime.fromisoformat(date_str)
-                            else:
-                                latest_dt = pack_latest
-                            if latest_dt.tzinfo:
-                                latest_dt = latest_dt.replace(tzinfo=None)
-                        except:
-                            pass
-                    
-                    # Check if date range overlaps with the filter range
-                    if earliest_dt and latest_dt:
-                        earliest_ts = earliest_dt.timestamp()
-                        latest_ts = latest_dt.timestamp()
-                        
-                        if cutoff_end_timestamp:
-                            # Date range filter: check if pack date range overlaps with filter range
-                            if earliest_ts <= cutoff_end_timestamp and latest_ts >= cutoff_timestamp:
-                                has_match_in_range = True
-                        else:
-                            # Single cutoff: check if pack has matches after cutoff
-                            if latest_ts >= cutoff_timestamp:
-                                has_match_in_range = True
-                    elif earliest_dt:
-                        earliest_ts = earliest_dt.timestamp()
-                        if cutoff_end_timestamp:
-                            if earliest_ts <= cutoff_end_timestamp and earliest_ts >= cutoff_timestamp:
-                                has_match_in_range = True
-                        else:
-                            if earliest_ts >= cutoff_timestamp:
-                                has_match_in_range = True
-                    elif latest_dt:
-                        latest_ts = latest_dt.timestamp()
-                        if cutoff_end_timestamp:
-                            if latest_ts <= cutoff_end_timestamp and latest_ts >= cutoff_timestamp:
-                                has_match_in_range = True
-                        else:
-                            if latest_ts >= cutoff_timestamp:
-                                has_match_in_range = True
-                else:
-                    # Fallback to generation_timestamp if match dates not available
-                    if "generation_timestamp" in pack_data:
-                        pack_timestamp = pack_data["generation_timestamp"]
-                        if isinstance(pack_timestamp, str):
-                            pack_timestamp = datetime.fromisoformat(pack_timestamp.replace('Z', '+00:00')).timestamp()
-                        if cutoff_end_timestamp:
-                            if cutoff_timestamp <= pack_timestamp <= cutoff_end_timestamp:
-                                has_match_in_range = True
-                        else:
-                            if pack_timestamp >= cutoff_timestamp:
-                                has_match_in_range = True
-                
-                if has_match_in_range:
-                    filtered_pack_files.append(pack_file)
-
-        pack_files = filtered_pack_files
-    else:
-        # Use most recent window_size packs
-        pack_files = all_pack_files[-window_size:]
+        # Use most recent window_size packs (other time_range values do not filter)
+        selected = packs[-window_size:]
 
     packs = {}
-    for pack_file in pack_files:
-        with open(pack_file, 'r') as f:
-            pack = json.load(f)
-            # Extract patch version from filename if queue_id is in filename
-            if queue_id is not None:
-                filename = pack_file.stem
-                if "_" in filename:
-                    patch = filename.rsplit("_", 1)[0].replace("pack_", "")
-                else:
-                    patch = pack.get("patch", "unknown")
-            else:
-                patch = pack.get("patch", "unknown")
-            packs[patch] = pack
+    for pack in selected:
+        # Extract patch version from filename if queue_id is in filename
+        if queue_id is not None:
+            patch = pack.patch or pack.data.get("patch", "unknown")
+        else:
+            patch = pack.data.get("patch", "unknown")
+        packs[patch] = pack.data
     return packs
 
 
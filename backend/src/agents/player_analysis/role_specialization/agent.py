@@ -6,17 +6,56 @@ Analyzes player mastery and specialization in a specific role.
 
 import json
 from pathlib import Path
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 
 from src.agents.shared.config import get_config
 from src.agents.shared.bedrock_adapter import BedrockLLM
+from src.agents.shared.analysis_cache import analysis_cache
 from .tools import (
     generate_comprehensive_role_analysis,
-    format_analysis_for_prompt
+    format_analysis_for_prompt,
+    load_role_data
 )
 from .prompts import build_narrative_prompt
 
 
+def get_role_analysis(
+    packs_dir: str,
+    role: str,
+    time_range: Optional[str] = None,
+    queue_id: Optional[int] = None,
+    all_packs_data: Optional[List[Dict]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Comprehensive role analysis and its prompts, memoised per player data version and filters
+
+    Args:
+        all_packs_data: Pack data already filtered by queue_id/time_range (optional, from AgentContext)
+
+    Returns:
+        {"analysis": ..., "prompts": {"system", "user"}}, or None if the player has no games in this role
+    """
+    def compute() -> Optional[Dict[str, Any]]:
+        if not load_role_data(packs_dir, role, all_packs_data, time_range=time_range, queue_id=queue_id):
+            return None
+        analysis = generate_comprehensive_role_analysis(
+            role=role,
+            packs_dir=packs_dir,
+            all_packs_data=all_packs_data,
+            time_range=time_range,
+            queue_id=queue_id
+        )
+        formatted_analysis = format_analysis_for_prompt(analysis)
+        return {
+            "analysis": analysis,
+            "prompts": build_narrative_prompt(analysis, formatted_analysis)
+        }
+
+    return analysis_cache.get_or_compute(
+        "role-specialization", packs_dir, compute, role=role, time_range=time_range, queue_id=queue_id
+    )
+
+
 class RoleSpecializationAgent:
     """
     Role Specialization Analysis Agent
@@ -160,18 +199,11 @@ class RoleSpecializationAgent:
         """
         from src.agents.shared.stream_helper import stream_agent_with_thinking
 
-        # 1. Generate comprehensive analysis
-        analysis = generate_comprehensive_role_analysis(
-            role=role,
-            packs_dir=packs_dir,
-            all_packs_data=None
-        )
-
-        # 2. Format data
-        formatted_analysis = format_analysis_for_prompt(analysis)
-
-        # 3. Build prompts
-        prompts = build_narrative_prompt(analysis, formatted_analysis)
+        # 1-3. Generate comprehensive analysis, format data and build prompts (memoised)
+        result = get_role_analysis(packs_dir, role)
+        if result is None:
+            raise ValueError(f"No data found for role {role}")
+        prompts = result["prompts"]
 
         # 4. Stream report generation
         for message in stream_agent_with_thinking(
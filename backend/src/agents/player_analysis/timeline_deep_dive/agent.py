@@ -18,6 +18,12 @@ from shared.bedrock_adapter import BedrockLLM
 from shared.timeline_compressor import TimelineCompressor
 from player_analysis.laning_phase.analyzer import LaningPhaseAnalyzer
 
+# Shared match store (available when running inside the backend service)
+try:
+    from services.match_store import match_store
+except ImportError:
+    match_store = None
+
 
 class TimelineDeepDiveAgent:
     """
@@ -135,7 +141,21 @@ class TimelineDeepDiveAgent:
         packs_path = Path(packs_dir)
         timeline_files = []
 
-        # Find all timeline JSON files
+        # Player packs reference the shared match store via match_ids.json
+        match_ids_file = packs_path / "match_ids.json"
+        if match_store is not None and match_ids_file.exists():
+            with open(match_ids_file, 'r', encoding='utf-8') as f:
+                match_ids = json.load(f)
+            if match_id:
+                match_ids = [mid for mid in match_ids if mid == match_id]
+            for mid in match_ids:
+                timeline = match_store.get_timeline(mid, puuid=packs_path.name)
+                if timeline and "frames" in timeline.get("info", {}):
+                    timeline_files.append(timeline)
+            if timeline_files:
+                return timeline_files
+
+        # Fallback: timeline JSON files on disk (Bronze layer / legacy packs)
         for timeline_file in packs_path.rglob("*timeline*.json"):
             try:
                 # If match_id specified, only load matching file
@@ -2,10 +2,11 @@
 
 import json
 from pathlib import Path
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 from src.agents.shared.config import get_config
 from src.agents.shared.bedrock_adapter import BedrockLLM
 from src.agents.shared.insight_detector import InsightDetector  # Phase 1.5: Automated Insights
+from src.agents.shared.analysis_cache import analysis_cache
 from .tools import load_recent_data, identify_weaknesses, format_analysis_for_prompt
 from .prompts import build_narrative_prompt
 
@@ -113,6 +114,59 @@ class WeaknessAnalysisAgent:
 
         return weaknesses, report_text
 
+    def _analyze(
+        self,
+        packs_dir: str,
+        recent_count: int,
+        time_range: Optional[str],
+        queue_id: Optional[int],
+        packs: Optional[List] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Load data, identify weaknesses, detect insights and build prompts (None if no data)"""
+        recent_data = load_recent_data(packs_dir, recent_count, time_range=time_range, queue_id=queue_id, packs=packs)
+        if len(recent_data) == 0:
+            return None
+
+        # Identify weaknesses
+        weaknesses = identify_weaknesses(recent_data)
+
+        # Automated insight detection
+        insights = self.insight_detector.detect_insights(weaknesses)
+        weaknesses['automated_insights'] = [insight.to_dict() for insight in insights]
+        weaknesses['insight_summary'] = self.insight_detector.generate_summary(insights)
+
+        # Format and build prompts
+        formatted_data = format_analysis_for_prompt(weaknesses)
+        prompts = build_narrative_prompt(weaknesses, formatted_data)
+
+        return {"weaknesses": weaknesses, "prompts": prompts}
+
+    def analyze(
+        self,
+        packs_dir: str,
+        recent_count: int = 5,
+        time_range: Optional[str] = None,
+        queue_id: Optional[int] = None,
+        packs: Optional[List] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Deterministic analysis + prompts, memoised per player data version and filters
+
+        Args:
+            packs: CachedPacks already filtered by queue_id/time_range (optional, from AgentContext.shared_packs)
+
+        Returns:
+            {"weaknesses": ..., "prompts": {"system", "user"}}, or None if no data matches the filters
+        """
+        return analysis_cache.get_or_compute(
+            "weakness-analysis",
+            packs_dir,
+            lambda: self._analyze(packs_dir, recent_count, time_range, queue_id, packs),
+            recent_count=recent_count,
+            time_range=time_range,
+            queue_id=queue_id
+        )
+
     def run_stream(
         self,
         packs_dir: str,
@@ -134,13 +188,25 @@ class WeaknessAnalysisAgent:
         Yields:
             SSE formatted messages for streaming
         """
-        from src.agents.shared.stream_helper import stream_agent_with_thinking
+        analysis = self.analyze(packs_dir, recent_count, time_range=time_range, queue_id=queue_id)
+        yield from self.stream_analysis(analysis, time_range=time_range, queue_id=queue_id)
 
-        # Load data
-        recent_data = load_recent_data(packs_dir, recent_count, time_range=time_range, queue_id=queue_id)
+    def stream_analysis(
+        self,
+        analysis: Optional[Dict[str, Any]],
+        time_range: Optional[str] = None,
+        queue_id: Optional[int] = None
+    ):
+        """
+        Stream the diagnosis report for an analysis from analyze() (the LLM stage only)
+
+        Yields:
+            SSE formatted messages for streaming
+        """
+        from src.agents.shared.stream_helper import stream_agent_with_thinking
 
         # Check if no data found
-        if len(recent_data) == 0:
+        if analysis is None:
             if queue_id == 400:
                 error_msg = "No Normal game data found. Please play some Normal games first."
             elif queue_id == 440:
@@ -154,17 +220,7 @@ class WeaknessAnalysisAgent:
             yield f"data: {{\"error\": \"{error_msg}\"}}\n\n"
             return
 
-        # Identify weaknesses
-        weaknesses = identify_weaknesses(recent_data)
-
-        # Automated insight detection
-        insights = self.insight_detector.detect_insights(weaknesses)
-        weaknesses['automated_insights'] = [insight.to_dict() for insight in insights]
-        weaknesses['insight_summary'] = self.insight_detector.generate_summary(insights)
-
-        # Format and build prompts
-        formatted_data = format_analysis_for_prompt(weaknesses)
-        prompts = build_narrative_prompt(weaknesses, formatted_data)
+        prompts = analysis['prompts']
 
         # Stream response
         for message in stream_agent_with_thinking(
@@ -0,0 +1,144 @@
+"""
+AnalysisCache - 进程级结构化分析结果缓存
+
+ReportCache只缓存最终的markdown报告；LLM之前的确定性分析（聚合、统计、洞察检测、
+prompt格式化）在每次调用时都会重新计算。换模型重新生成、LLM流失败后重试、
+或者annual-summary端点和agent各算一遍同一份分析时，都在重复这部分Python计算。
+
+- 以 (agent, packs目录, 过滤参数) 为槽位，值带上pack内容版本（pack_cache.content_version）
+- 任何pack重写（新比赛、time_to_core回填、窗口计数老化）都会改变内容版本，旧结果自动失效并被新结果替换
+- 同一个键并发计算时只算一次，其它线程等待结果
+- LRU淘汰，按条目数限制
+
+注意：返回的是缓存值的深拷贝，调用方可以随意修改。
+"""
+
+import copy
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple, Union
+
+from .pack_cache import pack_cache
+
+
+# 默认最多缓存的分析结果数
+DEFAULT_MAX_ENTRIES = 512
+
+
+class AnalysisCache:
+    """
+    结构化分析结果缓存
+
+    使用示例:
+        result = analysis_cache.get_or_compute(
+            "weakness-analysis", packs_dir,
+            lambda: compute_weakness_analysis(packs_dir, recent_count, time_range, queue_id),
+            recent_count=recent_count, time_range=time_range, queue_id=queue_id
+        )
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        # 槽位 → (内容版本, 结果)
+        self._entries: "OrderedDict[Tuple, Tuple[str, Any]]" = OrderedDict()
+        self._slot_locks: Dict[Tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _slot(agent_id: str, packs_dir: Union[str, Path], params: Dict[str, Any]) -> Tuple:
+        return (agent_id, str(Path(packs_dir))) + tuple(sorted(
+            (k, repr(v)) for k, v in params.items()
+        ))
+
+    def _lookup(self, slot: Tuple, version: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(slot)
+            if entry is None or entry[0] != version:
+                return False, None
+            self._entries.move_to_end(slot)
+            self.hits += 1
+            return True, entry[1]
+
+    def get_or_compute(
+        self,
+        agent_id: str,
+        packs_dir: Union[str, Path],
+        compute: Callable[[], Any],
+        **params
+    ) -> Any:
+        """
+        返回缓存的分析结果，不存在或内容版本已变化时调用 compute() 计算并缓存
+
+        Args:
+            agent_id: Agent标识（同一份分析可被多个调用方共享，用同一个ID即可）
+            packs_dir: Player-Pack目录（决定内容版本）
+            compute: 计算函数（无参数），返回结构化结果
+            **params: 过滤参数（time_range, queue_id, recent_count, role ...）
+
+        Returns:
+            结果的深拷贝
+        """
+        # 不用data_version：它只在有新比赛时变化，time_to_core回填后会返回旧的avg_time_to_core
+        version = pack_cache.content_version(packs_dir)
+        if version is None:
+            # 没有pack索引，无法判断数据是否变化，不缓存
+            return compute()
+
+        slot = self._slot(agent_id, packs_dir, params)
+        found, value = self._lookup(slot, version)
+        if found:
+            return copy.deepcopy(value)
+
+        with self._lock:
+            slot_lock = self._slot_locks.setdefault(slot, threading.Lock())
+
+        try:
+            with slot_lock:
+                # 等锁期间其它线程可能已算完
+                found, value = self._lookup(slot, version)
+                if found:
+                    return copy.deepcopy(value)
+
+                value = compute()
+                with self._lock:
+                    self.misses += 1
+                    self._entries[slot] = (version, copy.deepcopy(value))
+                    self._entries.move_to_end(slot)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                return value
+        finally:
+            # 槽位锁只在计算期间存在（compute() 抛异常时也要释放，否则字典只增不减）；
+            # 已在等待的线程持有同一把锁，随后直接命中缓存
+            with self._lock:
+                if self._slot_locks.get(slot) is slot_lock:
+                    del self._slot_locks[slot]
+
+    def invalidate(self, packs_dir: Union[str, Path] = None):
+        """清除缓存（指定目录时只清除该玩家的结果）"""
+        with self._lock:
+            if packs_dir is None:
+                self._entries.clear()
+                return
+            prefix = str(Path(packs_dir))
+            for slot in [s for s in self._entries if s[1] == prefix]:
+                del self._entries[slot]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """缓存统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0
+            }
+
+
+# 全局单例
+analysis_cache = AnalysisCache()
@@ -9,11 +9,14 @@ Option A Day 1: Integrated structured logging
 import json
 import os
 import asyncio
+import random
+import threading
 import time
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, AsyncIterator, List, Tuple
 from concurrent.futures import ThreadPoolExecutor
 import boto3
 from botocore.config import Config
+from botocore.exceptions import ClientError
 
 from .structured_logger import get_logger, LogTimer, LogContext
 from .metrics_collector import MetricNames  # Keep MetricNames for naming
@@ -51,6 +54,110 @@ class BedrockModel:
         return cls.MODEL_ALIASES.get(model_name.lower(), cls.SONNET_4_5)
 
 
+# ============================================================================
+# 进程级 Bedrock 客户端池
+# ============================================================================
+# boto3 客户端创建和凭证解析开销明显，且客户端本身线程安全：
+# 按 (region, 超时, 重试) 复用同一个客户端，所有 BedrockLLM 实例共享连接池
+BEDROCK_MAX_POOL_CONNECTIONS = int(os.getenv("BEDROCK_MAX_POOL_CONNECTIONS", "50"))
+
+_client_pool: Dict[Tuple[str, int, int, int], Any] = {}
+_client_pool_lock = threading.Lock()
+_boto_session = None
+
+
+def get_bedrock_client(
+    region: str,
+    read_timeout: int = 600,
+    connect_timeout: int = 60,
+    max_retries: int = 3
+):
+    """
+    获取共享的 bedrock-runtime 客户端（首次调用时创建）
+
+    Args:
+        region: AWS 区域
+        read_timeout: 读取超时（秒）
+        connect_timeout: 连接超时（秒）
+        max_retries: 最大重试次数
+    """
+    global _boto_session
+
+    key = (region, read_timeout, connect_timeout, max_retries)
+    client = _client_pool.get(key)
+    if client is not None:
+        return client
+
+    with _client_pool_lock:
+        client = _client_pool.get(key)
+        if client is None:
+            # boto3默认session不是线程安全的，使用专用session并在锁内创建客户端
+            if _boto_session is None:
+                _boto_session = boto3.session.Session()
+            client = _boto_session.client(
+                service_name='bedrock-runtime',
+                region_name=region,
+                config=Config(
+                    read_timeout=read_timeout,
+                    connect_timeout=connect_timeout,
+                    retries={'max_attempts': max_retries},
+                    max_pool_connections=BEDROCK_MAX_POOL_CONNECTIONS,
+                    tcp_keepalive=True
+                )
+            )
+            _client_pool[key] = client
+    return client
+
+
+# ============================================================================
+# 专用 LLM 线程池 + 限流重试
+# ============================================================================
+# 异步接口（generate / generate_batch）在专用线程池中执行同步调用，不占用默认executor
+LLM_EXECUTOR_WORKERS = int(os.getenv("LLM_EXECUTOR_WORKERS", "32"))
+
+# Bedrock限流时的应用层重试（在botocore自身重试之后）：全抖动指数退避
+THROTTLE_RETRIES = 4
+THROTTLE_BACKOFF_BASE = 1.0   # 秒
+THROTTLE_BACKOFF_CAP = 20.0   # 秒
+THROTTLING_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+}
+
+_llm_executor: Optional[ThreadPoolExecutor] = None
+_llm_executor_lock = threading.Lock()
+
+
+def get_llm_executor() -> ThreadPoolExecutor:
+    """全局LLM线程池（懒加载）"""
+    global _llm_executor
+    if _llm_executor is None:
+        with _llm_executor_lock:
+            if _llm_executor is None:
+                _llm_executor = ThreadPoolExecutor(
+                    max_workers=LLM_EXECUTOR_WORKERS,
+                    thread_name_prefix="bedrock-llm"
+                )
+    return _llm_executor
+
+
+def is_throttling_error(e: Exception) -> bool:
+    return isinstance(e, ClientError) and \
+        e.response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES
+
+
+def throttle_backoff(attempt: int) -> float:
+    """第attempt次重试的等待时间（full jitter）"""
+    return random.uniform(0, min(THROTTLE_BACKOFF_CAP, THROTTLE_BACKOFF_BASE * (2 ** attempt)))
+
+
+def llm_cache_enabled_by_default() -> bool:
+    """LLM结果缓存默认关闭，设置 LLM_CACHE_ENABLED=true 全局开启"""
+    return os.getenv("LLM_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+
+
 class BedrockLLM:
     """
     ADK-compatible Bedrock LLM adapter
@@ -75,7 +182,7 @@ class BedrockLLM:
         read_timeout: int = 600,
         connect_timeout: int = 60,
         max_retries: int = 3,
-        enable_cache: bool = True,
+        enable_cache: Optional[bool] = None,
         cache_ttl_hours: int = 24
     ):
         """
@@ -87,24 +194,22 @@ class BedrockLLM:
             read_timeout: 读取超时（秒）
             connect_timeout: 连接超时（秒）
             max_retries: 最大重试次数
-            enable_cache: 是否启用结果缓存（Phase 1.3）
+            enable_cache: 是否启用结果缓存（Phase 1.3，默认由 LLM_CACHE_ENABLED 决定）
             cache_ttl_hours: 缓存有效期（小时）
         """
         self.model_id = BedrockModel.resolve_model_id(model)
         self.region = region or os.getenv("AWS_REGION", "us-west-2")  # us-west-2更稳定
 
-        # 配置 boto3 client
-        config = Config(
+        # 共享的 boto3 client（进程级客户端池）
+        self.bedrock_runtime = get_bedrock_client(
+            region=self.region,
             read_timeout=read_timeout,
             connect_timeout=connect_timeout,
-            retries={'max_attempts': max_retries}
+            max_retries=max_retries
         )
 
-        self.bedrock_runtime = boto3.client(
-            service_name='bedrock-runtime',
-            region_name=self.region,
-            config=config
-        )
+        if enable_cache is None:
+            enable_cache = llm_cache_enabled_by_default()
 
         # 模型默认参数
         self.default_max_tokens = 16000 if "sonnet" in self.model_id else 8000
@@ -117,9 +222,9 @@ class BedrockLLM:
         # 指标收集器（Option A Day 2） - Using async non-blocking wrapper
         self.metrics = get_async_metrics()
 
-        # LLM缓存（Phase 1.3） - TEMPORARILY DISABLED
-        self.enable_cache = False  # FORCE DISABLE
-        self.cache = None  # FORCE DISABLE
+        # LLM缓存（Phase 1.3） - opt-in，有界LRU
+        self.enable_cache = enable_cache
+        self.cache = get_llm_cache(ttl_hours=cache_ttl_hours) if enable_cache else None
 
     async def generate(
         self,
@@ -127,38 +232,65 @@ class BedrockLLM:
         max_tokens: Optional[int] = None,
         temperature: Optional[float] = None,
         system: Optional[str] = None,
+        timeout: Optional[float] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """
         真正的异步生成接口（Phase 4 Day 4）
 
-        使用 asyncio + ThreadPoolExecutor 实现真正的并发调用
+        在专用LLM线程池中执行同步调用，实现真正的并发
 
         Args:
             prompt: 用户输入文本
             max_tokens: 最大生成 token 数
             temperature: 温度参数（0.0-1.0）
             system: 系统提示（可选）
+            timeout: 单次请求超时（秒，超时抛出 asyncio.TimeoutError）。
+                只放弃等待结果，线程池中的调用仍会执行到结束
             **kwargs: 其他参数
 
         Returns:
             dict: 包含 text 和 usage 的字典
         """
-        loop = asyncio.get_event_loop()
-
-        # 在线程池中运行同步调用
-        result = await loop.run_in_executor(
-            None,  # 使用默认executor
-            lambda: self.generate_sync(
-                prompt=prompt,
-                max_tokens=max_tokens,
-                temperature=temperature,
-                system=system,
-                **kwargs
-            )
+        future = self._submit(
+            prompt=prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            system=system,
+            **kwargs
         )
-
-        return result
+        return await self._await_result(future, timeout)
+
+    def _submit(self, **kwargs) -> asyncio.Future:
+        """在专用LLM线程池中提交一次 generate_sync 调用"""
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(get_llm_executor(), lambda: self.generate_sync(**kwargs))
+
+    @staticmethod
+    async def _await_result(future: asyncio.Future, timeout: Optional[float]) -> Dict[str, Any]:
+        # shield：超时/取消只影响等待方，不会把线程池任务标记为已取消
+        # （否则其 done 回调会在线程仍在运行时触发）
+        if timeout:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+        return await asyncio.shield(future)
+
+    def _invoke_with_retry(self, invoke, request_body: Dict[str, Any]):
+        """调用 invoke_model / invoke_model_with_response_stream，被限流时带抖动退避重试"""
+        body = json.dumps(request_body)
+        for attempt in range(THROTTLE_RETRIES + 1):
+            try:
+                return invoke(modelId=self.model_id, body=body)
+            except Exception as e:
+                if attempt >= THROTTLE_RETRIES or not is_throttling_error(e):
+                    raise
+                delay = throttle_backoff(attempt)
+                self.logger.warning(
+                    "LLM被限流，退避重试",
+                    model=self.model_id,
+                    attempt=attempt + 1,
+                    delay_s=round(delay, 2)
+                )
+                time.sleep(delay)
 
     def generate_sync(
         self,
@@ -244,10 +376,7 @@ class BedrockLLM:
         )
 
         try:
-            response = self.bedrock_runtime.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps(request_body)
-            )
+            response = self._invoke_with_retry(self.bedrock_runtime.invoke_model, request_body)
 
             response_body = json.loads(response['body'].read())
             duration_ms = (time.time() - start_time) * 1000
@@ -357,20 +486,97 @@ class BedrockLLM:
                 "model": self.model_id
             }
 
+    def _error_result(self, error: BaseException) -> Dict[str, Any]:
+        message = str(error) or type(error).__name__
+        return {
+            "text": f"# 生成失败\n{message}",
+            "usage": {"input_tokens": 0, "output_tokens": 0},
+            "model": self.model_id,
+            "error": message
+        }
+
+    async def generate_as_completed(
+        self,
+        requests: List[Dict[str, Any]],
+        max_concurrent: int = 5,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        并行生成，按完成顺序产出结果
+
+        信号量滑动窗口：始终保持 max_concurrent 个请求在途，一个完成立即补上下一个，
+        慢请求不会拖住其他请求。失败/超时的请求产出带 "error" 字段的结果。
+        超时的请求立即产出错误结果，但其槽位要等线程池中的调用真正结束才释放，
+        在途的 Bedrock 调用数始终不超过 max_concurrent。
+
+        Args:
+            requests: 请求列表（同 generate_batch）
+            max_concurrent: 最大并发数（None/0 表示不限）
+            timeout: 单个请求超时（秒）
+
+        Yields:
+            (请求下标, 结果)
+
+        使用示例:
+            async for index, result in llm.generate_as_completed(requests, max_concurrent=3):
+                print(index, result["text"][:50])
+        """
+        semaphore = asyncio.Semaphore(max_concurrent) if max_concurrent else None
+
+        async def run(index: int, req: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+            if semaphore is not None:
+                await semaphore.acquire()
+            try:
+                future = self._submit_request(req)
+            except Exception as e:
+                if semaphore is not None:
+                    semaphore.release()
+                return index, self._error_result(e)
+
+            if semaphore is not None:
+                # 槽位跟随线程池任务释放，而不是跟随本协程的等待
+                future.add_done_callback(lambda _: semaphore.release())
+
+            try:
+                return index, await self._await_result(future, timeout)
+            except asyncio.TimeoutError:
+                return index, self._error_result(TimeoutError(f"LLM request timed out after {timeout}s"))
+            except Exception as e:
+                return index, self._error_result(e)
+
+        tasks = [asyncio.create_task(run(i, req)) for i, req in enumerate(requests)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # 调用方提前退出时取消剩余请求
+            for task in tasks:
+                task.cancel()
+
+    def _submit_request(self, req: Dict[str, Any]) -> asyncio.Future:
+        return self._submit(
+            prompt=req.get("prompt", ""),
+            max_tokens=req.get("max_tokens"),
+            temperature=req.get("temperature"),
+            system=req.get("system")
+        )
+
     async def generate_batch(
         self,
         requests: List[Dict[str, Any]],
-        max_concurrent: int = 5
+        max_concurrent: int = 5,
+        timeout: Optional[float] = None
     ) -> List[Dict[str, Any]]:
         """
         批量并行生成（Phase 4 Day 4）
 
         Args:
             requests: 请求列表，每个请求是一个dict包含 prompt, max_tokens, temperature, system等
-            max_concurrent: 最大并发数（默认5）
+            max_concurrent: 最大并发数（默认5，滑动窗口）
+            timeout: 单个请求超时（秒）
 
         Returns:
-            结果列表，每个结果包含 text, usage, model
+            结果列表（与requests顺序一致），每个结果包含 text, usage, model
 
         使用示例:
             requests = [
@@ -390,46 +596,12 @@ class BedrockLLM:
             model=self.model_id
         )
 
-        # 使用 asyncio.gather 并行执行所有请求
-        tasks = [
-            self.generate(
-                prompt=req.get("prompt", ""),
-                max_tokens=req.get("max_tokens"),
-                temperature=req.get("temperature"),
-                system=req.get("system")
-            )
-            for req in requests
-        ]
-
-        # 限制并发数
-        if max_concurrent and max_concurrent < len(tasks):
-            # 分批执行
-            results = []
-            for i in range(0, len(tasks), max_concurrent):
-                batch = tasks[i:i + max_concurrent]
-                batch_results = await asyncio.gather(*batch, return_exceptions=True)
-                results.extend(batch_results)
-        else:
-            # 全部并行执行
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # 处理异常
-        processed_results = []
-        success_count = 0
-        error_count = 0
-
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                error_count += 1
-                processed_results.append({
-                    "text": f"# 生成失败\n{str(result)}",
-                    "usage": {"input_tokens": 0, "output_tokens": 0},
-                    "model": self.model_id,
-                    "error": str(result)
-                })
-            else:
-                success_count += 1
-                processed_results.append(result)
+        processed_results: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+        async for index, result in self.generate_as_completed(requests, max_concurrent, timeout):
+            processed_results[index] = result
+
+        error_count = sum(1 for r in processed_results if "error" in r)
+        success_count = len(processed_results) - error_count
 
         duration_ms = (time.time() - start_time) * 1000
 
@@ -466,6 +638,7 @@ class BedrockLLM:
         system: Optional[str] = None,
         on_chunk: Optional[callable] = None,
         enable_thinking: bool = False,
+        use_cache: bool = True,
         **kwargs
     ):
         """
@@ -480,10 +653,11 @@ class BedrockLLM:
             temperature: 温度参数
             system: 系统提示（可选）
             on_chunk: 回调函数，接收每个chunk的文本（可选）
+            use_cache: 是否使用缓存（默认True，extended thinking不缓存）
             **kwargs: 其他参数
 
         Yields:
-            str: 每次yield一个文本chunk
+            str: 每次yield一个文本chunk（缓存命中时整段文本一次返回）
 
         Returns:
             Dict[str, Any]: 最终完整结果 {"text": str, "usage": dict, "model": str}
@@ -507,6 +681,23 @@ class BedrockLLM:
         else:
             final_temperature = temperature or self.default_temperature
 
+        # Phase 1.3: 检查缓存（thinking输出不缓存）
+        cache_stream = self.enable_cache and use_cache and self.cache and not enable_thinking
+        if cache_stream:
+            cached_result = self.cache.get(
+                prompt=prompt,
+                system=system,
+                model=self.model_id,
+                temperature=final_temperature,
+                max_tokens=max_tokens
+            )
+            if cached_result is not None:
+                self.logger.info("LLM缓存命中", model=self.model_id, cache_key_preview=prompt[:50], streaming=True)
+                if on_chunk:
+                    on_chunk(cached_result["text"])
+                yield cached_result["text"]
+                return cached_result
+
         request_body = {
             "anthropic_version": "bedrock-2023-05-31",
             "max_tokens": max_tokens or self.default_max_tokens,
@@ -540,10 +731,7 @@ class BedrockLLM:
 
         try:
             # 使用流式API
-            response = self.bedrock_runtime.invoke_model_with_response_stream(
-                modelId=self.model_id,
-                body=json.dumps(request_body)
-            )
+            response = self._invoke_with_retry(self.bedrock_runtime.invoke_model_with_response_stream, request_body)
 
             # 收集完整响应
             full_text = []
@@ -642,6 +830,19 @@ class BedrockLLM:
                 labels={"model": model_label}
             )
 
+            if cache_stream and result["text"]:
+                try:
+                    self.cache.set(
+                        prompt=prompt,
+                        system=system,
+                        model=self.model_id,
+                        result=result,
+                        temperature=final_temperature,
+                        max_tokens=max_tokens
+                    )
+                except Exception:
+                    pass  # Don't let cache block the response
+
             return result
 
         except Exception as e:
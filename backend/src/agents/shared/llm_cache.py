@@ -5,9 +5,11 @@ LLM结果缓存系统 (Phase 1.3)
 """
 import json
 import hashlib
+import os
 import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime, timedelta
 import threading
 
@@ -19,7 +21,7 @@ class LLMCache:
     特性:
     - 基于prompt+system内容的SHA256哈希键
     - 可配置TTL过期时间
-    - 内存+磁盘双层缓存
+    - 内存+磁盘双层缓存（内存层O(1) LRU，磁盘层按条目数淘汰最旧文件）
     - 缓存命中率统计
     - 线程安全
     - 自动清理过期缓存
@@ -44,7 +46,8 @@ class LLMCache:
         cache_dir: str = "data/cache/llm",
         ttl_hours: int = 24,
         max_memory_items: int = 100,
-        enable_disk_cache: bool = True
+        enable_disk_cache: bool = True,
+        max_disk_items: int = 2000
     ):
         """
         初始化缓存管理器
@@ -54,16 +57,19 @@ class LLMCache:
             ttl_hours: 缓存有效期（小时）
             max_memory_items: 内存缓存最大条目数
             enable_disk_cache: 是否启用磁盘缓存
+            max_disk_items: 磁盘缓存最大条目数
         """
         self.cache_dir = Path(cache_dir)
         self.ttl_hours = ttl_hours
         self.ttl_seconds = ttl_hours * 3600
         self.max_memory_items = max_memory_items
         self.enable_disk_cache = enable_disk_cache
+        self.max_disk_items = max_disk_items
 
-        # 内存缓存 (LRU策略)
-        self.memory_cache: Dict[str, Tuple[Dict[str, Any], float]] = {}
-        self.cache_access_order = []  # 用于LRU
+        # 内存缓存 (LRU策略，OrderedDict按访问顺序排列，最旧的在前)
+        self.memory_cache: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        # 磁盘缓存索引 (按写入顺序，用于按条目数淘汰)
+        self.disk_index: "OrderedDict[str, None]" = OrderedDict()
 
         # 统计信息
         self.stats = {
@@ -81,6 +87,17 @@ class LLMCache:
         # 创建缓存目录
         if self.enable_disk_cache:
             self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._load_disk_index()
+
+    def _load_disk_index(self):
+        """启动时按修改时间建立磁盘索引，并淘汰超出上限的旧文件"""
+        try:
+            files = sorted(self.cache_dir.glob("*.json"), key=lambda f: f.stat().st_mtime)
+        except OSError:
+            files = []
+        for cache_file in files:
+            self.disk_index[cache_file.stem] = None
+        self._evict_disk()
 
     def _compute_hash(
         self,
@@ -138,59 +155,70 @@ class LLMCache:
         Returns:
             缓存的结果dict或None（未命中）
         """
-        with self.lock:
-            cache_key = self._compute_hash(prompt, system, model, temperature, max_tokens)
+        cache_key = self._compute_hash(prompt, system, model, temperature, max_tokens)
 
+        with self.lock:
             # 1. 检查内存缓存
-            if cache_key in self.memory_cache:
-                cached_data, cached_time = self.memory_cache[cache_key]
+            entry = self.memory_cache.get(cache_key)
+            if entry is not None:
+                cached_data, cached_time = entry
 
                 # 检查是否过期
                 if time.time() - cached_time < self.ttl_seconds:
                     # 更新访问顺序 (LRU)
-                    if cache_key in self.cache_access_order:
-                        self.cache_access_order.remove(cache_key)
-                    self.cache_access_order.append(cache_key)
-
+                    self.memory_cache.move_to_end(cache_key)
                     self.stats["hits"] += 1
                     return cached_data
-                else:
-                    # 过期，删除
-                    del self.memory_cache[cache_key]
-                    if cache_key in self.cache_access_order:
-                        self.cache_access_order.remove(cache_key)
 
-            # 2. 检查磁盘缓存
-            if self.enable_disk_cache:
-                cache_file = self.cache_dir / f"{cache_key}.json"
-                if cache_file.exists():
-                    try:
-                        with open(cache_file, 'r', encoding='utf-8') as f:
-                            cache_entry = json.load(f)
+                # 过期，删除
+                del self.memory_cache[cache_key]
+
+            if not self.enable_disk_cache:
+                # 缓存未命中
+                self.stats["misses"] += 1
+                return None
+            indexed = cache_key in self.disk_index
+
+        # 2. 检查磁盘缓存（在锁外读取文件）
+        # 索引只在启动时扫描一次，其他进程/实例之后写入的文件不在索引中，需回退检查文件
+        cache_file = self.cache_dir / f"{cache_key}.json"
+        if not indexed and not cache_file.exists():
+            with self.lock:
+                self.stats["misses"] += 1
+            return None
 
-                        # 检查是否过期
-                        if time.time() - cache_entry["timestamp"] < self.ttl_seconds:
-                            # 加载到内存缓存
-                            self.memory_cache[cache_key] = (cache_entry["data"], cache_entry["timestamp"])
-                            self.cache_access_order.append(cache_key)
-
-                            # 内存缓存满了，移除最旧的
-                            if len(self.memory_cache) > self.max_memory_items:
-                                self._evict_lru()
-
-                            self.stats["hits"] += 1
-                            self.stats["disk_reads"] += 1
-                            return cache_entry["data"]
-                        else:
-                            # 磁盘缓存也过期，删除文件
-                            cache_file.unlink()
-                    except Exception as e:
-                        # 缓存损坏，忽略
-                        pass
+        cache_entry = None
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cache_entry = json.load(f)
+        except Exception:
+            # 缓存损坏或已被删除，忽略
+            pass
 
-            # 缓存未命中
-            self.stats["misses"] += 1
-            return None
+        with self.lock:
+            if cache_entry is not None and time.time() - cache_entry["timestamp"] < self.ttl_seconds:
+                # 加载到内存缓存
+                self._remember(cache_key, cache_entry["data"], cache_entry["timestamp"])
+                self.stats["hits"] += 1
+                self.stats["disk_reads"] += 1
+                evicted = []
+                if cache_key not in self.disk_index:
+                    self.disk_index[cache_key] = None
+                    evicted = self._evict_disk()
+                result = cache_entry["data"]
+            else:
+                # 磁盘缓存也过期（或损坏），删除文件
+                self.disk_index.pop(cache_key, None)
+                self.stats["misses"] += 1
+                evicted = [cache_key]
+                result = None
+
+        for old_key in evicted:
+            try:
+                (self.cache_dir / f"{old_key}.json").unlink()
+            except OSError:
+                pass
+        return result
 
     def set(
         self,
@@ -232,43 +260,61 @@ class LLMCache:
         # CRITICAL FIX: Only hold lock for memory operations, NOT disk I/O
         with self.lock:
             # 存储到内存缓存
-            self.memory_cache[cache_key] = (result, current_time)
-            self.cache_access_order.append(cache_key)
-
-            # 内存缓存满了，移除最旧的
-            if len(self.memory_cache) > self.max_memory_items:
-                self._evict_lru()
-
+            self._remember(cache_key, result, current_time)
             self.stats["sets"] += 1
 
         # CRITICAL FIX: Write to disk OUTSIDE the lock to prevent deadlock
         if self.enable_disk_cache and cache_entry and cache_file:
             try:
-                with open(cache_file, 'w', encoding='utf-8') as f:
+                tmp_file = self.cache_dir / f".{cache_key}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_file, 'w', encoding='utf-8') as f:
                     json.dump(cache_entry, f, ensure_ascii=False, indent=2)
+                tmp_file.replace(cache_file)
                 with self.lock:
+                    self.disk_index[cache_key] = None
+                    self.disk_index.move_to_end(cache_key)
                     self.stats["disk_writes"] += 1
+                    evicted = self._evict_disk()
+                for old_key in evicted:
+                    try:
+                        (self.cache_dir / f"{old_key}.json").unlink()
+                    except OSError:
+                        pass
             except Exception as e:
                 # 磁盘写入失败，不影响功能
                 pass
 
+    def _remember(self, cache_key: str, data: Dict[str, Any], timestamp: float):
+        """写入内存缓存并标记为最近使用（调用方持有锁）"""
+        self.memory_cache[cache_key] = (data, timestamp)
+        self.memory_cache.move_to_end(cache_key)
+
+        # 内存缓存满了，移除最旧的
+        while len(self.memory_cache) > self.max_memory_items:
+            self._evict_lru()
+
     def _evict_lru(self):
-        """移除最近最少使用的缓存项 (LRU eviction)"""
-        if not self.cache_access_order:
+        """移除最近最少使用的缓存项 (LRU eviction, O(1))"""
+        if not self.memory_cache:
             return
 
-        # 移除最旧的
-        oldest_key = self.cache_access_order.pop(0)
-        if oldest_key in self.memory_cache:
-            del self.memory_cache[oldest_key]
-            self.stats["evictions"] += 1
+        self.memory_cache.popitem(last=False)
+        self.stats["evictions"] += 1
+
+    def _evict_disk(self) -> List[str]:
+        """磁盘条目超出上限时移出索引，返回需删除的键（调用方持有锁，文件在锁外删除）"""
+        evicted = []
+        while len(self.disk_index) > self.max_disk_items:
+            old_key, _ = self.disk_index.popitem(last=False)
+            evicted.append(old_key)
+        return evicted
 
     def clear(self):
         """清空所有缓存"""
         with self.lock:
             # 清空内存缓存
             self.memory_cache.clear()
-            self.cache_access_order.clear()
+            self.disk_index.clear()
 
             # 清空磁盘缓存
             if self.enable_disk_cache:
@@ -328,8 +374,6 @@ class LLMCache:
 
             for key in expired_keys:
                 del self.memory_cache[key]
-                if key in self.cache_access_order:
-                    self.cache_access_order.remove(key)
 
             # 清理磁盘缓存
             if self.enable_disk_cache:
@@ -340,16 +384,19 @@ class LLMCache:
 
                         if current_time - cache_entry["timestamp"] >= self.ttl_seconds:
                             cache_file.unlink()
+                            self.disk_index.pop(cache_file.stem, None)
                     except:
                         # 损坏的缓存文件，删除
                         try:
                             cache_file.unlink()
                         except:
                             pass
+                        self.disk_index.pop(cache_file.stem, None)
 
 
-# 全局缓存实例（单例模式）
-_global_cache: Optional[LLMCache] = None
+# 全局缓存实例（按 (目录, TTL) 各一个）
+_global_caches: Dict[Tuple[str, int], LLMCache] = {}
+_global_cache_lock = threading.Lock()
 
 
 def get_llm_cache(
@@ -357,7 +404,10 @@ def get_llm_cache(
     ttl_hours: int = 24
 ) -> LLMCache:
     """
-    获取全局LLM缓存实例（单例）
+    获取全局LLM缓存实例
+
+    相同 (cache_dir, ttl_hours) 共享同一实例；不同TTL得到各自的实例，
+    共用磁盘目录（过期按各自TTL在读取时判断）。
 
     Args:
         cache_dir: 缓存目录
@@ -366,12 +416,16 @@ def get_llm_cache(
     Returns:
         LLMCache实例
     """
-    global _global_cache
-
-    if _global_cache is None:
-        _global_cache = LLMCache(
-            cache_dir=cache_dir,
-            ttl_hours=ttl_hours
-        )
-
-    return _global_cache
+    key = (cache_dir, ttl_hours)
+    cache = _global_caches.get(key)
+    if cache is None:
+        with _global_cache_lock:
+            cache = _global_caches.get(key)
+            if cache is None:
+                cache = LLMCache(
+                    cache_dir=cache_dir,
+                    ttl_hours=ttl_hours
+                )
+                _global_caches[key] = cache
+
+    return cache
@@ -0,0 +1,283 @@
+"""
+PackCache - 进程级Player-Pack缓存
+
+所有agent工具、PlayerDataManager和API端点共享同一个缓存：
+- 以 (路径, mtime, size) 为键，pack文件被重写后自动失效
+- LRU淘汰，按字节预算（以文件大小估算）限制内存
+- 日期字段（earliest/latest_match_date, generation_timestamp）在加载时预解析
+- load_packs 先查每个玩家目录的列式索引（pack_manifest.py），只打开符合过滤条件的pack
+
+一次dashboard加载会对同一PUUID触发6-8个agent，之前每个agent都重新解析同一批pack文件，
+现在每个文件只解析一次。
+
+注意：返回的pack数据在所有调用方之间共享，只读使用，不要修改。
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .pack_manifest import (
+    PackManifest,
+    load_pack_manifest,
+    parse_generation_timestamp,
+    parse_match_date,
+    patch_from_filename,
+    row_in_time_range,
+    timestamps_in_range,
+    trusted_manifest_stamp,
+)
+
+
+# 默认字节预算：256MB（按pack文件大小计）
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class CachedPack:
+    """已解析的pack文件及其预解析字段"""
+
+    __slots__ = ("path", "patch", "queue_id", "data", "earliest_ts", "latest_ts", "generation_ts", "size")
+
+    def __init__(self, path: Path, data: Dict[str, Any], size: int):
+        self.path = path
+        self.data = data
+        self.size = size
+        self.patch = patch_from_filename(path)
+        self.queue_id = data.get('queue_id', 420)  # Default to Solo/Duo for legacy packs
+        self.earliest_ts = parse_match_date(data.get("earliest_match_date"))
+        self.latest_ts = parse_match_date(data.get("latest_match_date"))
+        self.generation_ts = parse_generation_timestamp(data.get("generation_timestamp"))
+
+
+def pack_in_time_range(
+    pack: Union[CachedPack, Dict[str, Any]],
+    cutoff_timestamp: Optional[float],
+    cutoff_end_timestamp: Optional[float] = None
+) -> bool:
+    """
+    判断pack是否有比赛落在时间范围内
+
+    优先使用比赛日期（earliest/latest_match_date），没有时回退到generation_timestamp。
+    pack可以是CachedPack或pack索引行（使用预解析字段），也可以是原始pack字典。
+    """
+    if isinstance(pack, CachedPack):
+        return timestamps_in_range(
+            pack.earliest_ts, pack.latest_ts, pack.generation_ts,
+            bool(pack.data.get("earliest_match_date") or pack.data.get("latest_match_date")),
+            cutoff_timestamp, cutoff_end_timestamp
+        )
+    if "earliest_ts" in pack:
+        return row_in_time_range(pack, cutoff_timestamp, cutoff_end_timestamp)
+    return timestamps_in_range(
+        parse_match_date(pack.get("earliest_match_date")),
+        parse_match_date(pack.get("latest_match_date")),
+        parse_generation_timestamp(pack.get("generation_timestamp")),
+        bool(pack.get("earliest_match_date") or pack.get("latest_match_date")),
+        cutoff_timestamp, cutoff_end_timestamp
+    )
+
+
+class PackCache:
+    """
+    进程级pack缓存（LRU + 字节预算）
+
+    使用示例:
+        from src.agents.shared.pack_cache import pack_cache
+        for pack in pack_cache.load_packs(packs_dir, queue_id=420, time_range="past-365"):
+            process(pack.patch, pack.data)
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], CachedPack]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        # 玩家目录 → ((索引mtime_ns, size), (data_version, content_version))
+        self._versions: Dict[str, Tuple[Tuple[int, int], Tuple[Optional[str], Optional[str]]]] = {}
+        # 玩家目录 → ((索引mtime_ns, size), 已解析的索引)
+        self._manifests: Dict[str, Tuple[Tuple[int, int], PackManifest]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, pack_file: Union[str, Path]) -> Optional[CachedPack]:
+        """
+        获取单个pack（文件mtime/size变化时重新解析）
+
+        Returns:
+            CachedPack，文件不存在或解析失败时返回None
+        """
+        pack_file = Path(pack_file)
+        key = str(pack_file)
+        try:
+            stat = pack_file.stat()
+        except OSError:
+            self._drop(key)
+            return None
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        # 在锁外解析，避免大文件阻塞其他读取
+        try:
+            with open(pack_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"⚠️  Failed to load pack {pack_file}: {e}")
+            return None
+        pack = CachedPack(pack_file, data, stat.st_size)
+
+        with self._lock:
+            self.misses += 1
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old[1].size
+            self._entries[key] = (version, pack)
+            self._total_bytes += pack.size
+            # 淘汰最久未使用的条目（至少保留刚加入的这一个）
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted.size
+        return pack
+
+    def load_packs(
+        self,
+        packs_dir: Union[str, Path],
+        queue_id: Optional[int] = None,
+        time_range: Optional[str] = None
+    ) -> List[CachedPack]:
+        """
+        加载目录下的pack（按文件名排序），可按queue_id和time_range过滤
+
+        过滤只查pack索引，只有符合条件的pack文件会被打开
+
+        Args:
+            packs_dir: Player-Pack目录
+            queue_id: 只返回该队列的pack（文件名和pack内queue_id都需匹配）
+            time_range: "2024-01-01" / "past-365" / None
+        """
+        manifest = self.load_manifest(packs_dir)
+        packs = []
+        for i in manifest.select(queue_id=queue_id, time_range=time_range):
+            pack = self.get(manifest.packs_dir / manifest.columns["file"][i])
+            if pack is not None:
+                packs.append(pack)
+        return packs
+
+    def load_manifest(
+        self,
+        packs_dir: Union[str, Path],
+        known_packs: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> PackManifest:
+        """
+        玩家目录的列式pack索引（packs_manifest.json），过期的行通过本缓存重新解析
+
+        索引可信时（见trusted_manifest_stamp）按索引文件的 (mtime, size) 记忆，命中时只需两次stat
+
+        Args:
+            packs_dir: Player-Pack目录
+            known_packs: 刚写入的pack数据 {文件名: pack}，避免重新解析
+        """
+        packs_path = Path(packs_dir)
+        key = str(packs_path)
+        if known_packs is None:
+            stamp = trusted_manifest_stamp(packs_path)
+            if stamp is not None:
+                with self._lock:
+                    entry = self._manifests.get(key)
+                if entry is not None and entry[0] == stamp:
+                    return entry[1]
+                manifest = PackManifest.read(packs_path)
+                if manifest is not None:
+                    with self._lock:
+                        self._manifests[key] = (stamp, manifest)
+                    return manifest
+
+        def loader(pack_file: Path) -> Optional[Dict[str, Any]]:
+            pack = self.get(pack_file)
+            return pack.data if pack is not None else None
+
+        return load_pack_manifest(packs_path, loader, known_packs=known_packs)
+
+    def data_version(self, packs_dir: Union[str, Path]) -> Optional[str]:
+        """
+        玩家数据版本（pack写入时预计算并存入索引），只在有新比赛时变化
+
+        索引可信时按索引文件的 (mtime, size) 记忆，命中时只需两次stat
+
+        Returns:
+            版本字符串，目录不存在或没有pack时返回None
+        """
+        return self._manifest_versions(packs_dir)[0]
+
+    def content_version(self, packs_dir: Union[str, Path]) -> Optional[str]:
+        """
+        pack内容版本，任何pack重写（time_to_core回填、窗口计数老化）都会改变
+
+        与data_version一样按索引文件的 (mtime, size) 记忆
+
+        Returns:
+            版本字符串，目录不存在或没有pack时返回None
+        """
+        return self._manifest_versions(packs_dir)[1]
+
+    def _manifest_versions(self, packs_dir: Union[str, Path]) -> Tuple[Optional[str], Optional[str]]:
+        packs_path = Path(packs_dir)
+        key = str(packs_path)
+        stamp = trusted_manifest_stamp(packs_path)
+        if stamp is not None:
+            with self._lock:
+                entry = self._versions.get(key)
+                if entry is not None and entry[0] == stamp:
+                    return entry[1]
+        elif not packs_path.exists():
+            return None, None
+
+        # 索引不存在或不可信时，load_manifest重新校验pack（有变化时写回索引）
+        manifest = self.load_manifest(packs_path)
+        versions = (manifest.data_version, manifest.content_version) if len(manifest) else (None, None)
+        stamp = trusted_manifest_stamp(packs_path)
+        if stamp is not None:
+            with self._lock:
+                self._versions[key] = (stamp, versions)
+        return versions
+
+    def invalidate(self, packs_dir: Union[str, Path] = None):
+        """清除缓存（指定目录时只清除该目录下的pack）"""
+        with self._lock:
+            if packs_dir is None:
+                self._entries.clear()
+                self._total_bytes = 0
+                return
+            prefix = str(Path(packs_dir))
+            for key in [k for k in self._entries if str(Path(k).parent) == prefix]:
+                self._total_bytes -= self._entries.pop(key)[1].size
+
+    def _drop(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._total_bytes -= entry[1].size
+
+    def get_stats(self) -> Dict[str, Any]:
+        """缓存统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "total_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0
+            }
+
+
+# 全局单例
+pack_cache = PackCache()
@@ -6,13 +6,13 @@ Phase 4 Day 3: 新增并行加载功能，提升 I/O 性能
 Option A Day 1: 集成结构化日志
 """
 
-import json
 from pathlib import Path
 from typing import Dict, Any, Iterator, List, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 
 from .structured_logger import get_logger, LogTimer
+from .pack_cache import pack_cache
 
 
 class PackDataLoader:
@@ -365,8 +365,11 @@ class PackDataLoader:
         Returns:
             pack数据字典
         """
-        with open(pack_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        # 通过进程级pack缓存读取（同一文件只解析一次）
+        pack = pack_cache.get(pack_file)
+        if pack is None:
+            raise ValueError(f"无法加载pack文件: {pack_file}")
+        return pack.data
 
     def _extract_patch(self, pack_file: Path) -> str:
         """
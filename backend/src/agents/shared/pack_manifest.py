@@ -0,0 +1,381 @@
+"""
+PackManifest - 每个玩家目录一个列式pack索引（packs_manifest.json）
+
+每个pack文件一行，按列存储：
+    file, patch, queue_id, total_games,
+    earliest_match_date, latest_match_date (原始字符串，供data-status等端点直接返回),
+    earliest_ts, latest_ts, generation_ts (预解析时间戳，供时间范围过滤),
+    past_season_games, past_365_days_games (写入时的窗口计数),
+    mtime_ns, size (用于校验索引是否过期)
+
+"past-365 / Season 2024 / queue 440" 之类的过滤只查索引，只打开符合条件的pack文件。
+
+索引同时保存玩家的数据版本（data_version，写入时预计算），只在有新比赛时变化，
+报告缓存用它判断是否过期。内容版本（content_version）由每个pack文件的 (mtime_ns, size)
+得出，任何pack重写（time_to_core回填、窗口计数老化）都会改变它，分析缓存用它判断是否过期。
+
+索引在pack写入时由PlayerDataManager刷新。读取时只要索引文件不比玩家目录旧（目录mtime
+在pack新增、删除时变化）就直接信任索引；索引不存在或比目录旧时才逐个stat pack文件，按
+(mtime_ns, size) 校验，变化或新增的文件会被重新解析并写回索引（兼容没有索引的旧目录和
+其他工具写入的pack）。
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+
+MANIFEST_FILENAME = "packs_manifest.json"
+MANIFEST_VERSION = 1
+
+COLUMNS = [
+    "file", "patch", "queue_id", "total_games",
+    "earliest_match_date", "latest_match_date",
+    "earliest_ts", "latest_ts", "generation_ts",
+    "past_season_games", "past_365_days_games",
+    "mtime_ns", "size",
+]
+
+
+# ============================================================================
+# 日期解析与时间范围过滤
+# ============================================================================
+
+def parse_match_date(value: Any) -> Optional[float]:
+    """解析earliest/latest_match_date：去掉时区后按本地时间取timestamp（与原有过滤逻辑一致）"""
+    if not value:
+        return None
+    try:
+        if isinstance(value, str):
+            date_str = value.replace('Z', '+00:00')
+            if '+' not in date_str and 'T' in date_str:
+                date_str = date_str + '+00:00'
+            dt = datetime.fromisoformat(date_str)
+        else:
+            dt = value
+        if dt.tzinfo:
+            dt = dt.replace(tzinfo=None)
+        return dt.timestamp()
+    except Exception:
+        return None
+
+
+def parse_generation_timestamp(value: Any) -> Optional[float]:
+    """解析generation_timestamp（保留时区）"""
+    if value is None:
+        return None
+    try:
+        if isinstance(value, str):
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        return float(value)
+    except Exception:
+        return None
+
+
+def patch_from_filename(pack_file: Union[str, Path]) -> Optional[str]:
+    """pack_15.18_420.json → "15.18"，pack_15.18.json → "15.18"，非pack文件返回None"""
+    filename = Path(pack_file).stem
+    if not filename.startswith("pack_"):
+        return None
+    patch = filename.replace("pack_", "")
+    if "_" in patch:
+        patch = patch.rsplit("_", 1)[0]
+    return patch
+
+
+def time_range_bounds(time_range: Optional[str]) -> Tuple[Optional[float], Optional[float]]:
+    """
+    time_range → (cutoff_timestamp, cutoff_end_timestamp)
+
+    - "2024-01-01": Past Season 2024 (2024-01-09 to 2025-01-06, patches 14.1 to 14.25)
+    - "past-365": Past 365 days
+    - None / other: no filter
+    """
+    if time_range == "2024-01-01":
+        return (
+            datetime(2024, 1, 9).timestamp(),
+            datetime(2025, 1, 6, 23, 59, 59, 999000).timestamp()
+        )
+    if time_range == "past-365":
+        return (datetime.now() - timedelta(days=365)).timestamp(), None
+    return None, None
+
+
+def timestamps_in_range(
+    earliest_ts: Optional[float],
+    latest_ts: Optional[float],
+    generation_ts: Optional[float],
+    has_match_dates: bool,
+    cutoff_timestamp: Optional[float],
+    cutoff_end_timestamp: Optional[float] = None
+) -> bool:
+    """
+    判断pack是否有比赛落在时间范围内
+
+    优先使用比赛日期，没有比赛日期时回退到generation_timestamp。
+    """
+    if not cutoff_timestamp:
+        return True
+
+    if has_match_dates:
+        if earliest_ts and latest_ts:
+            if cutoff_end_timestamp:
+                # Pack overlaps if: pack_earliest <= filter_end AND pack_latest >= filter_start
+                return earliest_ts <= cutoff_end_timestamp and latest_ts >= cutoff_timestamp
+            return latest_ts >= cutoff_timestamp
+
+        single_ts = earliest_ts or latest_ts
+        if single_ts:
+            if cutoff_end_timestamp:
+                return cutoff_timestamp <= single_ts <= cutoff_end_timestamp
+            return single_ts >= cutoff_timestamp
+        return False
+
+    # Fallback to generation_timestamp if match dates not available
+    if generation_ts is None:
+        return False
+    if cutoff_end_timestamp:
+        return cutoff_timestamp <= generation_ts <= cutoff_end_timestamp
+    return generation_ts >= cutoff_timestamp
+
+
+def row_in_time_range(row: Dict[str, Any], cutoff_timestamp: Optional[float], cutoff_end_timestamp: Optional[float] = None) -> bool:
+    """对索引行做时间范围过滤"""
+    return timestamps_in_range(
+        row["earliest_ts"], row["latest_ts"], row["generation_ts"],
+        bool(row["earliest_match_date"] or row["latest_match_date"]),
+        cutoff_timestamp, cutoff_end_timestamp
+    )
+
+
+# ============================================================================
+# Manifest
+# ============================================================================
+
+def build_row(filename: str, pack_data: Dict[str, Any], mtime_ns: int, size: int) -> Dict[str, Any]:
+    """从pack数据构建一行索引"""
+    earliest = pack_data.get("earliest_match_date")
+    latest = pack_data.get("latest_match_date")
+    return {
+        "file": filename,
+        "patch": pack_data.get("patch", "unknown"),
+        "queue_id": pack_data.get("queue_id", 420),  # Default to Solo/Duo for legacy packs
+        "total_games": pack_data.get("total_games", 0),
+        "earliest_match_date": earliest if isinstance(earliest, str) or earliest is None else str(earliest),
+        "latest_match_date": latest if isinstance(latest, str) or latest is None else str(latest),
+        "earliest_ts": parse_match_date(earliest),
+        "latest_ts": parse_match_date(latest),
+        "generation_ts": parse_generation_timestamp(pack_data.get("generation_timestamp")),
+        "past_season_games": pack_data.get("past_season_games"),
+        "past_365_days_games": pack_data.get("past_365_days_games"),
+        "mtime_ns": mtime_ns,
+        "size": size,
+    }
+
+
+def compute_data_version(columns: Dict[str, List[Any]]) -> str:
+    """
+    玩家数据版本：pack文件名 + 比赛数 + 最新比赛日期的哈希
+
+    time_to_core回填、窗口计数老化等重写不改变版本，只有新比赛才会
+    """
+    h = hashlib.sha1()
+    for row in zip(columns["file"], columns["total_games"], columns["latest_match_date"]):
+        h.update("|".join(str(v) for v in row).encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()[:16]
+
+
+def compute_content_version(columns: Dict[str, List[Any]]) -> str:
+    """
+    pack内容版本：pack文件名 + (mtime_ns, size) 的哈希
+
+    与data_version不同，任何pack重写都会改变它
+    """
+    h = hashlib.sha1()
+    for row in zip(columns["file"], columns["mtime_ns"], columns["size"]):
+        h.update("|".join(str(v) for v in row).encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()[:16]
+
+
+class PackManifest:
+    """列式pack索引（内存中按列存储，行号对应按文件名排序的pack文件）"""
+
+    def __init__(self, packs_dir: Path, columns: Dict[str, List[Any]] = None, data_version: str = None):
+        self.packs_dir = Path(packs_dir)
+        self.columns: Dict[str, List[Any]] = columns or {name: [] for name in COLUMNS}
+        self._data_version = data_version
+
+    def __len__(self) -> int:
+        return len(self.columns["file"])
+
+    def row(self, i: int) -> Dict[str, Any]:
+        return {name: self.columns[name][i] for name in COLUMNS}
+
+    def rows(self) -> List[Dict[str, Any]]:
+        return [self.row(i) for i in range(len(self))]
+
+    @property
+    def data_version(self) -> str:
+        if self._data_version is None:
+            self._data_version = compute_data_version(self.columns)
+        return self._data_version
+
+    @property
+    def content_version(self) -> str:
+        return compute_content_version(self.columns)
+
+    def select(self, queue_id: Optional[int] = None, time_range: Optional[str] = None) -> List[int]:
+        """
+        按queue_id和time_range过滤，返回符合条件的行号（按文件名排序）
+
+        queue_id过滤同时要求文件名后缀和pack内queue_id匹配（与原glob模式 pack_*_{queue_id}.json 一致）
+        """
+        cutoff_timestamp, cutoff_end_timestamp = time_range_bounds(time_range)
+        files = self.columns["file"]
+        queues = self.columns["queue_id"]
+        suffix = f"_{queue_id}.json" if queue_id is not None else None
+
+        selected = []
+        for i in range(len(files)):
+            if suffix is not None and (not files[i].endswith(suffix) or queues[i] != queue_id):
+                continue
+            if cutoff_timestamp and not row_in_time_range(self.row(i), cutoff_timestamp, cutoff_end_timestamp):
+                continue
+            selected.append(i)
+        return selected
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"version": MANIFEST_VERSION, "data_version": self.data_version, "columns": self.columns}
+
+    @classmethod
+    def read(cls, packs_dir: Path) -> Optional["PackManifest"]:
+        """读取磁盘上的索引；不存在、版本不符或损坏时返回None"""
+        manifest_file = Path(packs_dir) / MANIFEST_FILENAME
+        if not manifest_file.exists():
+            return None
+        try:
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION:
+                return None
+            columns = data["columns"]
+            if set(columns) != set(COLUMNS) or len({len(col) for col in columns.values()}) > 1:
+                return None
+            return cls(packs_dir, columns, data.get("data_version"))
+        except Exception as e:
+            print(f"⚠️  Corrupt pack manifest {manifest_file}, rebuilding: {e}")
+            return None
+
+    def write(self):
+        """原子写入（临时文件 + rename）"""
+        manifest_file = self.packs_dir / MANIFEST_FILENAME
+        tmp_file = self.packs_dir / f".{MANIFEST_FILENAME}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+        tmp_file.replace(manifest_file)
+        # rename更新了目录mtime：让索引的mtime不早于目录，否则下次读取会被当作过期
+        os.utime(manifest_file)
+
+
+def trusted_manifest_stamp(packs_dir: Union[str, Path]) -> Optional[Tuple[int, int]]:
+    """
+    索引文件的 (mtime_ns, size)；索引不存在或比玩家目录旧（之后有pack新增、删除或重写）时返回None
+
+    pack文件都以临时文件 + rename写入，重写也会更新目录mtime
+    """
+    packs_path = Path(packs_dir)
+    try:
+        stat = (packs_path / MANIFEST_FILENAME).stat()
+        dir_stat = packs_path.stat()
+    except OSError:
+        return None
+    if stat.st_mtime_ns < dir_stat.st_mtime_ns:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_pack_manifest(
+    packs_dir: Union[str, Path],
+    loader: Callable[[Path], Optional[Dict[str, Any]]],
+    known_packs: Optional[Dict[str, Dict[str, Any]]] = None
+) -> PackManifest:
+    """
+    读取玩家目录的pack索引
+
+    索引不比目录旧时直接返回；否则（或传入known_packs时）逐个校验pack文件，过期的行用
+    loader重新解析，有变化时写回磁盘
+
+    Args:
+        packs_dir: Player-Pack目录
+        loader: pack文件 → pack数据（解析失败返回None）
+        known_packs: 刚写入的pack数据 {文件名: pack}，避免重新解析
+
+    Returns:
+        PackManifest（目录不存在时为空索引）
+    """
+    packs_path = Path(packs_dir)
+    if not packs_path.exists():
+        return PackManifest(packs_path)
+
+    if known_packs is None and trusted_manifest_stamp(packs_path) is not None:
+        manifest = PackManifest.read(packs_path)
+        if manifest is not None:
+            return manifest
+
+    # 扫描前的目录mtime：扫描期间没有pack变动时，校验过的索引可以重新标记为可信
+    try:
+        dir_mtime_ns = packs_path.stat().st_mtime_ns
+    except OSError:
+        dir_mtime_ns = None
+
+    existing = PackManifest.read(packs_path)
+    existing_rows = {}
+    if existing is not None:
+        existing_rows = {row["file"]: row for row in existing.rows()}
+
+    manifest = PackManifest(packs_path)
+    changed = existing is None
+    for pack_file in sorted(packs_path.glob("pack_*.json")):
+        try:
+            stat = pack_file.stat()
+        except OSError:
+            continue
+
+        row = existing_rows.pop(pack_file.name, None)
+        if row is None or row["mtime_ns"] != stat.st_mtime_ns or row["size"] != stat.st_size:
+            pack_data = (known_packs or {}).get(pack_file.name)
+            if pack_data is None:
+                pack_data = loader(pack_file)
+            if pack_data is None:
+                continue
+            row = build_row(pack_file.name, pack_data, stat.st_mtime_ns, stat.st_size)
+            changed = True
+
+        for name in COLUMNS:
+            manifest.columns[name].append(row[name])
+
+    # Rows for deleted pack files
+    if existing_rows:
+        changed = True
+
+    if changed:
+        try:
+            manifest.write()
+        except Exception as e:
+            print(f"⚠️  Failed to write pack manifest for {packs_path}: {e}")
+    else:
+        # 目录mtime因其它文件（summary、accumulator）的rename而变化，但pack都没变：
+        # 更新索引mtime，避免之后每次读取都重新stat全部pack
+        try:
+            if dir_mtime_ns is not None and packs_path.stat().st_mtime_ns == dir_mtime_ns:
+                os.utime(packs_path / MANIFEST_FILENAME)
+        except OSError:
+            pass
+
+    return manifest
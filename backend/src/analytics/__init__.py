@@ -12,6 +12,8 @@ from .power_curve import PowerCurveGenerator
 from .counter_matrix import CounterMatrixCalculator, load_counter_matrix
 from .composition_analyzer import CompositionAnalyzer
 from .match_similarity import MatchSimilarityFinder
+from .catalog import AnalyticsCatalog, get_catalog
+from .matchup_cube import MatchupCube, MatchupCubeBuilder, get_matchup_cube, load_matchup_cube
 from .teammate_detector import FrequentTeammateDetector
 
 __all__ = [
@@ -23,5 +25,11 @@ __all__ = [
     'load_counter_matrix',
     'CompositionAnalyzer',
     'MatchSimilarityFinder',
-    'FrequentTeammateDetector'
+    'FrequentTeammateDetector',
+    'AnalyticsCatalog',
+    'get_catalog',
+    'MatchupCube',
+    'MatchupCubeBuilder',
+    'get_matchup_cube',
+    'load_matchup_cube'
 ]
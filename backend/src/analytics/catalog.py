@@ -0,0 +1,283 @@
+"""
+AnalyticsCatalog - Persistent DuckDB Catalog over the Gold Layer
+
+Materialises the Gold fact table into a DuckDB database file once per source
+version, so analytics requests query a sorted, indexed table instead of
+re-scanning parquet on every call.
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import duckdb
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION = 1
+FACT_TABLE = "fact_match_performance"
+
+# 物化表的排序列（DuckDB按行组记录min/max，按英雄/位置过滤时可跳过无关行组）
+FACT_SORT_COLUMNS = ("champion_id", "position", "match_id")
+
+# 点查索引（ART）: 单局查找 / 队友查找
+FACT_INDEXES = (
+    ("idx_fact_match_id", "match_id"),
+    ("idx_fact_player_key", "player_key"),
+)
+
+# 两次检查源文件是否变化的最小间隔（秒）
+REFRESH_INTERVAL = 30.0
+
+
+def _sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _source_files(source: Path) -> List[Path]:
+    """Gold源: 单个parquet文件，或Hive分区的parquet数据集目录"""
+    if source.is_dir():
+        return sorted(source.rglob("*.parquet"))
+    return [source]
+
+
+def _source_sql(source: Path) -> str:
+    if source.is_dir():
+        return (f"read_parquet({_sql_string(str(source / '**' / '*.parquet'))}, "
+                f"hive_partitioning = true, hive_types_autocast = false)")
+    return f"read_parquet({_sql_string(str(source))})"
+
+
+class AnalyticsCatalog:
+    """
+    Gold层分析目录（DuckDB数据库文件）
+
+    - 源文件（或数据集）每个版本物化一次: 按 champion_id/position/match_id 排序，
+      match_id/player_key 建索引，并收集统计信息
+    - 目录文件名包含源指纹，源变化后自动重建；各worker进程以只读方式打开同一个文件
+    - 每个线程使用独立的游标，SQL解析结果按查询文本缓存，重复查询只需绑定参数
+
+    Example:
+        >>> catalog = get_catalog("data/gold/parquet/fact_match_performance.parquet")
+        >>> rows = catalog.execute(
+        ...     "SELECT COUNT(*) FROM fact_match_performance WHERE champion_id = ?", [92]
+        ... ).fetchall()
+    """
+
+    def __init__(
+        self,
+        parquet_path: str,
+        catalog_dir: Optional[str] = None,
+        refresh_interval: float = REFRESH_INTERVAL
+    ):
+        """
+        Args:
+            parquet_path: Gold layer parquet file or dataset directory
+            catalog_dir: Directory for catalog files (default: <gold>/duckdb)
+            refresh_interval: Minimum seconds between source change checks
+        """
+        self.source = Path(parquet_path).resolve()
+        if not self.source.exists():
+            raise FileNotFoundError(f"Gold layer parquet not found: {parquet_path}")
+
+        self.catalog_dir = Path(catalog_dir) if catalog_dir else self.source.parent.parent / "duckdb"
+        self.refresh_interval = refresh_interval
+        self.catalog_file: Optional[Path] = None
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._conn = None
+        self._fingerprint = None
+        self._generation = 0
+        self._checked_at = 0.0
+
+    @property
+    def _catalog_prefix(self) -> str:
+        return f"{self.source.name}.catalog-"
+
+    def _fingerprint_source(self) -> str:
+        digest = hashlib.sha256(f"{CATALOG_VERSION}:{self.source}".encode())
+        for path in _source_files(self.source):
+            stat = path.stat()
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        return digest.hexdigest()[:16]
+
+    def _refresh(self):
+        """源文件变化时切换到（必要时构建）新版本的目录文件"""
+        if self._conn is not None and time.monotonic() - self._checked_at < self.refresh_interval:
+            return
+
+        with self._lock:
+            if self._conn is not None and time.monotonic() - self._checked_at < self.refresh_interval:
+                return
+
+            fingerprint = self._fingerprint_source()
+            self._checked_at = time.monotonic()
+            if fingerprint == self._fingerprint:
+                return
+
+            catalog_file = self.catalog_dir / f"{self._catalog_prefix}{fingerprint}.duckdb"
+            if not catalog_file.exists():
+                self._build(catalog_file)
+            try:
+                conn = duckdb.connect(str(catalog_file), read_only=True)
+            except duckdb.IOException:
+                # 检查与打开之间被其他worker当作旧版本删除（源文件短时间内再次变化），重新构建
+                logger.warning(f"⚠️ 分析目录文件已被移除，重新构建: {catalog_file}")
+                self._build(catalog_file)
+                conn = duckdb.connect(str(catalog_file), read_only=True)
+
+            # 其他线程的旧游标在下次获取时切换；旧连接随最后一个游标释放
+            self._conn = conn
+            self._fingerprint = fingerprint
+            self._generation += 1
+            self.catalog_file = catalog_file
+            self._remove_stale(catalog_file)
+
+    def _build(self, catalog_file: Path):
+        """物化Gold事实表到新的目录文件（写临时文件后原子替换，多个worker同时构建也安全）"""
+        logger.info(f"📚 正在从 {self.source} 构建分析目录...")
+        started = time.time()
+
+        self.catalog_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = catalog_file.with_name(f".{catalog_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_file.unlink(missing_ok=True)
+
+        conn = duckdb.connect(str(tmp_file))
+        try:
+            conn.execute(f"""
+                CREATE TABLE {FACT_TABLE} AS
+                SELECT * FROM {_source_sql(self.source)}
+                ORDER BY {', '.join(FACT_SORT_COLUMNS)}
+            """)
+            for index_name, column in FACT_INDEXES:
+                conn.execute(f"CREATE INDEX {index_name} ON {FACT_TABLE} ({column})")
+            conn.execute("ANALYZE")
+
+            row_count = conn.execute(f"SELECT COUNT(*) FROM {FACT_TABLE}").fetchone()[0]
+            conn.execute("""
+                CREATE TABLE catalog_info (
+                    source VARCHAR, fingerprint VARCHAR, catalog_version INTEGER,
+                    row_count BIGINT, built_at VARCHAR
+                )
+            """)
+            conn.execute(
+                "INSERT INTO catalog_info VALUES (?, ?, ?, ?, ?)",
+                [str(self.source), catalog_file.stem.rsplit('-', 1)[-1], CATALOG_VERSION,
+                 row_count, datetime.now(timezone.utc).isoformat()]
+            )
+            conn.execute("CHECKPOINT")
+        except Exception:
+            conn.close()
+            tmp_file.unlink(missing_ok=True)
+            raise
+        conn.close()
+
+        os.replace(tmp_file, catalog_file)
+        logger.info(f"✅ 分析目录已构建: {catalog_file} ({row_count} 行, {time.time() - started:.1f}s)")
+
+    def _remove_stale(self, current: Path):
+        """
+        删除同一源的旧版本目录文件（已打开的进程仍可继续读取）
+
+        只删除构建时间早于 REFRESH_INTERVAL 的文件: 刚构建的版本可能正被其他worker打开
+        """
+        cutoff = time.time() - REFRESH_INTERVAL
+        for stale_file in self.catalog_dir.glob(f"{self._catalog_prefix}*.duckdb"):
+            if stale_file == current:
+                continue
+            try:
+                if stale_file.stat().st_mtime < cutoff:
+                    stale_file.unlink()
+            except OSError:
+                pass
+
+    def cursor(self):
+        """当前线程的游标（目录文件切换后自动重新创建）"""
+        self._refresh()
+        with self._lock:
+            conn, generation = self._conn, self._generation
+
+        local = self._local
+        if getattr(local, 'generation', None) != generation:
+            local.cursor = conn.cursor()
+            local.generation = generation
+            local.statements = {}
+        return local.cursor
+
+    def execute(self, query: str, params: Optional[Sequence[Any]] = None):
+        """
+        执行参数化查询（查询文本 → 已解析语句按线程缓存）
+
+        Returns:
+            DuckDB游标（可 fetchall / fetchone / description）
+        """
+        cursor = self.cursor()
+        statements: Dict[str, Any] = self._local.statements
+        statement = statements.get(query)
+        if statement is None:
+            statement = cursor.extract_statements(query)[0]
+            statements[query] = statement
+        return cursor.execute(statement, list(params or []))
+
+    @property
+    def fingerprint(self) -> str:
+        """当前目录文件对应的源指纹（源变化后随目录一起更新）"""
+        self._refresh()
+        with self._lock:
+            return self._fingerprint
+
+    def info(self) -> Dict[str, Any]:
+        """目录元数据（源、指纹、行数、构建时间）"""
+        cursor = self.execute("SELECT * FROM catalog_info")
+        columns = [desc[0] for desc in cursor.description]
+        return dict(zip(columns, cursor.fetchone()))
+
+
+# 进程级目录池: (pid, 源路径) → AnalyticsCatalog
+_catalogs: Dict[Tuple[int, str], AnalyticsCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(parquet_path: str) -> AnalyticsCatalog:
+    """
+    获取当前进程共享的分析目录（fork出的worker进程各自重新打开）
+
+    Args:
+        parquet_path: Gold layer parquet file or dataset directory
+    """
+    key = (os.getpid(), str(Path(parquet_path).resolve()))
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = AnalyticsCatalog(parquet_path)
+            _catalogs[key] = catalog
+        return catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the persistent DuckDB analytics catalog")
+    parser.add_argument("--parquet", default="data/gold/parquet/fact_match_performance.parquet",
+                        help="Gold layer parquet file or dataset directory")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        info = get_catalog(args.parquet).info()
+    except Exception as e:
+        print(f"❌ 分析目录构建失败: {e}")
+        return 1
+
+    for key, value in info.items():
+        print(f"   {key}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
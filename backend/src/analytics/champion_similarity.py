@@ -6,7 +6,6 @@ Champion Similarity Calculator
 基于多维统计特征计算英雄之间的相似度矩阵
 """
 
-import duckdb
 import numpy as np
 import json
 from pathlib import Path
@@ -15,6 +14,8 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.metrics.pairwise import cosine_similarity
 import logging
 
+from .catalog import get_catalog, FACT_TABLE
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -54,6 +55,8 @@ class ChampionSimilarityCalculator:
         if not self.parquet_path.exists():
             raise FileNotFoundError(f"Parquet文件不存在: {parquet_path}")
 
+        self.catalog = get_catalog(str(self.parquet_path))
+
     def _extract_champion_features(self) -> Tuple[Dict[int, str], np.ndarray]:
         """
         从Parquet文件提取英雄特征向量
@@ -63,8 +66,6 @@ class ChampionSimilarityCalculator:
         """
         logger.info(f"📊 正在从 {self.parquet_path} 提取英雄特征...")
 
-        conn = duckdb.connect(":memory:")
-
         # 聚合每个英雄的统计数据
         feature_list = ', '.join([f'AVG({col.replace("avg_", "")}) as {col}'
                                    for col in self.FEATURE_COLUMNS])
@@ -75,15 +76,14 @@ class ChampionSimilarityCalculator:
             champion_name,
             COUNT(*) as total_games,
             {feature_list}
-        FROM read_parquet(?)
+        FROM {FACT_TABLE}
         WHERE champion_id IS NOT NULL
         GROUP BY champion_id, champion_name
         HAVING COUNT(*) >= ?
         ORDER BY champion_id
         """
 
-        result = conn.execute(query, [str(self.parquet_path), self.min_games]).fetchall()
-        conn.close()
+        result = self.catalog.execute(query, [self.min_games]).fetchall()
 
         if not result:
             raise ValueError(f"没有找到满足最小游戏场次({self.min_games})的英雄数据")
@@ -4,9 +4,11 @@ CompositionAnalyzer - Team Composition Analysis
 Analyzes team compositions for balance, synergy, and strategic characteristics.
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from collections import defaultdict
 
+from .matchup_cube import MatchupCube, DEFAULT_MIN_MATCHUPS
+
 
 class CompositionAnalyzer:
     """
@@ -16,6 +18,8 @@ class CompositionAnalyzer:
 
     Example:
         >>> analyzer = CompositionAnalyzer(power_curves_data, counter_matrix_data)
+        >>> # 或直接查询对抗立方体（可限定patch窗口）
+        >>> analyzer = CompositionAnalyzer(power_curves_data, matchup_cube=cube, patch_from="14.18")
         >>> composition = [
         ...     {"champion_id": 92, "role": "TOP"},
         ...     {"champion_id": 64, "role": "JUNGLE"},
@@ -27,15 +31,24 @@ class CompositionAnalyzer:
     def __init__(
         self,
         power_curves_data: Dict[str, Any],
-        counter_matrix_data: Dict[str, Any] = None
+        counter_matrix_data: Dict[str, Any] = None,
+        matchup_cube: Optional[MatchupCube] = None,
+        patch_from: Optional[str] = None,
+        patch_to: Optional[str] = None
     ):
         """
         Args:
             power_curves_data: Power curves from PowerCurveGenerator
             counter_matrix_data: Counter matrix from CounterMatrixCalculator (optional)
+            matchup_cube: MatchupCube to query instead of the counter matrix (optional)
+            patch_from: First patch of the matchup window (inclusive, cube only)
+            patch_to: Last patch of the matchup window (inclusive, cube only)
         """
         self.power_curves = power_curves_data["champions"]
         self.counter_matrix = counter_matrix_data["champions"] if counter_matrix_data else {}
+        self.matchup_cube = matchup_cube
+        self.patch_from = patch_from
+        self.patch_to = patch_to
 
     def analyze_composition(
         self,
@@ -289,7 +302,15 @@ class CompositionAnalyzer:
         enemy_champ_id: str,
         role: str
     ) -> float:
-        """获取对抗优势（从克制关系矩阵）"""
+        """获取对抗优势（从对抗立方体或克制关系矩阵）"""
+        if self.matchup_cube is not None:
+            stats = self.matchup_cube.matchup(
+                our_champ_id, enemy_champ_id, role, self.patch_from, self.patch_to
+            )
+            if stats is None or stats["games"] < DEFAULT_MIN_MATCHUPS:
+                return 0.0
+            return round(stats["winrate"] - 0.5, 3)
+
         if not self.counter_matrix:
             return 0.0  # No counter matrix available
 
@@ -5,11 +5,15 @@ Calculates champion-vs-champion win rates to build a counter matrix for BP analy
 """
 
 import json
-import duckdb
 from pathlib import Path
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Optional
 from collections import defaultdict
 
+from .matchup_cube import load_matchup_cube
+
+COUNTER_THRESHOLD = 0.45  # Win rate < 45% = counter
+STRONG_THRESHOLD = 0.55   # Win rate > 55% = strong against
+
 
 class CounterMatrixCalculator:
     """
@@ -29,12 +33,14 @@ class CounterMatrixCalculator:
     def __init__(
         self,
         parquet_path: str = "data/gold/parquet/fact_match_performance.parquet",
-        min_matchups: int = 20
+        min_matchups: int = 20,
+        cube_dir: Optional[str] = None
     ):
         """
         Args:
             parquet_path: Path to Gold layer parquet file
             min_matchups: Minimum matchups required for reliable counter data
+            cube_dir: Matchup cube directory (default: <gold>/matchup_cube)
         """
         parquet_file = Path(parquet_path)
         if not parquet_file.exists():
@@ -45,11 +51,16 @@ class CounterMatrixCalculator:
 
         self.parquet_path = parquet_path
         self.min_matchups = min_matchups
+        self.cube_dir = cube_dir
 
-    def generate(self) -> Dict[str, Any]:
+    def generate(self, patch_from: Optional[str] = None, patch_to: Optional[str] = None) -> Dict[str, Any]:
         """
         生成完整的英雄克制关系矩阵
 
+        Args:
+            patch_from: First patch of the window (inclusive, default: earliest)
+            patch_to: Last patch of the window (inclusive, default: latest)
+
         Returns:
             {
                 "champions": {
@@ -72,48 +83,17 @@ class CounterMatrixCalculator:
 
         print(f"\n📊 分析数据源: {self.parquet_path}")
 
-        # Query to find all same-role matchups
-        query = """
-        WITH matchups AS (
-            SELECT
-                a.champion_id as champ_a,
-                a.champion_name as name_a,
-                a.position as role,
-                b.champion_id as champ_b,
-                b.champion_name as name_b,
-                a.win as a_win,
-                a.match_id
-            FROM read_parquet(?) a
-            JOIN read_parquet(?) b
-                ON a.match_id = b.match_id
-                AND a.position = b.position
-                AND a.team_id != b.team_id
-            WHERE a.position IS NOT NULL
-                AND a.champion_id IS NOT NULL
-                AND b.champion_id IS NOT NULL
-        )
-        SELECT
-            champ_a,
-            ANY_VALUE(name_a) as name_a,
-            role,
-            champ_b,
-            ANY_VALUE(name_b) as name_b,
-            COUNT(*) as matchup_count,
-            SUM(CASE WHEN a_win THEN 1 ELSE 0 END) as a_wins,
-            AVG(CASE WHEN a_win THEN 1.0 ELSE 0.0 END) as a_winrate
-        FROM matchups
-        GROUP BY champ_a, role, champ_b
-        HAVING COUNT(*) >= ?
-        ORDER BY champ_a, role, a_winrate DESC
-        """
-
-        print("🔍 查询同位置英雄对抗数据...")
+        # 同位置对抗统计来自物化的对抗立方体（只增量计算新增/变化的patch）
+        print("🔍 读取对抗立方体...")
+        cube = load_matchup_cube(self.parquet_path, self.cube_dir)
 
-        conn = duckdb.connect()
-        result = conn.execute(
-            query,
-            [self.parquet_path, self.parquet_path, self.min_matchups]
-        ).fetchall()
+        result = [
+            (champ_a, role, champ_b, games, wins, wins / games)
+            for role, champ_a, champ_b, games, wins in cube.iter_matchups(
+                patch_from, patch_to, min_games=self.min_matchups
+            )
+        ]
+        result.sort(key=lambda row: (row[0], row[1], -row[5]))
 
         print(f"✅ 找到 {len(result)} 条有效对抗记录")
 
@@ -128,11 +108,12 @@ class CounterMatrixCalculator:
         })
 
         total_matchups = 0
-        counter_threshold = 0.45  # Win rate < 45% = counter
-        strong_threshold = 0.55   # Win rate > 55% = strong against
+        counter_threshold = COUNTER_THRESHOLD
+        strong_threshold = STRONG_THRESHOLD
 
-        for row in result:
-            champ_a, name_a, role, champ_b, name_b, matchup_count, a_wins, a_winrate = row
+        for champ_a, role, champ_b, matchup_count, a_wins, a_winrate in result:
+            name_a = cube.champion_name(champ_a)
+            name_b = cube.champion_name(champ_b)
 
             champ_a_str = str(champ_a)
             champ_b_str = str(champ_b)
@@ -185,7 +166,8 @@ class CounterMatrixCalculator:
                 "min_matchups_threshold": self.min_matchups,
                 "counter_threshold": counter_threshold,
                 "strong_threshold": strong_threshold,
-                "data_source": str(self.parquet_path)
+                "data_source": str(self.parquet_path),
+                "patches": cube.window_patches(patch_from, patch_to)
             }
         }
 
@@ -5,10 +5,11 @@ Finds similar historical matches based on champion, role, and game context.
 Used for build simulation and performance comparison.
 """
 
-import duckdb
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 
+from .catalog import get_catalog, FACT_TABLE
+
 
 class MatchSimilarityFinder:
     """
@@ -46,6 +47,7 @@ class MatchSimilarityFinder:
             )
 
         self.parquet_path = parquet_path
+        self.catalog = get_catalog(parquet_path)
 
     def find_similar(
         self,
@@ -72,25 +74,7 @@ class MatchSimilarityFinder:
         Returns:
             List of similar match records with performance metrics
         """
-        # Build query conditions
-        conditions = [
-            f"champion_id = {champion_id}",
-            f"position = '{role}'"
-        ]
-
-        if game_duration_min is not None:
-            conditions.append(f"game_duration_minutes >= {game_duration_min}")
-
-        if game_duration_max is not None:
-            conditions.append(f"game_duration_minutes <= {game_duration_max}")
-
-        if win is not None:
-            win_value = 'TRUE' if win else 'FALSE'
-            conditions.append(f"win = {win_value}")
-
-        where_clause = " AND ".join(conditions)
-
-        # Build query
+        # Optional filters are NULL parameters, so every call reuses one parsed statement
         query = f"""
         SELECT
             match_id,
@@ -112,13 +96,18 @@ class MatchSimilarityFinder:
             vision_score,
             vision_score_per_minute,
             final_items
-        FROM read_parquet(?)
-        WHERE {where_clause}
-        LIMIT ?
+        FROM {FACT_TABLE}
+        WHERE champion_id = $1
+            AND position = $2
+            AND ($3::DOUBLE IS NULL OR game_duration_minutes >= $3)
+            AND ($4::DOUBLE IS NULL OR game_duration_minutes <= $4)
+            AND ($5::BOOLEAN IS NULL OR win = $5)
+        LIMIT $6
         """
 
-        conn = duckdb.connect()
-        result = conn.execute(query, [self.parquet_path, limit]).fetchall()
+        result = self.catalog.execute(
+            query, [champion_id, role, game_duration_min, game_duration_max, win, limit]
+        ).fetchall()
 
         # Convert to dictionaries
         column_names = [
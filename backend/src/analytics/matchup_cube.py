@@ -0,0 +1,506 @@
+"""
+MatchupCube - Materialised Champion Matchup Cube
+
+Stores same-role matchup sufficient statistics (games / wins) for every
+champion × role × opponent × patch as one parquet file per patch. The cube is
+refreshed incrementally from the analytics catalog (only new or changed patches
+are recomputed) and served from in-memory prefix sums, so a lookup over any
+patch window is a dictionary probe plus two subtractions.
+"""
+
+import argparse
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .catalog import get_catalog, FACT_TABLE
+
+logger = logging.getLogger(__name__)
+
+CUBE_VERSION = 1
+MANIFEST_FILE = "_manifest.json"
+
+# 对局数低于该值的对抗数据不参与克制判断（与克制关系矩阵的默认阈值一致）
+DEFAULT_MIN_MATCHUPS = 20
+
+CUBE_SCHEMA = pa.schema([
+    ("role", pa.string()),
+    ("champion_id", pa.int64()),
+    ("opponent_id", pa.int64()),
+    ("games", pa.int32()),
+    ("wins", pa.int32()),
+])
+
+# 每个patch的内容签名: 行数 + 行哈希异或（与行顺序无关）
+# 先拼接成字符串再哈希: 多参数 hash() 按列异或组合，同一局10名玩家的 win 同时翻转会在异或中相互抵消
+_PATCH_SIGNATURE_QUERY = f"""
+SELECT
+    patch_version,
+    COUNT(*),
+    bit_xor(hash(concat_ws('|', match_id, player_key, position, team_id, champion_id, win)))
+FROM {FACT_TABLE}
+WHERE patch_version IS NOT NULL
+GROUP BY patch_version
+"""
+
+# 单个patch的同位置对抗（一局比赛只属于一个patch，两侧都按patch过滤）
+_PATCH_MATCHUPS_QUERY = f"""
+SELECT
+    a.position AS role,
+    a.champion_id,
+    b.champion_id AS opponent_id,
+    COUNT(*)::INTEGER AS games,
+    SUM(CASE WHEN a.win THEN 1 ELSE 0 END)::INTEGER AS wins
+FROM {FACT_TABLE} a
+JOIN {FACT_TABLE} b
+    ON a.match_id = b.match_id
+    AND a.position = b.position
+    AND a.team_id != b.team_id
+WHERE a.patch_version = ?
+    AND b.patch_version = ?
+    AND a.position IS NOT NULL
+    AND a.champion_id IS NOT NULL
+    AND b.champion_id IS NOT NULL
+GROUP BY a.position, a.champion_id, b.champion_id
+ORDER BY role, a.champion_id, opponent_id
+"""
+
+_PATCH_NAMES_QUERY = f"""
+SELECT champion_id, ANY_VALUE(champion_name)
+FROM {FACT_TABLE}
+WHERE patch_version = ? AND champion_id IS NOT NULL AND champion_name IS NOT NULL
+GROUP BY champion_id
+"""
+
+
+def patch_sort_key(patch_version: str) -> Tuple:
+    """'14.20.1' → ((0, 14), (0, 20), (0, 1))，按版本号而不是字符串排序"""
+    return tuple((0, int(part)) if part.isdigit() else (1, part) for part in str(patch_version).split('.'))
+
+
+def default_cube_dir(parquet_path: str) -> Path:
+    """默认立方体目录: <gold>/matchup_cube（与分析目录的 <gold>/duckdb 并列）"""
+    return Path(parquet_path).resolve().parent.parent / "matchup_cube"
+
+
+def read_manifest(cube_dir: Path) -> Optional[Dict[str, Any]]:
+    manifest_file = Path(cube_dir) / MANIFEST_FILE
+    if not manifest_file.exists():
+        return None
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get("cube_version") != CUBE_VERSION:
+        return None
+    return manifest
+
+
+def _replace_file(path: Path, write) -> None:
+    """写临时文件后原子替换（多个进程同时刷新也安全）"""
+    tmp_file = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        write(tmp_file)
+    except Exception:
+        tmp_file.unlink(missing_ok=True)
+        raise
+    os.replace(tmp_file, path)
+
+
+class MatchupCubeBuilder:
+    """
+    对抗立方体构建器（按patch增量刷新）
+
+    - 分析目录的源指纹未变化时直接返回，不查询数据
+    - 按patch计算内容签名，只对新增/变化的patch做同位置自连接并写出该patch的parquet文件
+    - 源中已不存在的patch被移除；清单最后原子替换，读取方总是看到一致的文件集合
+
+    Example:
+        >>> builder = MatchupCubeBuilder("data/gold/parquet/fact_match_performance.parquet")
+        >>> summary = builder.refresh()
+        >>> summary["updated"]
+        ['15.1.1']
+    """
+
+    def __init__(self, parquet_path: str, cube_dir: Optional[str] = None):
+        """
+        Args:
+            parquet_path: Gold layer parquet file or dataset directory
+            cube_dir: Directory for cube files (default: <gold>/matchup_cube)
+        """
+        self.parquet_path = parquet_path
+        self.cube_dir = Path(cube_dir) if cube_dir else default_cube_dir(parquet_path)
+
+    def refresh(self, force: bool = False) -> Dict[str, Any]:
+        """
+        增量刷新立方体
+
+        Args:
+            force: Recompute every patch even if its signature is unchanged
+
+        Returns:
+            {"updated": [patch...], "removed": [patch...], "patches": 当前patch数}
+        """
+        manifest = read_manifest(self.cube_dir) or {}
+        catalog = get_catalog(self.parquet_path)
+        fingerprint = catalog.fingerprint
+
+        if not force and manifest.get("source_fingerprint") == fingerprint:
+            return {"updated": [], "removed": [], "patches": len(manifest["patches"])}
+
+        started = time.time()
+        signatures = {
+            patch_version: f"{row_count}-{row_hash:016x}"
+            for patch_version, row_count, row_hash in catalog.execute(_PATCH_SIGNATURE_QUERY).fetchall()
+        }
+        previous = manifest.get("patches", {})
+        updated = sorted(
+            (patch_version for patch_version, signature in signatures.items()
+             if force or previous.get(patch_version, {}).get("signature") != signature),
+            key=patch_sort_key
+        )
+        removed = sorted((patch_version for patch_version in previous if patch_version not in signatures),
+                         key=patch_sort_key)
+
+        patches = {patch_version: entry for patch_version, entry in previous.items() if patch_version in signatures}
+        champion_names = dict(manifest.get("champion_names", {}))
+
+        self.cube_dir.mkdir(parents=True, exist_ok=True)
+        for patch_version in updated:
+            patches[patch_version] = self._build_patch(catalog, patch_version, signatures[patch_version])
+            for champion_id, champion_name in catalog.execute(_PATCH_NAMES_QUERY, [patch_version]).fetchall():
+                champion_names[str(champion_id)] = champion_name
+
+        manifest = {
+            "cube_version": CUBE_VERSION,
+            "source": str(Path(self.parquet_path).resolve()),
+            "source_fingerprint": fingerprint,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+            "patches": {patch_version: patches[patch_version]
+                        for patch_version in sorted(patches, key=patch_sort_key)},
+            "champion_names": champion_names,
+        }
+
+        def write_manifest(tmp_file: Path):
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+        _replace_file(self.cube_dir / MANIFEST_FILE, write_manifest)
+        self._remove_stale(manifest["patches"])
+
+        if updated or removed:
+            logger.info(f"✅ 对抗立方体已刷新: {self.cube_dir} (更新 {len(updated)} 个patch, "
+                        f"移除 {len(removed)} 个, {time.time() - started:.1f}s)")
+        return {"updated": updated, "removed": removed, "patches": len(patches)}
+
+    def _build_patch(self, catalog, patch_version: str, signature: str) -> Dict[str, Any]:
+        """计算单个patch的对抗统计并写出parquet文件（文件名带签名，旧版本在清单替换后删除）"""
+        logger.info(f"🎯 正在计算 patch {patch_version} 的对抗统计...")
+        columns = catalog.execute(_PATCH_MATCHUPS_QUERY, [patch_version, patch_version]).fetchnumpy()
+        table = pa.table({name: columns[name] for name in CUBE_SCHEMA.names}, schema=CUBE_SCHEMA)
+
+        file_name = f"patch_{patch_version}-{signature}.parquet"
+        _replace_file(self.cube_dir / file_name,
+                      lambda tmp_file: pq.write_table(table, tmp_file, compression="zstd"))
+
+        return {
+            "signature": signature,
+            "file": file_name,
+            "matchups": table.num_rows,
+            "games": int(np.sum(columns["games"], dtype=np.int64)),
+        }
+
+    def _remove_stale(self, patches: Dict[str, Dict[str, Any]]):
+        referenced = {entry["file"] for entry in patches.values()}
+        for patch_file in self.cube_dir.glob("patch_*.parquet"):
+            if patch_file.name not in referenced:
+                patch_file.unlink(missing_ok=True)
+
+
+class MatchupCube:
+    """
+    对抗立方体（内存只读视图）
+
+    - 每个 (位置, 英雄, 对手) 一行，沿patch轴保存 games/wins 的前缀和，
+      任意连续patch窗口的统计 = 两次下标相减，不需要重新聚合
+    - 同一 (位置, 英雄) 的对手在内存中连续存放，列出全部对手只需一次切片
+    - patch_from/patch_to 含端点，可以写到版本前缀（'14.20' 覆盖 14.20.x）
+
+    Example:
+        >>> cube = load_matchup_cube("data/gold/parquet/fact_match_performance.parquet")
+        >>> cube.matchup(92, 122, "TOP", patch_from="14.18", patch_to="14.20")
+        {'games': 57, 'wins': 25, 'winrate': 0.439}
+        >>> cube.matchups(92, "TOP", patch_from="14.18", min_games=20)
+        {122: {'games': 57, 'wins': 25, 'winrate': 0.439}, ...}
+    """
+
+    def __init__(self, cube_dir: str):
+        """
+        Args:
+            cube_dir: Directory written by MatchupCubeBuilder
+        """
+        self.cube_dir = Path(cube_dir)
+        manifest = read_manifest(self.cube_dir)
+        if manifest is None:
+            raise FileNotFoundError(f"Matchup cube not found: {cube_dir}")
+
+        self.manifest = manifest
+        self.patches: List[str] = sorted(manifest["patches"], key=patch_sort_key)
+        self.champion_names: Dict[int, str] = {
+            int(champion_id): name for champion_id, name in manifest.get("champion_names", {}).items()
+        }
+        self._patch_keys = [patch_sort_key(patch_version) for patch_version in self.patches]
+        self._windows: Dict[Tuple[Optional[str], Optional[str]], Tuple[int, int]] = {}
+        self._load()
+
+    def _load(self):
+        roles, champions, opponents, games, wins, patch_index = [], [], [], [], [], []
+        for index, patch_version in enumerate(self.patches):
+            table = pq.read_table(self.cube_dir / self.manifest["patches"][patch_version]["file"])
+            roles.append(table.column("role").to_numpy(zero_copy_only=False).astype(str))
+            champions.append(table.column("champion_id").to_numpy())
+            opponents.append(table.column("opponent_id").to_numpy())
+            games.append(table.column("games").to_numpy())
+            wins.append(table.column("wins").to_numpy())
+            patch_index.append(np.full(table.num_rows, index, dtype=np.int64))
+
+        def concat(parts, dtype):
+            return np.concatenate(parts).astype(dtype, copy=False) if parts else np.array([], dtype=dtype)
+
+        roles = concat(roles, str)
+        self.roles: List[str] = sorted(set(roles.tolist()))
+        role_codes = np.searchsorted(np.array(self.roles, dtype=str), roles)
+
+        # 唯一键按 (位置, 英雄, 对手) 排序 → 同一位置、同一 (位置, 英雄) 的行都连续
+        keys = np.stack([role_codes, concat(champions, np.int64), concat(opponents, np.int64)], axis=1)
+        unique_keys, rows = np.unique(keys.astype(np.int64), axis=0, return_inverse=True)
+        rows = rows.reshape(-1)
+        patch_index = concat(patch_index, np.int64)
+
+        # 前缀和: [:, j] = 前 j 个patch的累计值（单个对抗组合的累计对局数远小于 2^31，int32 足够）
+        row_count = len(unique_keys)
+        self._games = np.zeros((row_count, len(self.patches) + 1), dtype=np.int32)
+        self._wins = np.zeros((row_count, len(self.patches) + 1), dtype=np.int32)
+        self._games[rows, patch_index + 1] = concat(games, np.int32)
+        self._wins[rows, patch_index + 1] = concat(wins, np.int32)
+        np.cumsum(self._games, axis=1, out=self._games)
+        np.cumsum(self._wins, axis=1, out=self._wins)
+
+        self._champions = unique_keys[:, 1]
+        self._opponents = unique_keys[:, 2]
+        key_roles = [self.roles[code] for code in unique_keys[:, 0].tolist()]
+        key_champions = self._champions.tolist()
+        self._rows: Dict[Tuple[str, int, int], int] = dict(
+            zip(zip(key_roles, key_champions, self._opponents.tolist()), range(row_count))
+        )
+
+        # (位置, 英雄) → 行区间；位置 → 行区间
+        self._slices: Dict[Tuple[str, int], Tuple[int, int]] = {}
+        self._role_slices: Dict[str, Tuple[int, int]] = {}
+        boundaries = (np.flatnonzero(np.any(np.diff(unique_keys[:, :2], axis=0) != 0, axis=1)) + 1).tolist()
+        for start, end in zip([0] + boundaries, boundaries + [row_count]):
+            if start == end:
+                continue
+            role = key_roles[start]
+            self._slices[(role, key_champions[start])] = (start, end)
+            self._role_slices[role] = (self._role_slices.get(role, (start, end))[0], end)
+
+    def _window(self, patch_from: Optional[str] = None, patch_to: Optional[str] = None) -> Tuple[int, int]:
+        """patch窗口 → 前缀和列区间 [lo, hi)"""
+        window = self._windows.get((patch_from, patch_to))
+        if window is None:
+            lo = 0 if patch_from is None else bisect.bisect_left(self._patch_keys, patch_sort_key(patch_from))
+            hi = len(self.patches) if patch_to is None else bisect.bisect_right(
+                self._patch_keys, patch_sort_key(patch_to) + ((2,),)
+            )
+            window = (lo, max(lo, hi))
+            self._windows[(patch_from, patch_to)] = window
+        return window
+
+    def latest_patches(self, count: int) -> Tuple[Optional[str], Optional[str]]:
+        """最近 count 个patch的窗口 (patch_from, patch_to)"""
+        if not self.patches or count <= 0:
+            return None, None
+        return self.patches[max(0, len(self.patches) - count)], self.patches[-1]
+
+    def window_patches(self, patch_from: Optional[str] = None, patch_to: Optional[str] = None) -> List[str]:
+        """窗口内的patch列表"""
+        lo, hi = self._window(patch_from, patch_to)
+        return self.patches[lo:hi]
+
+    def champion_name(self, champion_id) -> Optional[str]:
+        return self.champion_names.get(int(champion_id))
+
+    def matchup(
+        self,
+        champion_id,
+        opponent_id,
+        role: str,
+        patch_from: Optional[str] = None,
+        patch_to: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        单个对抗在patch窗口内的统计（champion_id 视角）
+
+        Returns:
+            {"games", "wins", "winrate"}，窗口内没有对局时返回None
+        """
+        row = self._rows.get((role, int(champion_id), int(opponent_id)))
+        if row is None:
+            return None
+        lo, hi = self._window(patch_from, patch_to)
+        games_row, wins_row = self._games[row], self._wins[row]
+        games = int(games_row[hi] - games_row[lo])
+        if not games:
+            return None
+        wins = int(wins_row[hi] - wins_row[lo])
+        return {"games": games, "wins": wins, "winrate": round(wins / games, 3)}
+
+    def matchups(
+        self,
+        champion_id,
+        role: str,
+        patch_from: Optional[str] = None,
+        patch_to: Optional[str] = None,
+        min_games: int = 1
+    ) -> Dict[int, Dict[str, Any]]:
+        """英雄在某位置对所有对手的统计（对局数 ≥ min_games），按对手ID排序"""
+        span = self._slices.get((role, int(champion_id)))
+        if span is None:
+            return {}
+        start, end = span
+        lo, hi = self._window(patch_from, patch_to)
+        games = self._games[start:end, hi] - self._games[start:end, lo]
+        wins = self._wins[start:end, hi] - self._wins[start:end, lo]
+        selected = np.flatnonzero(games >= max(min_games, 1))
+        return {
+            opponent: {"games": game_count, "wins": win_count, "winrate": round(win_count / game_count, 3)}
+            for opponent, game_count, win_count in zip(
+                self._opponents[start:end][selected].tolist(), games[selected].tolist(), wins[selected].tolist()
+            )
+        }
+
+    def champions(
+        self,
+        role: str,
+        patch_from: Optional[str] = None,
+        patch_to: Optional[str] = None,
+        min_games: int = 1
+    ) -> List[int]:
+        """在窗口内至少有一个对手达到 min_games 的该位置英雄"""
+        span = self._role_slices.get(role)
+        if span is None:
+            return []
+        start, end = span
+        lo, hi = self._window(patch_from, patch_to)
+        games = self._games[start:end, hi] - self._games[start:end, lo]
+        return np.unique(self._champions[start:end][games >= max(min_games, 1)]).tolist()
+
+    def iter_matchups(
+        self,
+        patch_from: Optional[str] = None,
+        patch_to: Optional[str] = None,
+        min_games: int = 1
+    ) -> Iterator[Tuple[str, int, int, int, int]]:
+        """遍历窗口内的全部对抗 (位置, 英雄, 对手, 对局数, 胜场)"""
+        lo, hi = self._window(patch_from, patch_to)
+        games = self._games[:, hi] - self._games[:, lo]
+        wins = self._wins[:, hi] - self._wins[:, lo]
+        for role, (start, end) in self._role_slices.items():
+            selected = start + np.flatnonzero(games[start:end] >= max(min_games, 1))
+            yield from zip(
+                [role] * len(selected), self._champions[selected].tolist(), self._opponents[selected].tolist(),
+                games[selected].tolist(), wins[selected].tolist()
+            )
+
+
+# 进程级立方体缓存: 目录 → ((清单mtime_ns, size), MatchupCube)
+_cubes: Dict[str, Tuple[Tuple[int, int], MatchupCube]] = {}
+_cubes_lock = threading.Lock()
+
+
+def get_matchup_cube(cube_dir: str) -> MatchupCube:
+    """
+    获取当前进程共享的对抗立方体（清单被刷新后自动重新加载）
+
+    Args:
+        cube_dir: Directory written by MatchupCubeBuilder
+    """
+    manifest_file = Path(cube_dir) / MANIFEST_FILE
+    stat = manifest_file.stat()
+    version = (stat.st_mtime_ns, stat.st_size)
+    key = str(Path(cube_dir).resolve())
+
+    with _cubes_lock:
+        entry = _cubes.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        cube = MatchupCube(cube_dir)
+        _cubes[key] = (version, cube)
+        return cube
+
+
+def load_matchup_cube(
+    parquet_path: str = "data/gold/parquet/fact_match_performance.parquet",
+    cube_dir: Optional[str] = None,
+    refresh: bool = True
+) -> MatchupCube:
+    """
+    加载对抗立方体（缺失时自动构建，Gold层更新后增量刷新）
+
+    Args:
+        parquet_path: Gold layer parquet file or dataset directory
+        cube_dir: Directory for cube files (default: <gold>/matchup_cube)
+        refresh: Bring the cube up to date with the Gold layer before loading
+
+    Returns:
+        Shared MatchupCube instance (read-only)
+    """
+    cube_dir = Path(cube_dir) if cube_dir else default_cube_dir(parquet_path)
+    cube_exists = (cube_dir / MANIFEST_FILE).exists()
+
+    if not Path(parquet_path).exists():
+        # 只部署了立方体文件（没有Gold层）时直接使用现有立方体
+        if not cube_exists:
+            raise FileNotFoundError(f"❌ Gold layer数据不存在: {parquet_path}")
+    elif refresh or not cube_exists:
+        MatchupCubeBuilder(parquet_path, str(cube_dir)).refresh()
+
+    return get_matchup_cube(str(cube_dir))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or incrementally refresh the champion matchup cube")
+    parser.add_argument("--parquet", default="data/gold/parquet/fact_match_performance.parquet",
+                        help="Gold layer parquet file or dataset directory")
+    parser.add_argument("--cube-dir", default=None, help="Cube directory (default: <gold>/matchup_cube)")
+    parser.add_argument("--force", action="store_true", help="Recompute every patch")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    builder = MatchupCubeBuilder(args.parquet, args.cube_dir)
+    try:
+        summary = builder.refresh(force=args.force)
+    except Exception as e:
+        print(f"❌ 对抗立方体刷新失败: {e}")
+        return 1
+
+    print(f"   目录: {builder.cube_dir}")
+    print(f"   更新patch: {', '.join(summary['updated']) or '无'}")
+    print(f"   移除patch: {', '.join(summary['removed']) or '无'}")
+    for patch_version, entry in read_manifest(builder.cube_dir)["patches"].items():
+        print(f"   {patch_version}: {entry['matchups']} 个对抗组合, {entry['games']} 个对抗样本")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -6,13 +6,14 @@ Meta层级分类模块
 基于胜率和选取率对英雄进行S/A/B/C/D层级分类
 """
 
-import duckdb
 import json
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 import numpy as np
 import logging
 
+from .catalog import get_catalog, FACT_TABLE
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -50,6 +51,8 @@ class MetaTierClassifier:
         if not self.parquet_path.exists():
             raise FileNotFoundError(f"Parquet文件不存在: {parquet_path}")
 
+        self.catalog = get_catalog(str(self.parquet_path))
+
     def _calculate_champion_stats(self) -> List[Dict[str, Any]]:
         """
         计算每个英雄的统计数据
@@ -59,9 +62,7 @@ class MetaTierClassifier:
         """
         logger.info(f"📊 正在从 {self.parquet_path} 计算英雄统计...")
 
-        conn = duckdb.connect(":memory:")
-
-        query = """
+        query = f"""
         SELECT
             champion_id,
             champion_name,
@@ -71,15 +72,14 @@ class MetaTierClassifier:
             AVG(kda_ratio) as avg_kda,
             AVG(gold_per_minute) as avg_gold_per_min,
             AVG(damage_per_minute) as avg_damage_per_min
-        FROM read_parquet(?)
+        FROM {FACT_TABLE}
         WHERE champion_id IS NOT NULL
         GROUP BY champion_id, champion_name
         HAVING COUNT(*) >= ?
         ORDER BY winrate DESC, total_games DESC
         """
 
-        result = conn.execute(query, [str(self.parquet_path), self.min_games]).fetchall()
-        conn.close()
+        result = self.catalog.execute(query, [self.min_games]).fetchall()
 
         if not result:
             raise ValueError(f"没有找到满足最小游戏场次({self.min_games})的英雄数据")
@@ -200,9 +200,7 @@ class MetaTierClassifier:
         """
         logger.info("📊 正在按位置进行Meta分层...")
 
-        conn = duckdb.connect(":memory:")
-
-        query = """
+        query = f"""
         SELECT
             position,
             champion_id,
@@ -210,15 +208,14 @@ class MetaTierClassifier:
             COUNT(*) as total_games,
             SUM(CAST(win AS INTEGER)) as wins,
             AVG(CAST(win AS INTEGER)) as winrate
-        FROM read_parquet(?)
+        FROM {FACT_TABLE}
         WHERE champion_id IS NOT NULL AND position IS NOT NULL
         GROUP BY position, champion_id, champion_name
         HAVING COUNT(*) >= ?
         ORDER BY position, winrate DESC
         """
 
-        result = conn.execute(query, [str(self.parquet_path), self.min_games]).fetchall()
-        conn.close()
+        result = self.catalog.execute(query, [self.min_games]).fetchall()
 
         # 按位置分组
         role_stats = {}
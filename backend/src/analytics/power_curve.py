@@ -12,13 +12,14 @@ Key Metrics:
 Data Source: Gold layer (fact_match_performance.parquet)
 """
 
-import duckdb
 import json
 import logging
 from pathlib import Path
 from typing import Dict, Any, List, Tuple
 from datetime import datetime
 
+from .catalog import get_catalog, FACT_TABLE
+
 logger = logging.getLogger(__name__)
 
 
@@ -50,6 +51,8 @@ class PowerCurveGenerator:
         if not Path(parquet_path).exists():
             raise FileNotFoundError(f"Parquet file not found: {parquet_path}")
 
+        self.catalog = get_catalog(parquet_path)
+
     def generate(self) -> Dict[str, Any]:
         """
         Generate power curves for all champion-role combinations
@@ -93,10 +96,8 @@ class PowerCurveGenerator:
         """
         logger.info(f"📊 正在从 {self.parquet_path} 生成战力曲线...")
 
-        conn = duckdb.connect()
-
         # Query: Calculate power scores by champion, role, and time segment
-        query = """
+        query = f"""
         WITH time_segmented AS (
             SELECT
                 champion_id,
@@ -114,7 +115,7 @@ class PowerCurveGenerator:
                 vision_score_per_minute,
                 win,
                 game_duration_minutes
-            FROM read_parquet(?)
+            FROM {FACT_TABLE}
             WHERE position IS NOT NULL
               AND champion_id IS NOT NULL
         ),
@@ -166,7 +167,7 @@ class PowerCurveGenerator:
         ORDER BY c.champion_id, c.role, c.time_segment
         """
 
-        results = conn.execute(query, [self.parquet_path, self.min_games]).fetchall()
+        results = self.catalog.execute(query, [self.min_games]).fetchall()
 
         if not results:
             logger.warning("⚠️  未找到符合条件的数据")
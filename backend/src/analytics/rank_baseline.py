@@ -6,12 +6,13 @@ Rank Baseline Generator
 从Gold layer生成各段位的平均表现指标，用于同段位对比分析
 """
 
-import duckdb
 import json
 from pathlib import Path
 from typing import Dict, Any, Optional
 import logging
 
+from .catalog import get_catalog, FACT_TABLE
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -37,6 +38,8 @@ class RankBaselineGenerator:
         if not self.parquet_path.exists():
             raise FileNotFoundError(f"Parquet文件不存在: {parquet_path}")
 
+        self.catalog = get_catalog(str(self.parquet_path))
+
     def generate(self) -> Dict[str, Any]:
         """
         生成段位基准统计数据
@@ -55,9 +58,7 @@ class RankBaselineGenerator:
         """
         logger.info(f"📊 正在从 {self.parquet_path} 生成段位基准数据...")
 
-        conn = duckdb.connect(":memory:")
-
-        query = """
+        query = f"""
         SELECT
             tier,
             COUNT(*) as sample_size,
@@ -80,7 +81,7 @@ class RankBaselineGenerator:
             STDDEV(kda_ratio) as std_kda,
             STDDEV(cs_per_minute) as std_cs_per_min,
             STDDEV(gold_per_minute) as std_gold_per_min
-        FROM read_parquet(?)
+        FROM {FACT_TABLE}
         WHERE tier IS NOT NULL
         GROUP BY tier
         HAVING COUNT(*) >= ?
@@ -100,10 +101,9 @@ class RankBaselineGenerator:
             END
         """
 
-        result = conn.execute(query, [str(self.parquet_path), self.min_sample_size]).fetchall()
-        columns = [desc[0] for desc in conn.description]
-
-        conn.close()
+        cursor = self.catalog.execute(query, [self.min_sample_size])
+        result = cursor.fetchall()
+        columns = [desc[0] for desc in cursor.description]
 
         # 转换为字典格式
         baselines = {}
@@ -127,9 +127,7 @@ class RankBaselineGenerator:
         """
         logger.info("📊 正在生成位置分层的段位基准数据...")
 
-        conn = duckdb.connect(":memory:")
-
-        query = """
+        query = f"""
         SELECT
             tier,
             position,
@@ -139,17 +137,16 @@ class RankBaselineGenerator:
             AVG(cs_per_minute) as avg_cs_per_min,
             AVG(gold_per_minute) as avg_gold_per_min,
             AVG(damage_per_minute) as avg_damage_per_min
-        FROM read_parquet(?)
+        FROM {FACT_TABLE}
         WHERE tier IS NOT NULL AND position IS NOT NULL
         GROUP BY tier, position
         HAVING COUNT(*) >= ?
         ORDER BY tier, position
         """
 
-        result = conn.execute(query, [str(self.parquet_path), self.min_sample_size]).fetchall()
-        columns = [desc[0] for desc in conn.description]
-
-        conn.close()
+        cursor = self.catalog.execute(query, [self.min_sample_size])
+        result = cursor.fetchall()
+        columns = [desc[0] for desc in cursor.description]
 
         # 构建嵌套字典：position -> tier -> stats
         role_baselines = {}
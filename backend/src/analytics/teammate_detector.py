@@ -4,11 +4,12 @@ FrequentTeammateDetector - Teammate Relationship Analysis
 Detects frequently played together teammates and analyzes their synergy.
 """
 
-import duckdb
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 import json
 
+from .catalog import get_catalog, FACT_TABLE
+
 
 class FrequentTeammateDetector:
     """
@@ -43,6 +44,7 @@ class FrequentTeammateDetector:
 
         self.min_games_together = min_games_together
         self.teammates_data = None
+        self.catalog = get_catalog(str(self.parquet_path))
 
     def find_frequent_teammates(
         self,
@@ -61,13 +63,13 @@ class FrequentTeammateDetector:
         """
         min_games = min_games or self.min_games_together
 
-        query = """
+        query = f"""
         WITH player_matches AS (
             SELECT DISTINCT
                 match_id,
                 team_id,
                 player_key
-            FROM read_parquet(?)
+            FROM {FACT_TABLE}
             WHERE player_key = ?
         ),
         teammate_pairs AS (
@@ -88,7 +90,7 @@ class FrequentTeammateDetector:
                 fp.damage_to_champions,
                 fp.gold_earned
             FROM player_matches pm
-            JOIN read_parquet(?) fp
+            JOIN {FACT_TABLE} fp
                 ON pm.match_id = fp.match_id
                 AND pm.team_id = fp.team_id
                 AND pm.player_key != fp.player_key
@@ -125,36 +127,28 @@ class FrequentTeammateDetector:
         ORDER BY games_together DESC, win_rate_together DESC
         """
 
-        conn = duckdb.connect(database=':memory:')
-        try:
-            result = conn.execute(
-                query,
-                [str(self.parquet_path), player_key, str(self.parquet_path), min_games]
-            ).fetchall()
-
-            columns = [
-                'teammate_key', 'teammate_name', 'games_together', 'wins_together',
-                'win_rate_together', 'avg_game_duration', 'roles_played', 'most_common_role',
-                'avg_kills', 'avg_deaths', 'avg_assists', 'avg_damage', 'avg_gold',
-                'unique_champions', 'most_played_champion'
-            ]
+        result = self.catalog.execute(query, [player_key, min_games]).fetchall()
 
-            teammates = []
-            for row in result:
-                teammate = dict(zip(columns, row))
+        columns = [
+            'teammate_key', 'teammate_name', 'games_together', 'wins_together',
+            'win_rate_together', 'avg_game_duration', 'roles_played', 'most_common_role',
+            'avg_kills', 'avg_deaths', 'avg_assists', 'avg_damage', 'avg_gold',
+            'unique_champions', 'most_played_champion'
+        ]
 
-                # Calculate KDA
-                if teammate['avg_deaths'] > 0:
-                    teammate['avg_kda'] = (teammate['avg_kills'] + teammate['avg_assists']) / teammate['avg_deaths']
-                else:
-                    teammate['avg_kda'] = teammate['avg_kills'] + teammate['avg_assists']
+        teammates = []
+        for row in result:
+            teammate = dict(zip(columns, row))
 
-                teammates.append(teammate)
+            # Calculate KDA
+            if teammate['avg_deaths'] > 0:
+                teammate['avg_kda'] = (teammate['avg_kills'] + teammate['avg_assists']) / teammate['avg_deaths']
+            else:
+                teammate['avg_kda'] = teammate['avg_kills'] + teammate['avg_assists']
 
-            return teammates
+            teammates.append(teammate)
 
-        finally:
-            conn.close()
+        return teammates
 
     def analyze_synergy(
         self,
@@ -171,12 +165,12 @@ class FrequentTeammateDetector:
         Returns:
             Detailed synergy analysis
         """
-        query = """
+        query = f"""
         WITH player_matches AS (
             SELECT DISTINCT
                 match_id,
                 team_id
-            FROM read_parquet(?)
+            FROM {FACT_TABLE}
             WHERE player_key = ?
         ),
         teammate_matches AS (
@@ -203,11 +197,11 @@ class FrequentTeammateDetector:
                 p1.win,
                 p1.game_duration_minutes
             FROM player_matches pm
-            JOIN read_parquet(?) p1
+            JOIN {FACT_TABLE} p1
                 ON pm.match_id = p1.match_id
                 AND pm.team_id = p1.team_id
                 AND p1.player_key = ?
-            JOIN read_parquet(?) p2
+            JOIN {FACT_TABLE} p2
                 ON pm.match_id = p2.match_id
                 AND pm.team_id = p2.team_id
                 AND p2.player_key = ?
@@ -244,70 +238,58 @@ class FrequentTeammateDetector:
         FROM synergy_stats
         """
 
-        conn = duckdb.connect(database=':memory:')
-        try:
-            result = conn.execute(
-                query,
-                [
-                    str(self.parquet_path), player_key1,
-                    str(self.parquet_path), player_key1,
-                    str(self.parquet_path), player_key2
-                ]
-            ).fetchone()
-
-            if not result or result[0] == 0:
-                return {
-                    "games_together": 0,
-                    "synergy_score": 0,
-                    "message": "No games found together"
-                }
-
-            columns = [
-                'games_together', 'wins', 'win_rate', 'avg_duration',
-                'role_combos', 'most_common_combo',
-                'avg_combined_kills', 'avg_combined_deaths', 'avg_combined_assists', 'avg_combined_damage',
-                'player1_name', 'player2_name',
-                'p1_avg_kills', 'p1_avg_deaths', 'p1_avg_assists',
-                'p2_avg_kills', 'p2_avg_deaths', 'p2_avg_assists'
-            ]
-
-            synergy = dict(zip(columns, result))
-
-            # Calculate synergy score (0-100)
-            # Components:
-            # - Win rate: 40 points
-            # - Combined KDA: 30 points
-            # - Games together: 20 points (capped at 50 games)
-            # - Role diversity: 10 points
-
-            win_rate_score = synergy['win_rate'] * 40
-
-            combined_kda = (synergy['avg_combined_kills'] + synergy['avg_combined_assists']) / max(synergy['avg_combined_deaths'], 1)
-            kda_score = min(combined_kda / 10.0, 1.0) * 30  # Normalize to 0-30
-
-            games_score = min(synergy['games_together'] / 50.0, 1.0) * 20
-
-            role_diversity_score = min(synergy['role_combos'] / 5.0, 1.0) * 10
-
-            synergy_score = win_rate_score + kda_score + games_score + role_diversity_score
-
-            synergy['synergy_score'] = round(synergy_score, 1)
-
-            # Calculate individual KDAs
-            if synergy['p1_avg_deaths'] > 0:
-                synergy['p1_kda'] = (synergy['p1_avg_kills'] + synergy['p1_avg_assists']) / synergy['p1_avg_deaths']
-            else:
-                synergy['p1_kda'] = synergy['p1_avg_kills'] + synergy['p1_avg_assists']
+        result = self.catalog.execute(query, [player_key1, player_key1, player_key2]).fetchone()
 
-            if synergy['p2_avg_deaths'] > 0:
-                synergy['p2_kda'] = (synergy['p2_avg_kills'] + synergy['p2_avg_assists']) / synergy['p2_avg_deaths']
-            else:
-                synergy['p2_kda'] = synergy['p2_avg_kills'] + synergy['p2_avg_assists']
+        if not result or result[0] == 0:
+            return {
+                "games_together": 0,
+                "synergy_score": 0,
+                "message": "No games found together"
+            }
+
+        columns = [
+            'games_together', 'wins', 'win_rate', 'avg_duration',
+            'role_combos', 'most_common_combo',
+            'avg_combined_kills', 'avg_combined_deaths', 'avg_combined_assists', 'avg_combined_damage',
+            'player1_name', 'player2_name',
+            'p1_avg_kills', 'p1_avg_deaths', 'p1_avg_assists',
+            'p2_avg_kills', 'p2_avg_deaths', 'p2_avg_assists'
+        ]
+
+        synergy = dict(zip(columns, result))
+
+        # Calculate synergy score (0-100)
+        # Components:
+        # - Win rate: 40 points
+        # - Combined KDA: 30 points
+        # - Games together: 20 points (capped at 50 games)
+        # - Role diversity: 10 points
 
-            return synergy
+        win_rate_score = synergy['win_rate'] * 40
+
+        combined_kda = (synergy['avg_combined_kills'] + synergy['avg_combined_assists']) / max(synergy['avg_combined_deaths'], 1)
+        kda_score = min(combined_kda / 10.0, 1.0) * 30  # Normalize to 0-30
+
+        games_score = min(synergy['games_together'] / 50.0, 1.0) * 20
+
+        role_diversity_score = min(synergy['role_combos'] / 5.0, 1.0) * 10
+
+        synergy_score = win_rate_score + kda_score + games_score + role_diversity_score
+
+        synergy['synergy_score'] = round(synergy_score, 1)
+
+        # Calculate individual KDAs
+        if synergy['p1_avg_deaths'] > 0:
+            synergy['p1_kda'] = (synergy['p1_avg_kills'] + synergy['p1_avg_assists']) / synergy['p1_avg_deaths']
+        else:
+            synergy['p1_kda'] = synergy['p1_avg_kills'] + synergy['p1_avg_assists']
+
+        if synergy['p2_avg_deaths'] > 0:
+            synergy['p2_kda'] = (synergy['p2_avg_kills'] + synergy['p2_avg_assists']) / synergy['p2_avg_deaths']
+        else:
+            synergy['p2_kda'] = synergy['p2_avg_kills'] + synergy['p2_avg_assists']
 
-        finally:
-            conn.close()
+        return synergy
 
     def generate_team_report(
         self,
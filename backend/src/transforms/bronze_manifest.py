@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Bronze Manifest - 持久化的Bronze摄取清单（增量Silver构建）
+
+每个Silver输出目录各自保存一份清单（_bronze_manifest.json），记录:
+
+- 已处理的Bronze文件: 相对路径 → 大小、mtime、内容哈希(sha256)、match_id、patch
+- 每个patch的水位线: 最新比赛时间、文件数、最近摄取时间
+- 每个patch分区的输出统计（由转换器维护，用于在不重读全部分区的情况下生成摘要）
+
+增量运行时先按 (大小, mtime) 快速比较，只有元数据变化的已知文件才重新计算哈希；
+内容未变的文件被跳过，新增/变更的文件重新转换，已删除/变更文件的旧输出由转换器撤回。
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+
+MANIFEST_FILENAME = "_bronze_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def file_sha256(path: Path) -> str:
+    """计算文件内容哈希"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+@dataclass
+class BronzePlan:
+    """一次扫描的处理计划（针对一个转换器的清单）"""
+
+    incremental: bool
+    pending: Set[str] = field(default_factory=set)          # 需要转换的文件（新增 + 变更）
+    retired: List[Dict] = field(default_factory=list)       # 需要撤回旧输出的清单条目（变更 + 删除）
+    new_files: int = 0
+    changed_files: int = 0
+    deleted_files: int = 0
+    unchanged_files: int = 0
+
+    def describe(self) -> str:
+        if not self.incremental:
+            return f"全量 {len(self.pending)} 个文件"
+        return (f"新增 {self.new_files}, 变更 {self.changed_files}, "
+                f"删除 {self.deleted_files}, 未变 {self.unchanged_files}")
+
+
+class BronzeManifest:
+    """Bronze摄取清单"""
+
+    def __init__(self, manifest_file: Path, patch_mapper=None):
+        self.manifest_file = Path(manifest_file)
+        self.patch_mapper = patch_mapper
+        self.files: Dict[str, Dict] = {}
+        self.watermarks: Dict[str, Dict] = {}
+        self.partitions: Dict[str, Dict] = {}
+        self._load()
+
+    def _load(self):
+        if not self.manifest_file.exists():
+            return
+        try:
+            with open(self.manifest_file, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"⚠️ 加载Bronze清单失败: {e}, 将执行全量构建")
+            return
+
+        if data.get('version') != MANIFEST_VERSION:
+            print(f"⚠️ Bronze清单版本不匹配 ({data.get('version')}), 将执行全量构建")
+            return
+
+        self.files = data.get('files', {})
+        self.watermarks = data.get('watermarks', {})
+        self.partitions = data.get('partitions', {})
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.files
+
+    def reset(self):
+        """全量构建前清空清单"""
+        self.files = {}
+        self.watermarks = {}
+        self.partitions = {}
+
+    def require_outputs(self, partition_files: Callable[[str], List[Path]]):
+        """清单记录的分区输出缺失时清空清单（下次扫描自动退化为全量构建）"""
+        for patch_version in self.partitions:
+            missing = [path for path in partition_files(patch_version) if not path.exists()]
+            if missing:
+                print(f"⚠️ Silver分区缺失 ({missing[0]}), 清单失效, 将执行全量构建")
+                self.reset()
+                return
+
+    def plan(self,
+             stats: Iterable[Tuple[str, int, int]],
+             hasher: Callable[[str], str],
+             incremental: bool = True) -> BronzePlan:
+        """
+        对比当前Bronze文件与清单，生成处理计划（只会刷新内容未变文件的mtime）
+
+        Args:
+            stats: (相对路径, 大小, mtime_ns)
+            hasher: 相对路径 → sha256（只对元数据变化的已知文件调用）
+            incremental: False 或清单为空时生成全量计划
+        """
+        stats = list(stats)
+        if not incremental or self.is_empty:
+            return BronzePlan(incremental=False, pending={key for key, _, _ in stats})
+
+        plan = BronzePlan(incremental=True)
+        seen = set()
+        for key, size, mtime_ns in stats:
+            seen.add(key)
+            entry = self.files.get(key)
+            if entry is None:
+                plan.pending.add(key)
+                plan.new_files += 1
+            elif entry['size'] == size and entry['mtime_ns'] == mtime_ns:
+                plan.unchanged_files += 1
+            elif entry['size'] == size and hasher(key) == entry['sha256']:
+                # 只是被touch/复制过，内容未变
+                entry['mtime_ns'] = mtime_ns
+                plan.unchanged_files += 1
+            else:
+                plan.pending.add(key)
+                plan.retired.append({'key': key, **entry})
+                plan.changed_files += 1
+
+        for key, entry in self.files.items():
+            if key not in seen:
+                plan.retired.append({'key': key, **entry})
+                plan.deleted_files += 1
+
+        return plan
+
+    def forget(self, entries: Iterable[Dict]):
+        """移除被撤回的条目（变更的文件在重新转换成功后会被重新记录）"""
+        for entry in entries:
+            self.files.pop(entry['key'], None)
+
+    def record(self, key: str, size: int, mtime_ns: int, sha256: str, match_meta: Dict):
+        """记录一个已成功转换的Bronze文件，并推进其patch的水位线"""
+        game_creation = match_meta.get('game_creation') or 0
+        patch_version = None
+        if self.patch_mapper is not None and game_creation:
+            patch_version = self.patch_mapper.get_patch_by_timestamp(game_creation)
+
+        self.files[key] = {
+            'size': size,
+            'mtime_ns': mtime_ns,
+            'sha256': sha256,
+            'match_id': match_meta.get('match_id'),
+            'game_id': match_meta.get('game_id'),
+            'game_creation': game_creation,
+            'patch': patch_version
+        }
+
+        if patch_version:
+            watermark = self.watermarks.setdefault(
+                patch_version, {'max_game_creation': 0, 'files': 0, 'last_ingested_at': None}
+            )
+            watermark['max_game_creation'] = max(watermark['max_game_creation'], game_creation)
+            watermark['files'] += 1
+            watermark['last_ingested_at'] = datetime.now(timezone.utc).isoformat()
+
+    def save(self):
+        """原子写入清单（应在Silver输出落盘之后调用）"""
+        # 水位线中的文件数以当前清单为准（变更/删除的文件已被移除）
+        file_counts: Dict[str, int] = {}
+        for entry in self.files.values():
+            if entry.get('patch'):
+                file_counts[entry['patch']] = file_counts.get(entry['patch'], 0) + 1
+        for patch_version in list(self.watermarks):
+            if patch_version in file_counts:
+                self.watermarks[patch_version]['files'] = file_counts[patch_version]
+            else:
+                del self.watermarks[patch_version]
+
+        data = {
+            'version': MANIFEST_VERSION,
+            'updated_at': datetime.now(timezone.utc).isoformat(),
+            'file_count': len(self.files),
+            'watermarks': self.watermarks,
+            'partitions': self.partitions,
+            'files': self.files
+        }
+
+        self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.manifest_file.with_suffix('.json.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_file, self.manifest_file)
+
+
+def retired_by_patch(entries: Iterable[Dict]) -> Dict[str, Set]:
+    """被撤回的条目按patch分组 → {patch: {game_id}}"""
+    grouped: Dict[str, Set] = {}
+    for entry in entries:
+        if entry.get('patch'):
+            grouped.setdefault(entry['patch'], set()).add(entry.get('game_id'))
+    return grouped
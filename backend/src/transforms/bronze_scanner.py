@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Bronze Scanner - 共享的单遍、并行Bronze层扫描器
+
+BronzeToSilverSCD2Transformer、FactMatchPerformanceTransformer、EnhancedFactTransformer
+以前各自 rglob 整个Bronze目录，并在单核上逐个 json.load 每个比赛文件。现在：
+
+- 目录只遍历一次（顺序与原来一致：段位目录 → rglob）
+- 文件按块分给进程池：子进程读取、解析（有 orjson 时使用 orjson），并直接执行每个
+  转换器的逐场转换（transform_bronze_match）；主进程只做合并（collect_bronze_match）
+- 同一场比赛只解析一次，扇出给所有注册的转换器
+- 增量模式（incremental=True）: 按各转换器的Bronze清单（bronze_manifest）只转换新增/变更的文件，
+  已删除/变更文件的旧输出交给转换器撤回
+
+转换器协议（鸭子类型）:
+    bronze_manifest
+        BronzeManifest，记录该转换器已处理的Bronze文件
+    begin_bronze_scan(plan)
+        扫描开始前调用；plan.incremental 为 False 时为全量构建，否则需撤回 plan.retired 的旧输出
+    transform_bronze_match(tier, match_file, match_data) -> partial | None
+        纯函数式的逐场转换，可能在子进程中执行（不要在这里修改累积状态）；None 表示跳过
+    collect_bronze_match(tier, partial, source)
+        在主进程中按文件顺序合并结果（source 为Bronze文件相对路径）
+    finish_bronze_scan(tiers)
+        扫描结束（打印统计等）
+
+使用示例:
+    python src/transforms/bronze_scanner.py --bronze-dir data/bronze/matches --workers 8
+    python src/transforms/bronze_scanner.py --incremental   # 只处理新增/变更的Bronze文件
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent))
+from transforms.bronze_manifest import file_sha256
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# 每个进程池任务处理的文件数（摊薄进程间通信开销）
+DEFAULT_CHUNK_SIZE = 64
+
+# 子进程中的转换器副本（由进程池initializer设置）
+_worker_transforms: Sequence[Any] = ()
+
+
+def _parse_bronze(raw: bytes) -> Dict:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def load_bronze_file(match_file: Path) -> Dict:
+    """读取并解析一个Bronze比赛文件（有 orjson 时使用 orjson）"""
+    with open(match_file, 'rb') as f:
+        return _parse_bronze(f.read())
+
+
+def _transform_file(transforms: Sequence[Any], tier: str, match_file: Path,
+                    mask: Sequence[bool]) -> Tuple[Optional[str], Optional[Dict], List[Any]]:
+    """
+    解析一个文件并交给 mask 选中的转换器
+
+    Returns:
+        (文件级错误, 文件信息(sha256/match_id/...), [每个转换器的 ("ok", partial) / ("error", 错误信息) / None])
+    """
+    try:
+        with open(match_file, 'rb') as f:
+            raw = f.read()
+        match_data = _parse_bronze(raw)
+    except Exception as e:
+        return str(e), None, []
+
+    info = match_data.get('raw_data', {}).get('info', {})
+    file_info = {
+        'sha256': hashlib.sha256(raw).hexdigest(),
+        'match_id': match_data.get('bronze_metadata', {}).get('match_id')
+                    or match_data.get('raw_data', {}).get('metadata', {}).get('matchId'),
+        'game_id': info.get('gameId'),
+        'game_creation': info.get('gameCreation', 0)
+    }
+
+    results = []
+    for transform, selected in zip(transforms, mask):
+        if not selected:
+            results.append(None)
+            continue
+        try:
+            results.append(("ok", transform.transform_bronze_match(tier, match_file, match_data)))
+        except Exception as e:
+            results.append(("error", str(e)))
+    return None, file_info, results
+
+
+def _init_worker(transforms: Sequence[Any]):
+    global _worker_transforms
+    _worker_transforms = transforms
+
+
+def _transform_chunk(chunk: List[Tuple[str, Path, Tuple[bool, ...]]]) -> List[Tuple]:
+    return [_transform_file(_worker_transforms, tier, match_file, mask) for tier, match_file, mask in chunk]
+
+
+class BronzeScanner:
+    """单遍扫描Bronze层，把每场比赛扇出给所有注册的转换器"""
+
+    def __init__(self,
+                 bronze_dir: str = "data/bronze/matches",
+                 workers: Optional[int] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.bronze_dir = Path(bronze_dir)
+        # 默认使用全部CPU核心；1 表示在当前进程内串行执行
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+
+    def iter_match_files(self) -> Iterator[Tuple[str, Path]]:
+        """(段位, 比赛文件)，顺序与各转换器原来的遍历顺序一致"""
+        for tier_dir in self.bronze_dir.iterdir():
+            if not tier_dir.is_dir():
+                continue
+            for match_file in tier_dir.rglob("*.json"):
+                yield tier_dir.name, match_file
+
+    def _iter_results(self, transforms: Sequence[Any], work: List[Tuple[str, Path, Tuple[bool, ...]]]):
+        if self.workers <= 1 or len(work) <= self.chunk_size:
+            for tier, match_file, mask in work:
+                yield _transform_file(transforms, tier, match_file, mask)
+            return
+
+        chunks = [work[i:i + self.chunk_size] for i in range(0, len(work), self.chunk_size)]
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(list(transforms),)) as executor:
+            # map 保持文件顺序，合并结果与串行执行一致
+            for chunk_results in executor.map(_transform_chunk, chunks):
+                yield from chunk_results
+
+    def _plan(self, transforms: Sequence[Any], files: List[Tuple[str, Path]], incremental: bool):
+        """为每个转换器生成处理计划 → (计划列表, {相对路径: (大小, mtime_ns)})"""
+        stats = {}
+        for _, match_file in files:
+            st = match_file.stat()
+            stats[match_file.relative_to(self.bronze_dir).as_posix()] = (st.st_size, st.st_mtime_ns)
+
+        # 同一文件的哈希在多个清单之间共享
+        hashes = {}
+
+        def hasher(key: str) -> str:
+            if key not in hashes:
+                hashes[key] = file_sha256(self.bronze_dir / key)
+            return hashes[key]
+
+        stat_rows = [(key, size, mtime_ns) for key, (size, mtime_ns) in stats.items()]
+        plans = []
+        for transform in transforms:
+            manifest = transform.bronze_manifest
+            plan = manifest.plan(stat_rows, hasher, incremental=incremental)
+            if plan.incremental:
+                manifest.forget(plan.retired)
+            else:
+                manifest.reset()
+            transform.begin_bronze_scan(plan)
+            plans.append(plan)
+        return plans, stats
+
+    def scan(self, transforms: Sequence[Any], incremental: bool = False) -> Dict[str, Any]:
+        """
+        扫描Bronze层并把结果合并进各转换器
+
+        Args:
+            transforms: 转换器列表
+            incremental: 只转换各转换器清单中新增/变更的文件（清单为空时自动退化为全量）
+
+        Returns:
+            扫描统计
+        """
+        start = time.time()
+        files = list(self.iter_match_files())
+        tiers = list(dict.fromkeys(tier for tier, _ in files))
+        plans, stats = self._plan(transforms, files, incremental)
+
+        work = []
+        for tier, match_file in files:
+            key = match_file.relative_to(self.bronze_dir).as_posix()
+            mask = tuple(key in plan.pending for plan in plans)
+            if any(mask):
+                work.append((tier, match_file, mask))
+
+        mode = f"{self.workers} 进程" if self.workers > 1 and len(work) > self.chunk_size else "单进程"
+        print(f"  🔍 扫描Bronze层: {len(files)} 个文件, {len(tiers)} 个段位, {len(transforms)} 个转换器 "
+              f"({mode}, JSON解析: {'orjson' if orjson is not None else 'json'})")
+        for transform, plan in zip(transforms, plans):
+            print(f"    📒 {type(transform).__name__}: {plan.describe()}")
+
+        failed = 0
+        for (tier, match_file, _), (file_error, file_info, results) in zip(work, self._iter_results(transforms, work)):
+            if file_error is not None:
+                failed += 1
+                print(f"    ⚠️ 处理文件失败 {match_file}: {file_error}")
+                continue
+
+            key = match_file.relative_to(self.bronze_dir).as_posix()
+            size, mtime_ns = stats[key]
+            for transform, result in zip(transforms, results):
+                if result is None:
+                    continue
+                status, partial = result
+                if status == "error":
+                    print(f"    ⚠️ 处理文件失败 {match_file}: {partial}")
+                    continue
+                try:
+                    if partial is not None:
+                        transform.collect_bronze_match(tier, partial, key)
+                except Exception as e:
+                    print(f"    ⚠️ 处理文件失败 {match_file}: {e}")
+                    continue
+                # 只记录成功处理的文件，失败的文件下次运行会重试
+                transform.bronze_manifest.record(key, size, mtime_ns, file_info['sha256'], file_info)
+
+        for transform in transforms:
+            transform.finish_bronze_scan(tiers)
+
+        elapsed = time.time() - start
+        print(f"  ✅ Bronze扫描完成: {len(files)} 个文件 (转换 {len(work)} 个), 耗时 {elapsed:.2f}s")
+        return {"files": len(files), "transformed": len(work), "failed": failed, "tiers": tiers,
+                "elapsed_seconds": round(elapsed, 2)}
+
+
+def main():
+    """单遍运行全部Silver转换（SCD2维度表 + 事实表 + 增强事实表）"""
+    import argparse
+    from transforms.bronze_to_silver_scd2 import BronzeToSilverSCD2Transformer
+    from transforms.fact_match_performance import FactMatchPerformanceTransformer
+    from transforms.enhanced_fact_transform import EnhancedFactTransformer
+
+    parser = argparse.ArgumentParser(description="Single-pass Bronze → Silver transforms")
+    parser.add_argument("--bronze-dir", default="data/bronze/matches",
+                       help="Bronze层数据目录")
+    parser.add_argument("--silver-dir", default="data/silver",
+                       help="Silver层根目录 (dimensions / facts / enhanced_facts)")
+    parser.add_argument("--patch-mappings", default="data/patch_mappings.json",
+                       help="Patch映射文件")
+    parser.add_argument("--workers", type=int, default=None,
+                       help="进程数 (默认: CPU核心数, 1 = 单进程)")
+    parser.add_argument("--incremental", action="store_true",
+                       help="增量构建: 只处理新增/变更的Bronze文件")
+    parser.add_argument("--gold-dir", default=None,
+                       help="同时写出Hive分区的Gold Parquet数据集 (如 data/gold)")
+
+    args = parser.parse_args()
+    silver_dir = Path(args.silver_dir)
+
+    try:
+        scd2 = BronzeToSilverSCD2Transformer(
+            bronze_dir=args.bronze_dir,
+            silver_dir=str(silver_dir / "dimensions"),
+            patch_mappings_file=args.patch_mappings
+        )
+        facts = FactMatchPerformanceTransformer(
+            bronze_dir=args.bronze_dir,
+            silver_dir=str(silver_dir / "facts"),
+            patch_mappings_file=args.patch_mappings,
+            gold_dir=args.gold_dir
+        )
+        enhanced = EnhancedFactTransformer(
+            bronze_dir=args.bronze_dir,
+            silver_dir=str(silver_dir / "enhanced_facts"),
+            patch_mappings_file=args.patch_mappings,
+            gold_dir=args.gold_dir
+        )
+
+        print("🚀 开始单遍Bronze->Silver转换...")
+        BronzeScanner(args.bronze_dir, workers=args.workers).scan([scd2, facts, enhanced],
+                                                                 incremental=args.incremental)
+
+        scd2.aggregate_player_stats()
+        scd2.apply_scd2_logic()
+        scd2.save_silver_layer()
+        facts.save_fact_table()
+        enhanced.save_enhanced_fact_table()
+
+        print("✅ 单遍Bronze->Silver转换完成!")
+        return 0
+
+    except Exception as e:
+        print(f"💥 转换失败: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    exit(main())
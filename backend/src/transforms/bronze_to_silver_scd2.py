@@ -12,12 +12,15 @@ from typing import Dict, List, Optional, Set
 import hashlib
 from dataclasses import dataclass, asdict
 from collections import defaultdict
+from functools import partial
 
 # Import our utility classes
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 from utils.patch_mapper import PatchMapper
 from utils.player_anonymizer import PlayerAnonymizer
+from transforms.bronze_scanner import BronzeScanner
+from transforms.bronze_manifest import BronzeManifest, MANIFEST_FILENAME
 
 @dataclass
 class DimVersionedPlayerStats:
@@ -91,85 +94,156 @@ class BronzeToSilverSCD2Transformer:
     def __init__(self,
                  bronze_dir: str = "data/bronze/matches",
                  silver_dir: str = "data/silver/dimensions",
-                 patch_mappings_file: str = "data/patch_mappings.json"):
+                 patch_mappings_file: str = "data/patch_mappings.json",
+                 incremental: bool = False):
 
         self.bronze_dir = Path(bronze_dir)
         self.silver_dir = Path(silver_dir)
         self.silver_dir.mkdir(parents=True, exist_ok=True)
+        self.incremental = incremental
 
         # 初始化工具
         self.patch_mapper = PatchMapper(patch_mappings_file)
         self.anonymizer = PlayerAnonymizer()
 
+        # Bronze摄取清单 + 逐场统计状态（增量构建时只重算受影响的 玩家×patch）
+        self.dim_stats_dir = self.silver_dir / "dim_versioned_player_stats"
+        self.state_dir = self.silver_dir / "_state"
+        self.bronze_manifest = BronzeManifest(self.silver_dir / MANIFEST_FILENAME, self.patch_mapper)
+        self.bronze_manifest.require_outputs(
+            lambda patch: [self.dim_stats_dir / f"patch_{patch}.json", self._state_file(patch)]
+        )
+        self._bronze_plan = None
+        self._game_state = {}           # patch -> {bronze文件: [[player_key, player_stats], ...]}
+        self._collected = set()         # 本次已收集的 (patch, bronze文件)
+        self._affected = set()          # 增量: 受影响的 (player_key, patch)
+        self._dim_partitions = {}       # 增量: patch -> 已有维表记录
+
         # 内存中的聚合数据
-        self.player_stats = defaultdict(lambda: defaultdict(list))  # player -> patch -> [stats]
+        self.player_stats = defaultdict(partial(defaultdict, list))  # player -> patch -> [stats]
         self.player_metadata = {}  # player -> latest metadata
+        self._tier_counts = {}  # tier -> {'matches', 'players'}
 
         print("🔄 初始化Bronze->Silver SCD2转换器")
 
-    def extract_bronze_data(self):
-        """从Bronze层提取所有比赛数据"""
-        print("📊 从Bronze层提取比赛数据...")
+    def __getstate__(self):
+        # 进程池子进程只需要逐场转换用到的工具对象，不复制主进程中的累积状态
+        state = self.__dict__.copy()
+        for key in ('bronze_manifest', '_game_state', '_dim_partitions', 'player_stats', 'player_metadata'):
+            state.pop(key, None)
+        return state
 
-        total_matches = 0
-        total_players = 0
-
-        for tier_dir in self.bronze_dir.iterdir():
-            if not tier_dir.is_dir():
+    def extract_bronze_data(self, workers: Optional[int] = None, incremental: Optional[bool] = None):
+        """从Bronze层提取比赛数据（共享的并行单遍扫描，见 bronze_scanner；增量时只提取新增/变更的文件）"""
+        print("📊 从Bronze层提取比赛数据...")
+        if incremental is None:
+            incremental = self.incremental
+        BronzeScanner(self.bronze_dir, workers=workers).scan([self], incremental=incremental)
+
+    @property
+    def _is_incremental(self) -> bool:
+        return self._bronze_plan is not None and self._bronze_plan.incremental
+
+    def _state_file(self, patch_version: str) -> Path:
+        return self.state_dir / f"player_games_patch_{patch_version}.json"
+
+    def _games_for_patch(self, patch_version: str) -> Dict[str, List]:
+        """某个patch的逐场统计状态（增量时按需从磁盘加载）"""
+        if patch_version not in self._game_state:
+            state_file = self._state_file(patch_version)
+            if self._is_incremental and state_file.exists():
+                with open(state_file, 'r') as f:
+                    self._game_state[patch_version] = json.load(f)
+            else:
+                self._game_state[patch_version] = {}
+        return self._game_state[patch_version]
+
+    def begin_bronze_scan(self, plan):
+        """扫描开始: 增量时撤回变更/删除文件的逐场统计，并标记受影响的玩家"""
+        self._bronze_plan = plan
+        self._game_state = {}
+        self._collected = set()         # 本次已收集的 (patch, bronze文件)
+        self._affected = set()
+        self._dim_partitions = {}
+        self.player_stats = defaultdict(partial(defaultdict, list))
+        self._tier_counts = {}
+
+        if not plan.incremental:
+            return
+
+        for entry in plan.retired:
+            if not entry.get('patch'):
                 continue
+            games = self._games_for_patch(entry['patch'])
+            for player_key, _ in games.pop(entry['key'], []):
+                self._affected.add((player_key, entry['patch']))
+
+    def transform_bronze_match(self, tier: str, match_file: Path, match_data: Dict) -> Optional[List]:
+        """单场比赛 → [(player_key, patch_version, player_stats, participant_names)]（可在子进程中执行）"""
+        # 提取比赛信息
+        bronze_metadata = match_data.get('bronze_metadata', {})
+        raw_data = match_data.get('raw_data', {})
+        info = raw_data.get('info', {})
+
+        # 获取patch版本
+        game_timestamp = info.get('gameCreation', 0)
+        patch_version = self.patch_mapper.get_patch_by_timestamp(game_timestamp)
+        if not patch_version:
+            return None
 
-            tier_matches = 0
-            tier_players = set()
-
-            print(f"  处理 {tier_dir.name} 段位...")
-
-            for match_file in tier_dir.rglob("*.json"):
-                try:
-                    with open(match_file, 'r') as f:
-                        match_data = json.load(f)
-
-                    # 提取比赛信息
-                    bronze_metadata = match_data.get('bronze_metadata', {})
-                    raw_data = match_data.get('raw_data', {})
-                    info = raw_data.get('info', {})
+        # 处理每个参与者
+        rows = []
+        participants = info.get('participants', [])
+        for participant in participants:
+            puuid = participant.get('puuid')
+            if not puuid:
+                continue
 
-                    # 获取patch版本
-                    game_timestamp = info.get('gameCreation', 0)
-                    patch_version = self.patch_mapper.get_patch_by_timestamp(game_timestamp)
-                    if not patch_version:
-                        continue
+            # 匿名化PUUID
+            player_key = self.anonymizer.anonymize_puuid(puuid)
 
-                    # 处理每个参与者
-                    participants = info.get('participants', [])
-                    for participant in participants:
-                        puuid = participant.get('puuid')
-                        if not puuid:
-                            continue
+            # 提取玩家统计
+            player_stats = self._extract_player_stats(
+                participant, patch_version, bronze_metadata, info
+            )
+            participant_names = {
+                key: participant.get(key, '') for key in ('summonerName', 'riotIdGameName', 'riotIdTagline')
+            }
+            rows.append((player_key, patch_version, player_stats, participant_names))
 
-                        # 匿名化PUUID
-                        player_key = self.anonymizer.anonymize_puuid(puuid)
-                        tier_players.add(player_key)
+        return rows
 
-                        # 提取玩家统计
-                        player_stats = self._extract_player_stats(
-                            participant, patch_version, bronze_metadata, info
-                        )
+    def collect_bronze_match(self, tier: str, rows: List, source: Optional[str] = None):
+        """合并单场比赛的结果（主进程，按文件顺序）"""
+        tier_counts = self._tier_counts.setdefault(tier, {'matches': 0, 'players': set()})
+        for player_key, patch_version, player_stats, participant_names in rows:
+            tier_counts['players'].add(player_key)
 
-                        # 添加到聚合数据
-                        self.player_stats[player_key][patch_version].append(player_stats)
+            # 添加到聚合数据
+            self.player_stats[player_key][patch_version].append(player_stats)
 
-                        # 更新玩家元数据
-                        self._update_player_metadata(player_key, participant)
+            # 逐场统计状态（供之后的增量构建使用）
+            if source is not None:
+                games = self._games_for_patch(patch_version)
+                if (patch_version, source) not in self._collected:
+                    # 上次运行在保存清单之前中断时，状态中可能已有该文件的记录: 覆盖而不是追加
+                    self._collected.add((patch_version, source))
+                    for stale_player_key, _ in games.pop(source, []):
+                        self._affected.add((stale_player_key, patch_version))
+                games.setdefault(source, []).append([player_key, player_stats])
+            self._affected.add((player_key, patch_version))
 
-                    tier_matches += 1
-                    total_matches += 1
+            # 更新玩家元数据
+            self._update_player_metadata(player_key, participant_names)
 
-                except Exception as e:
-                    print(f"    ⚠️ 处理文件失败 {match_file}: {e}")
-                    continue
+        tier_counts['matches'] += 1
 
-            print(f"    ✅ {tier_dir.name}: {tier_matches} 场比赛, {len(tier_players)} 个玩家")
-            total_players += len(tier_players)
+    def finish_bronze_scan(self, tiers: List[str]):
+        total_matches = 0
+        for tier in tiers:
+            tier_counts = self._tier_counts.get(tier, {'matches': 0, 'players': set()})
+            print(f"    ✅ {tier}: {tier_counts['matches']} 场比赛, {len(tier_counts['players'])} 个玩家")
+            total_matches += tier_counts['matches']
 
         print(f"✅ Bronze数据提取完成: {total_matches} 场比赛, {len(self.player_stats)} 个唯一玩家")
 
@@ -230,6 +304,16 @@ class BronzeToSilverSCD2Transformer:
 
         self.aggregated_stats = {}
 
+        if self._is_incremental:
+            # 增量: 从逐场状态重建受影响的 (玩家, patch) 的完整比赛列表
+            self.player_stats = defaultdict(partial(defaultdict, list))
+            for patch_version, games in self._game_state.items():
+                for rows in games.values():
+                    for player_key, player_stats in rows:
+                        if (player_key, patch_version) in self._affected:
+                            self.player_stats[player_key][patch_version].append(player_stats)
+            print(f"  🔁 增量聚合: {len(self._affected)} 个受影响的 玩家×patch")
+
         for player_key, patches_data in self.player_stats.items():
             self.aggregated_stats[player_key] = {}
 
@@ -249,6 +333,9 @@ class BronzeToSilverSCD2Transformer:
         if not games_list:
             return None
 
+        # 按比赛时间排序，使首场比赛/平局取值与扫描或增量追加的顺序无关
+        games_list = sorted(games_list, key=lambda game: game['game_timestamp'])
+
         # 基础累积统计
         total_games = len(games_list)
         total_wins = sum(1 for game in games_list if game['win'])
@@ -370,12 +457,34 @@ class BronzeToSilverSCD2Transformer:
             governance_tags=json.dumps(governance_tags)
         )
 
+    def _load_dim_partitions(self):
+        """加载已有的维表分区（增量时受影响玩家在其他patch的版本需要重新串联）"""
+        self._dim_partitions = {}
+        if not self.dim_stats_dir.exists():
+            return
+        for patch_file in self.dim_stats_dir.glob("patch_*.json"):
+            with open(patch_file, 'r') as f:
+                data = json.load(f)
+            self._dim_partitions[data['metadata']['patch_version']] = data.get('records', [])
+
     def apply_scd2_logic(self):
-        """应用SCD2逻辑，处理版本控制"""
+        """应用SCD2逻辑，处理版本控制（增量时只处理受影响的玩家）"""
         print("🔄 应用SCD2版本控制逻辑...")
 
         self.scd2_records = []
 
+        if self._is_incremental:
+            # 受影响玩家在未变化patch上的版本直接沿用已有维表记录，只重新计算SCD2字段
+            affected_players = {player_key for player_key, _ in self._affected}
+            self._load_dim_partitions()
+            for patch_version, records in self._dim_partitions.items():
+                for record in records:
+                    player_key = record['player_key']
+                    if player_key in affected_players and (player_key, patch_version) not in self._affected:
+                        self.aggregated_stats.setdefault(player_key, {})[patch_version] = \
+                            DimVersionedPlayerStats(**record)
+            print(f"  🔁 增量SCD2: {len(affected_players)} 个受影响的玩家")
+
         for player_key, patches_data in self.aggregated_stats.items():
             if not patches_data:
                 continue
@@ -417,7 +526,7 @@ class BronzeToSilverSCD2Transformer:
         print("💾 保存到Silver层...")
 
         # 创建输出目录
-        dim_stats_dir = self.silver_dir / "dim_versioned_player_stats"
+        dim_stats_dir = self.dim_stats_dir
         dim_stats_dir.mkdir(parents=True, exist_ok=True)
 
         # 按patch分区保存
@@ -425,18 +534,28 @@ class BronzeToSilverSCD2Transformer:
         for record in self.scd2_records:
             patch_groups[record.patch_version].append(record)
 
+        if self._is_incremental:
+            patch_groups = self._merge_incremental_partitions(patch_groups)
+        else:
+            patch_groups = {patch_version: [asdict(record) for record in records]
+                            for patch_version, records in patch_groups.items()}
+            self.bronze_manifest.partitions = {}
+
         total_records = 0
-        for patch_version, records in patch_groups.items():
+        for patch_version, records_data in patch_groups.items():
             patch_file = dim_stats_dir / f"patch_{patch_version}.json"
 
-            # 转换为字典格式
-            records_data = [asdict(record) for record in records]
+            if not records_data:
+                patch_file.unlink(missing_ok=True)
+                self.bronze_manifest.partitions.pop(patch_version, None)
+                print(f"  🗑️ {patch_version}: 分区已清空 -> {patch_file}")
+                continue
 
             # 添加元数据
             output_data = {
                 'metadata': {
                     'patch_version': patch_version,
-                    'record_count': len(records),
+                    'record_count': len(records_data),
                     'generated_at': datetime.now(timezone.utc).isoformat(),
                     'schema_version': '1.0',
                     'data_type': 'dim_versioned_player_stats'
@@ -447,8 +566,13 @@ class BronzeToSilverSCD2Transformer:
             with open(patch_file, 'w') as f:
                 json.dump(output_data, f, indent=2)
 
-            print(f"  ✅ {patch_version}: {len(records)} 条记录 -> {patch_file}")
-            total_records += len(records)
+            self.bronze_manifest.partitions[patch_version] = {'record_count': len(records_data)}
+            print(f"  ✅ {patch_version}: {len(records_data)} 条记录 -> {patch_file}")
+            total_records += len(records_data)
+
+        # 摘要覆盖全部分区（增量时包括本次未改动的分区）
+        all_records = [record for records in self._dim_partitions.values() for record in records] \
+            if self._is_incremental else [record for records in patch_groups.values() for record in records]
 
         # 保存转换摘要
         summary = {
@@ -456,15 +580,15 @@ class BronzeToSilverSCD2Transformer:
                 'source_layer': 'bronze',
                 'target_layer': 'silver',
                 'transformation_type': 'scd2_dim_versioned_stats',
-                'total_players': len(self.aggregated_stats),
-                'total_records': total_records,
-                'patches_processed': len(patch_groups),
+                'total_players': len(set(r['player_key'] for r in all_records)),
+                'total_records': len(all_records),
+                'patches_processed': len(self.bronze_manifest.partitions),
                 'transformation_timestamp': datetime.now(timezone.utc).isoformat()
             },
             'quality_metrics': {
-                'avg_data_quality_score': sum(r.data_quality_score for r in self.scd2_records) / len(self.scd2_records),
-                'records_with_high_quality': sum(1 for r in self.scd2_records if r.data_quality_score >= 0.9),
-                'unique_players': len(set(r.player_key for r in self.scd2_records))
+                'avg_data_quality_score': sum(r['data_quality_score'] for r in all_records) / max(len(all_records), 1),
+                'records_with_high_quality': sum(1 for r in all_records if r['data_quality_score'] >= 0.9),
+                'unique_players': len(set(r['player_key'] for r in all_records))
             }
         }
 
@@ -472,8 +596,63 @@ class BronzeToSilverSCD2Transformer:
         with open(summary_file, 'w') as f:
             json.dump(summary, f, indent=2)
 
+        self._save_game_state()
+
+        # 清单在维表和状态落盘之后保存
+        self.bronze_manifest.save()
+
         print(f"✅ Silver层保存完成: {total_records} 条记录, {len(patch_groups)} 个patch分区")
 
+    def _merge_incremental_partitions(self, patch_groups: Dict[str, List]) -> Dict[str, List[Dict]]:
+        """
+        增量: 受影响玩家的记录替换到已有分区中（原位置替换，新记录追加），
+        未受影响的分区不重写
+
+        Returns:
+            需要重写的分区 → 完整记录列表（空列表表示分区被清空）
+        """
+        affected_players = {player_key for player_key, _ in self._affected}
+        changed = {}
+
+        for patch_version in list(self._dim_partitions) + [p for p in patch_groups if p not in self._dim_partitions]:
+            existing = self._dim_partitions.get(patch_version, [])
+            new_records = {record.player_key: asdict(record) for record in patch_groups.get(patch_version, [])}
+            if not new_records and not any(r['player_key'] in affected_players for r in existing):
+                continue
+
+            merged = []
+            for record in existing:
+                player_key = record['player_key']
+                if player_key not in affected_players:
+                    merged.append(record)
+                elif player_key in new_records:
+                    merged.append(new_records.pop(player_key))
+            merged.extend(new_records.values())
+
+            changed[patch_version] = merged
+            self._dim_partitions[patch_version] = merged
+
+        unchanged = len(self._dim_partitions) - len(changed)
+        print(f"  🔁 增量写入: 重写 {len(changed)} 个分区, 跳过 {unchanged} 个未变化分区")
+        return changed
+
+    def _save_game_state(self):
+        """保存逐场统计状态（全量时重建全部patch，增量时只写本次加载/修改过的patch）"""
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        if not self._is_incremental:
+            for state_file in self.state_dir.glob("player_games_patch_*.json"):
+                state_file.unlink()
+
+        for patch_version, games in self._game_state.items():
+            state_file = self._state_file(patch_version)
+            if not games:
+                state_file.unlink(missing_ok=True)
+                continue
+            tmp_file = state_file.with_suffix('.json.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump(games, f)
+            os.replace(tmp_file, state_file)
+
     def run_transformation(self):
         """运行完整的转换流程"""
         print("🚀 开始Bronze->Silver SCD2转换...")
@@ -501,6 +680,8 @@ def main():
                        help="Silver层输出目录")
     parser.add_argument("--patch-mappings", default="data/patch_mappings.json",
                        help="Patch映射文件")
+    parser.add_argument("--incremental", action="store_true",
+                       help="增量构建: 只处理新增/变更的Bronze文件")
 
     args = parser.parse_args()
 
@@ -508,7 +689,8 @@ def main():
         transformer = BronzeToSilverSCD2Transformer(
             bronze_dir=args.bronze_dir,
             silver_dir=args.silver_dir,
-            patch_mappings_file=args.patch_mappings
+            patch_mappings_file=args.patch_mappings,
+            incremental=args.incremental
         )
 
         transformer.run_transformation()
@@ -17,6 +17,10 @@ import sys
 sys.path.append(str(Path(__file__).parent.parent))
 from utils.patch_mapper import PatchMapper
 from utils.player_anonymizer import PlayerAnonymizer
+from transforms.bronze_scanner import BronzeScanner
+from transforms.bronze_manifest import BronzeManifest, MANIFEST_FILENAME, retired_by_patch
+from transforms.silver_writer import SilverTableWriter
+from transforms.gold_writer import GoldDatasetWriter, arrow_schema_for, remove_partitions
 
 @dataclass
 class FactMatchPerformance:
@@ -132,93 +136,140 @@ class FactMatchPerformanceTransformer:
     def __init__(self,
                  bronze_dir: str = "data/bronze/matches",
                  silver_dir: str = "data/silver/facts",
-                 patch_mappings_file: str = "data/patch_mappings.json"):
+                 patch_mappings_file: str = "data/patch_mappings.json",
+                 incremental: bool = False,
+                 gold_dir: Optional[str] = None):
 
         self.bronze_dir = Path(bronze_dir)
         self.silver_dir = Path(silver_dir)
         self.silver_dir.mkdir(parents=True, exist_ok=True)
+        self.incremental = incremental
+
+        # 可选: 同时流式写出Hive分区的Gold Parquet数据集
+        self.gold_dataset_dir = Path(gold_dir) / "parquet" / "fact_match_performance" if gold_dir else None
 
         # 初始化工具
         self.patch_mapper = PatchMapper(patch_mappings_file)
         self.anonymizer = PlayerAnonymizer()
 
-        self.fact_records = []
-
-        print("🏭 初始化比赛表现事实表转换器")
+        # Bronze摄取清单（增量构建）
+        self.bronze_manifest = BronzeManifest(self.silver_dir / MANIFEST_FILENAME, self.patch_mapper)
+        self.bronze_manifest.require_outputs(lambda patch: [self._partition_file(patch)])
+        self._bronze_plan = None
 
-    def extract_and_transform(self):
-        """提取和转换比赛数据为事实表记录"""
-        print("📊 转换比赛数据为事实表...")
-
-        total_matches = 0
-        total_participants = 0
+        # 记录逐条流式写出，不在内存中保留整张表
+        self._silver_output = None
+        self._partition_stats = {}  # patch -> {'record_count', 'data_quality_sum'}
+        self._tier_counts = {}  # tier -> {'matches', 'records'}
 
-        for tier_dir in self.bronze_dir.iterdir():
-            if not tier_dir.is_dir():
-                continue
+        print("🏭 初始化比赛表现事实表转换器")
 
-            tier_matches = 0
-            tier_participants = 0
+    def __getstate__(self):
+        # 进程池子进程只需要逐场转换用到的工具对象，不复制主进程中的累积状态
+        state = self.__dict__.copy()
+        for key in ('bronze_manifest', '_silver_output', '_partition_stats'):
+            state.pop(key, None)
+        return state
 
-            print(f"  处理 {tier_dir.name} 段位...")
+    def _partition_file(self, patch_version: str) -> Path:
+        return self.silver_dir / f"fact_match_performance_patch_{patch_version}.json"
 
-            for match_file in tier_dir.rglob("*.json"):
-                try:
-                    with open(match_file, 'r') as f:
-                        match_data = json.load(f)
+    def extract_and_transform(self, workers: Optional[int] = None, incremental: Optional[bool] = None):
+        """提取和转换比赛数据为事实表记录（共享的并行单遍扫描，见 bronze_scanner）"""
+        print("📊 转换比赛数据为事实表...")
+        if incremental is None:
+            incremental = self.incremental
+        BronzeScanner(self.bronze_dir, workers=workers).scan([self], incremental=incremental)
+
+    def begin_bronze_scan(self, plan):
+        """扫描开始: 按处理计划打开流式输出（增量时保留分区中未被撤回的旧记录）"""
+        self._bronze_plan = plan
+        self._tier_counts = {}
+        self._partition_stats = {}
+
+        gold_writer = None
+        if self.gold_dataset_dir is not None:
+            gold_writer = GoldDatasetWriter(
+                self.gold_dataset_dir, arrow_schema_for(FactMatchPerformance),
+                overwrite=not plan.incremental
+            )
 
-                    # 提取比赛信息
-                    bronze_metadata = match_data.get('bronze_metadata', {})
-                    raw_data = match_data.get('raw_data', {})
-                    info = raw_data.get('info', {})
+        self._silver_output = SilverTableWriter(
+            self._partition_file,
+            incremental=plan.incremental,
+            retired=retired_by_patch(plan.retired) if plan.incremental else {},
+            gold_writer=gold_writer,
+            on_record=self._count_partition_record
+        )
 
-                    # 比赛基础信息
-                    match_id = info.get('gameId', '')
-                    if not match_id:
-                        continue
+    def _count_partition_record(self, patch_version: str, record: Dict):
+        stats = self._partition_stats.setdefault(patch_version, {'record_count': 0, 'data_quality_sum': 0.0})
+        stats['record_count'] += 1
+        stats['data_quality_sum'] += record['data_quality_score']
+
+    def transform_bronze_match(self, tier: str, match_file: Path, match_data: Dict) -> Optional[List]:
+        """单场比赛 → 事实表记录列表（可在子进程中执行）"""
+        # 提取比赛信息
+        bronze_metadata = match_data.get('bronze_metadata', {})
+        raw_data = match_data.get('raw_data', {})
+        info = raw_data.get('info', {})
+
+        # 比赛基础信息
+        match_id = info.get('gameId', '')
+        if not match_id:
+            return None
 
-                    # 获取patch版本
-                    game_timestamp = info.get('gameCreation', 0)
-                    patch_version = self.patch_mapper.get_patch_by_timestamp(game_timestamp)
-                    if not patch_version:
-                        continue
+        # 获取patch版本
+        game_timestamp = info.get('gameCreation', 0)
+        patch_version = self.patch_mapper.get_patch_by_timestamp(game_timestamp)
+        if not patch_version:
+            return None
 
-                    # 比赛上下文
-                    game_duration = info.get('gameDuration', 0)
-                    game_duration_minutes = game_duration / 60 if game_duration > 0 else 0
+        # 比赛上下文
+        game_duration = info.get('gameDuration', 0)
+        game_duration_minutes = game_duration / 60 if game_duration > 0 else 0
 
-                    match_date = datetime.fromtimestamp(game_timestamp/1000, timezone.utc).date().isoformat()
+        match_date = datetime.fromtimestamp(game_timestamp/1000, timezone.utc).date().isoformat()
 
-                    # 处理每个参与者
-                    participants = info.get('participants', [])
-                    for participant in participants:
-                        puuid = participant.get('puuid')
-                        if not puuid:
-                            continue
+        # 处理每个参与者
+        records = []
+        participants = info.get('participants', [])
+        for participant in participants:
+            puuid = participant.get('puuid')
+            if not puuid:
+                continue
 
-                        # 匿名化PUUID
-                        player_key = self.anonymizer.anonymize_puuid(puuid)
+            # 匿名化PUUID
+            player_key = self.anonymizer.anonymize_puuid(puuid)
 
-                        # 创建事实表记录
-                        fact_record = self._create_fact_record(
-                            participant, match_id, player_key,
-                            patch_version, match_date, game_duration_minutes,
-                            bronze_metadata, info
-                        )
+            # 创建事实表记录
+            fact_record = self._create_fact_record(
+                participant, match_id, player_key,
+                patch_version, match_date, game_duration_minutes,
+                bronze_metadata, info
+            )
 
-                        if fact_record:
-                            self.fact_records.append(fact_record)
-                            tier_participants += 1
-                            total_participants += 1
+            if fact_record:
+                records.append(fact_record)
 
-                    tier_matches += 1
-                    total_matches += 1
+        return records
 
-                except Exception as e:
-                    print(f"    ⚠️ 处理文件失败 {match_file}: {e}")
-                    continue
+    def collect_bronze_match(self, tier: str, records: List, source: Optional[str] = None):
+        """合并单场比赛的记录（主进程，按文件顺序）"""
+        tier_counts = self._tier_counts.setdefault(tier, {'matches': 0, 'records': 0})
+        for record in records:
+            self._silver_output.write(record.patch_version, asdict(record))
+        tier_counts['records'] += len(records)
+        tier_counts['matches'] += 1
 
-            print(f"    ✅ {tier_dir.name}: {tier_matches} 场比赛, {tier_participants} 条记录")
+    def finish_bronze_scan(self, tiers: List[str]):
+        total_matches = 0
+        total_participants = 0
+        for tier in tiers:
+            tier_counts = self._tier_counts.get(tier, {'matches': 0, 'records': 0})
+            print(f"    ✅ {tier}: {tier_counts['matches']} 场比赛, {tier_counts['records']} 条记录")
+            total_matches += tier_counts['matches']
+            total_participants += tier_counts['records']
 
         print(f"✅ 事实表转换完成: {total_matches} 场比赛, {total_participants} 条记录")
 
@@ -377,52 +428,71 @@ class FactMatchPerformanceTransformer:
             return None
 
     def save_fact_table(self):
-        """保存事实表到Silver层"""
+        """保存事实表到Silver层（记录已在扫描时流式写出；增量时只重写受影响的patch分区）"""
         print("💾 保存事实表到Silver层...")
 
-        if not self.fact_records:
+        if self._silver_output is None:
             print("⚠️ 没有事实记录可保存")
             return
 
-        # 按patch分区保存
-        from collections import defaultdict
-        patch_groups = defaultdict(list)
-
-        for record in self.fact_records:
-            patch_groups[record.patch_version].append(record)
-
-        total_records = 0
-        for patch_version, records in patch_groups.items():
-            patch_file = self.silver_dir / f"fact_match_performance_patch_{patch_version}.json"
-
-            # 转换为字典格式
-            records_data = [asdict(record) for record in records]
-
-            # 添加元数据
-            output_data = {
-                'metadata': {
-                    'table_name': 'fact_match_performance',
-                    'patch_version': patch_version,
-                    'record_count': len(records),
-                    'generated_at': datetime.now(timezone.utc).isoformat(),
-                    'schema_version': '1.0'
-                },
-                'records': records_data
-            }
-
-            with open(patch_file, 'w') as f:
-                json.dump(output_data, f, indent=2)
-
-            print(f"  ✅ {patch_version}: {len(records)} 条记录 -> {patch_file}")
-            total_records += len(records)
+        incremental = self._bronze_plan.incremental
+        output = self._silver_output
+        output.touch(output.retired)
+        gold_writer = output.gold_writer
+        if gold_writer is not None and incremental and not self.gold_dataset_dir.exists():
+            # Gold数据集尚不存在: 回填所有分区
+            output.touch(self.bronze_manifest.partitions)
+
+        written = output.finish()
+        if not written:
+            output.abort()
+            self._silver_output = None
+            if incremental:
+                print("✅ Bronze层无变化, 事实表无需更新")
+                self.bronze_manifest.save()
+            else:
+                print("⚠️ 没有事实记录可保存")
+            return
 
-        # 保存转换摘要
+        # 按patch分区保存（记录之后写入元数据）
+        generated_at = datetime.now(timezone.utc).isoformat()
+        output.close(lambda patch_version, record_count: {
+            'metadata': {
+                'table_name': 'fact_match_performance',
+                'patch_version': patch_version,
+                'record_count': record_count,
+                'generated_at': generated_at,
+                'schema_version': '1.0'
+            }
+        })
+        self._silver_output = None
+
+        partitions = self.bronze_manifest.partitions
+        for patch_version, record_count in written.items():
+            patch_file = self._partition_file(patch_version)
+            if record_count:
+                partitions[patch_version] = self._partition_stats[patch_version]
+                print(f"  ✅ {patch_version}: {record_count} 条记录 -> {patch_file}")
+            else:
+                partitions.pop(patch_version, None)
+                print(f"  🗑️ {patch_version}: 分区已清空 -> {patch_file}")
+
+        # Gold数据集（Silver分区落盘之后）
+        if gold_writer is not None:
+            gold_partitions = gold_writer.close()
+            remove_partitions(self.gold_dataset_dir, 'patch_version',
+                              [patch_version for patch_version, count in written.items() if not count])
+            print(f"  📦 Gold数据集: {len(gold_partitions)} 个分区, "
+                  f"{sum(gold_partitions.values())} 条记录 -> {self.gold_dataset_dir}")
+
+        # 保存转换摘要（汇总全部分区，包括本次未改动的分区）
+        total_records = sum(p['record_count'] for p in partitions.values())
         summary = {
             'fact_table_summary': {
                 'table_name': 'fact_match_performance',
                 'total_records': total_records,
-                'patches_processed': len(patch_groups),
-                'avg_data_quality': sum(r.data_quality_score for r in self.fact_records) / len(self.fact_records),
+                'patches_processed': len(partitions),
+                'avg_data_quality': sum(p['data_quality_sum'] for p in partitions.values()) / max(total_records, 1),
                 'transformation_timestamp': datetime.now(timezone.utc).isoformat()
             }
         }
@@ -431,7 +501,10 @@ class FactMatchPerformanceTransformer:
         with open(summary_file, 'w') as f:
             json.dump(summary, f, indent=2)
 
-        print(f"✅ 事实表保存完成: {total_records} 条记录, {len(patch_groups)} 个patch分区")
+        # 清单在分区落盘之后保存
+        self.bronze_manifest.save()
+
+        print(f"✅ 事实表保存完成: {total_records} 条记录, {len(partitions)} 个patch分区")
 
     def run_transformation(self):
         """运行完整的事实表转换流程"""
@@ -456,13 +529,19 @@ def main():
                        help="Bronze层数据目录")
     parser.add_argument("--silver-dir", default="data/silver/facts",
                        help="Silver层输出目录")
+    parser.add_argument("--incremental", action="store_true",
+                       help="增量构建: 只处理新增/变更的Bronze文件")
+    parser.add_argument("--gold-dir", default=None,
+                       help="同时写出Hive分区的Gold Parquet数据集 (如 data/gold)")
 
     args = parser.parse_args()
 
     try:
         transformer = FactMatchPerformanceTransformer(
             bronze_dir=args.bronze_dir,
-            silver_dir=args.silver_dir
+            silver_dir=args.silver_dir,
+            incremental=args.incremental,
+            gold_dir=args.gold_dir
         )
 
         transformer.run_transformation()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Gold Writer - 流式写入Hive分区的Parquet Gold数据集（Arrow + DuckDB）
+
+记录逐条写入，按分区缓冲到 batch_size 后转换为 Arrow RecordBatch，追加到该分区的暂存Parquet；
+close() 时由DuckDB对每个分区按 sort_by 排序（内存受 memory_limit 限制，超出部分落盘）并写成:
+
+    <dataset_dir>/patch_version=15.1.1/queue_type=420/part-0.parquet
+
+行组按 champion_id/position 有序，DuckDB查询可以同时利用分区裁剪和行组min/max统计裁剪:
+
+    SELECT ... FROM read_parquet('<dataset_dir>/**/*.parquet', hive_partitioning = true,
+                                 hive_types_autocast = false)
+    WHERE patch_version = '15.1.1' AND champion_id = 92
+
+峰值内存 ≈ 分区数 × batch_size 条记录；本次写入涉及的分区整体替换，其余分区保持不变（增量构建）。
+"""
+
+import shutil
+import typing
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+
+DEFAULT_BATCH_SIZE = 8192
+DEFAULT_ROW_GROUP_SIZE = 16384
+DEFAULT_MEMORY_LIMIT = "1GB"
+
+
+def arrow_schema_for(record_class) -> "pa.Schema":
+    """由Silver记录dataclass生成Arrow schema"""
+    if pa is None:
+        raise ImportError("需要 pyarrow: pip install pyarrow")
+    type_map = {int: pa.int64(), float: pa.float64(), str: pa.string(), bool: pa.bool_()}
+    fields = []
+    for name, hint in typing.get_type_hints(record_class).items():
+        # Optional[X] → X（可空）
+        args = [arg for arg in typing.get_args(hint) if arg is not type(None)]
+        base = args[0] if typing.get_origin(hint) is typing.Union and args else hint
+        fields.append(pa.field(name, type_map.get(base, pa.string())))
+    return pa.schema(fields)
+
+
+def dataset_glob(dataset_dir: Path) -> str:
+    """DuckDB read_parquet 使用的数据集路径"""
+    return str(Path(dataset_dir) / "**" / "*.parquet")
+
+
+def read_dataset_sql(dataset_dir: Path) -> str:
+    """读取数据集的DuckDB表函数（分区列保持为VARCHAR，与Silver记录一致）"""
+    return (f"read_parquet('{dataset_glob(Path(dataset_dir).resolve())}', "
+            f"hive_partitioning = true, hive_types_autocast = false)")
+
+
+class GoldDatasetWriter:
+    """Hive分区Parquet数据集的流式写入器"""
+
+    def __init__(self,
+                 dataset_dir: Path,
+                 schema: "pa.Schema",
+                 partition_cols: Sequence[str] = ("patch_version", "queue_type"),
+                 sort_by: Sequence[str] = ("champion_id", "position"),
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+                 memory_limit: str = DEFAULT_MEMORY_LIMIT,
+                 overwrite: bool = False):
+        if pa is None or duckdb is None:
+            raise ImportError("GoldDatasetWriter 需要 pyarrow 和 duckdb: pip install pyarrow duckdb")
+
+        self.dataset_dir = Path(dataset_dir)
+        self.schema = schema
+        self.partition_cols = list(partition_cols)
+        self.sort_by = [col for col in sort_by if col in schema.names]
+        self.batch_size = batch_size
+        self.row_group_size = row_group_size
+        self.memory_limit = memory_limit
+        self.overwrite = overwrite  # True: 全量构建，替换整个数据集
+
+        self.staging_dir = self.dataset_dir.parent / f".{self.dataset_dir.name}.staging-{uuid.uuid4().hex[:8]}"
+        self._buffers: Dict[Tuple, List[Dict]] = {}
+        self._writers: Dict[Tuple, Any] = {}
+        self._staging_files: Dict[Tuple, Path] = {}
+        self.row_counts: Dict[Tuple, int] = {}
+
+    def write(self, record: Dict):
+        key = tuple(str(record[col]) for col in self.partition_cols)
+        buffer = self._buffers.setdefault(key, [])
+        buffer.append(record)
+        if len(buffer) >= self.batch_size:
+            self._flush(key)
+
+    def _flush(self, key: Tuple):
+        rows = self._buffers.get(key)
+        if not rows:
+            return
+        batch = pa.RecordBatch.from_pylist(rows, schema=self.schema)
+        writer = self._writers.get(key)
+        if writer is None:
+            self.staging_dir.mkdir(parents=True, exist_ok=True)
+            staging_file = self.staging_dir / f"part-{len(self._writers)}.parquet"
+            writer = pq.ParquetWriter(str(staging_file), self.schema, compression='snappy')
+            self._writers[key] = writer
+            self._staging_files[key] = staging_file
+        writer.write_batch(batch)
+        self.row_counts[key] = self.row_counts.get(key, 0) + len(rows)
+        self._buffers[key] = []
+
+    def _partition_path(self, key: Tuple) -> Path:
+        path = self.dataset_dir
+        for col, value in zip(self.partition_cols, key):
+            path = path / f"{col}={value}"
+        return path
+
+    def close(self) -> Dict[str, int]:
+        """
+        排序并写出所有分区；本次写入涉及的顶层分区（如 patch_version=X）整体替换，
+        overwrite 时替换整个数据集
+
+        Returns:
+            {分区相对路径: 行数}
+        """
+        for key in list(self._buffers):
+            self._flush(key)
+        for writer in self._writers.values():
+            writer.close()
+
+        if not self._writers:
+            if self.overwrite and self.dataset_dir.exists():
+                shutil.rmtree(self.dataset_dir)
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+            return {}
+
+        # 先写到新目录，完成后再替换旧分区（失败时旧数据保持不变）
+        build_dir = self.staging_dir / "dataset"
+        columns = [name for name in self.schema.names if name not in self.partition_cols]
+        order_by = f" ORDER BY {', '.join(self.sort_by)}" if self.sort_by else ""
+
+        conn = duckdb.connect()
+        try:
+            conn.execute(f"SET memory_limit = '{self.memory_limit}'")
+            conn.execute(f"SET temp_directory = '{self.staging_dir / 'spill'}'")
+            for key, staging_file in self._staging_files.items():
+                target = build_dir / self._partition_path(key).relative_to(self.dataset_dir) / "part-0.parquet"
+                target.parent.mkdir(parents=True, exist_ok=True)
+                conn.execute(
+                    f"COPY (SELECT {', '.join(columns)} FROM read_parquet('{staging_file}'){order_by}) "
+                    f"TO '{target}' (FORMAT PARQUET, COMPRESSION ZSTD, ROW_GROUP_SIZE {self.row_group_size})"
+                )
+        finally:
+            conn.close()
+
+        if self.overwrite:
+            if self.dataset_dir.exists():
+                shutil.rmtree(self.dataset_dir)
+            self.dataset_dir.parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(str(build_dir), str(self.dataset_dir))
+        else:
+            self.dataset_dir.mkdir(parents=True, exist_ok=True)
+            for value in {key[0] for key in self._writers}:
+                old_dir = self.dataset_dir / f"{self.partition_cols[0]}={value}"
+                if old_dir.exists():
+                    shutil.rmtree(old_dir)
+                shutil.move(str(build_dir / f"{self.partition_cols[0]}={value}"), str(old_dir))
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+
+        return {str(self._partition_path(key).relative_to(self.dataset_dir)): count
+                for key, count in sorted(self.row_counts.items())}
+
+    def abort(self):
+        for writer in self._writers.values():
+            writer.close()
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+
+
+def remove_partitions(dataset_dir: Path, partition_col: str, values: Sequence[str]):
+    """删除数据集中的顶层分区（对应的Silver分区已被清空）"""
+    for value in values:
+        partition_dir = Path(dataset_dir) / f"{partition_col}={value}"
+        if partition_dir.exists():
+            shutil.rmtree(partition_dir)
@@ -2,19 +2,53 @@
 """
 Multi-Format Output Pipeline
 构建Parquet+DuckDB多格式输出管道，支持高效存储和查询
+
+Silver分区记录流式写入Hive分区的Parquet Gold数据集（见 gold_writer），峰值内存受批大小限制；
+DuckDB视图、CSV导出和元数据统计都直接查询数据集，不再把整张表加载为DataFrame。
 """
 
 import json
-import os
+import sys
 from pathlib import Path
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Any
-import pandas as pd
 import duckdb
-import pyarrow as pa
-import pyarrow.parquet as pq
-from dataclasses import asdict
-import shutil
+
+sys.path.append(str(Path(__file__).parent.parent))
+from transforms.bronze_to_silver_scd2 import DimVersionedPlayerStats
+from transforms.fact_match_performance import FactMatchPerformance
+from transforms.enhanced_fact_transform import EnhancedFactMatchPerformance
+from transforms.silver_writer import iter_partition_records
+from transforms.gold_writer import (
+    GoldDatasetWriter, arrow_schema_for, read_dataset_sql, DEFAULT_MEMORY_LIMIT, DEFAULT_ROW_GROUP_SIZE
+)
+
+
+# Silver表 → Gold数据集（分区列 + 行组排序列）
+SILVER_TABLES = {
+    'dim_versioned_player_stats': {
+        'pattern': 'dimensions/dim_versioned_player_stats/patch_*.json',
+        'record_class': DimVersionedPlayerStats,
+        'partition_cols': ('patch_version',),
+        'sort_by': ('player_key',),
+        'label': '📋 维表'
+    },
+    'fact_match_performance': {
+        'pattern': 'facts/fact_match_performance_patch_*.json',
+        'record_class': FactMatchPerformance,
+        'partition_cols': ('patch_version', 'queue_type'),
+        'sort_by': ('champion_id', 'position'),
+        'label': '📊 事实表'
+    },
+    'enhanced_fact_match_performance': {
+        'pattern': 'enhanced_facts/enhanced_fact_match_performance_patch_*.json',
+        'record_class': EnhancedFactMatchPerformance,
+        'partition_cols': ('patch_version', 'queue_type'),
+        'sort_by': ('champion_id', 'position'),
+        'label': '🛡️ 增强事实表'
+    }
+}
+
 
 class MultiFormatOutputPipeline:
     """多格式输出管道"""
@@ -22,7 +56,8 @@ class MultiFormatOutputPipeline:
     def __init__(self,
                  silver_dir: str = "data/silver",
                  gold_dir: str = "data/gold",
-                 formats: List[str] = None):
+                 formats: List[str] = None,
+                 memory_limit: str = DEFAULT_MEMORY_LIMIT):
 
         self.silver_dir = Path(silver_dir)
         self.gold_dir = Path(gold_dir)
@@ -31,19 +66,31 @@ class MultiFormatOutputPipeline:
         # 支持的输出格式
         self.formats = formats or ["parquet", "duckdb", "json", "csv"]
 
-        # 创建格式特定目录
-        for fmt in self.formats:
+        # 创建格式特定目录（Gold数据集总是写在 parquet/ 下）
+        for fmt in set(self.formats) | {"parquet"}:
             (self.gold_dir / fmt).mkdir(parents=True, exist_ok=True)
 
         # DuckDB连接
         self.db_path = self.gold_dir / "duckdb" / "analytics.duckdb"
         self.conn = None
+        self.memory_limit = memory_limit
+        self._scratch = None            # 内存DuckDB: 导出/统计查询
+        self.table_counts: Dict[str, int] = {}
 
         print(f"🔄 初始化多格式输出管道")
         print(f"📁 Silver层: {self.silver_dir}")
         print(f"📁 Gold层: {self.gold_dir}")
         print(f"📦 支持格式: {self.formats}")
 
+    def dataset_dir(self, table_name: str) -> Path:
+        """表的Gold数据集目录"""
+        return self.gold_dir / "parquet" / table_name
+
+    def _dataset_query(self, table_name: str) -> str:
+        """按Silver记录字段顺序读取数据集（分区列在Parquet文件中不重复存储）"""
+        columns = arrow_schema_for(SILVER_TABLES[table_name]['record_class']).names
+        return f"SELECT {', '.join(columns)} FROM {read_dataset_sql(self.dataset_dir(table_name))}"
+
     def _init_duckdb(self):
         """初始化DuckDB连接"""
         if self.conn is None:
@@ -55,157 +102,106 @@ class MultiFormatOutputPipeline:
         if self.conn:
             self.conn.close()
             self.conn = None
-
-    def load_silver_data(self) -> Dict[str, List[Dict]]:
-        """加载Silver层数据"""
+        if self._scratch:
+            self._scratch.close()
+            self._scratch = None
+
+    def _query_conn(self):
+        """导出/统计查询使用的内存DuckDB连接（排序等超出内存限制的部分落盘）"""
+        if self._scratch is None:
+            self._scratch = duckdb.connect()
+            self._scratch.execute(f"SET memory_limit = '{self.memory_limit}'")
+            self._scratch.execute(f"SET temp_directory = '{self.gold_dir / '.duckdb_tmp'}'")
+        return self._scratch
+
+    def load_silver_data(self) -> Dict[str, List[Path]]:
+        """查找Silver层各表的patch分区文件（记录在写Gold数据集时流式读取）"""
         print("📊 加载Silver层数据...")
 
         data_sources = {}
-
-        # 加载SCD2维表数据
-        dimensions_dir = self.silver_dir / "dimensions"
-        if dimensions_dir.exists():
-            for dim_file in dimensions_dir.glob("*.json"):
-                if "summary" not in dim_file.name:
-                    with open(dim_file, 'r') as f:
-                        data = json.load(f)
-
-                    table_name = dim_file.stem
-                    data_sources[table_name] = data.get('records', [])
-                    print(f"  📋 维表 {table_name}: {len(data_sources[table_name])} 条记录")
-
-        # 加载事实表数据
-        facts_dir = self.silver_dir / "facts"
-        if facts_dir.exists():
-            fact_records = []
-            for fact_file in facts_dir.glob("*.json"):
-                if "summary" not in fact_file.name:
-                    with open(fact_file, 'r') as f:
-                        data = json.load(f)
-
-                    records = data.get('records', [])
-                    fact_records.extend(records)
-
-            if fact_records:
-                data_sources['fact_match_performance'] = fact_records
-                print(f"  📊 事实表 fact_match_performance: {len(fact_records)} 条记录")
-
-        # 加载增强事实表数据
-        enhanced_facts_dir = self.silver_dir / "enhanced_facts"
-        if enhanced_facts_dir.exists():
-            enhanced_records = []
-            for fact_file in enhanced_facts_dir.glob("*.json"):
-                if "governance" not in fact_file.name:
-                    with open(fact_file, 'r') as f:
-                        data = json.load(f)
-
-                    records = data.get('records', [])
-                    enhanced_records.extend(records)
-
-            if enhanced_records:
-                data_sources['enhanced_fact_match_performance'] = enhanced_records
-                print(f"  🛡️ 增强事实表: {len(enhanced_records)} 条记录")
+        for table_name, table in SILVER_TABLES.items():
+            partition_files = sorted(self.silver_dir.glob(table['pattern']))
+            if partition_files:
+                data_sources[table_name] = partition_files
+                print(f"  {table['label']} {table_name}: {len(partition_files)} 个patch分区")
 
         return data_sources
 
-    def convert_to_parquet(self, data_sources: Dict[str, List[Dict]]):
-        """转换为Parquet格式"""
+    def build_gold_datasets(self, data_sources: Dict[str, List[Path]]):
+        """Silver分区记录 → Hive分区的Parquet Gold数据集（逐批写入，不在内存中保留整张表）"""
+        print("\n📦 写入Gold Parquet数据集...")
+
+        for table_name, partition_files in data_sources.items():
+            table = SILVER_TABLES[table_name]
+            dataset_dir = self.dataset_dir(table_name)
+            writer = GoldDatasetWriter(
+                dataset_dir, arrow_schema_for(table['record_class']),
+                partition_cols=table['partition_cols'],
+                sort_by=table['sort_by'],
+                memory_limit=self.memory_limit,
+                overwrite=True
+            )
+
+            try:
+                for partition_file in partition_files:
+                    for record in iter_partition_records(partition_file):
+                        writer.write(record)
+                partitions = writer.close()
+            except Exception as e:
+                writer.abort()
+                print(f"  ❌ {table_name} Parquet数据集写入失败: {e}")
+                continue
+
+            self.table_counts[table_name] = sum(partitions.values())
+            print(f"  ✅ {table_name}/: {self.table_counts[table_name]} 条记录, {len(partitions)} 个分区")
+
+    def convert_to_parquet(self, data_sources: Dict[str, List[Path]]):
+        """转换为Parquet格式（单文件，供按文件路径读取的下游使用；由数据集按分区+排序列导出）"""
         print("\n📦 转换为Parquet格式...")
 
         parquet_dir = self.gold_dir / "parquet"
+        conn = self._query_conn()
 
-        for table_name, records in data_sources.items():
-            if not records:
+        for table_name in data_sources:
+            if not self.table_counts.get(table_name):
                 continue
 
             try:
-                # 转换为DataFrame
-                df = pd.DataFrame(records)
-
-                # 优化数据类型
-                df = self._optimize_dataframe_types(df, table_name)
-
-                # 保存为Parquet
+                table = SILVER_TABLES[table_name]
+                order_by = ', '.join(table['partition_cols'] + table['sort_by'])
                 parquet_file = parquet_dir / f"{table_name}.parquet"
-                df.to_parquet(parquet_file, index=False, compression='snappy')
+                conn.execute(
+                    f"COPY ({self._dataset_query(table_name)} ORDER BY {order_by}) TO '{parquet_file}' "
+                    f"(FORMAT PARQUET, COMPRESSION ZSTD, ROW_GROUP_SIZE {DEFAULT_ROW_GROUP_SIZE})"
+                )
 
                 # 验证文件
                 file_size = parquet_file.stat().st_size / 1024 / 1024  # MB
-                print(f"  ✅ {table_name}.parquet: {len(records)} 条记录, {file_size:.1f}MB")
+                print(f"  ✅ {table_name}.parquet: {self.table_counts[table_name]} 条记录, {file_size:.1f}MB")
 
             except Exception as e:
                 print(f"  ❌ {table_name} Parquet转换失败: {e}")
 
-    def _optimize_dataframe_types(self, df: pd.DataFrame, table_name: str) -> pd.DataFrame:
-        """优化DataFrame数据类型以减少存储空间"""
-
-        # 通用优化规则
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                # 尝试转换为数值类型
-                if df[col].str.match(r'^\d+$').all() if not df[col].isna().all() else False:
-                    df[col] = pd.to_numeric(df[col], errors='ignore')
-                # 尝试转换为类别类型（对于重复值多的列）
-                elif df[col].nunique() / len(df) < 0.5:
-                    df[col] = df[col].astype('category')
-
-            # 优化整数类型
-            elif df[col].dtype in ['int64']:
-                if df[col].min() >= 0:
-                    if df[col].max() <= 255:
-                        df[col] = df[col].astype('uint8')
-                    elif df[col].max() <= 65535:
-                        df[col] = df[col].astype('uint16')
-                    elif df[col].max() <= 4294967295:
-                        df[col] = df[col].astype('uint32')
-                else:
-                    if df[col].min() >= -128 and df[col].max() <= 127:
-                        df[col] = df[col].astype('int8')
-                    elif df[col].min() >= -32768 and df[col].max() <= 32767:
-                        df[col] = df[col].astype('int16')
-
-            # 优化浮点类型
-            elif df[col].dtype == 'float64':
-                df[col] = pd.to_numeric(df[col], downcast='float')
-
-        # 表特定优化
-        if table_name.startswith('fact_'):
-            # 事实表特定优化
-            boolean_cols = ['win', 'game_ended_early', 'surrender',
-                           'anonymization_validated', 'pii_detection_passed', 'gdpr_compliant']
-            for col in boolean_cols:
-                if col in df.columns:
-                    df[col] = df[col].astype('bool')
-
-            # 类别列优化
-            category_cols = ['tier', 'position', 'champion_name', 'game_mode', 'risk_level']
-            for col in category_cols:
-                if col in df.columns:
-                    df[col] = df[col].astype('category')
-
-        return df
-
-    def load_into_duckdb(self, data_sources: Dict[str, List[Dict]]):
-        """加载数据到DuckDB"""
+    def load_into_duckdb(self, data_sources: Dict[str, List[Path]]):
+        """在DuckDB中注册Gold数据集（视图直接查询Parquet，可利用分区和行组裁剪）"""
         print("\n🦆 加载数据到DuckDB...")
 
         self._init_duckdb()
 
-        for table_name, records in data_sources.items():
-            if not records:
+        for table_name in data_sources:
+            if not self.table_counts.get(table_name):
                 continue
 
             try:
-                # 创建DataFrame
-                df = pd.DataFrame(records)
-                df = self._optimize_dataframe_types(df, table_name)
-
-                # 删除表（如果存在）
-                self.conn.execute(f"DROP TABLE IF EXISTS {table_name}")
+                # 删除旧的表/视图（如果存在）
+                existing = self.conn.execute(
+                    "SELECT table_type FROM information_schema.tables WHERE table_name = ?", [table_name]
+                ).fetchone()
+                if existing:
+                    object_type = "VIEW" if existing[0] == "VIEW" else "TABLE"
+                    self.conn.execute(f"DROP {object_type} {table_name}")
 
-                # 创建表并插入数据
-                self.conn.register(f"{table_name}_df", df)
-                self.conn.execute(f"CREATE TABLE {table_name} AS SELECT * FROM {table_name}_df")
+                self.conn.execute(f"CREATE VIEW {table_name} AS {self._dataset_query(table_name)}")
 
                 # 验证数据
                 row_count = self.conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
@@ -298,23 +294,23 @@ class MultiFormatOutputPipeline:
         except Exception as e:
             print(f"  ❌ 补丁分析视图创建失败: {e}")
 
-    def export_to_csv(self, data_sources: Dict[str, List[Dict]]):
+    def export_to_csv(self, data_sources: Dict[str, List[Path]]):
         """导出为CSV格式"""
         print("\n📄 导出为CSV格式...")
 
         csv_dir = self.gold_dir / "csv"
+        conn = self._query_conn()
 
-        for table_name, records in data_sources.items():
-            if not records:
+        for table_name in data_sources:
+            if not self.table_counts.get(table_name):
                 continue
 
             try:
-                df = pd.DataFrame(records)
                 csv_file = csv_dir / f"{table_name}.csv"
-                df.to_csv(csv_file, index=False, encoding='utf-8')
+                conn.execute(f"COPY ({self._dataset_query(table_name)}) TO '{csv_file}' (HEADER, DELIMITER ',')")
 
                 file_size = csv_file.stat().st_size / 1024 / 1024  # MB
-                print(f"  ✅ {table_name}.csv: {len(records)} 条记录, {file_size:.1f}MB")
+                print(f"  ✅ {table_name}.csv: {self.table_counts[table_name]} 条记录, {file_size:.1f}MB")
 
             except Exception as e:
                 print(f"  ❌ {table_name} CSV导出失败: {e}")
@@ -327,10 +323,11 @@ class MultiFormatOutputPipeline:
             return
 
         # 获取所有视图
-        views = self.conn.execute("""
+        # 只导出聚合视图（Gold表本身也以视图形式注册）
+        views = [(view_name,) for (view_name,) in self.conn.execute("""
             SELECT table_name FROM information_schema.tables
             WHERE table_type = 'VIEW'
-        """).fetchall()
+        """).fetchall() if view_name not in SILVER_TABLES]
 
         results_dir = self.gold_dir / "analytics"
         results_dir.mkdir(exist_ok=True)
@@ -358,14 +355,14 @@ class MultiFormatOutputPipeline:
             except Exception as e:
                 print(f"  ❌ {view_name} 分析结果导出失败: {e}")
 
-    def generate_metadata(self, data_sources: Dict[str, List[Dict]]):
-        """生成元数据"""
+    def generate_metadata(self, data_sources: Dict[str, List[Path]]):
+        """生成元数据（字段统计由DuckDB在数据集上流式计算）"""
         print("\n📋 生成元数据...")
 
         metadata = {
             'pipeline_metadata': {
                 'generated_at': datetime.now(timezone.utc).isoformat(),
-                'pipeline_version': '1.0',
+                'pipeline_version': '2.0',
                 'formats_supported': self.formats,
                 'source_data_summary': {}
             },
@@ -374,48 +371,64 @@ class MultiFormatOutputPipeline:
             'quality_summary': {}
         }
 
+        conn = self._query_conn()
+
         # 收集表结构和统计信息
-        for table_name, records in data_sources.items():
-            if not records:
+        for table_name in data_sources:
+            record_count = self.table_counts.get(table_name)
+            if not record_count:
                 continue
 
+            table = SILVER_TABLES[table_name]
+            sample_record = next(iter_partition_records(data_sources[table_name][0]), {})
+
             # 数据统计
             metadata['pipeline_metadata']['source_data_summary'][table_name] = {
-                'record_count': len(records),
-                'sample_record': records[0] if records else {}
+                'record_count': record_count,
+                'sample_record': sample_record,
+                'gold_dataset': str(self.dataset_dir(table_name)),
+                'partitioned_by': list(table['partition_cols']),
+                'sorted_by': list(table['sort_by'])
             }
 
             # 字段统计
-            df = pd.DataFrame(records)
             field_stats = {}
-
-            for col in df.columns:
-                field_stats[col] = {
-                    'type': str(df[col].dtype),
-                    'non_null_count': int(df[col].count()),
-                    'null_count': int(df[col].isnull().sum()),
-                    'unique_values': int(df[col].nunique())
+            summary = conn.execute(f"SUMMARIZE {self._dataset_query(table_name)}").fetchall()
+            for column_name, column_type, min_value, max_value, approx_unique, avg, _, _, _, _, count, null_percentage in summary:
+                null_count = int(round(float(null_percentage or 0) * count / 100))
+                field_stats[column_name] = {
+                    'type': column_type,
+                    'non_null_count': count - null_count,
+                    'null_count': null_count,
+                    'unique_values': int(approx_unique)  # 近似值 (HyperLogLog)
                 }
 
                 # 数值字段额外统计
-                if df[col].dtype in ['int64', 'float64', 'int32', 'float32']:
-                    field_stats[col].update({
-                        'min': float(df[col].min()) if not df[col].isna().all() else None,
-                        'max': float(df[col].max()) if not df[col].isna().all() else None,
-                        'mean': float(df[col].mean()) if not df[col].isna().all() else None
+                if column_type in ('BIGINT', 'DOUBLE'):
+                    field_stats[column_name].update({
+                        'min': float(min_value) if min_value is not None else None,
+                        'max': float(max_value) if max_value is not None else None,
+                        'mean': float(avg) if avg is not None else None
                     })
 
             metadata['table_schemas'][table_name] = field_stats
 
         # 数据质量摘要（如果有治理数据）
-        if 'enhanced_fact_match_performance' in data_sources:
-            enhanced_df = pd.DataFrame(data_sources['enhanced_fact_match_performance'])
+        if self.table_counts.get('enhanced_fact_match_performance'):
+            enhanced = read_dataset_sql(self.dataset_dir('enhanced_fact_match_performance'))
+            total_records, avg_quality, compliance_rate = conn.execute(f"""
+                SELECT COUNT(*), AVG(data_quality_score), AVG(gdpr_compliant::INTEGER) * 100
+                FROM {enhanced}
+            """).fetchone()
 
             metadata['quality_summary'] = {
-                'total_records': len(enhanced_df),
-                'avg_data_quality_score': float(enhanced_df['data_quality_score'].mean()),
-                'gdpr_compliance_rate': float(enhanced_df['gdpr_compliant'].mean() * 100),
-                'risk_distribution': enhanced_df['risk_level'].value_counts().to_dict()
+                'total_records': total_records,
+                'avg_data_quality_score': float(avg_quality),
+                'gdpr_compliance_rate': float(compliance_rate),
+                'risk_distribution': dict(conn.execute(f"""
+                    SELECT risk_level, COUNT(*) FROM {enhanced}
+                    GROUP BY risk_level ORDER BY COUNT(*) DESC
+                """).fetchall())
             }
 
         # 保存元数据
@@ -437,7 +450,10 @@ class MultiFormatOutputPipeline:
                 print("❌ 未找到Silver层数据")
                 return
 
-            # 2. 转换为不同格式
+            # 2. 流式写入Gold数据集（其余格式都由数据集导出）
+            self.build_gold_datasets(data_sources)
+
+            # 3. 转换为不同格式
             if "parquet" in self.formats:
                 self.convert_to_parquet(data_sources)
 
@@ -449,10 +465,10 @@ class MultiFormatOutputPipeline:
             if "csv" in self.formats:
                 self.export_to_csv(data_sources)
 
-            # 3. 生成元数据
+            # 4. 生成元数据
             self.generate_metadata(data_sources)
 
-            # 4. 生成摘要报告
+            # 5. 生成摘要报告
             self._generate_summary_report(data_sources)
 
             print("✅ 多格式输出管道完成!")
@@ -463,11 +479,11 @@ class MultiFormatOutputPipeline:
         finally:
             self._close_duckdb()
 
-    def _generate_summary_report(self, data_sources: Dict[str, List[Dict]]):
+    def _generate_summary_report(self, data_sources: Dict[str, List[Path]]):
         """生成摘要报告"""
         print("\n📋 生成摘要报告...")
 
-        total_records = sum(len(records) for records in data_sources.values())
+        total_records = sum(self.table_counts.values())
 
         summary = {
             'multi_format_pipeline_summary': {
@@ -477,12 +493,10 @@ class MultiFormatOutputPipeline:
                 'output_formats': self.formats,
                 'output_directory': str(self.gold_dir)
             },
-            'table_summary': {
-                table_name: len(records)
-                for table_name, records in data_sources.items()
-            },
+            'table_summary': dict(self.table_counts),
             'format_outputs': {
                 'parquet': list((self.gold_dir / "parquet").glob("*.parquet")) if "parquet" in self.formats else [],
+                'parquet_datasets': [self.dataset_dir(table_name) for table_name in self.table_counts],
                 'duckdb': str(self.db_path) if "duckdb" in self.formats else None,
                 'csv': list((self.gold_dir / "csv").glob("*.csv")) if "csv" in self.formats else [],
                 'analytics': list((self.gold_dir / "analytics").glob("*")) if "duckdb" in self.formats else []
@@ -524,6 +538,8 @@ def main():
                        choices=['parquet', 'duckdb', 'csv', 'json'],
                        default=['parquet', 'duckdb', 'csv'],
                        help="输出格式")
+    parser.add_argument("--memory-limit", default=DEFAULT_MEMORY_LIMIT,
+                       help="DuckDB排序/导出的内存上限 (如 1GB)")
 
     args = parser.parse_args()
 
@@ -531,7 +547,8 @@ def main():
         pipeline = MultiFormatOutputPipeline(
             silver_dir=args.silver_dir,
             gold_dir=args.gold_dir,
-            formats=args.formats
+            formats=args.formats,
+            memory_limit=args.memory_limit
         )
 
         pipeline.run_multi_format_pipeline()
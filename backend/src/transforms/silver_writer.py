@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Silver Writer - 流式Silver分区写入/读取
+
+Silver分区文件仍然是一个JSON文档（{"records": [...], "metadata": {...}}，下游 json.load 不受影响），
+但记录逐条写入、每行一条，不需要先在内存中攒出整个分区；读取时同样逐行流式解析。
+
+    writer = SilverPartitionWriter(path)
+    for record in records:
+        writer.write(record)
+    writer.close({'metadata': {...}})        # 原子替换目标文件
+
+    for record in iter_partition_records(path):
+        ...
+
+SilverTableWriter 把整张按patch分区的表流式写出（增量构建时先复制分区中保留的旧记录），
+并可以把同一记录流同时送入Gold数据集写入器（见 gold_writer）。
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional, Set
+
+
+class SilverPartitionWriter:
+    """逐条写入一个Silver分区（写临时文件，close时原子替换）"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        self.record_count = 0
+        self._file = open(self.tmp_path, 'w')
+        self._file.write('{"records": [\n')
+
+    def write(self, record: Dict):
+        if self.record_count:
+            self._file.write(',\n')
+        self._file.write(json.dumps(record))
+        self.record_count += 1
+
+    def close(self, trailer: Optional[Dict] = None):
+        """写入记录之后的字段（metadata 等）并替换目标文件"""
+        self._file.write('\n]')
+        for key, value in (trailer or {}).items():
+            self._file.write(f',\n{json.dumps(key)}: {json.dumps(value)}')
+        self._file.write('}\n')
+        self._file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self._file.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+
+def iter_partition_records(path: Path) -> Iterator[Dict]:
+    """流式读取Silver分区记录（旧的整块JSON格式回退到 json.load）"""
+    path = Path(path)
+    with open(path, 'r') as f:
+        header = f.readline()
+        if header.strip() != '{"records": [':
+            f.seek(0)
+            yield from json.load(f).get('records', [])
+            return
+
+        for line in f:
+            line = line.rstrip('\n')
+            if line.startswith(']'):
+                return
+            yield json.loads(line[:-1] if line.endswith(',') else line)
+
+
+class SilverTableWriter:
+    """按patch分区流式写出一张Silver表"""
+
+    def __init__(self,
+                 partition_file: Callable[[str], Path],
+                 incremental: bool = False,
+                 retired: Optional[Dict[str, Set]] = None,
+                 gold_writer=None,
+                 on_record: Optional[Callable[[str, Dict], None]] = None):
+        """
+        Args:
+            partition_file: patch → 分区文件路径
+            incremental: 关闭分区前复制已有分区中保留的旧记录
+            retired: 增量时被撤回的比赛 {patch: {game_id}}
+            gold_writer: 可选的 GoldDatasetWriter，接收同样的记录流
+            on_record: 每条写出的记录（包括复制的旧记录）回调 (patch, record)，用于分区统计
+        """
+        self.partition_file = partition_file
+        self.incremental = incremental
+        self.retired = retired or {}
+        self.gold_writer = gold_writer
+        self.on_record = on_record
+        self._writers: Dict[str, SilverPartitionWriter] = {}
+        self._written_ids: Dict[str, Set[str]] = {}
+
+    def _emit(self, patch_version: str, record: Dict):
+        self._writers[patch_version].write(record)
+        if self.gold_writer is not None:
+            self.gold_writer.write(record)
+        if self.on_record is not None:
+            self.on_record(patch_version, record)
+
+    def touch(self, patch_versions: Iterable[str]):
+        """确保这些分区被重写（被撤回记录的分区、需要回填Gold的分区）"""
+        for patch_version in patch_versions:
+            if patch_version not in self._writers:
+                self._writers[patch_version] = SilverPartitionWriter(self.partition_file(patch_version))
+                self._written_ids[patch_version] = set()
+
+    def write(self, patch_version: str, record: Dict):
+        self.touch((patch_version,))
+        self._written_ids[patch_version].add(str(record.get('match_id')))
+        self._emit(patch_version, record)
+
+    def _copy_retained(self, patch_version: str):
+        """
+        复制已有分区中保留的旧记录；本次重新写入的比赛也会被跳过，
+        这样上次运行在保存清单之前中断时，重试不会产生重复记录
+        """
+        patch_file = self.partition_file(patch_version)
+        if not self.incremental or not patch_file.exists():
+            return
+        # 事实表中的 match_id 为 str(gameId)
+        drop_ids = self._written_ids[patch_version] | {str(game_id) for game_id in self.retired.get(patch_version, ())}
+        for record in iter_partition_records(patch_file):
+            if str(record.get('match_id')) not in drop_ids:
+                self._emit(patch_version, record)
+
+    def finish(self) -> Dict[str, int]:
+        """
+        复制各分区保留的旧记录（之后分区统计即为完整分区的统计）
+
+        Returns:
+            本次重写的分区 → 记录数（0 表示分区将被删除）
+        """
+        for patch_version in self._writers:
+            self._copy_retained(patch_version)
+        return {patch_version: writer.record_count for patch_version, writer in self._writers.items()}
+
+    def close(self, trailer: Callable[[str, int], Dict]):
+        """
+        关闭所有分区（应在 finish 之后调用）；记录数为0的分区被删除
+
+        Args:
+            trailer: (patch, 记录数) → 写在记录之后的字段（metadata 等）
+        """
+        for patch_version, writer in self._writers.items():
+            if writer.record_count:
+                writer.close(trailer(patch_version, writer.record_count))
+            else:
+                writer.abort()
+                self.partition_file(patch_version).unlink(missing_ok=True)
+        self._writers = {}
+
+    def abort(self):
+        for writer in self._writers.values():
+            writer.abort()
+        self._writers = {}
+        if self.gold_writer is not None:
+            self.gold_writer.abort()
@@ -7,13 +7,22 @@ Enhanced to work with DDragon version data for accurate patch timing.
 
 import json
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Union
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
+# Simple date-based patch timeline (newest first)
+PATCH_RELEASE_DATES: Dict[str, datetime] = {
+    "15.1.1": datetime(2025, 1, 1),
+    "14.23.1": datetime(2024, 11, 20),
+    "14.20.1": datetime(2024, 10, 1),
+    "14.14.1": datetime(2024, 7, 1),
+    "14.10.1": datetime(2024, 1, 1),
+}
+
 @dataclass
 class PatchInfo:
     """Information about a specific patch version"""
@@ -66,16 +75,26 @@ class PatchMapper:
             dt = dt.replace(tzinfo=None)
 
         # Simple date-based mapping for now
-        if dt >= datetime(2025, 1, 1):
-            return "15.1.1"
-        elif dt >= datetime(2024, 11, 20):
-            return "14.23.1"
-        elif dt >= datetime(2024, 10, 1):
-            return "14.20.1"
-        elif dt >= datetime(2024, 7, 1):
-            return "14.14.1"
-        else:
-            return "14.10.1"
+        for version, release_date in PATCH_RELEASE_DATES.items():
+            if dt >= release_date:
+                return version
+        return "14.10.1"
+
+    def get_patch_by_timestamp(self, timestamp_ms: Union[int, float]) -> Optional[str]:
+        """Get patch version for a match-v5 timestamp (gameCreation, epoch milliseconds)"""
+        if not timestamp_ms:
+            return None
+        return self.get_patch_for_timestamp(datetime.utcfromtimestamp(timestamp_ms / 1000))
+
+    def get_patch_info(self, version: str) -> Optional[Dict[str, Any]]:
+        """Get patch release info: {'version', 'timestamp' (release, epoch milliseconds)}"""
+        release_date = PATCH_RELEASE_DATES.get(version)
+        if release_date is None:
+            return None
+        return {
+            'version': version,
+            'timestamp': int(release_date.replace(tzinfo=timezone.utc).timestamp() * 1000)
+        }
 
     def get_latest_patch(self) -> str:
         """Get the latest available patch version"""
@@ -0,0 +1,47 @@
+"""
+Setup for tests - ensures imports work correctly and provides the sample match data
+"""
+import glob
+import json
+import os
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SAMPLE_MATCHES_DIR = BACKEND_DIR / "api" / "data" / "bronze" / "matches"
+
+# Add backend root to path so we can import services / src
+sys.path.insert(0, str(BACKEND_DIR))
+
+# services/__init__ builds the Riot client at import time
+os.environ.setdefault("RIOT_API_KEY_PRIMARY", "RGAPI-00000000-0000-0000-0000-000000000000")
+
+
+@pytest.fixture(scope="session")
+def sample_match_files():
+    """Bronze sample match files (bronze_metadata + raw_data), sorted by path"""
+    return sorted(Path(f) for f in glob.glob(str(SAMPLE_MATCHES_DIR / "**" / "*.json"), recursive=True))
+
+
+@pytest.fixture(scope="session")
+def sample_matches(sample_match_files):
+    """Raw Riot match payloads of the sample files"""
+    matches = []
+    for match_file in sample_match_files:
+        with open(match_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        matches.append(data.get("raw_data", data))
+    return matches
+
+
+@pytest.fixture(scope="session")
+def sample_player(sample_matches):
+    """(puuid, game_name, tag_line, matches) of the player with the most sample games"""
+    counts = Counter(p["puuid"] for m in sample_matches for p in m["info"]["participants"])
+    puuid, _ = counts.most_common(1)[0]
+    matches = [m for m in sample_matches if any(p["puuid"] == puuid for p in m["info"]["participants"])]
+    participant = next(p for p in matches[0]["info"]["participants"] if p["puuid"] == puuid)
+    return puuid, participant.get("riotIdGameName", ""), participant.get("riotIdTagline", ""), matches
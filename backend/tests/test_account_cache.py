@@ -0,0 +1,89 @@
+"""
+Tests for the Riot ID → account cache (services/account_cache.py)
+"""
+import asyncio
+import json
+
+import pytest
+
+from services.account_cache import AccountCache
+
+ACCOUNT = {"puuid": "puuid-1", "gameName": "Faker", "tagLine": "KR1"}
+KEY = "fingerprint-a"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AccountCache(cache_file=tmp_path / "account_cache.json", save_delay=60)
+
+
+def test_single_flight_and_case_insensitive_hits(cache):
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return ACCOUNT
+
+    async def main():
+        results = await asyncio.gather(*[
+            cache.resolve(name, "kr1", "asia", KEY, fetch) for name in ("Faker", "faker", "FAKER")
+        ])
+        again = await cache.resolve("Faker", "KR1", "asia", KEY, fetch)
+        return results, again
+
+    results, again = asyncio.run(main())
+
+    assert results == [ACCOUNT] * 3
+    assert again == ACCOUNT
+    assert len(calls) == 1
+
+
+def test_not_found_is_cached_per_region(cache):
+    cache.set("Nobody", "NA1", "americas", KEY, None)
+
+    assert cache.get("nobody", "na1", "americas", KEY) == (True, None)
+    assert cache.get("nobody", "na1", "europe", KEY) == (False, None)
+
+    # A later successful lookup clears every negative entry for the Riot ID
+    cache.set("Nobody", "NA1", "europe", KEY, ACCOUNT)
+    assert cache.get("nobody", "na1", "americas", KEY) == (True, ACCOUNT)
+    assert cache.get_stats()["not_found"] == 0
+
+
+def test_key_rotation_and_ttl_invalidate(tmp_path):
+    cache = AccountCache(cache_file=tmp_path / "account_cache.json", positive_ttl=0, save_delay=60)
+    cache.set("Faker", "KR1", "asia", KEY, ACCOUNT)
+    assert cache.get("Faker", "KR1", "asia", KEY) == (False, None)
+
+    cache = AccountCache(cache_file=tmp_path / "other.json", save_delay=60)
+    cache.set("Faker", "KR1", "asia", KEY, ACCOUNT)
+    assert cache.get("Faker", "KR1", "asia", "fingerprint-b") == (False, None)
+
+
+def test_errors_are_not_cached(cache):
+    async def fail():
+        raise RuntimeError("503")
+
+    async def ok():
+        return ACCOUNT
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            await cache.resolve("Faker", "KR1", "asia", KEY, fail)
+        return await cache.resolve("Faker", "KR1", "asia", KEY, ok)
+
+    assert asyncio.run(main()) == ACCOUNT
+
+
+def test_flush_persists_and_reloads(cache):
+    cache.set("Faker", "KR1", "asia", KEY, ACCOUNT)
+    cache.set_platform("Faker", "KR1", "kr")
+    cache.flush()
+
+    data = json.loads(cache.cache_file.read_text())
+    assert list(data["accounts"]) == ["faker#kr1"]
+
+    reloaded = AccountCache(cache_file=cache.cache_file, save_delay=60)
+    assert reloaded.get_location("faker", "kr1") == ("kr", "asia")
+    assert reloaded.get("Faker", "KR1", "asia", KEY) == (True, ACCOUNT)
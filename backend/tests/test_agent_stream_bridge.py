@@ -0,0 +1,88 @@
+"""
+Tests for running sync agent generators off the event loop (services/agent_stream_bridge.py)
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services import agent_stream_bridge
+from services.agent_stream_bridge import run_in_worker, stream_in_worker
+
+
+async def collect(iterable, **kwargs):
+    return [item async for item in stream_in_worker(iterable, **kwargs)]
+
+
+def test_stream_yields_in_order_off_the_loop():
+    loop_thread = threading.get_ident()
+    threads = []
+
+    def generate():
+        for i in range(5):
+            threads.append(threading.get_ident())
+            yield i
+
+    assert asyncio.run(collect(generate())) == list(range(5))
+    assert loop_thread not in threads
+
+
+def test_stream_reraises_generator_errors():
+    def generate():
+        yield 1
+        raise ValueError("boom")
+
+    async def main():
+        received = []
+        with pytest.raises(ValueError, match="boom"):
+            async for item in stream_in_worker(generate()):
+                received.append(item)
+        return received
+
+    assert asyncio.run(main()) == [1]
+
+
+def test_consumer_disconnect_closes_the_generator():
+    closed = threading.Event()
+
+    def generate():
+        try:
+            for i in range(1000):
+                yield i
+        finally:
+            closed.set()
+
+    async def main():
+        stream = stream_in_worker(generate(), max_buffered=2)
+        async for item in stream:
+            if item == 3:
+                break
+        await stream.aclose()
+
+    asyncio.run(main())
+    assert closed.wait(5)
+
+
+def test_short_calls_do_not_queue_behind_streams(monkeypatch):
+    # One streaming thread, busy with a long "LLM stream"
+    monkeypatch.setattr(agent_stream_bridge, "_executor", None)
+    monkeypatch.setattr(agent_stream_bridge, "DEFAULT_WORKERS", 1)
+    release = threading.Event()
+
+    def long_stream():
+        yield "start"
+        release.wait(5)
+        yield "end"
+
+    async def main():
+        stream = stream_in_worker(long_stream())
+        assert await stream.__anext__() == "start"
+        start = time.monotonic()
+        assert await run_in_worker(lambda: 42) == 42
+        elapsed = time.monotonic() - start
+        release.set()
+        assert [item async for item in stream] == ["end"]
+        return elapsed
+
+    assert asyncio.run(main()) < 1
@@ -0,0 +1,93 @@
+"""
+Tests for the structured pre-LLM analysis cache (src/agents/shared/analysis_cache.py)
+"""
+import threading
+import time
+
+import pytest
+
+from src.agents.shared import analysis_cache as analysis_cache_module
+from src.agents.shared.analysis_cache import AnalysisCache
+
+
+@pytest.fixture
+def versions(monkeypatch):
+    versions = {"packs": "v1"}
+    monkeypatch.setattr(analysis_cache_module.pack_cache, "content_version", lambda packs_dir: versions.get(str(packs_dir)))
+    return versions
+
+
+def counting(value):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"value": value, "items": [1, 2]}
+
+    return compute, calls
+
+
+def test_hit_until_content_version_changes(versions):
+    cache = AnalysisCache()
+    compute, calls = counting("a")
+
+    first = cache.get_or_compute("weakness-analysis", "packs", compute, time_range="past-365")
+    first["items"].append(3)  # callers get a copy they may mutate
+    second = cache.get_or_compute("weakness-analysis", "packs", compute, time_range="past-365")
+
+    assert second == {"value": "a", "items": [1, 2]}
+    assert len(calls) == 1
+
+    cache.get_or_compute("weakness-analysis", "packs", compute, time_range="past-60")
+    versions["packs"] = "v2"
+    cache.get_or_compute("weakness-analysis", "packs", compute, time_range="past-365")
+    assert len(calls) == 3
+
+
+def test_without_content_version_nothing_is_cached(versions):
+    cache = AnalysisCache()
+    compute, calls = counting("a")
+
+    cache.get_or_compute("weakness-analysis", "no-packs", compute)
+    cache.get_or_compute("weakness-analysis", "no-packs", compute)
+
+    assert len(calls) == 2
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_concurrent_misses_compute_once(versions):
+    cache = AnalysisCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"value": 1}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute("annual-summary", "packs", compute)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [{"value": 1}] * 4
+    assert len(calls) == 1
+    assert cache._slot_locks == {}
+
+
+def test_lru_bound_and_failed_compute(versions):
+    cache = AnalysisCache(max_entries=2)
+    for agent_id in ("a", "b", "c"):
+        cache.get_or_compute(agent_id, "packs", lambda: agent_id)
+    assert cache.get_stats()["entries"] == 2
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        cache.get_or_compute("d", "packs", fail)
+    assert cache._slot_locks == {}
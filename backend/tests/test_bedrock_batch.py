@@ -0,0 +1,64 @@
+"""
+Tests for parallel Bedrock generation (BedrockLLM.generate_as_completed / generate_batch)
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.agents.shared.bedrock_adapter import BedrockLLM
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    llm = BedrockLLM(model="haiku", region="us-west-2", enable_cache=False)
+    state = {"in_flight": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def fake_generate_sync(prompt, **kwargs):
+        with lock:
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+        try:
+            time.sleep(float(prompt))
+            return {"text": prompt, "usage": {}, "model": llm.model_id}
+        finally:
+            with lock:
+                state["in_flight"] -= 1
+
+    monkeypatch.setattr(llm, "generate_sync", fake_generate_sync)
+    llm.calls = state
+    return llm
+
+
+async def collect(llm, requests, **kwargs):
+    return [item async for item in llm.generate_as_completed(requests, **kwargs)]
+
+
+def test_yields_in_completion_order(llm):
+    requests = [{"prompt": "0.3"}, {"prompt": "0.01"}, {"prompt": "0.1"}]
+
+    results = asyncio.run(collect(llm, requests, max_concurrent=3))
+
+    assert [index for index, _ in results] == [1, 2, 0]
+    assert [result["text"] for _, result in results] == ["0.01", "0.1", "0.3"]
+
+
+def test_batch_keeps_request_order(llm):
+    requests = [{"prompt": "0.2"}, {"prompt": "0.01"}]
+
+    results = asyncio.run(llm.generate_batch(requests, max_concurrent=2))
+
+    assert [r["text"] for r in results] == ["0.2", "0.01"]
+
+
+def test_timed_out_calls_keep_their_slot(llm):
+    requests = [{"prompt": "0.3"}] * 2 + [{"prompt": "0.01"}] * 4
+
+    results = asyncio.run(collect(llm, requests, max_concurrent=2, timeout=0.05))
+    errors = {index for index, result in results if "error" in result}
+
+    # The slow calls time out but keep running in the pool: nothing else may start alongside them
+    assert errors == {0, 1}
+    assert llm.calls["peak"] <= 2
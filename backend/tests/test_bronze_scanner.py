@@ -0,0 +1,87 @@
+"""
+Tests for the shared single-pass Bronze scanner (src/transforms/bronze_scanner.py)
+"""
+import shutil
+
+import pytest
+
+from src.transforms.bronze_manifest import BronzeManifest
+from src.transforms.bronze_scanner import BronzeScanner
+
+
+class RecordingTransform:
+    """Minimal transform: collects (tier, match_id, source) for every scanned match"""
+
+    def __init__(self, manifest_file, skip_tier=None):
+        self.bronze_manifest = BronzeManifest(manifest_file)
+        self.skip_tier = skip_tier
+        self.collected = []
+
+    def begin_bronze_scan(self, plan):
+        self.plan = plan
+
+    def transform_bronze_match(self, tier, match_file, match_data):
+        if tier == self.skip_tier:
+            return None
+        return match_data["raw_data"]["metadata"]["matchId"]
+
+    def collect_bronze_match(self, tier, partial, source):
+        self.collected.append((tier, partial, source))
+
+    def finish_bronze_scan(self, tiers):
+        self.tiers = tiers
+
+
+@pytest.fixture
+def bronze_dir(tmp_path, sample_match_files):
+    bronze_dir = tmp_path / "bronze"
+    for i, match_file in enumerate(sample_match_files[:40]):
+        tier = "challenger" if i % 2 else "master"
+        target = bronze_dir / tier / "na1" / match_file.name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy(match_file, target)
+    return bronze_dir
+
+
+def test_one_pass_fans_out_to_every_transform(bronze_dir, tmp_path):
+    first = RecordingTransform(tmp_path / "first.json")
+    second = RecordingTransform(tmp_path / "second.json", skip_tier="master")
+
+    stats = BronzeScanner(str(bronze_dir), workers=1).scan([first, second])
+
+    assert stats["files"] == stats["transformed"] == 40
+    assert sorted(stats["tiers"]) == ["challenger", "master"]
+    assert len(first.collected) == 40
+    assert {tier for tier, _, _ in second.collected} == {"challenger"}
+    # Skipped matches still count as processed
+    assert len(second.bronze_manifest.files) == 40
+
+
+def test_process_pool_matches_serial_order(bronze_dir, tmp_path):
+    serial = RecordingTransform(tmp_path / "serial.json")
+    parallel = RecordingTransform(tmp_path / "parallel.json")
+
+    BronzeScanner(str(bronze_dir), workers=1).scan([serial])
+    BronzeScanner(str(bronze_dir), workers=2, chunk_size=8).scan([parallel])
+
+    assert parallel.collected == serial.collected
+
+
+def test_incremental_scan_and_bad_files(bronze_dir, tmp_path):
+    transform = RecordingTransform(tmp_path / "manifest.json")
+    scanner = BronzeScanner(str(bronze_dir), workers=1)
+    scanner.scan([transform])
+
+    (bronze_dir / "master" / "na1" / "broken.json").write_text("{not json")
+    changed = next((bronze_dir / "challenger" / "na1").glob("*.json"))
+    changed.write_text(changed.read_text() + "\n")
+    transform.collected = []
+
+    stats = scanner.scan([transform], incremental=True)
+
+    assert stats["transformed"] == 2
+    assert stats["failed"] == 1
+    assert [source for _, _, source in transform.collected] == [changed.relative_to(bronze_dir).as_posix()]
+    assert [entry["key"] for entry in transform.plan.retired] == [changed.relative_to(bronze_dir).as_posix()]
+    # The unreadable file is not recorded, so the next run retries it
+    assert "master/na1/broken.json" not in transform.bronze_manifest.files
@@ -0,0 +1,74 @@
+"""
+Tests for the resumable bulk crawler (services/bulk_crawler.py) against the mock Riot server
+"""
+import asyncio
+import json
+
+from aiohttp import web
+
+from scripts.mock_riot_server import MockRiotWorld, create_app
+from services.bulk_crawler import BulkCrawler
+from services.riot_client import RiotAPIClient
+
+
+async def crawl(tmp_path, **kwargs):
+    """Run one crawl against a fresh mock server; returns (crawler stats, server stats)"""
+    app = create_app(MockRiotWorld(players=200, matches=300), ladder_size=10)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    client = RiotAPIClient(api_key="mock", default_region="na1", base_url=f"http://127.0.0.1:{port}")
+    try:
+        crawler = BulkCrawler(
+            client,
+            bronze_dir=tmp_path / "bronze",
+            state_file=tmp_path / "crawler_state_na1.json",
+            tiers=("challenger",),
+            matches_per_player=5,
+            concurrency=4,
+            **kwargs
+        )
+        stats = await crawler.run()
+    finally:
+        await client.close()
+        await runner.cleanup()
+    return stats, {"unique": len(app["served"])}
+
+
+def bronze_files(tmp_path):
+    return sorted((tmp_path / "bronze").rglob("*.json"))
+
+
+def test_crawl_writes_bronze_matches(tmp_path):
+    stats, server = asyncio.run(crawl(tmp_path, max_matches=20))
+
+    files = bronze_files(tmp_path)
+    assert stats["matches_written"] >= 20
+    assert len(files) == stats["matches_written"] == server["unique"]
+
+    record = json.loads(files[0].read_text())
+    assert record["bronze_metadata"]["tier"] == "challenger"
+    assert record["bronze_metadata"]["match_id"] == files[0].stem
+    assert len(record["raw_data"]["info"]["participants"]) == 10
+    assert files[0].relative_to(tmp_path / "bronze").parts[:2] == ("challenger", "na1")
+
+
+def test_resume_skips_stored_matches(tmp_path):
+    first, _ = asyncio.run(crawl(tmp_path, max_matches=15))
+    second, server = asyncio.run(crawl(tmp_path, max_matches=15))
+
+    files = bronze_files(tmp_path)
+    assert len({f.stem for f in files}) == len(files) == first["matches_written"] + second["matches_written"]
+    # Only matches not written by the first run are fetched again
+    assert server["unique"] == second["matches_written"]
+    assert second["totals"]["matches_written"] == len(files)
+
+
+def test_request_budget_stops_the_crawl(tmp_path):
+    stats, _ = asyncio.run(crawl(tmp_path, max_requests=10))
+
+    assert stats["requests"] == 10
+    assert stats["frontier"] > 0
@@ -0,0 +1,99 @@
+"""
+Tests for the persistent DuckDB analytics catalog (src/analytics/catalog.py)
+"""
+import os
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from src.analytics.catalog import FACT_TABLE, AnalyticsCatalog
+
+
+def write_fact(path, champion_ids):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rows = [
+        {"match_id": f"NA1_{i}", "player_key": f"NA1_{i}_100_TOP", "position": "TOP", "champion_id": champion_id}
+        for i, champion_id in enumerate(champion_ids)
+    ]
+    pq.write_table(pa.Table.from_pylist(rows), path)
+    return path
+
+
+def count(catalog, champion_id):
+    return catalog.execute(f"SELECT COUNT(*) FROM {FACT_TABLE} WHERE champion_id = ?", [champion_id]).fetchone()[0]
+
+
+def rewrite(path, champion_ids):
+    write_fact(path, champion_ids)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def source(tmp_path):
+    return write_fact(tmp_path / "gold" / "parquet" / "fact.parquet", [1, 1, 2])
+
+
+def catalog_files(source):
+    return sorted((source.parent.parent / "duckdb").glob("*.duckdb"))
+
+
+def test_builds_once_and_serves_queries(source):
+    catalog = AnalyticsCatalog(str(source))
+    assert count(catalog, 1) == 2
+
+    info = catalog.info()
+    assert info["row_count"] == 3
+    assert info["fingerprint"] == catalog.fingerprint
+
+    # A second worker opens the existing file instead of rebuilding
+    other = AnalyticsCatalog(str(source))
+    assert count(other, 2) == 1
+    assert other.catalog_file == catalog.catalog_file
+    assert len(catalog_files(source)) == 1
+
+
+def test_source_change_switches_catalog(source):
+    catalog = AnalyticsCatalog(str(source), refresh_interval=0)
+    assert count(catalog, 2) == 1
+    first_file = catalog.catalog_file
+
+    rewrite(source, [2, 2, 2, 2])
+
+    assert count(catalog, 2) == 4
+    assert catalog.catalog_file != first_file
+    # The previous version was built just now and may still be opened by another worker
+    assert first_file.exists()
+
+
+def test_old_versions_are_removed(source):
+    catalog = AnalyticsCatalog(str(source), refresh_interval=0)
+    count(catalog, 1)
+    first_file = catalog.catalog_file
+    old = time.time() - 3600
+    os.utime(first_file, (old, old))
+
+    rewrite(source, [3])
+
+    assert count(catalog, 3) == 1
+    assert catalog_files(source) == [catalog.catalog_file]
+    assert not first_file.exists()
+
+
+def test_rebuilds_a_file_removed_before_open(source, monkeypatch):
+    catalog = AnalyticsCatalog(str(source))
+    build = catalog._build
+    builds = []
+
+    def build_then_vanish(catalog_file):
+        builds.append(catalog_file)
+        build(catalog_file)
+        if len(builds) == 1:
+            catalog_file.unlink()  # another worker removed it as stale
+
+    monkeypatch.setattr(catalog, "_build", build_then_vanish)
+
+    assert count(catalog, 1) == 2
+    assert len(builds) == 2
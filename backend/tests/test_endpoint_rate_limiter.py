@@ -0,0 +1,70 @@
+"""
+Tests for the adaptive, header-driven Riot API rate limiter (services/endpoint_rate_limiter.py)
+"""
+import asyncio
+import time
+
+from services.endpoint_rate_limiter import EndpointRateLimiter, parse_rate_limit_header
+
+MATCH_URL = "https://americas.api.riotgames.com/lol/match/v5/matches/NA1_1"
+
+
+def test_parse_rate_limit_header():
+    assert parse_rate_limit_header("20:1,100:120") == [(20, 1), (100, 120)]
+    assert parse_rate_limit_header("20:1,bad,5") == [(20, 1)]
+    assert parse_rate_limit_header(None) == []
+
+
+def test_learns_limits_from_headers():
+    limiter = EndpointRateLimiter(num_api_keys=1)
+    limiter.update_from_headers(MATCH_URL, 0, {
+        "X-App-Rate-Limit": "20:1,100:120",
+        "X-App-Rate-Limit-Count": "5:1,50:120",
+        "X-Method-Rate-Limit": "2000:10",
+        "X-Method-Rate-Limit-Count": "1:10",
+    })
+
+    status = limiter.get_endpoint_status(MATCH_URL)["keys"][0]
+    assert status["app_limits"] == [(20, 1), (100, 120)]
+    assert status["method_limits"] == [(2000, 10)]
+    assert status["learned"]
+    # 50 of 100 used in the 120s window
+    assert status["headroom"] == 0.5
+
+
+def test_acquire_prefers_key_with_headroom():
+    limiter = EndpointRateLimiter(num_api_keys=3)
+    limiter.update_from_headers(MATCH_URL, 0, {"X-App-Rate-Limit": "20:1,100:120", "X-App-Rate-Limit-Count": "19:1,95:120"})
+
+    async def acquire_many():
+        return [await limiter.acquire(MATCH_URL, [0, 1, 2]) for _ in range(10)]
+
+    picks = asyncio.run(acquire_many())
+    assert 0 not in picks
+    assert {1, 2} == set(picks)
+
+
+def test_acquire_waits_when_learned_limit_is_exhausted():
+    limiter = EndpointRateLimiter(num_api_keys=1)
+    limiter.update_from_headers(MATCH_URL, 0, {"X-App-Rate-Limit": "2:1", "X-App-Rate-Limit-Count": "2:1"})
+
+    started = time.monotonic()
+    asyncio.run(limiter.acquire(MATCH_URL, [0]))
+    assert time.monotonic() - started >= 0.4
+
+
+def test_penalize_blocks_until_retry_after():
+    limiter = EndpointRateLimiter(num_api_keys=2)
+    limiter.penalize(MATCH_URL, 0, 0.3, "application")
+
+    # Key 1 is unaffected
+    assert asyncio.run(limiter.acquire(MATCH_URL, [0, 1])) == 1
+
+    started = time.monotonic()
+    assert asyncio.run(limiter.acquire(MATCH_URL, [0])) == 0
+    assert time.monotonic() - started >= 0.25
+
+
+def test_non_riot_hosts_are_not_limited():
+    limiter = EndpointRateLimiter(num_api_keys=1)
+    assert asyncio.run(limiter.acquire("https://ddragon.leagueoflegends.com/api/versions.json")) == 0
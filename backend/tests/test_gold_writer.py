@@ -0,0 +1,92 @@
+"""
+Tests for the streaming Hive-partitioned Gold dataset writer (src/transforms/gold_writer.py)
+"""
+import random
+from dataclasses import dataclass
+from typing import Optional
+
+import duckdb
+
+from src.transforms.gold_writer import GoldDatasetWriter, arrow_schema_for, read_dataset_sql, remove_partitions
+
+
+@dataclass
+class Row:
+    match_id: str
+    patch_version: str
+    queue_type: str
+    champion_id: int
+    position: str
+    kda: Optional[float]
+    win: bool
+
+
+POSITIONS = ["TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY"]
+
+
+def rows(patches, per_patch=300, seed=1):
+    rng = random.Random(seed)
+    return [
+        {"match_id": f"NA1_{patch}_{i}", "patch_version": patch, "queue_type": rng.choice(["420", "440"]),
+         "champion_id": rng.randint(1, 50), "position": rng.choice(POSITIONS),
+         "kda": rng.random() * 5 if i % 10 else None, "win": rng.random() < 0.5}
+        for patch in patches for i in range(per_patch)
+    ]
+
+
+def write(dataset_dir, records, overwrite=False):
+    writer = GoldDatasetWriter(dataset_dir, arrow_schema_for(Row), batch_size=64, row_group_size=100,
+                               overwrite=overwrite)
+    for record in records:
+        writer.write(record)
+    return writer.close()
+
+
+def query(dataset_dir, sql):
+    con = duckdb.connect()
+    try:
+        return con.execute(sql.format(dataset=read_dataset_sql(dataset_dir))).fetchall()
+    finally:
+        con.close()
+
+
+def test_partitioned_and_sorted(tmp_path):
+    dataset_dir = tmp_path / "gold" / "fact"
+    records = rows(["15.1.1", "15.2.1"])
+
+    counts = write(dataset_dir, records, overwrite=True)
+
+    assert sum(counts.values()) == len(records)
+    assert set(counts) == {f"patch_version={p}/queue_type={q}" for p in ("15.1.1", "15.2.1") for q in ("420", "440")}
+    assert query(dataset_dir, "SELECT COUNT(*), COUNT(kda) FROM {dataset}") == [
+        (len(records), sum(r["kda"] is not None for r in records))
+    ]
+
+    con = duckdb.connect()
+    part = next(dataset_dir.rglob("part-0.parquet"))
+    ordered = con.execute(f"SELECT champion_id, position FROM read_parquet('{part}')").fetchall()
+    con.close()
+    assert ordered == sorted(ordered)
+    assert not list(tmp_path.joinpath("gold").glob(".*staging*"))
+
+
+def test_incremental_write_replaces_only_touched_partitions(tmp_path):
+    dataset_dir = tmp_path / "gold" / "fact"
+    write(dataset_dir, rows(["15.1.1", "15.2.1"]), overwrite=True)
+
+    rewritten = rows(["15.2.1"], per_patch=50, seed=2)
+    write(dataset_dir, rewritten)
+
+    counts = dict(query(dataset_dir, "SELECT patch_version, COUNT(*) FROM {dataset} GROUP BY 1"))
+    assert counts == {"15.1.1": 300, "15.2.1": 50}
+
+    remove_partitions(dataset_dir, "patch_version", ["15.1.1"])
+    assert query(dataset_dir, "SELECT DISTINCT patch_version FROM {dataset}") == [("15.2.1",)]
+
+
+def test_empty_overwrite_clears_dataset(tmp_path):
+    dataset_dir = tmp_path / "gold" / "fact"
+    write(dataset_dir, rows(["15.1.1"], per_patch=10), overwrite=True)
+
+    assert write(dataset_dir, [], overwrite=True) == {}
+    assert not dataset_dir.exists()
@@ -0,0 +1,66 @@
+"""
+Tests for the cross-process job registry (services/job_registry.py)
+"""
+import time
+
+import pytest
+
+from services.job_registry import JobRegistry
+
+PUUID = "puuid-1"
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return JobRegistry(db_file=tmp_path / "jobs.db", lease_seconds=1)
+
+
+def claim(registry, owner, refresh=False):
+    return registry.claim(PUUID, "na1", "Player", "NA1", 100, owner, refresh=refresh)
+
+
+def test_only_one_owner_claims(registry):
+    won, row = claim(registry, "worker-a")
+    assert won and row["owner"] == "worker-a" and row["status"] == "not_started"
+
+    won, row = claim(registry, "worker-b")
+    assert not won and row["owner"] == "worker-a"
+
+    # The owner may re-claim its own job
+    assert claim(registry, "worker-a")[0]
+
+
+def test_lease_expiry_and_reclaim(registry):
+    assert claim(registry, "worker-a")[0]
+    assert registry.update(PUUID, "worker-a", "fetching_matches", 0.3)
+    assert not registry.get(PUUID)["stale"]
+
+    time.sleep(1.2)
+    assert registry.get(PUUID)["stale"]
+
+    won, row = claim(registry, "worker-b")
+    assert won and row["owner"] == "worker-b"
+
+    # The previous owner learns it lost the job on its next heartbeat
+    assert not registry.update(PUUID, "worker-a", "fetching_matches", 0.5)
+    assert registry.update(PUUID, "worker-b", "fetching_matches", 0.5)
+    assert registry.get(PUUID)["progress"] == 0.5
+
+
+def test_recent_completion_is_reused(registry):
+    assert claim(registry, "worker-a")[0]
+    assert registry.update(PUUID, "worker-a", "completed", 1.0, completed_at=time.time())
+
+    won, row = claim(registry, "worker-b")
+    assert not won and row["status"] == "completed"
+
+    # refresh forces a new fetch
+    assert claim(registry, "worker-b", refresh=True)[0]
+
+
+def test_registry_is_shared_between_instances(tmp_path):
+    a = JobRegistry(db_file=tmp_path / "jobs.db")
+    b = JobRegistry(db_file=tmp_path / "jobs.db")
+    assert a.claim(PUUID, "na1", "Player", "NA1", 100, "worker-a")[0]
+    assert not b.claim(PUUID, "na1", "Player", "NA1", 100, "worker-b")[0]
+    assert b.get(PUUID)["owner"] == "worker-a"
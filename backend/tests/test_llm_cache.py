@@ -0,0 +1,64 @@
+"""
+Tests for the LLM result cache (src/agents/shared/llm_cache.py) and the shared Bedrock client pool
+"""
+from src.agents.shared import bedrock_adapter, llm_cache
+from src.agents.shared.llm_cache import LLMCache, get_llm_cache
+
+
+def result(text):
+    return {"text": text, "usage": {}, "model": "haiku"}
+
+
+def test_memory_lru_evicts_least_recently_used(tmp_path):
+    cache = LLMCache(cache_dir=str(tmp_path), max_memory_items=2, enable_disk_cache=False)
+    cache.set("a", None, "haiku", result("a"))
+    cache.set("b", None, "haiku", result("b"))
+
+    assert cache.get("a", model="haiku")["text"] == "a"  # a is now most recent
+    cache.set("c", None, "haiku", result("c"))
+
+    assert cache.get("b", model="haiku") is None
+    assert cache.get("a", model="haiku")["text"] == "a"
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_disk_cache_is_bounded(tmp_path):
+    cache = LLMCache(cache_dir=str(tmp_path), max_memory_items=1, max_disk_items=2)
+    for prompt in "abc":
+        cache.set(prompt, None, "haiku", result(prompt))
+
+    assert len(list(tmp_path.glob("*.json"))) == 2
+    assert cache.get("a", model="haiku") is None
+    assert cache.get("b", model="haiku")["text"] == "b"
+
+
+def test_reads_entries_written_after_startup(tmp_path):
+    reader = LLMCache(cache_dir=str(tmp_path))
+    writer = LLMCache(cache_dir=str(tmp_path))
+    writer.set("prompt", "system", "haiku", result("shared"))
+
+    assert reader.get("prompt", "system", "haiku")["text"] == "shared"
+    assert reader.get_stats()["disk_reads"] == 1
+    assert len(reader.disk_index) == 1
+
+
+def test_global_cache_is_keyed_on_ttl(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, "_global_caches", {})
+
+    day = get_llm_cache(cache_dir=str(tmp_path), ttl_hours=24)
+    hour = get_llm_cache(cache_dir=str(tmp_path), ttl_hours=1)
+
+    assert get_llm_cache(cache_dir=str(tmp_path), ttl_hours=24) is day
+    assert hour is not day
+    assert hour.ttl_hours == 1
+
+
+def test_bedrock_clients_are_pooled_per_config(monkeypatch):
+    monkeypatch.setattr(bedrock_adapter, "_client_pool", {})
+
+    first = bedrock_adapter.get_bedrock_client("us-west-2")
+    again = bedrock_adapter.get_bedrock_client("us-west-2")
+    short = bedrock_adapter.get_bedrock_client("us-west-2", read_timeout=30)
+
+    assert first is again
+    assert short is not first
@@ -0,0 +1,59 @@
+"""
+Tests for the compressed, sharded match store (services/match_store.py)
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from services.match_store import MatchStore
+
+
+def test_round_trip(tmp_path, sample_matches):
+    store = MatchStore(root_dir=tmp_path / "store", legacy_matches_dir=tmp_path / "none")
+    for match in sample_matches:
+        assert store.put_match(match["metadata"]["matchId"], match)
+
+    # A fresh instance reads everything back from the shard indexes
+    reopened = MatchStore(root_dir=tmp_path / "store", legacy_matches_dir=tmp_path / "none")
+    for match in sample_matches:
+        assert reopened.get_match(match["metadata"]["matchId"]) == match
+    assert reopened.get_match("NA1_0") is None
+
+    ids = [m["metadata"]["matchId"] for m in sample_matches[:5]]
+    assert [m["metadata"]["matchId"] for m in reopened.get_matches(ids + ["NA1_0"])] == ids
+
+
+def test_timelines_are_stored_separately(tmp_path, sample_matches):
+    store = MatchStore(root_dir=tmp_path / "store", legacy_packs_dir=tmp_path / "none")
+    match_id = sample_matches[0]["metadata"]["matchId"]
+    timeline = {"metadata": {"matchId": match_id, "participants": []}, "info": {"frames": []}}
+
+    assert store.put_timeline(match_id, timeline)
+    assert store.get_timeline(match_id) == timeline
+    assert not store.has_match(match_id)
+
+
+def test_duplicate_append_is_skipped(tmp_path, sample_matches):
+    match = sample_matches[0]
+    match_id = match["metadata"]["matchId"]
+    store = MatchStore(root_dir=tmp_path / "store")
+    # Another worker process sharing the same directory
+    other = MatchStore(root_dir=tmp_path / "store")
+
+    assert store.put_match(match_id, match)
+    assert not store.put_match(match_id, match)
+    assert not other.put_match(match_id, match)
+
+    shard = store._shard("matches", match_id)
+    lines = [line for line in shard.index_path.read_text().splitlines() if line.startswith(match_id + "\t")]
+    assert len(lines) == 1
+    assert other.get_match(match_id) == match
+
+
+def test_concurrent_threads(tmp_path, sample_matches):
+    store = MatchStore(root_dir=tmp_path / "store")
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        added = list(executor.map(lambda m: store.put_match(m["metadata"]["matchId"], m), sample_matches * 2))
+        read = list(executor.map(lambda m: store.get_match(m["metadata"]["matchId"]), sample_matches))
+
+    assert sum(added) == len(sample_matches)
+    assert [json.dumps(m, sort_keys=True) for m in read] == [json.dumps(m, sort_keys=True) for m in sample_matches]
@@ -0,0 +1,123 @@
+"""
+Tests for the materialised matchup cube (src/analytics/matchup_cube.py)
+
+Window sums served from the cube's prefix sums must equal the same-role self-join over the
+Gold fact table, and an incremental refresh must only recompute the patches that changed.
+"""
+import random
+from collections import defaultdict
+
+import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from src.analytics.matchup_cube import MatchupCube, MatchupCubeBuilder
+
+PATCHES = ["14.18.1", "14.19.1", "14.20.1", "14.21.1"]
+POSITIONS = ["TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY"]
+
+
+def fact_rows(seed, matches_per_patch=150, patches=PATCHES):
+    rng = random.Random(seed)
+    rows = []
+    for patch_version in patches:
+        for m in range(matches_per_patch):
+            match_id = f"NA1_{patch_version}_{m}"
+            blue_wins = rng.random() < 0.5
+            for team_id in (100, 200):
+                for position in POSITIONS:
+                    champion_id = rng.randint(1, 12)
+                    rows.append({
+                        "match_id": match_id,
+                        "player_key": f"{match_id}_{team_id}_{position}",
+                        "position": position,
+                        "team_id": team_id,
+                        "champion_id": champion_id,
+                        "champion_name": f"Champion{champion_id}",
+                        "win": blue_wins == (team_id == 100),
+                        "patch_version": patch_version,
+                    })
+    return rows
+
+
+def write_fact(path, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(pa.Table.from_pylist(rows), path)
+    return str(path)
+
+
+def self_join(parquet_path):
+    """(role, champion, opponent, patch) → [games, wins] straight from the fact table"""
+    con = duckdb.connect()
+    rows = con.execute(f"""
+        SELECT a.position, a.champion_id, b.champion_id, a.patch_version,
+               COUNT(*), SUM(CASE WHEN a.win THEN 1 ELSE 0 END)
+        FROM read_parquet('{parquet_path}') a
+        JOIN read_parquet('{parquet_path}') b
+            ON a.match_id = b.match_id AND a.position = b.position AND a.team_id != b.team_id
+        GROUP BY ALL
+    """).fetchall()
+    con.close()
+    return rows
+
+
+def window_sums(reference, patches):
+    sums = defaultdict(lambda: [0, 0])
+    for role, champion_id, opponent_id, patch_version, games, wins in reference:
+        if patch_version in patches:
+            sums[(role, champion_id, opponent_id)][0] += games
+            sums[(role, champion_id, opponent_id)][1] += wins
+    return {key: tuple(value) for key, value in sums.items()}
+
+
+@pytest.fixture
+def gold(tmp_path):
+    parquet_path = write_fact(tmp_path / "gold" / "parquet" / "fact_v1.parquet", fact_rows(seed=1))
+    cube_dir = tmp_path / "gold" / "matchup_cube"
+    MatchupCubeBuilder(parquet_path, str(cube_dir)).refresh()
+    return parquet_path, cube_dir
+
+
+def test_window_sums_match_self_join(gold):
+    parquet_path, cube_dir = gold
+    cube = MatchupCube(str(cube_dir))
+    reference = self_join(parquet_path)
+    assert cube.patches == PATCHES
+
+    for i in range(len(PATCHES)):
+        for j in range(i, len(PATCHES)):
+            expected = window_sums(reference, set(PATCHES[i:j + 1]))
+            got = {(r, c, o): (g, w) for r, c, o, g, w in cube.iter_matchups(PATCHES[i], PATCHES[j])}
+            assert got == expected
+
+    # Point lookups, per-champion slices and version-prefix windows ('14.19' covers 14.19.x)
+    expected = window_sums(reference, {"14.19.1", "14.20.1"})
+    for (role, champion_id, opponent_id), (games, wins) in list(expected.items())[:50]:
+        assert cube.matchup(champion_id, opponent_id, role, "14.19", "14.20") == {
+            "games": games, "wins": wins, "winrate": round(wins / games, 3)
+        }
+    role, champion_id, _ = next(iter(expected))
+    assert {o: (v["games"], v["wins"]) for o, v in cube.matchups(champion_id, role, "14.19", "14.20").items()} == {
+        o: value for (r, c, o), value in expected.items() if (r, c) == (role, champion_id)
+    }
+
+
+def test_incremental_refresh_recomputes_changed_patches_only(gold, tmp_path):
+    _, cube_dir = gold
+    # 14.21.1 gets new matches, 14.22.1 appears, 14.18.1 disappears
+    new_rows = fact_rows(seed=2, matches_per_patch=20, patches=["14.21.1", "14.22.1"])
+    for r in new_rows:
+        r["match_id"] += "_new"
+        r["player_key"] += "_new"
+    rows = [r for r in fact_rows(seed=1) if r["patch_version"] != "14.18.1"] + new_rows
+    parquet_path = write_fact(tmp_path / "gold" / "parquet" / "fact_v2.parquet", rows)
+
+    summary = MatchupCubeBuilder(parquet_path, str(cube_dir)).refresh()
+    assert summary["updated"] == ["14.21.1", "14.22.1"]
+    assert summary["removed"] == ["14.18.1"]
+
+    cube = MatchupCube(str(cube_dir))
+    reference = self_join(parquet_path)
+    expected = window_sums(reference, {"14.19.1", "14.20.1", "14.21.1", "14.22.1"})
+    assert {(r, c, o): (g, w) for r, c, o, g, w in cube.iter_matchups()} == expected
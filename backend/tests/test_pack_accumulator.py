@@ -0,0 +1,160 @@
+"""
+Tests for incremental Player-Pack aggregation (services/pack_accumulator.py)
+
+The reference below is the per-(patch, queue, champion, role) aggregation of the former
+full-regeneration _generate_player_pack: every published by_cr field (Wilson CI, winsorized
+KDA, governance tag, ...) must come out of the accumulators unchanged.
+"""
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from src.core.statistical_utils import wilson_confidence_interval, winsorize
+from services.pack_accumulator import PlayerPackAccumulator
+from services.player_data_manager import PlayerDataManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return PlayerDataManager(cache_dir=tmp_path / "player_packs")
+
+
+def reference_by_cr(manager, puuid, matches):
+    """(patch, queue_id) → {(champ_id, role): by_cr entry}, computed from the full match list"""
+    grouped = defaultdict(lambda: defaultdict(list))
+    for match in matches:
+        player = next((p for p in match["info"]["participants"] if p.get("puuid") == puuid), None)
+        if player is None or not player["teamPosition"] or player["teamPosition"] == "Invalid":
+            continue
+        patch = ".".join(match["info"].get("gameVersion", "0.0.0.0").split(".")[:2])
+        queue_id = match["info"].get("queueId", 420)
+        stats = manager._extract_game_stats(player_data=player, match_data=match, timeline_data=None)
+        grouped[(patch, queue_id)][(player["championId"], player["teamPosition"])].append(stats)
+
+    packs = {}
+    for key, cells in grouped.items():
+        packs[key] = {}
+        for (champ_id, role), games_stats in cells.items():
+            games = len(games_stats)
+            wins = sum(1 for g in games_stats if g["win"])
+            _, ci_lower, ci_upper = wilson_confidence_interval(wins, games)
+            kda_winsorized = winsorize([g["kda_adj"] for g in games_stats])
+            item_counts = defaultdict(int)
+            for g in games_stats:
+                for item_id in g["items_at_25"]:
+                    item_counts[item_id] += 1
+            rune_counts = defaultdict(int)
+            for g in games_stats:
+                rune_counts[g["rune_keystone"]] += 1
+            packs[key][(champ_id, role)] = {
+                "champ_id": champ_id,
+                "role": role,
+                "games": games,
+                "wins": wins,
+                "losses": games - wins,
+                "p_hat": round(wins / games, 4),
+                "p_hat_ci": [round(ci_lower, 4), round(ci_upper, 4)],
+                "kda_adj": round(float(np.mean(kda_winsorized)), 2),
+                "obj_rate": round(float(np.mean([g["obj_rate"] for g in games_stats])), 3),
+                "cp_25": round(float(np.mean([g["cp_25"] for g in games_stats])), 1),
+                "build_core": sorted(item_counts, key=lambda x: item_counts[x], reverse=True)[:3],
+                "avg_time_to_core": round(float(np.mean([g["time_to_core"] for g in games_stats])), 2),
+                "rune_keystone": max(rune_counts, key=lambda x: rune_counts[x]),
+                "effective_n": games,
+                "governance_tag": "CONFIDENT" if games >= 100 else "CAUTION" if games >= 30 else "CONTEXT",
+            }
+    return packs
+
+
+def packs_by_cr(packs):
+    return {
+        (pack["patch"], pack["queue_id"]): {(e["champ_id"], e["role"]): e for e in pack["by_cr"]}
+        for pack in packs
+    }
+
+
+def test_fold_matches_full_regeneration(manager, sample_player):
+    puuid, game_name, tag_line, matches = sample_player
+    packs = manager._generate_player_pack(puuid, game_name, tag_line, matches, [])
+
+    assert packs
+    assert packs_by_cr(packs) == reference_by_cr(manager, puuid, matches)
+    for pack in packs:
+        assert pack["total_games"] == sum(e["games"] for e in pack["by_cr"])
+
+
+def test_incremental_fold_matches_one_shot(manager, sample_player, tmp_path):
+    puuid, game_name, tag_line, matches = sample_player
+    player_dir = tmp_path / "player"
+    player_dir.mkdir()
+    now = datetime.now(timezone.utc)
+
+    # Fold in three batches, persisting and reloading the accumulators in between
+    state = PlayerPackAccumulator(puuid)
+    for start in range(0, len(matches), len(matches) // 3 + 1):
+        dirty = manager._fold_matches(state, puuid, game_name, tag_line, matches[start:start + len(matches) // 3 + 1], [])
+        assert dirty
+        state.save(player_dir)
+        state = PlayerPackAccumulator.load(player_dir, puuid)
+
+    # Re-folding known matches is a no-op
+    assert manager._fold_matches(state, puuid, game_name, tag_line, matches, []) == set()
+
+    one_shot = PlayerPackAccumulator(puuid)
+    manager._fold_matches(one_shot, puuid, game_name, tag_line, matches, [])
+
+    strip = lambda pack: {k: v for k, v in pack.items() if k != "generation_timestamp"}
+    assert [strip(p) for p in state.build_all_packs(now)] == [strip(p) for p in one_shot.build_all_packs(now)]
+    assert packs_by_cr(state.build_all_packs(now)) == reference_by_cr(manager, puuid, matches)
+
+
+def test_set_time_to_core_updates_one_pack(manager, sample_player, tmp_path):
+    puuid, game_name, tag_line, matches = sample_player
+    state = PlayerPackAccumulator(puuid)
+    manager._fold_matches(state, puuid, game_name, tag_line, matches, [])
+
+    match_id = next(mid for mid, entry in state.match_index.items() if entry[2] is not None)
+    patch, queue_id, champ_id, role = state.match_index[match_id][:4]
+
+    assert state.set_time_to_core(match_id, 12.0) == (patch, queue_id)
+    assert state.set_time_to_core(match_id, 12.0) is None  # unchanged value
+    assert state.set_time_to_core("NA1_0", 12.0) is None   # unknown match
+    assert match_id in state.timeline_applied
+
+    entry = next(
+        e for e in state.build_pack((patch, queue_id), datetime.now(timezone.utc))["by_cr"]
+        if (e["champ_id"], e["role"]) == (champ_id, role)
+    )
+    expected = (12.0 + 30.0 * (entry["games"] - 1)) / entry["games"]
+    assert entry["avg_time_to_core"] == round(expected, 2)
+
+    # timeline_applied survives a save/load round trip
+    state.save(tmp_path)
+    assert match_id in PlayerPackAccumulator.load(tmp_path, puuid).timeline_applied
+
+
+def test_newest_first_orders_by_game_creation(manager, sample_player):
+    puuid, game_name, tag_line, matches = sample_player
+    state = PlayerPackAccumulator(puuid)
+    manager._fold_matches(state, puuid, game_name, tag_line, matches, [])
+
+    expected = [m["metadata"]["matchId"] for m in sorted(matches, key=lambda m: m["info"]["gameCreation"], reverse=True)]
+    assert state.newest_first([m["metadata"]["matchId"] for m in matches] + ["NA1_0"]) == expected + ["NA1_0"]
+
+
+def test_concurrent_saves_leave_a_valid_state(manager, sample_player, tmp_path):
+    puuid, game_name, tag_line, matches = sample_player
+    state = PlayerPackAccumulator(puuid)
+    manager._fold_matches(state, puuid, game_name, tag_line, matches, [])
+
+    threads = [threading.Thread(target=state.save, args=(tmp_path,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert PlayerPackAccumulator.load(tmp_path, puuid).match_index == state.match_index
+    assert not list(tmp_path.glob(".*.tmp"))
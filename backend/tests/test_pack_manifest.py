@@ -0,0 +1,77 @@
+"""
+Tests for the per-player pack manifest (src/agents/shared/pack_manifest.py)
+
+packs_manifest.json is trusted while it is not older than the player directory, so every
+pack write must move the directory mtime (temp file + rename).
+"""
+import json
+import os
+import time
+
+import pytest
+
+from services.pack_accumulator import PlayerPackAccumulator
+from services.player_data_manager import PlayerDataManager
+from src.agents.shared.pack_cache import PackCache
+from src.agents.shared.pack_manifest import MANIFEST_FILENAME, trusted_manifest_stamp
+
+
+@pytest.fixture
+def player_dir(tmp_path, sample_player):
+    puuid, game_name, tag_line, matches = sample_player
+    manager = PlayerDataManager(cache_dir=tmp_path)
+    state = PlayerPackAccumulator(puuid)
+    dirty = manager._fold_matches(state, puuid, game_name, tag_line, matches, [])
+    directory = tmp_path / puuid
+    directory.mkdir()
+    manager._write_player_packs(directory, state, dirty)
+    return directory
+
+
+def rewrite_pack(pack_file, **changes):
+    """Rewrite a pack the way _write_player_packs does, without refreshing the manifest"""
+    with open(pack_file, 'r', encoding='utf-8') as f:
+        pack = json.load(f)
+    pack.update(changes)
+    tmp_file = pack_file.with_name(f".{pack_file.name}.tmp")
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(pack, f)
+    tmp_file.replace(pack_file)
+
+
+def test_manifest_trusted_after_write(player_dir):
+    assert (player_dir / MANIFEST_FILENAME).exists()
+    assert trusted_manifest_stamp(player_dir) is not None
+    assert not list(player_dir.glob(".*.tmp"))
+
+
+def test_rewrite_without_manifest_refresh_is_detected(player_dir):
+    cache = PackCache()
+    before = cache.content_version(player_dir)
+    pack_file = sorted(player_dir.glob("pack_*.json"))[0]
+
+    # A crash between the pack write and the manifest refresh
+    time.sleep(0.01)
+    rewrite_pack(pack_file, total_games=999)
+
+    assert trusted_manifest_stamp(player_dir) is None
+    assert cache.content_version(player_dir) != before
+    assert any(pack.data["total_games"] == 999 for pack in cache.load_packs(player_dir))
+    # The rescan rewrote the manifest, so it is trusted again
+    assert trusted_manifest_stamp(player_dir) is not None
+
+
+def test_unrelated_rename_retrusts_manifest(player_dir):
+    cache = PackCache()
+    time.sleep(0.01)
+    other = player_dir / "summary.json"
+    tmp_file = player_dir / ".summary.json.tmp"
+    tmp_file.write_text("{}")
+    tmp_file.replace(other)
+    assert trusted_manifest_stamp(player_dir) is None
+
+    manifest_mtime = os.stat(player_dir / MANIFEST_FILENAME).st_mtime_ns
+    cache.load_packs(player_dir)
+    # Packs unchanged: the manifest is touched, not rewritten, and trusted again
+    assert trusted_manifest_stamp(player_dir) is not None
+    assert os.stat(player_dir / MANIFEST_FILENAME).st_mtime_ns > manifest_mtime
@@ -0,0 +1,73 @@
+"""
+Tests for the pre-aggregated player summaries (services/player_summary.py) and their ETag / 304 responses
+"""
+import json
+
+import pytest
+from starlette.requests import Request
+
+from services.pack_accumulator import PlayerPackAccumulator
+from services.player_data_manager import PlayerDataManager
+from services.player_summary import SUMMARY_QUEUE_IDS, SUMMARY_TIME_RANGES, summary_filename
+from src.agents.shared.pack_cache import pack_cache
+
+
+@pytest.fixture
+def player(tmp_path, sample_player):
+    puuid, game_name, tag_line, matches = sample_player
+    manager = PlayerDataManager(cache_dir=tmp_path)
+    state = PlayerPackAccumulator(puuid)
+    dirty = manager._fold_matches(state, puuid, game_name, tag_line, matches, [])
+    player_dir = tmp_path / puuid
+    player_dir.mkdir()
+    manager._write_player_packs(player_dir, state, dirty)
+    manager._materialise_player_summaries(player_dir)
+    return manager, puuid, player_dir
+
+
+def request(path, if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": path, "headers": headers, "query_string": b""})
+
+
+def test_summaries_are_materialised_at_write(player, sample_matches):
+    manager, puuid, player_dir = player
+    for time_range in SUMMARY_TIME_RANGES:
+        for queue_id in SUMMARY_QUEUE_IDS:
+            assert (player_dir / summary_filename(time_range, queue_id)).exists()
+
+    summary = manager.get_player_summary(puuid)
+    assert summary["data_version"] == pack_cache.data_version(player_dir)
+    assert summary["total_games"] == sum(role["games"] for role in summary["role_stats"])
+    assert manager.get_player_summary("unknown-puuid") is None
+
+
+def test_stale_summary_is_rebuilt(player):
+    manager, puuid, player_dir = player
+    summary_file = player_dir / summary_filename()
+    stale = json.loads(summary_file.read_text())
+    stale["data_version"] = "outdated"
+    stale["champions"] = []
+    summary_file.write_text(json.dumps(stale))
+
+    summary = manager.get_player_summary(puuid)
+
+    assert summary["data_version"] == pack_cache.data_version(player_dir)
+    assert summary["champions"]
+    assert json.loads(summary_file.read_text())["data_version"] == summary["data_version"]
+
+
+def test_summary_response_etag_and_304(player):
+    from api.server import summary_response
+
+    manager, puuid, _ = player
+    summary = manager.get_player_summary(puuid)
+    path = "/api/player/a/b/champions"
+
+    first = summary_response(request(path), summary, {"champions": summary["champions"][:5]}, 5)
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+
+    assert summary_response(request(path, etag), summary, {}, 5).status_code == 304
+    assert summary_response(request(path, f'"other", {etag}'), summary, {}, 5).status_code == 304
+    assert summary_response(request(path, etag), summary, {}, 10).status_code == 200
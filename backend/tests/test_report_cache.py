@@ -0,0 +1,102 @@
+"""
+Tests for the report cache and single-flight report generation (services/report_cache.py)
+"""
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+from services import report_cache as report_cache_module
+from services.report_cache import ReportCache, cached_agent_stream
+
+PUUID = "puuid-1"
+
+
+def chunk(text):
+    return f'data: {{"type": "chunk", "content": {json.dumps(text)}}}\n\n'
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ReportCache(cache_dir=tmp_path / "report_cache", memory_entries=2)
+    cache.version = "v1"
+    monkeypatch.setattr(cache, "_get_data_version", lambda packs_dir: cache.version)
+    monkeypatch.setattr(report_cache_module, "report_cache", cache)
+    return cache
+
+
+def test_report_is_invalidated_by_new_data(cache):
+    cache.set(PUUID, "weakness-analysis", Path("packs"), "report", time_range="past-365")
+
+    assert cache.get(PUUID, "weakness-analysis", Path("packs"), time_range="past-365")["report_content"] == "report"
+    assert cache.get(PUUID, "weakness-analysis", Path("packs"), time_range="past-60") is None
+
+    cache.version = "v2"
+    assert cache.get(PUUID, "weakness-analysis", Path("packs"), time_range="past-365") is None
+
+
+def test_disk_tier_survives_memory_eviction(cache):
+    for agent_id in ("a", "b", "c"):
+        cache.set(PUUID, agent_id, Path("packs"), f"report {agent_id}")
+
+    assert len(cache._memory) == 2
+    assert cache.get(PUUID, "a", Path("packs"))["report_content"] == "report a"
+
+
+def test_concurrent_requests_share_one_generation(cache, monkeypatch):
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+    attached = threading.Event()
+    subscribe = report_cache_module._Flight.subscribe
+
+    def attach(flight):
+        attached.set()
+        return subscribe(flight)
+
+    monkeypatch.setattr(report_cache_module._Flight, "subscribe", attach)
+
+    def run_stream():
+        calls.append(1)
+        started.set()
+        yield chunk("hello ")
+        release.wait(5)
+        yield chunk("world")
+        yield 'data: {"type": "complete"}\n\n'
+
+    results = {}
+
+    def consume(name):
+        results[name] = list(cached_agent_stream("annual-summary", run_stream, PUUID, Path("packs"), time_range="2024"))
+
+    leader = threading.Thread(target=consume, args=("leader",))
+    leader.start()
+    assert started.wait(5)
+    follower = threading.Thread(target=consume, args=("follower",))
+    follower.start()
+    assert attached.wait(5)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert len(calls) == 1
+    assert results["leader"] == results["follower"]
+    assert len(results["leader"]) == 3
+
+    # The finished generation was cached: the next request is served without the agent
+    cached = list(cached_agent_stream("annual-summary", run_stream, PUUID, Path("packs"), time_range="2024"))
+    assert len(calls) == 1
+    assert json.loads(cached[0].split("data: ")[1])["content"] == "hello world"
+
+
+def test_leader_disconnect_still_completes_generation(cache):
+    def run_stream():
+        yield chunk("part one ")
+        yield chunk("part two")
+
+    stream = cached_agent_stream("risk-forecaster", run_stream, PUUID, Path("packs"))
+    next(stream)
+    stream.close()
+
+    assert cache.get(PUUID, "risk-forecaster", Path("packs"))["report_content"] == "part one part two"
@@ -0,0 +1,109 @@
+"""
+Tests for incremental Silver builds (src/transforms/bronze_manifest.py + bronze_to_silver_scd2.py)
+
+An incremental run over new, changed and deleted Bronze files must produce the same
+dimension partitions as a full rebuild of the final Bronze layer.
+"""
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from src.transforms.bronze_to_silver_scd2 import BronzeToSilverSCD2Transformer
+
+PATCH_MAPPINGS = Path(__file__).resolve().parents[2] / "data" / "patch_mappings.json"
+
+# Spread the sample matches over several patches so players get multiple SCD2 versions
+GAME_DATES = [datetime(2024, 8, 1, tzinfo=timezone.utc), datetime(2024, 12, 1, tzinfo=timezone.utc),
+              datetime(2025, 3, 1, tzinfo=timezone.utc)]
+
+# Volatile fields (wall-clock timestamps)
+VOLATILE = {"last_updated"}
+
+
+def write_bronze(bronze_dir, match_file, index):
+    with open(match_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    date = GAME_DATES[index % len(GAME_DATES)]
+    data["raw_data"]["info"]["gameCreation"] = int(date.timestamp() * 1000) + index * 60_000
+    target = bronze_dir / "challenger" / match_file.name
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with open(target, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    return target
+
+
+def run(bronze_dir, silver_dir, incremental):
+    transformer = BronzeToSilverSCD2Transformer(
+        bronze_dir=str(bronze_dir),
+        silver_dir=str(silver_dir),
+        patch_mappings_file=str(PATCH_MAPPINGS),
+        incremental=incremental
+    )
+    transformer.extract_bronze_data(workers=1)
+    transformer.aggregate_player_stats()
+    transformer.apply_scd2_logic()
+    transformer.save_silver_layer()
+
+
+def dimension_partitions(silver_dir):
+    partitions = {}
+    for patch_file in sorted((silver_dir / "dim_versioned_player_stats").glob("patch_*.json")):
+        with open(patch_file, "r", encoding="utf-8") as f:
+            records = json.load(f)["records"]
+        partitions[patch_file.name] = sorted(
+            ({k: v for k, v in r.items() if k not in VOLATILE} for r in records),
+            key=lambda r: r["stats_sk"]
+        )
+    return partitions
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # PlayerAnonymizer keeps its salt under ./data: share one salt between both builds
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_incremental_build_matches_full_rebuild(workdir, sample_match_files):
+    bronze_dir = workdir / "bronze"
+    files = sample_match_files[:60]
+    written = [write_bronze(bronze_dir, f, i) for i, f in enumerate(files[:45])]
+    run(bronze_dir, workdir / "silver_incremental", incremental=False)
+
+    # New files, one changed file and one deleted file
+    for i, f in enumerate(files[45:], start=45):
+        write_bronze(bronze_dir, f, i)
+    write_bronze(bronze_dir, files[3], 4)   # gameCreation moves to another patch
+    written[7].unlink()
+    run(bronze_dir, workdir / "silver_incremental", incremental=True)
+
+    run(bronze_dir, workdir / "silver_full", incremental=False)
+
+    incremental = dimension_partitions(workdir / "silver_incremental")
+    full = dimension_partitions(workdir / "silver_full")
+    assert len(full) == len(GAME_DATES)
+    assert incremental == full
+
+
+def test_unchanged_bronze_is_skipped(workdir, sample_match_files):
+    bronze_dir = workdir / "bronze"
+    for i, f in enumerate(sample_match_files[:20]):
+        write_bronze(bronze_dir, f, i)
+    run(bronze_dir, workdir / "silver", incremental=False)
+    before = dimension_partitions(workdir / "silver")
+
+    transformer = BronzeToSilverSCD2Transformer(
+        bronze_dir=str(bronze_dir), silver_dir=str(workdir / "silver"),
+        patch_mappings_file=str(PATCH_MAPPINGS), incremental=True
+    )
+    transformer.extract_bronze_data(workers=1)
+    assert transformer._bronze_plan.incremental
+    assert not transformer._bronze_plan.pending
+    assert transformer._bronze_plan.unchanged_files == 20
+
+    transformer.aggregate_player_stats()
+    transformer.apply_scd2_logic()
+    transformer.save_silver_layer()
+    assert dimension_partitions(workdir / "silver") == before
@@ -0,0 +1,79 @@
+"""
+Tests for precomputed static-data responses (services/static_response_cache.py)
+"""
+import gzip
+import json
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from services.static_response_cache import StaticResponseCache
+
+CACHE_CONTROL = "public, max-age=3600"
+ITEMS = {"items": [{"id": i, "name": f"Item {i}"} for i in range(100)]}
+
+
+def request(**headers):
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/api/static/items", "headers": raw, "query_string": b""})
+
+
+def test_built_once_per_version():
+    cache = StaticResponseCache()
+    builds = []
+
+    def build():
+        builds.append(1)
+        return ITEMS
+
+    first = cache.get("static:items", "14.20.1", build)
+    assert cache.lookup("static:items", "14.20.1") is first
+    assert cache.get("static:items", "14.20.1", build) is first
+    assert len(builds) == 1
+
+    assert cache.lookup("static:items", "14.21.1") is None
+    cache.get("static:items", "14.21.1", build)
+    assert len(builds) == 2
+
+
+def test_encodings_and_304():
+    entry = StaticResponseCache().get("static:items", "14.20.1", lambda: ITEMS)
+
+    plain = entry.respond(request(), CACHE_CONTROL)
+    assert json.loads(plain.body) == ITEMS
+    assert plain.headers["cache-control"] == CACHE_CONTROL
+
+    gzipped = entry.respond(request(accept_encoding="gzip, deflate"), CACHE_CONTROL)
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert json.loads(gzip.decompress(gzipped.body)) == ITEMS
+
+    assert entry.respond(request(if_none_match=entry.etag), CACHE_CONTROL).status_code == 304
+    assert entry.respond(request(if_none_match=f"W/{entry.etag}"), CACHE_CONTROL).status_code == 304
+    assert entry.respond(request(if_none_match='"stale"'), CACHE_CONTROL).status_code == 200
+
+
+def test_small_bodies_are_not_compressed():
+    entry = StaticResponseCache().get("static:patches", "v1", lambda: ["14.20.1"])
+
+    response = entry.respond(request(accept_encoding="gzip"), CACHE_CONTROL)
+
+    assert "content-encoding" not in response.headers
+    assert entry.gzip_body is None
+
+
+def test_failed_build_is_not_cached_and_lru_is_bounded():
+    cache = StaticResponseCache(max_entries=2)
+
+    def missing():
+        raise HTTPException(status_code=404, detail="Champion not found")
+
+    with pytest.raises(HTTPException):
+        cache.get("static:champion:nobody", "v1", missing)
+    assert cache._build_locks == {}
+    assert cache.get_stats()["entries"] == 0
+
+    for key in ("a", "b", "c"):
+        cache.get(key, "v1", lambda: {"key": key})
+    assert cache.lookup("a", "v1") is None
+    assert cache.get_stats()["entries"] == 2
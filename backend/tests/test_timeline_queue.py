@@ -0,0 +1,130 @@
+"""
+Tests for the SQLite-backed timeline work queue (services/timeline_queue.py)
+and the time_to_core flushes fed by it
+"""
+import asyncio
+import multiprocessing
+import time
+
+import pytest
+
+from services.job_registry import JobRegistry
+from services.pack_accumulator import PlayerPackAccumulator
+from services.player_data_manager import PlayerDataManager
+from services.timeline_queue import TimelineQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return TimelineQueue(db_file=tmp_path / "jobs.db", lease_seconds=1)
+
+
+def test_newest_first_and_no_duplicates(queue):
+    assert queue.push_many([("a", "NA1_1", "na1", 100), ("a", "NA1_2", "na1", 300), ("a", "NA1_3", "na1", None)]) == 3
+    assert queue.push_many([("a", "NA1_1", "na1", 100)]) == 0
+
+    # NA1_3 has no gameCreation: priority falls back to the match ID number
+    assert [queue.pop("w")["match_id"] for _ in range(3)] == ["NA1_2", "NA1_1", "NA1_3"]
+    assert queue.pop("w") is None
+
+
+def test_player_affinity_and_lease_expiry(queue):
+    queue.push_many([("a", "NA1_1", "na1", 1), ("a", "NA1_2", "na1", 2), ("b", "NA1_3", "na1", 0)])
+
+    assert queue.pop("w1")["match_id"] == "NA1_2"
+    # Player a has live claims held by w1
+    assert queue.pop("w2")["puuid"] == "b"
+    assert queue.pop("w2") is None
+    assert queue.pop("w1")["match_id"] == "NA1_1"
+
+    time.sleep(1.2)
+    task = queue.pop("w2")
+    assert task["puuid"] == "a"
+
+
+def test_ack_retry_and_renew(queue):
+    queue.push("a", "NA1_1", "na1", 1)
+    task = queue.pop("w1")
+
+    queue.renew([task["key"]], "w1")
+    assert queue.get_stats()["in_progress"] == 1
+
+    assert queue.retry(task["key"])            # attempt 1 → requeued
+    assert queue.pop("w1")["key"] == task["key"]
+    assert queue.retry(task["key"])            # attempt 2 → requeued
+    assert not queue.retry(task["key"])        # attempt 3 → dropped
+    assert queue.outstanding("a") == 0
+
+    queue.push("a", "NA1_2", "na1", 1)
+    queue.ack([queue.pop("w1")["key"]])
+    assert queue.outstanding("a") == 0
+
+
+def _drain(db_file, owner, results):
+    queue = TimelineQueue(db_file=db_file)
+    claimed = []
+    while True:
+        task = queue.pop(owner)
+        if task is None:
+            break
+        claimed.append(task["key"])
+        queue.ack([task["key"]])
+    results.put(claimed)
+
+
+def test_workers_never_claim_the_same_task(tmp_path):
+    db_file = tmp_path / "jobs.db"
+    TimelineQueue(db_file=db_file).push_many(
+        [(f"player-{i % 20}", f"NA1_{i}", "na1", i) for i in range(400)]
+    )
+
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_drain, args=(db_file, f"w{i}", results)) for i in range(4)]
+    for worker in workers:
+        worker.start()
+    claimed = [key for _ in workers for key in results.get(timeout=60)]
+    for worker in workers:
+        worker.join()
+
+    assert len(claimed) == len(set(claimed)) == 400
+
+
+def test_concurrent_flushes_for_one_player_keep_both_batches(tmp_path, sample_player, monkeypatch):
+    puuid, game_name, tag_line, matches = sample_player
+    manager = PlayerDataManager(cache_dir=tmp_path / "packs")
+    manager.timeline_queue = TimelineQueue(db_file=tmp_path / "jobs.db")
+    manager.job_registry = JobRegistry(db_file=tmp_path / "registry.db")
+
+    state = PlayerPackAccumulator(puuid)
+    dirty = manager._fold_matches(state, puuid, game_name, tag_line, matches, [])
+    player_dir = tmp_path / "packs" / puuid
+    player_dir.mkdir(parents=True)
+    manager._write_player_packs(player_dir, state, dirty)
+
+    match_ids = list(state.match_index)[:6]
+    manager.timeline_queue.push_many([(puuid, match_id, "na1", i) for i, match_id in enumerate(match_ids)])
+    for _ in match_ids:
+        manager.timeline_queue.pop("w")
+
+    # Widen the load → save window so overlapping flushes would overwrite each other
+    load = PlayerPackAccumulator.load
+
+    def slow_load(*args):
+        loaded = load(*args)
+        time.sleep(0.2)
+        return loaded
+
+    monkeypatch.setattr(PlayerPackAccumulator, "load", staticmethod(slow_load))
+
+    async def main():
+        manager._pending_time_to_core[puuid] = {match_id: 111.0 for match_id in match_ids[:3]}
+        first = asyncio.create_task(manager._flush_time_to_core(puuid))
+        await asyncio.sleep(0.05)
+        manager._pending_time_to_core[puuid] = {match_id: 222.0 for match_id in match_ids[3:]}
+        await asyncio.gather(first, manager._flush_time_to_core(puuid))
+
+    asyncio.run(main())
+
+    saved = load(player_dir, puuid)
+    assert saved.timeline_applied == set(match_ids)
+    assert manager.timeline_queue.outstanding(puuid) == 0
@@ -0,0 +1,110 @@
+"""
+Tests for event-driven data-preparation progress (PlayerDataManager.watch_job / wait_for_data)
+and the SSE data-progress endpoint
+"""
+import asyncio
+import json
+import time
+
+import pytest
+
+from services.job_registry import JobRegistry
+from services.player_data_manager import DataStatus, PlayerDataJob, PlayerDataManager
+
+PUUID = "puuid-1"
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = PlayerDataManager(cache_dir=tmp_path / "packs")
+    manager.job_registry = JobRegistry(db_file=tmp_path / "jobs.db")
+    return manager
+
+
+def start_job(manager):
+    job = PlayerDataJob(PUUID, "na1", "Player", "NA1")
+    job.status = DataStatus.FETCHING_MATCHES
+    manager.jobs[PUUID] = job
+    return job
+
+
+async def run_job(job, fail=False):
+    for progress in (0.3, 0.6):
+        await asyncio.sleep(0.01)
+        job.progress = progress
+    await asyncio.sleep(0.01)
+    if fail:
+        job.error = "Riot API unavailable"
+        job.status = DataStatus.FAILED
+    else:
+        job.player_pack = {"puuid": PUUID}
+        job.status = DataStatus.COMPLETED
+
+
+def test_watch_job_yields_every_change_until_done(manager):
+    async def main():
+        job = start_job(manager)
+        runner = asyncio.create_task(run_job(job))
+        states = [state async for state in manager.watch_job(PUUID, timeout=5)]
+        await runner
+        return states
+
+    states = asyncio.run(main())
+
+    assert [s["progress"] for s in states[:3]] == [0.0, 0.3, 0.6]
+    assert states[-1]["status"] == DataStatus.COMPLETED
+    assert states[-1]["has_data"]
+
+
+def test_watch_job_without_job_reports_not_started(manager):
+    async def main():
+        return [state async for state in manager.watch_job(PUUID)]
+
+    assert asyncio.run(main()) == [{"status": DataStatus.NOT_STARTED}]
+
+
+def test_wait_for_data_wakes_on_completion(manager):
+    async def main():
+        job = start_job(manager)
+        runner = asyncio.create_task(run_job(job))
+        started = time.monotonic()
+        data = await manager.wait_for_data(PUUID, timeout=5)
+        await runner
+        return data, time.monotonic() - started
+
+    data, elapsed = asyncio.run(main())
+
+    assert data == {"puuid": PUUID}
+    assert elapsed < 0.5
+
+
+def test_wait_for_data_returns_none_on_failure_and_timeout(manager):
+    async def main():
+        job = start_job(manager)
+        assert await manager.wait_for_data(PUUID, timeout=0.05) is None
+        runner = asyncio.create_task(run_job(job, fail=True))
+        data = await manager.wait_for_data(PUUID, timeout=5)
+        await runner
+        return data
+
+    assert asyncio.run(main()) is None
+
+
+def test_data_progress_stream(manager, monkeypatch):
+    from api import server
+
+    monkeypatch.setattr(server, "player_data_manager", manager)
+
+    async def main():
+        job = start_job(manager)
+        runner = asyncio.create_task(run_job(job, fail=True))
+        response = await server.stream_player_data_progress(PUUID, timeout=5)
+        events = [json.loads(chunk.split("data: ", 1)[1]) async for chunk in response.body_iterator]
+        await runner
+        return events
+
+    events = asyncio.run(main())
+
+    assert {e["type"] for e in events[:-1]} == {"progress"}
+    assert events[-1]["type"] == "failed"
+    assert events[-1]["error"] == "Riot API unavailable"